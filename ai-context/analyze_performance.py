@@ -14,18 +14,52 @@ Features:
 - Estadísticas de éxito/fallo
 - Análisis de formato de logs
 - Generación de reportes en JSON y texto
+
+Lectura de logs:
+- Una sola pasada en streaming por archivo (formato, componentes y sesiones)
+- Los eventos de inicio/fin de cada [servicio][core][componente] se emparejan
+  para obtener duraciones reales
+- Archivos en paralelo con un pool de procesos
+- Índice incremental de offsets: las ejecuciones siguientes solo leen los
+  bytes nuevos de cada archivo (se reinicia si el archivo rotó)
 """
 
 import os
 import re
 import json
+import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 import statistics
 
+PROFESSIONAL_PATTERN = r'\[\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}\]\[[\w]+\]\[[\w]+\]\[[\w]+\]\[[\w]+\] - .*'
+LEGACY_PATTERNS = [
+    r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d+ - [\w\.]+ - [\w]+ - .*',
+    r'\[[\w-]+\] [\w]+: .*'
+]
+
+# [timestamp][servicio][core][componente][nivel] - mensaje
+LINE_PATTERN = re.compile(
+    r'^\[(\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2})\]\[([\w]+)\]\[([\w]+)\]\[([\w]+)\]\[([\w]+)\] - (.*)$')
+TIMESTAMP_FORMAT = '%Y-%m-%d_%H:%M:%S'
+START_PATTERN = re.compile(r'\b(INICIANDO|Iniciando|INICIO|SESSION_START)\b')
+END_PATTERN = re.compile(r'\b(COMPLETAD[OA]|Completad[oa]|FINALIZAD[OA]|Finalizad[oa]|EXITOSO|'
+                         r'TERMINAD[OA]|SESSION_END|SUCCESS|FAILED)\b')
+SESSION_PATTERN = re.compile(r'INICIANDO EXTRACCIÓN DE (AFINIA|AIRE)')
+DURATION_PATTERN = re.compile(r'DURACION.*?(\d+\.?\d*)\s+segundos')
+FILES_PATTERN = re.compile(r'ARCHIVOS.*?(\d+)')
+PQR_PATTERN = re.compile(r'PQRs procesados.*?(\d+)')
+TIMESTAMP_PATTERN = re.compile(r'\[(\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2})\]')
+
+MAX_OPEN_EVENTS = 50      # Inicios sin cierre que se recuerdan por componente
+FINGERPRINT_BYTES = 256   # Bytes iniciales que identifican un archivo (detecta rotación)
+INDEX_VERSION = 1
+
+
 @dataclass
 class ComponentMetrics:
     """Métricas de un componente específico"""
@@ -38,6 +72,22 @@ class ComponentMetrics:
     min_time: float = float('inf')
     max_time: float = 0.0
     bottleneck_score: float = 0.0
+    timed_executions: int = 0
+
+    def add_duration(self, seconds: float):
+        self.timed_executions += 1
+        self.total_time += seconds
+        self.min_time = min(self.min_time, seconds)
+        self.max_time = max(self.max_time, seconds)
+
+    def merge(self, other: 'ComponentMetrics'):
+        self.total_executions += other.total_executions
+        self.success_count += other.success_count
+        self.failed_count += other.failed_count
+        self.total_time += other.total_time
+        self.timed_executions += other.timed_executions
+        self.min_time = min(self.min_time, other.min_time)
+        self.max_time = max(self.max_time, other.max_time)
 
 @dataclass
 class ExtrationSession:
@@ -55,12 +105,187 @@ class ExtrationSession:
         if self.errors is None:
             self.errors = []
 
+
+@dataclass
+class LogFileState:
+    """Resultado acumulado de un archivo de log hasta `offset` (se guarda en el índice)"""
+    path: str
+    offset: int = 0
+    fingerprint: str = ""
+    fingerprint_len: int = 0
+    total_lines: int = 0
+    professional_format_count: int = 0
+    legacy_format_count: int = 0
+    samples: Dict[str, List[str]] = field(default_factory=lambda: {'professional': [], 'legacy': []})
+    components: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    open_events: Dict[str, List[str]] = field(default_factory=dict)
+    sessions: List[Dict[str, Any]] = field(default_factory=list)
+    current_session: Optional[Dict[str, Any]] = None
+    bytes_read: int = 0
+
+
+def _fingerprint(path: Path, length: int) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def scan_log_file(state: LogFileState) -> LogFileState:
+    """
+    Leer un archivo desde state.offset en una sola pasada
+
+    Solo consume líneas completas: una línea a medio escribir se relee en la
+    siguiente ejecución. Se ejecuta en los procesos del pool.
+    """
+    path = Path(state.path)
+    size = path.stat().st_size
+
+    # Archivo rotado o truncado: empezar de nuevo
+    if state.offset and (size < state.offset or
+                         _fingerprint(path, state.fingerprint_len) != state.fingerprint):
+        state = LogFileState(path=state.path)
+    if not state.fingerprint_len or state.fingerprint_len < FINGERPRINT_BYTES:
+        state.fingerprint_len = min(size, FINGERPRINT_BYTES)
+        state.fingerprint = _fingerprint(path, state.fingerprint_len)
+
+    professional_pattern = re.compile(PROFESSIONAL_PATTERN)
+    legacy_patterns = [re.compile(pattern) for pattern in LEGACY_PATTERNS]
+    components = {name: ComponentMetrics(**data) for name, data in state.components.items()}
+    session = ExtrationSession(**state.current_session) if state.current_session else None
+    state.bytes_read = 0
+
+    with open(path, 'rb') as f:
+        f.seek(state.offset)
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            state.offset += len(raw)
+            state.bytes_read += len(raw)
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            state.total_lines += 1
+
+            # Formato
+            if professional_pattern.match(line):
+                state.professional_format_count += 1
+                if len(state.samples['professional']) < 3:
+                    state.samples['professional'].append(line)
+            else:
+                for legacy_pattern in legacy_patterns:
+                    if legacy_pattern.match(line):
+                        state.legacy_format_count += 1
+                        if len(state.samples['legacy']) < 3:
+                            state.samples['legacy'].append(line)
+                        break
+                else:
+                    if len(state.samples['legacy']) < 5:
+                        state.samples['legacy'].append(f"UNKNOWN: {line}")
+
+            # Componentes: conteos y emparejamiento inicio/fin
+            match = LINE_PATTERN.match(line)
+            if match:
+                timestamp, service, core, component, level, message = match.groups()
+                comp_name = f"{core}.{component}"
+                comp = components.get(comp_name)
+                if comp is None:
+                    comp = components[comp_name] = ComponentMetrics(name=comp_name)
+                comp.total_executions += 1
+
+                failed = level in ('ERROR', 'CRITICAL') or 'FAILED' in message
+                if 'EXITOSO' in line or 'SUCCESS' in line:
+                    comp.success_count += 1
+                elif 'ERROR' in line or 'FAILED' in line:
+                    comp.failed_count += 1
+
+                event_key = f"{service}.{comp_name}"
+                if START_PATTERN.search(message):
+                    stack = state.open_events.setdefault(event_key, [])
+                    stack.append(timestamp)
+                    del stack[:-MAX_OPEN_EVENTS]
+                elif END_PATTERN.search(message) or failed:
+                    stack = state.open_events.get(event_key)
+                    if stack:
+                        started = _parse_timestamp(stack.pop())
+                        ended = _parse_timestamp(timestamp)
+                        if started and ended and ended >= started:
+                            comp.add_duration((ended - started).total_seconds())
+
+            # Sesiones de extracción
+            if SESSION_PATTERN.search(line):
+                if session:
+                    state.sessions.append(asdict(session))
+                session = ExtrationSession(start_time="", end_time="", duration=0.0, success=False)
+                timestamp_match = TIMESTAMP_PATTERN.search(line)
+                if timestamp_match:
+                    session.start_time = timestamp_match.group(1)
+
+            if session:
+                duration_match = DURATION_PATTERN.search(line)
+                if duration_match:
+                    session.duration = float(duration_match.group(1))
+                if 'ARCHIVOS' in line:
+                    files_match = FILES_PATTERN.search(line)
+                    if files_match:
+                        session.files_downloaded = int(files_match.group(1))
+                pqr_match = PQR_PATTERN.search(line)
+                if pqr_match:
+                    session.pqrs_processed = int(pqr_match.group(1))
+                if 'EXTRACCIÓN COMPLETADA EXITOSAMENTE' in line:
+                    session.success = True
+                    timestamp_match = TIMESTAMP_PATTERN.search(line)
+                    if timestamp_match:
+                        session.end_time = timestamp_match.group(1)
+                if 'ERROR' in line and 'Error' in line:
+                    session.errors.append(line)
+
+    state.components = {name: asdict(comp) for name, comp in components.items()}
+    state.current_session = asdict(session) if session else None
+    return state
+
+
+class LogIndex:
+    """Índice incremental: estado acumulado y offset por archivo de log"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, LogFileState] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+                if data.get('version') == INDEX_VERSION:
+                    self.files = {name: LogFileState(**state) for name, state in data['files'].items()}
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"  [ADVERTENCIA] Índice inválido, se reconstruye: {e}")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({
+            'version': INDEX_VERSION,
+            'updated_at': datetime.now().isoformat(),
+            'files': {name: asdict(state) for name, state in self.files.items()}
+        }, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+
 class PerformanceAnalyzer:
     """Analizador de rendimiento del sistema"""
 
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", index_file: Optional[str] = None,
+                 workers: Optional[int] = None, incremental: bool = True):
         self.data_dir = Path(data_dir)
         self.logs_dir = self.data_dir / "logs"
+        self.index_path = Path(index_file) if index_file else self.data_dir / "state" / "performance_log_index.json"
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.incremental = incremental
+        self._states: Optional[List[LogFileState]] = None
         self.results = {
             'analysis_timestamp': datetime.now().isoformat(),
             'format_analysis': {},
@@ -70,203 +295,128 @@ class PerformanceAnalyzer:
             'projections': {},
             'recommendations': []
         }
-        
+
+    def scan_logs(self) -> List[LogFileState]:
+        """
+        Pasada única (incremental y en paralelo) sobre todos los .log
+
+        El resultado se reutiliza en el análisis de formato, componentes y
+        sesiones.
+        """
+        if self._states is not None:
+            return self._states
+
+        index = LogIndex(self.index_path)
+        log_files = sorted(self.logs_dir.glob("*.log"))
+        pending = []
+        for log_file in log_files:
+            key = str(log_file.resolve())
+            previous = index.files.get(key) if self.incremental else None
+            pending.append(previous or LogFileState(path=key))
+
+        print(f"[CONFIGURACION] Leyendo {len(pending)} archivos de log ({self.workers} procesos)...")
+        states: List[LogFileState] = []
+        if len(pending) > 1 and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [(state, executor.submit(scan_log_file, state)) for state in pending]
+                for state, future in futures:
+                    try:
+                        states.append(future.result())
+                    except Exception as e:
+                        print(f"  [ERROR] Error leyendo {Path(state.path).name}: {e}")
+        else:
+            for state in pending:
+                try:
+                    states.append(scan_log_file(state))
+                except Exception as e:
+                    print(f"  [ERROR] Error leyendo {Path(state.path).name}: {e}")
+
+        bytes_read = sum(state.bytes_read for state in states)
+        print(f"  [DATOS] Bytes nuevos leídos: {bytes_read / (1024 * 1024):.1f} MB")
+        self.results['performance_metrics']['log_scan'] = {
+            'files': len(states),
+            'bytes_read': bytes_read,
+            'incremental': self.incremental
+        }
+
+        # Los archivos que ya no existen salen del índice
+        index.files = {state.path: state for state in states}
+        index.save()
+
+        self._states = states
+        return states
+
     def analyze_log_format(self) -> Dict[str, Any]:
         """Analiza el formato de los logs para verificar profesionalización"""
         print("[EMOJI_REMOVIDO] Analizando formato de logs...")
-        
+
         format_stats = {
             'professional_format_count': 0,
             'legacy_format_count': 0,
             'total_lines': 0,
             'format_compliance': 0.0,
-            'professional_pattern': r'\[\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}\]\[[\w]+\]\[[\w]+\]\[[\w]+\]\[[\w]+\] - .*',
-            'legacy_patterns': [
-                r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d+ - [\w\.]+ - [\w]+ - .*',
-                r'\[[\w-]+\] [\w]+: .*'
-            ],
+            'professional_pattern': PROFESSIONAL_PATTERN,
+            'legacy_patterns': LEGACY_PATTERNS,
             'samples': {
                 'professional': [],
                 'legacy': []
             }
         }
-        
-        log_files = list(self.logs_dir.glob("*.log"))
-        professional_pattern = re.compile(format_stats['professional_pattern'])
-        legacy_patterns = [re.compile(pattern) for pattern in format_stats['legacy_patterns']]
-        
-        for log_file in log_files:
-            print(f"  [EMOJI_REMOVIDO] Analizando: {log_file.name}")
-            
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        format_stats['total_lines'] += 1
-                        
-                        # Verificar formato profesional
-                        if professional_pattern.match(line):
-                            format_stats['professional_format_count'] += 1
-                            if len(format_stats['samples']['professional']) < 3:
-                                format_stats['samples']['professional'].append(line)
-                        else:
-                            # Verificar formatos legacy
-                            is_legacy = False
-                            for legacy_pattern in legacy_patterns:
-                                if legacy_pattern.match(line):
-                                    format_stats['legacy_format_count'] += 1
-                                    is_legacy = True
-                                    if len(format_stats['samples']['legacy']) < 3:
-                                        format_stats['samples']['legacy'].append(line)
-                                    break
-                            
-                            if not is_legacy:
-                                # Línea que no coincide con ningún formato conocido
-                                if len(format_stats['samples']['legacy']) < 5:
-                                    format_stats['samples']['legacy'].append(f"UNKNOWN: {line}")
-                                    
-            except Exception as e:
-                print(f"  [ERROR] Error leyendo {log_file.name}: {e}")
-        
+
+        for state in self.scan_logs():
+            format_stats['total_lines'] += state.total_lines
+            format_stats['professional_format_count'] += state.professional_format_count
+            format_stats['legacy_format_count'] += state.legacy_format_count
+            for kind, limit in (('professional', 3), ('legacy', 5)):
+                room = limit - len(format_stats['samples'][kind])
+                format_stats['samples'][kind].extend(state.samples[kind][:max(0, room)])
+
         # Calcular compliance
         if format_stats['total_lines'] > 0:
             format_stats['format_compliance'] = (
                 format_stats['professional_format_count'] / format_stats['total_lines'] * 100
             )
-        
+
         print(f"  [EXITOSO] Formato profesional: {format_stats['professional_format_count']} líneas")
         print(f"  [DATOS] Compliance: {format_stats['format_compliance']:.1f}%")
-        
+
         return format_stats
 
     def extract_component_metrics(self) -> Dict[str, ComponentMetrics]:
         """Extrae métricas por componente de los logs"""
         print("[CONFIGURACION] Analizando métricas por componente...")
-        
-        components = {}
-        timestamp_pattern = re.compile(r'\[(\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2})\]')
-        component_pattern = re.compile(r'\[[\w]+\]\[([\w]+)\]\[([\w]+)\]\[[\w]+\]')
-        
-        log_files = list(self.logs_dir.glob("*.log"))
-        
-        for log_file in log_files:
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    
-                for i, line in enumerate(lines):
-                    line = line.strip()
-                    
-                    # Extraer componente
-                    component_match = component_pattern.search(line)
-                    if not component_match:
-                        continue
-                        
-                    core = component_match.group(1)
-                    component = component_match.group(2)
-                    comp_name = f"{core}.{component}"
-                    
-                    if comp_name not in components:
-                        components[comp_name] = ComponentMetrics(name=comp_name)
-                    
-                    comp = components[comp_name]
-                    comp.total_executions += 1
-                    
-                    # Detectar éxito/fallo
-                    if 'EXITOSO' in line or 'SUCCESS' in line:
-                        comp.success_count += 1
-                    elif 'ERROR' in line or 'FAILED' in line:
-                        comp.failed_count += 1
-                        
-            except Exception as e:
-                print(f"  [ERROR] Error procesando {log_file.name}: {e}")
-        
-        # Calcular métricas derivadas
+
+        components: Dict[str, ComponentMetrics] = {}
+        for state in self.scan_logs():
+            for name, data in state.components.items():
+                metrics = ComponentMetrics(**data)
+                if name in components:
+                    components[name].merge(metrics)
+                else:
+                    components[name] = metrics
+
+        # Calcular métricas derivadas (duraciones de pares inicio/fin)
         for comp in components.values():
-            if comp.total_executions > 0:
-                comp.avg_time = comp.total_time / comp.total_executions
-            comp.bottleneck_score = comp.total_executions * comp.avg_time
-            
+            if comp.timed_executions > 0:
+                comp.avg_time = comp.total_time / comp.timed_executions
+            else:
+                comp.min_time = 0.0
+            comp.bottleneck_score = comp.total_time
+
         print(f"  [DATOS] Componentes analizados: {len(components)}")
         return components
 
     def analyze_extraction_sessions(self) -> List[ExtrationSession]:
         """Analiza sesiones completas de extracción"""
         print("[EMOJI_REMOVIDO] Analizando sesiones de extracción...")
-        
+
         sessions = []
-        session_pattern = re.compile(r'INICIANDO EXTRACCIÓN DE (AFINIA|AIRE)')
-        duration_pattern = re.compile(r'DURACION.*?(\d+\.?\d*)\s+segundos')
-        files_pattern = re.compile(r'ARCHIVOS.*?(\d+)')
-        pqr_pattern = re.compile(r'PQRs procesados.*?(\d+)')
-        
-        log_files = list(self.logs_dir.glob("*.log"))
-        
-        for log_file in log_files:
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    
-                current_session = None
-                
-                for line in lines:
-                    line = line.strip()
-                    
-                    # Detectar inicio de sesión
-                    if session_pattern.search(line):
-                        if current_session:
-                            sessions.append(current_session)
-                            
-                        current_session = ExtrationSession(
-                            start_time="",
-                            end_time="",
-                            duration=0.0,
-                            success=False
-                        )
-                        
-                        # Extraer timestamp de inicio
-                        timestamp_match = re.search(r'\[(\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2})\]', line)
-                        if timestamp_match:
-                            current_session.start_time = timestamp_match.group(1)
-                    
-                    # Procesar línea de sesión actual
-                    if current_session:
-                        # Duración
-                        duration_match = duration_pattern.search(line)
-                        if duration_match:
-                            current_session.duration = float(duration_match.group(1))
-                        
-                        # Archivos descargados
-                        files_match = files_pattern.search(line)
-                        if files_match and 'ARCHIVOS' in line:
-                            current_session.files_downloaded = int(files_match.group(1))
-                        
-                        # PQRs procesados
-                        pqr_match = pqr_pattern.search(line)
-                        if pqr_match:
-                            current_session.pqrs_processed = int(pqr_match.group(1))
-                        
-                        # Éxito/Fallo
-                        if 'EXTRACCIÓN COMPLETADA EXITOSAMENTE' in line:
-                            current_session.success = True
-                            timestamp_match = re.search(r'\[(\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2})\]', line)
-                            if timestamp_match:
-                                current_session.end_time = timestamp_match.group(1)
-                        
-                        # Errores
-                        if 'ERROR' in line and 'Error' in line:
-                            current_session.errors.append(line)
-                
-                # Agregar última sesión
-                if current_session:
-                    sessions.append(current_session)
-                    
-            except Exception as e:
-                print(f"  [ERROR] Error procesando {log_file.name}: {e}")
-        
+        for state in self.scan_logs():
+            sessions.extend(ExtrationSession(**data) for data in state.sessions)
+            # La última sesión de cada archivo puede seguir abierta
+            if state.current_session:
+                sessions.append(ExtrationSession(**state.current_session))
+
         print(f"  [DATOS] Sesiones encontradas: {len(sessions)}")
         return sessions
 
@@ -407,6 +557,11 @@ class PerformanceAnalyzer:
                 'success_count': comp.success_count,
                 'failed_count': comp.failed_count,
                 'success_rate': comp.success_count / max(1, comp.total_executions) * 100,
+                'timed_executions': comp.timed_executions,
+                'total_time': round(comp.total_time, 3),
+                'avg_time': round(comp.avg_time, 3),
+                'min_time': round(comp.min_time, 3),
+                'max_time': round(comp.max_time, 3),
                 'bottleneck_score': comp.bottleneck_score
             }
             for name, comp in components.items()
@@ -502,11 +657,18 @@ def main():
                        help='Archivo de salida del reporte JSON')
     parser.add_argument('--summary-only', action='store_true',
                        help='Solo mostrar resumen sin generar reporte completo')
+    parser.add_argument('--index',
+                       help='Índice incremental de offsets (default: <data-dir>/state/performance_log_index.json)')
+    parser.add_argument('--full', action='store_true',
+                       help='Releer todos los logs desde el inicio y reconstruir el índice')
+    parser.add_argument('--workers', type=int,
+                       help='Procesos para leer archivos en paralelo (default: min(8, CPUs))')
     
     args = parser.parse_args()
     
     # Crear analizador
-    analyzer = PerformanceAnalyzer(args.data_dir)
+    analyzer = PerformanceAnalyzer(args.data_dir, index_file=args.index,
+                                   workers=args.workers, incremental=not args.full)
     
     # Ejecutar análisis
     results = analyzer.run_analysis()
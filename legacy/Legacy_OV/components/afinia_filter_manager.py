@@ -30,13 +30,17 @@ class AfiniaFilterManager:
         self.page = page
         self.logger = logger
         
-    async def configure_filters_and_search(self, days_back: int = 1) -> bool:
+    async def configure_filters_and_search(self, days_back: int = 1,
+                                           start_date: Optional[datetime] = None,
+                                           end_date: Optional[datetime] = None) -> bool:
         """
         Proceso completo de configuración de filtros y búsqueda
         Basado exactamente en el código legacy funcional
         
         Args:
             days_back: Días hacia atrás desde hoy para fecha inicial
+            start_date: Fecha inicial explícita (tiene prioridad sobre days_back)
+            end_date: Fecha final explícita (por defecto hoy)
             
         Returns:
             bool: True si fue exitoso
@@ -55,7 +59,7 @@ class AfiniaFilterManager:
                 self.logger.warning("Error configurando estado, continuando...")
                 
             # PASO 3: Configurar fechas
-            dates_success = await self._configure_date_filters(days_back)
+            dates_success = await self._configure_date_filters(days_back, start_date, end_date)
             if not dates_success:
                 self.logger.warning("Error configurando fechas, continuando...")
                 
@@ -216,13 +220,17 @@ class AfiniaFilterManager:
             self.logger.error(f"Error configurando estado: {e}")
             return False
             
-    async def _configure_date_filters(self, days_back: int = 1) -> bool:
+    async def _configure_date_filters(self, days_back: int = 1,
+                                      start_date: Optional[datetime] = None,
+                                      end_date: Optional[datetime] = None) -> bool:
         """
         Configura los filtros de fecha inicial y final
         Basado exactamente en el código legacy funcional
         
         Args:
             days_back: Días hacia atrás desde hoy para fecha inicial
+            start_date: Fecha inicial explícita (tiene prioridad sobre days_back)
+            end_date: Fecha final explícita (por defecto hoy)
             
         Returns:
             bool: True si fue exitoso
@@ -231,8 +239,8 @@ class AfiniaFilterManager:
             self.logger.info("=== PASO 3: Configurando filtros de fecha ===")
             
             # Calcular fechas (igual que en el legacy)
-            today = datetime.now()
-            start_date = today - timedelta(days=days_back)
+            today = end_date or datetime.now()
+            start_date = start_date or (today - timedelta(days=days_back))
             
             fecha_inicial = start_date.strftime("%Y-%m-%d")
             fecha_final = today.strftime("%Y-%m-%d")
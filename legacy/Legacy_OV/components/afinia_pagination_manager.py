@@ -6,13 +6,18 @@ Optimizado para servidor Linux con controles de pausa/parada
 
 import os
 import json
+import time
 import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+from src.utils.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from src.services.control_endpoint import ControlChannel, get_control_endpoint
+from .partitioned_pagination import CrawlSession, PartitionedPaginationCrawler, govern_session
+
 logger = logging.getLogger('AFINIA-PAGINATION')
 
 @dataclass
@@ -21,6 +26,7 @@ class PaginationState:
     current_page: int = 1
     total_records: int = 0
     processed_records: int = 0
+    failed_records: int = 0
     records_per_page: int = 10
     total_pages: int = 0
     session_start: str = ""
@@ -50,7 +56,24 @@ class AfiniaPaginationManager:
         # Configuración para servidor
         self.max_records_per_session = int(os.getenv('MAX_RECORDS_PER_SESSION', '50'))
         self.checkpoint_frequency = int(os.getenv('CHECKPOINT_FREQUENCY', '10'))  # Cada 10 registros
+        # Intervalo inicial del limitador por host (se adapta a la respuesta del portal)
         self.pause_between_pages = float(os.getenv('PAUSE_BETWEEN_PAGES', '3.0'))  # 3 segundos
+        self.rate_limiter: Optional[AdaptiveRateLimiter] = None
+        # Sesiones del recorrido particionado: con más de 1 los extractores reparten las páginas
+        self.partition_workers = int(os.getenv('PAGINATION_WORKERS', '1'))
+        # BrowserResourceGovernor asignado por el extractor (recicla el navegador entre páginas)
+        self.resource_governor = None
+        
+        # Endpoint local de métricas/control (CONTROL_ENDPOINT): reemplaza el
+        # sondeo de PAUSE/STOP/RESUME y STATUS.json queda como respaldo espaciado
+        self.control_channel: Optional[ControlChannel] = None
+        self.status_file_interval = 0.0
+        self._last_status_write = 0.0
+        endpoint = get_control_endpoint()
+        if endpoint is not None:
+            self.control_channel = endpoint.register_source('afinia', self._status_snapshot)
+            self.status_file_interval = float(os.getenv('STATUS_FILE_INTERVAL', '30'))
+            logger.info(f"CONTROL Endpoint de métricas y control: {endpoint.url}")
         
         logger.info(f"EXITOSO PaginationManager inicializado")
         logger.info(f"ARCHIVOS Control dir: {self.control_dir}")
@@ -114,21 +137,33 @@ class AfiniaPaginationManager:
             logger.error(f"ERROR Error guardando checkpoint: {e}")
             return False
 
+    def _status_snapshot(self) -> Dict[str, Any]:
+        """Estado actual para STATUS.json y el endpoint de métricas"""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'current_page': self.state.current_page,
+            'total_pages': self.state.total_pages,
+            'processed_records': self.state.processed_records,
+            'failed_records': self.state.failed_records,
+            'total_records': self.state.total_records,
+            'progress_percentage': (self.state.processed_records / self.state.total_records * 100) if self.state.total_records > 0 else 0,
+            'is_paused': self.state.is_paused,
+            'is_stopped': self.state.is_stopped,
+            'session_start': self.state.session_start,
+            'estimated_remaining': self._estimate_remaining_time()
+        }
+
     def _update_status(self):
         """Actualizar archivo de estado para monitoreo externo"""
+        # Con el endpoint activo el archivo es solo un respaldo: se reescribe cada
+        # status_file_interval segundos y en los cambios de pausa/parada
+        now = time.monotonic()
+        if (self.status_file_interval and now - self._last_status_write < self.status_file_interval
+                and not self.state.is_paused and not self.state.is_stopped):
+            return
+        self._last_status_write = now
         try:
-            status_data = {
-                'timestamp': datetime.now().isoformat(),
-                'current_page': self.state.current_page,
-                'total_pages': self.state.total_pages,
-                'processed_records': self.state.processed_records,
-                'total_records': self.state.total_records,
-                'progress_percentage': (self.state.processed_records / self.state.total_records * 100) if self.state.total_records > 0 else 0,
-                'is_paused': self.state.is_paused,
-                'is_stopped': self.state.is_stopped,
-                'session_start': self.state.session_start,
-                'estimated_remaining': self._estimate_remaining_time()
-            }
+            status_data = self._status_snapshot()
             
             with open(self.status_file, 'w', encoding='utf-8') as f:
                 json.dump(status_data, f, indent=2, ensure_ascii=False)
@@ -168,6 +203,9 @@ class AfiniaPaginationManager:
 
     def _check_control_signals(self) -> str:
         """Verificar archivos de control para pausar/detener"""
+        if self.control_channel is not None:
+            return self._check_channel_signals()
+        
         if self.stop_file.exists():
             logger.warning(" SEÑAL DE PARADA DETECTADA")
             self.state.is_stopped = True
@@ -190,12 +228,41 @@ class AfiniaPaginationManager:
             
         return "CONTINUE"
 
+    def _check_channel_signals(self) -> str:
+        """Misma semántica que los archivos de control, leyendo el canal en memoria"""
+        channel = self.control_channel
+        if channel.stopped:
+            if not self.state.is_stopped:
+                logger.warning(" SEÑAL DE PARADA RECIBIDA (endpoint)")
+            self.state.is_stopped = True
+            return "STOP"
+        
+        if channel.paused:
+            if not self.state.is_paused:
+                logger.warning("⏸ SEÑAL DE PAUSA RECIBIDA (endpoint)")
+                self.state.is_paused = True
+            return "PAUSE"
+        
+        if self.state.is_paused:
+            logger.info(" SEÑAL DE REANUDACIÓN RECIBIDA (endpoint)")
+            self.state.is_paused = False
+            return "RESUME"
+        
+        return "CONTINUE"
+
+    async def _wait_control_change(self, timeout: float = 5.0):
+        """Esperar el próximo comando del endpoint o, sin endpoint, el siguiente sondeo"""
+        if self.control_channel is not None:
+            await self.control_channel.wait_async(timeout)
+        else:
+            await asyncio.sleep(timeout)
+
     async def _wait_for_resume(self):
         """Esperar hasta que se reanude el procesamiento"""
         logger.info("⏸ Procesamiento pausado. Esperando señal de reanudación...")
         
         while self.state.is_paused and not self.state.is_stopped:
-            await asyncio.sleep(5)  # Verificar cada 5 segundos
+            await self._wait_control_change(5)  # Verificar cada 5 segundos o al recibir un comando
             signal = self._check_control_signals()
             self._update_status()
             
@@ -292,6 +359,12 @@ class AfiniaPaginationManager:
             logger.error(f"ERROR Error verificando página siguiente: {e}")
             return False
 
+    def _get_rate_limiter(self, page) -> AdaptiveRateLimiter:
+        """Limitador adaptativo del host del portal (compartido entre procesos)"""
+        if self.rate_limiter is None:
+            self.rate_limiter = get_rate_limiter(page.url, initial_interval=self.pause_between_pages)
+        return self.rate_limiter
+
     async def click_next_page(self, page) -> bool:
         """Hacer clic en el botón de página siguiente"""
         try:
@@ -317,13 +390,12 @@ class AfiniaPaginationManager:
                             await button.scroll_into_view_if_needed()
                             await asyncio.sleep(1)
                             
-                            await button.click()
-                            
-                            # Esperar a que la página se actualice
-                            await asyncio.sleep(self.pause_between_pages)
-                            
-                            # Esperar a que el contenido se cargue
-                            await page.wait_for_load_state('networkidle')
+                            # Turno del limitador compartido; mide la carga de la página
+                            async with self._get_rate_limiter(page).request():
+                                await button.click()
+                                
+                                # Esperar a que el contenido se cargue
+                                await page.wait_for_load_state('networkidle')
                             
                             logger.info("EXITOSO Clic en página siguiente exitoso")
                             return True
@@ -339,6 +411,25 @@ class AfiniaPaginationManager:
             logger.error(f"ERROR Error haciendo clic en página siguiente: {e}")
             return False
 
+    async def process_all_pages_partitioned(self, session_factory: Callable[[int], Awaitable[CrawlSession]],
+                                            workers: Optional[int] = None,
+                                            max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Procesar todas las páginas repartiéndolas entre varias sesiones de navegador
+        
+        Cada sesión salta directo a su página inicial y las sesiones libres roban
+        rangos pendientes de las más lentas. El progreso queda en un único journal
+        (checkpoints/partitioned_journal.jsonl) que permite reanudar.
+        
+        Args:
+            session_factory: Crea una sesión autenticada en la grilla (recibe el id del worker)
+            workers: Sesiones simultáneas (PAGINATION_WORKERS por defecto)
+            max_pages: Límite máximo de páginas (None = sin límite)
+        """
+        crawler = PartitionedPaginationCrawler(self, session_factory,
+                                               workers=workers or self.partition_workers)
+        return await crawler.run(max_pages=max_pages)
+
     async def process_all_pages(self, page, pqr_processor, max_pages: Optional[int] = None) -> Dict[str, Any]:
         """
         Procesar todas las páginas de PQR con paginación automática
@@ -415,6 +506,7 @@ class AfiniaPaginationManager:
                     
                     # Actualizar estado
                     self.state.processed_records += page_results.get('total_processed', 0)
+                    self.state.failed_records += page_results.get('failed', 0)
                     self.state.current_page = current_page
                     
                     logger.info(f"EXITOSO Página {current_page} completada")
@@ -424,6 +516,7 @@ class AfiniaPaginationManager:
                 except Exception as page_error:
                     logger.error(f"ERROR Error procesando página {current_page}: {page_error}")
                     results['failed'] += self.state.records_per_page  # Asumir que toda la página falló
+                    self.state.failed_records += self.state.records_per_page
                 
                 # Guardar checkpoint periódicamente
                 if current_page % self.checkpoint_frequency == 0:
@@ -433,6 +526,10 @@ class AfiniaPaginationManager:
                 # Actualizar estado
                 self._update_status()
                 
+                # Reciclar el navegador si el gobernador lo pide
+                page = await govern_session(self, self.resource_governor, page, pqr_processor,
+                                            current_page, self.state.records_per_page)
+                
                 # Verificar si hay página siguiente
                 if not await self.has_next_page(page):
                     logger.info("COMPLETADO No hay más páginas. Procesamiento completado")
@@ -444,9 +541,6 @@ class AfiniaPaginationManager:
                     break
                 
                 current_page += 1
-                
-                # Pausa entre páginas para no sobrecargar el servidor
-                await asyncio.sleep(self.pause_between_pages)
             
             # Guardar checkpoint final
             self._save_checkpoint()
@@ -470,12 +564,23 @@ class AfiniaPaginationManager:
         scripts_dir = self.base_dir / "server_control_scripts"
         scripts_dir.mkdir(exist_ok=True)
         
+        # Con el endpoint activo los scripts envían el comando por HTTP
+        endpoint = get_control_endpoint() if self.control_channel is not None else None
+        if endpoint is not None:
+            pause_cmd = f'curl -s -X POST "{endpoint.url}/control/pause?target=afinia"'
+            resume_cmd = f'curl -s -X POST "{endpoint.url}/control/resume?target=afinia"'
+            stop_cmd = f'curl -s -X POST "{endpoint.url}/control/stop?target=afinia"'
+        else:
+            pause_cmd = f'touch "{self.pause_file}"'
+            resume_cmd = f'touch "{self.resume_file}"'
+            stop_cmd = f'touch "{self.stop_file}"'
+        
         # Script de pausa
         pause_script = scripts_dir / "pause.sh"
         pause_script.write_text(f"""#!/bin/bash
 # Script para pausar el procesamiento
 echo "⏸  Pausando procesamiento..."
-touch "{self.pause_file}"
+{pause_cmd}
 echo "EXITOSO Señal de pausa enviada"
 echo " Para reanudar, ejecuta: ./resume.sh"
 """)
@@ -486,7 +591,7 @@ echo " Para reanudar, ejecuta: ./resume.sh"
         resume_script.write_text(f"""#!/bin/bash
 # Script para reanudar el procesamiento
 echo "  Reanudando procesamiento..."
-touch "{self.resume_file}"
+{resume_cmd}
 echo "EXITOSO Señal de reanudación enviada"
 """)
         resume_script.chmod(0o755)
@@ -496,7 +601,7 @@ echo "EXITOSO Señal de reanudación enviada"
         stop_script.write_text(f"""#!/bin/bash
 # Script para detener el procesamiento
 echo " Deteniendo procesamiento..."
-touch "{self.stop_file}"
+{stop_cmd}
 echo "EXITOSO Señal de parada enviada"
 echo "ADVERTENCIA  El sistema guardará el progreso antes de detenerse"
 """)
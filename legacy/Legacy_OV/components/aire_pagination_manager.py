@@ -10,9 +10,13 @@ import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+from src.utils.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from src.services.control_endpoint import ControlChannel, get_control_endpoint
+from .partitioned_pagination import CrawlSession, PartitionedPaginationCrawler, govern_session
+
 logger = logging.getLogger('AIRE-PAGINATION')
 
 @dataclass
@@ -21,6 +25,7 @@ class PaginationState:
     current_page: int = 1
     total_records: int = 0
     processed_records: int = 0
+    failed_records: int = 0
     records_per_page: int = 10
     total_pages: int = 0
     session_start: str = ""
@@ -50,15 +55,45 @@ class AirePaginationManager:
         # Configuración para servidor
         self.max_records_per_session = int(os.getenv('MAX_RECORDS_PER_SESSION', '50'))
         self.checkpoint_frequency = int(os.getenv('CHECKPOINT_FREQUENCY', '10'))  # Cada 10 registros
+        # Intervalo inicial del limitador por host (se adapta a la respuesta del portal)
         self.pause_between_pages = float(os.getenv('PAUSE_BETWEEN_PAGES', '3.0'))  # 3 segundos
+        self.rate_limiter: Optional[AdaptiveRateLimiter] = None
+        # Sesiones del recorrido particionado: con más de 1 los extractores reparten las páginas
+        self.partition_workers = int(os.getenv('PAGINATION_WORKERS', '1'))
+        # BrowserResourceGovernor asignado por el extractor (recicla el navegador entre páginas)
+        self.resource_governor = None
+        
+        # Endpoint local de métricas/control (CONTROL_ENDPOINT)
+        self.control_channel: Optional[ControlChannel] = None
+        endpoint = get_control_endpoint()
+        if endpoint is not None:
+            self.control_channel = endpoint.register_source('aire', self._status_snapshot)
+            logger.info(f"Endpoint de métricas y control: {endpoint.url}")
         
         logger.info(f"PaginationManager inicializado")
         logger.info(f"Control dir: {self.control_dir}")
         logger.info(f"Checkpoint dir: {self.checkpoint_dir}")
         logger.info(f"Max records per session: {self.max_records_per_session}")
 
+    def _status_snapshot(self) -> Dict[str, Any]:
+        """Estado actual para el endpoint de métricas"""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'current_page': self.state.current_page,
+            'total_pages': self.state.total_pages,
+            'processed_records': self.state.processed_records,
+            'failed_records': self.state.failed_records,
+            'total_records': self.state.total_records,
+            'is_paused': self.state.is_paused,
+            'is_stopped': self.state.is_stopped,
+            'session_start': self.state.session_start
+        }
+
     def _check_control_signals(self) -> str:
         """Verificar archivos de control para pausar/detener"""
+        if self.control_channel is not None:
+            return self._check_channel_signals()
+        
         if self.stop_file.exists():
             logger.warning("SEÑAL DE PARADA DETECTADA")
             self.state.is_stopped = True
@@ -81,6 +116,35 @@ class AirePaginationManager:
             
         return "CONTINUE"
 
+    def _check_channel_signals(self) -> str:
+        """Misma semántica que los archivos de control, leyendo el canal en memoria"""
+        channel = self.control_channel
+        if channel.stopped:
+            if not self.state.is_stopped:
+                logger.warning("SEÑAL DE PARADA RECIBIDA (endpoint)")
+            self.state.is_stopped = True
+            return "STOP"
+        
+        if channel.paused:
+            if not self.state.is_paused:
+                logger.warning("SEÑAL DE PAUSA RECIBIDA (endpoint)")
+                self.state.is_paused = True
+            return "PAUSE"
+        
+        if self.state.is_paused:
+            logger.info("SEÑAL DE REANUDACIÓN RECIBIDA (endpoint)")
+            self.state.is_paused = False
+            return "RESUME"
+        
+        return "CONTINUE"
+
+    async def _wait_control_change(self, timeout: float = 5.0):
+        """Esperar el próximo comando del endpoint o, sin endpoint, el siguiente sondeo"""
+        if self.control_channel is not None:
+            await self.control_channel.wait_async(timeout)
+        else:
+            await asyncio.sleep(timeout)
+
     async def extract_pagination_info(self, page) -> Tuple[int, int, int]:
         """Extraer información de paginación de la página"""
         try:
@@ -166,6 +230,12 @@ class AirePaginationManager:
             logger.error(f"Error verificando página siguiente: {e}")
             return False
 
+    def _get_rate_limiter(self, page) -> AdaptiveRateLimiter:
+        """Limitador adaptativo del host del portal (compartido entre procesos)"""
+        if self.rate_limiter is None:
+            self.rate_limiter = get_rate_limiter(page.url, initial_interval=self.pause_between_pages)
+        return self.rate_limiter
+
     async def click_next_page(self, page) -> bool:
         """Hacer clic en el botón de página siguiente"""
         try:
@@ -191,13 +261,12 @@ class AirePaginationManager:
                             await button.scroll_into_view_if_needed()
                             await asyncio.sleep(1)
                             
-                            await button.click()
-                            
-                            # Esperar a que la página se actualice
-                            await asyncio.sleep(self.pause_between_pages)
-                            
-                            # Esperar a que el contenido se cargue
-                            await page.wait_for_load_state('networkidle')
+                            # Turno del limitador compartido; mide la carga de la página
+                            async with self._get_rate_limiter(page).request():
+                                await button.click()
+                                
+                                # Esperar a que el contenido se cargue
+                                await page.wait_for_load_state('networkidle')
                             
                             logger.info("Clic en página siguiente exitoso")
                             return True
@@ -213,6 +282,25 @@ class AirePaginationManager:
             logger.error(f"Error haciendo clic en página siguiente: {e}")
             return False
 
+    async def process_all_pages_partitioned(self, session_factory: Callable[[int], Awaitable[CrawlSession]],
+                                            workers: Optional[int] = None,
+                                            max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Procesar todas las páginas repartiéndolas entre varias sesiones de navegador
+        
+        Cada sesión salta directo a su página inicial y las sesiones libres roban
+        rangos pendientes de las más lentas. El progreso queda en un único journal
+        (checkpoints/partitioned_journal.jsonl) que permite reanudar.
+        
+        Args:
+            session_factory: Crea una sesión autenticada en la grilla (recibe el id del worker)
+            workers: Sesiones simultáneas (PAGINATION_WORKERS por defecto)
+            max_pages: Límite máximo de páginas (None = sin límite)
+        """
+        crawler = PartitionedPaginationCrawler(self, session_factory,
+                                               workers=workers or self.partition_workers)
+        return await crawler.run(max_pages=max_pages)
+
     async def process_all_pages(self, page, pqr_processor, max_pages: Optional[int] = None) -> Dict[str, Any]:
         """
         Procesar todas las páginas de PQR con paginación automática
@@ -256,6 +344,14 @@ class AirePaginationManager:
                     logger.warning("PARADA SOLICITADA - Guardando progreso...")
                     break
                 
+                # Pausa desde el endpoint (los archivos PAUSE siguen sin detener este bucle)
+                while signal == "PAUSE" and self.control_channel is not None:
+                    await self._wait_control_change(5)
+                    signal = self._check_control_signals()
+                if signal == "STOP":
+                    logger.warning("PARADA SOLICITADA - Guardando progreso...")
+                    break
+                
                 # Verificar límites
                 if max_pages and current_page > max_pages:
                     logger.info(f"Límite de páginas alcanzado: {max_pages}")
@@ -276,6 +372,7 @@ class AirePaginationManager:
                     
                     # Actualizar estado
                     self.state.processed_records += page_results.get('total_processed', 0)
+                    self.state.failed_records += page_results.get('failed', 0)
                     self.state.current_page = current_page
                     
                     logger.info(f"Página {current_page} completada")
@@ -285,6 +382,11 @@ class AirePaginationManager:
                 except Exception as page_error:
                     logger.error(f"Error procesando página {current_page}: {page_error}")
                     results['failed'] += self.state.records_per_page  # Asumir que toda la página falló
+                    self.state.failed_records += self.state.records_per_page
+                
+                # Reciclar el navegador si el gobernador lo pide
+                page = await govern_session(self, self.resource_governor, page, pqr_processor,
+                                            current_page, self.state.records_per_page)
                 
                 # Verificar si hay página siguiente
                 if not await self.has_next_page(page):
@@ -297,9 +399,6 @@ class AirePaginationManager:
                     break
                 
                 current_page += 1
-                
-                # Pausa entre páginas para no sobrecargar el servidor
-                await asyncio.sleep(self.pause_between_pages)
             
             results['end_time'] = datetime.now().isoformat()
             
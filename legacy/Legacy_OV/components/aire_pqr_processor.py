@@ -16,6 +16,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from .aire_pagination_manager import AirePaginationManager
+from src.services.record_bus import publish_record
+from src.services.pqr_pdf_renderer import drain_pdf_renders, queue_template_pdf, wait_pdf_render
+from src.utils.tracing import get_tracer
 import logging
 
 # Configurar logger específico para este módulo
@@ -46,10 +49,12 @@ class AirePQRProcessor:
             screenshots_dir: Directorio para screenshots
         """
         self.page = page
+        self.tracer = get_tracer()
         
-        # Asegurar que usamos la ruta dentro del proyecto
+        # Asegurar que usamos la ruta dentro del proyecto (las rutas absolutas se
+        # respetan: permiten directorios aislados por ventana de fechas)
         base_path = Path(download_path)
-        if not str(base_path).endswith("ExtractorOV_Modular"):
+        if not base_path.is_absolute() and not str(base_path).endswith("ExtractorOV_Modular"):
         # Si la ruta no termina en el proyecto, construir la ruta correcta
             project_root = Path(__file__).parent.parent.parent
             base_path = project_root / "data" / "downloads" / "aire" / "oficina_virtual"
@@ -129,6 +134,15 @@ class AirePQRProcessor:
         Returns:
             int: Número de registros procesados exitosamente
         """
+        try:
+            return await self._process_records(max_records, enable_pagination)
+        finally:
+            # Cada registro espera su PDF antes de publicarse; aquí solo se vacía el pool
+            # (renders de registros interrumpidos) en toda salida
+            await drain_pdf_renders()
+
+    async def _process_records(self, max_records: Optional[int] = None, enable_pagination: bool = False) -> int:
+        """Procesar la página actual (y las siguientes si enable_pagination)"""
         try:
             logger.info("=== INICIANDO PROCESAMIENTO DE PQR (SECUENCIA ESPECÍFICA AIRE) ===")
 
@@ -207,7 +221,8 @@ class AirePQRProcessor:
         """
         try:
             # Procesar registros de la página actual usando el método existente
-            successful_records = await self.process_all_pqr_records(max_records=max_records)
+            # Llamado por página desde la paginación: el pool se vacía al final de la corrida
+            successful_records = await self._process_records(max_records=max_records)
             
             return {
                 'total_processed': successful_records,
@@ -253,6 +268,11 @@ class AirePQRProcessor:
             return []
 
     async def _process_single_pqr_specific_sequence(self, eye_button, record_number: int) -> bool:
+        """Procesa una PQR dentro de un span de traza (ver _run_pqr_sequence)"""
+        with self.tracer.span("pqr_record", company="aire", record_number=record_number):
+            return await self._run_pqr_sequence(eye_button, record_number)
+
+    async def _run_pqr_sequence(self, eye_button, record_number: int) -> bool:
         """
         Procesa una sola PQR siguiendo la secuencia específica requerida:
         1. Clic para abrir nueva pestaña (sin cerrar anterior)
@@ -273,7 +293,8 @@ class AirePQRProcessor:
 
             # PASO 1: Abrir nueva pestaña SIN cerrar la anterior
             logger.info("PASO 1: Abriendo nueva pestaña sin cerrar la anterior...")
-            new_page = await self._open_new_tab_without_closing_current(eye_button)
+            with self.tracer.span("open_tab"):
+                new_page = await self._open_new_tab_without_closing_current(eye_button)
 
             if not new_page:
                 logger.error("No se pudo abrir nueva pestaña")
@@ -281,31 +302,38 @@ class AirePQRProcessor:
 
             try:
                 # Esperar a que la página cargue completamente con timeout extendido
-                try:
-                    await new_page.wait_for_load_state('networkidle', timeout=60000)  # 60 segundos
-                    logger.info("Nueva pestaña cargada exitosamente")
-                except Exception as load_error:
-                    logger.warning(f"Timeout en networkidle, intentando con domcontentloaded: {load_error}")
+                with self.tracer.span("wait_load"):
                     try:
-                        await new_page.wait_for_load_state('domcontentloaded', timeout=30000)  # 30 segundos
-                        logger.info("Nueva pestaña cargada con domcontentloaded")
-                        # Esperar adicional para asegurar carga de AngularJS
-                        await new_page.wait_for_timeout(5000)
-                    except Exception as fallback_error:
-                        logger.warning(f"Timeout en domcontentloaded también, continuando: {fallback_error}")
-                        # Esperar un poco y continuar
-                        await new_page.wait_for_timeout(3000)
+                        await new_page.wait_for_load_state('networkidle', timeout=60000)  # 60 segundos
+                        logger.info("Nueva pestaña cargada exitosamente")
+                    except Exception as load_error:
+                        logger.warning(f"Timeout en networkidle, intentando con domcontentloaded: {load_error}")
+                        try:
+                            await new_page.wait_for_load_state('domcontentloaded', timeout=30000)  # 30 segundos
+                            logger.info("Nueva pestaña cargada con domcontentloaded")
+                            # Esperar adicional para asegurar carga de AngularJS
+                            await new_page.wait_for_timeout(5000)
+                        except Exception as fallback_error:
+                            logger.warning(f"Timeout en domcontentloaded también, continuando: {fallback_error}")
+                            # Esperar un poco y continuar
+                            await new_page.wait_for_timeout(3000)
 
                 # PASO 2: Extraer número SGC para nombrar archivos
                 logger.info("PASO 2: Extrayendo número SGC...")
-                sgc_number = await self._extract_sgc_number_from_page(new_page, record_number)
+                with self.tracer.span("extract_sgc"):
+                    sgc_number = await self._extract_sgc_number_from_page(new_page, record_number)
+                self.tracer.set_record(sgc_number)
                 logger.info(f"Número SGC extraído: {sgc_number}")
 
                 # PASO 3: Generar PDF con nombre del SGC
                 logger.info("PASO 3: Generando PDF con nombre del SGC...")
                 pdf_success = False
+                pdf_render = None
                 try:
-                    pdf_success = await self._generate_pdf_with_sgc_name(new_page, sgc_number, record_number)
+                    with self.tracer.span("pdf"):
+                        pdf_render = await self._queue_template_pdf(new_page, sgc_number, record_number)
+                        if pdf_render is None:
+                            pdf_success = await self._generate_pdf_with_sgc_name(new_page, sgc_number, record_number)
                 except Exception as pdf_error:
                     logger.error(f"Error en generación PDF: {pdf_error}")
                 
@@ -313,7 +341,8 @@ class AirePQRProcessor:
                 logger.info("PASO 4: Verificando adjuntos en 'Documento/prueba'...")
                 attachments_success = False
                 try:
-                    attachments_success = await self._download_document_proof_attachments(new_page, sgc_number, record_number)
+                    with self.tracer.span("attachments"):
+                        attachments_success = await self._download_document_proof_attachments(new_page, sgc_number, record_number)
                 except Exception as attachments_error:
                     logger.error(f"Error en descarga adjuntos: {attachments_error}")
 
@@ -321,10 +350,16 @@ class AirePQRProcessor:
                 logger.info("PASO 5: Extrayendo y guardando JSON...")
                 json_success = False
                 try:
-                    json_success = await self._extract_and_save_json_data(new_page, sgc_number, record_number)
+                    with self.tracer.span("json"):
+                        json_success = await self._extract_and_save_json_data(new_page, sgc_number, record_number,
+                                                                              pdf_render=pdf_render)
                 except Exception as json_error:
                     logger.error(f"Error en extracción JSON: {json_error}")
 
+                # Modo plantilla: el PDF cuenta como generado solo cuando su render terminó
+                if pdf_render is not None:
+                    pdf_success = await wait_pdf_render(pdf_render)
+
                 # Resultado final - Considerar exitoso si al menos uno funcionó
                 overall_success = pdf_success or attachments_success or json_success
                 
@@ -459,6 +494,20 @@ class AirePQRProcessor:
             logger.error(f"Error extrayendo número SGC: {e}")
             return f"PQR_{record_number}_ERROR"
 
+    async def _queue_template_pdf(self, page, sgc_number: str, record_number: int) -> Optional[asyncio.Future]:
+        """
+        Modo plantilla: encolar el PDF del registro en el pool de procesos
+
+        El PDF aún no existe al volver: el llamador espera el future antes de
+        publicar el registro. Devuelve None si hay que usar page.pdf().
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        pdf_filename = self.download_path / f"{sgc_number}_{timestamp}.pdf"
+        pdf_render = await queue_template_pdf(page, "aire", sgc_number, record_number, pdf_filename)
+        if pdf_render is not None:
+            logger.info(f"PDF en render por plantilla (se espera antes de publicar): {pdf_filename}")
+        return pdf_render
+
     async def _generate_pdf_with_sgc_name(self, page, sgc_number: str, record_number: int) -> bool:
         """Genera PDF con el nombre del número SGC"""
         try:
@@ -711,7 +760,8 @@ class AirePQRProcessor:
             logger.warning(f"Error extrayendo nombre de archivo documento_prueba: {e}")
             return ""
 
-    async def _extract_and_save_json_data(self, page, sgc_number: str, record_number: int) -> bool:
+    async def _extract_and_save_json_data(self, page, sgc_number: str, record_number: int,
+                                          pdf_render: Optional[asyncio.Future] = None) -> bool:
         """Extrae todos los datos de la PQR y los guarda en formato JSON"""
         try:
             logger.info(f"Extrayendo datos JSON para PQR #{record_number}")
@@ -775,6 +825,15 @@ class AirePQRProcessor:
                 json.dump(pqr_data, f, ensure_ascii=False, indent=2)
 
             logger.info(f"JSON guardado exitosamente: {json_path}")
+
+            # Modo plantilla: publicar solo cuando el render del PDF terminó, así los
+            # consumidores (RDS, S3) no ven el registro sin su PDF
+            if pdf_render is not None:
+                await wait_pdf_render(pdf_render)
+
+            # Entregar el registro a los consumidores (bloquea si van atrasados)
+            await publish_record("aire", sgc_number, json_path, pqr_data)
+
             logger.info(f"Campos extraídos: {len([k for k, v in pqr_data.items() if v])}")
             
             return True
@@ -0,0 +1,382 @@
+"""
+PARTITIONED PAGINATION
+Recorrido masivo de páginas repartido entre varias sesiones de navegador
+independientes, con robo de trabajo (work stealing) y un journal único de progreso
+"""
+
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger('PARTITIONED-PAGINATION')
+
+# md-data-table expone el controlador de paginación en el scope del componente:
+# asignar la página y disparar onPaginationChange evita recorrer 1..N con "siguiente"
+_JUMP_TO_PAGE_JS = """
+(target) => {
+    const element = document.querySelector('md-table-pagination');
+    if (!element || !window.angular) return false;
+    const ngElement = window.angular.element(element);
+    const scope = ngElement.isolateScope() || ngElement.scope();
+    const pagination = scope && (scope.$pagination || scope);
+    if (!pagination || typeof pagination.onPaginationChange !== 'function') return false;
+    scope.$apply(() => {
+        pagination.page = target;
+        pagination.onPaginationChange();
+    });
+    return true;
+}
+"""
+
+
+@dataclass
+class CrawlSession:
+    """Sesión de navegador independiente lista en la grilla de PQR"""
+    page: Any
+    pqr_processor: Any
+    close: Optional[Callable[[], Awaitable[None]]] = None
+    governor: Optional[Any] = None  # BrowserResourceGovernor de la sesión
+
+
+@dataclass
+class PageRange:
+    """Rango de páginas asignado a un worker: [next_page, end_page)"""
+    next_page: int
+    end_page: int
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.end_page - self.next_page)
+
+
+@dataclass
+class WorkerStats:
+    """Estadísticas por sesión"""
+    worker_id: int
+    pages: int = 0
+    jumps: int = 0
+    steals: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+class PageJournal:
+    """Journal JSONL único de páginas completadas (compartido por todos los workers)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def completed_pages(self) -> Set[int]:
+        """Páginas ya procesadas en corridas anteriores"""
+        completed = set()
+        if not self.path.exists():
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # última línea truncada por una caída
+                if entry.get('status') == 'completed':
+                    completed.add(int(entry['page']))
+        return completed
+
+    def record(self, page_number: int, worker_id: int, status: str, page_results: Dict[str, Any]):
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'page': page_number,
+            'worker': worker_id,
+            'status': status,
+            'total_processed': page_results.get('total_processed', 0),
+            'successful': page_results.get('successful', 0),
+            'failed': page_results.get('failed', 0)
+        }
+        # Una línea por append: escrituras pequeñas en modo append no se intercalan
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class WorkStealingPageScheduler:
+    """
+    Reparte páginas pendientes en rangos contiguos por worker.
+    Un worker sin trabajo roba la mitad final del rango con más páginas pendientes.
+    """
+
+    def __init__(self, pending_pages: List[int], workers: int, min_steal: int = 2):
+        self.min_steal = min_steal
+        self.pending = sorted(set(pending_pages))
+        self._pending_set = set(self.pending)
+        self.ranges: Dict[int, PageRange] = {}
+        self.orphans: List[PageRange] = []
+
+        if self.pending:
+            first, last = self.pending[0], self.pending[-1] + 1
+            span = last - first
+            chunk = max(1, -(-span // workers))
+            for worker_id in range(workers):
+                start = first + worker_id * chunk
+                end = min(last, start + chunk)
+                self.ranges[worker_id] = PageRange(start, end) if start < end else PageRange(last, last)
+
+    def _pop_from(self, page_range: PageRange) -> Optional[int]:
+        while page_range.remaining:
+            page_number = page_range.next_page
+            page_range.next_page += 1
+            if page_number in self._pending_set:
+                return page_number
+        return None
+
+    def next_page(self, worker_id: int) -> Optional[int]:
+        """Siguiente página del worker; roba trabajo cuando su rango se agota"""
+        own = self.ranges.setdefault(worker_id, PageRange(0, 0))
+        page_number = self._pop_from(own)
+        if page_number is not None:
+            return page_number
+
+        if self._steal(worker_id):
+            return self._pop_from(self.ranges[worker_id])
+        return None
+
+    def _steal(self, worker_id: int) -> bool:
+        # Primero rangos huérfanos (workers que terminaron con error)
+        while self.orphans:
+            orphan = self.orphans.pop()
+            if orphan.remaining:
+                self.ranges[worker_id] = orphan
+                return True
+
+        victims = [(r.remaining, wid) for wid, r in self.ranges.items() if wid != worker_id]
+        if not victims:
+            return False
+        remaining, victim_id = max(victims)
+        if remaining < self.min_steal:
+            return False
+
+        victim = self.ranges[victim_id]
+        split = victim.next_page + remaining // 2
+        self.ranges[worker_id] = PageRange(split, victim.end_page)
+        victim.end_page = split
+        logger.info(f"ROBO Worker {worker_id} toma páginas {split}-{self.ranges[worker_id].end_page - 1} "
+                    f"del worker {victim_id}")
+        return True
+
+    def retire(self, worker_id: int, unfinished_page: Optional[int] = None):
+        """Liberar el rango de un worker que no puede continuar"""
+        own = self.ranges.pop(worker_id, None)
+        if own is None:
+            return
+        start = unfinished_page if unfinished_page is not None else own.next_page
+        if own.end_page > start:
+            self.orphans.append(PageRange(start, own.end_page))
+
+    def remaining(self) -> int:
+        return sum(r.remaining for r in self.ranges.values()) + sum(r.remaining for r in self.orphans)
+
+
+async def jump_to_page(pagination_manager, page, target_page: int, records_per_page: int) -> bool:
+    """
+    Llevar la grilla directamente a ``target_page``
+
+    Usa el controlador de md-data-table; si no está disponible, avanza con
+    "siguiente" desde la página actual (solo hacia adelante).
+    """
+    expected_start = (target_page - 1) * records_per_page + 1
+    try:
+        jumped = await page.evaluate(_JUMP_TO_PAGE_JS, target_page)
+        if jumped:
+            await page.wait_for_load_state('networkidle')
+            start_num, _, _ = await pagination_manager.extract_pagination_info(page)
+            if start_num == expected_start:
+                return True
+            logger.warning(f"ADVERTENCIA Salto a página {target_page} no verificado (inicio {start_num})")
+    except Exception as e:
+        logger.debug(f"Salto directo no disponible: {e}")
+
+    start_num, _, _ = await pagination_manager.extract_pagination_info(page)
+    current_page = (start_num - 1) // max(1, records_per_page) + 1
+    if current_page > target_page:
+        logger.error(f"ERROR No se puede retroceder de la página {current_page} a {target_page}")
+        return False
+
+    logger.info(f"PAGINA Avanzando de página {current_page} a {target_page} con 'siguiente'")
+    while current_page < target_page:
+        if not await pagination_manager.click_next_page(page):
+            return False
+        current_page += 1
+    return True
+
+
+async def govern_session(pagination_manager, governor, page, pqr_processor,
+                         current_page: int, records_per_page: int) -> Any:
+    """
+    Punto seguro entre páginas: reciclar el navegador si el gobernador lo pide
+
+    Tras reciclar, los callbacks del gobernador dejan la grilla filtrada en la
+    página 1; aquí se vuelve a ``current_page`` para que el recorrido siga
+    donde iba. Devuelve la página a usar (la misma si no hubo reciclado).
+    """
+    if governor is None:
+        return page
+    new_page = await governor.checkpoint()
+    if new_page is None:
+        return page
+
+    pqr_processor.page = new_page
+    if current_page > 1 and not await jump_to_page(pagination_manager, new_page, current_page, records_per_page):
+        raise RuntimeError(f"No se pudo volver a la página {current_page} tras reciclar el navegador")
+    logger.info(f"REANUDANDO Grilla restaurada en página {current_page} tras reciclar el navegador")
+    return new_page
+
+
+class PartitionedPaginationCrawler:
+    """
+    Recorre páginas 1..N con varias sesiones de navegador en paralelo
+    """
+
+    def __init__(self, pagination_manager, session_factory: Callable[[int], Awaitable[CrawlSession]],
+                 workers: int = 4, journal_path: Optional[Path] = None):
+        """
+        Args:
+            pagination_manager: AfiniaPaginationManager o AirePaginationManager
+            session_factory: Crea una sesión autenticada en la grilla de PQR (recibe el id del worker)
+            workers: Sesiones de navegador simultáneas
+            journal_path: Journal de progreso (por defecto en checkpoint_dir del manager)
+        """
+        self.manager = pagination_manager
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.journal = PageJournal(journal_path or pagination_manager.checkpoint_dir / "partitioned_journal.jsonl")
+        self.worker_stats: Dict[int, WorkerStats] = {}
+        self._stopped = False
+
+    async def _wait_control_signals(self) -> bool:
+        """Respetar PAUSE/STOP (archivos de control o endpoint). Devuelve False si hay que detenerse"""
+        signal = self.manager._check_control_signals()
+        while signal == "PAUSE" and not self._stopped:
+            await self.manager._wait_control_change(5)
+            signal = self.manager._check_control_signals()
+        if signal == "STOP":
+            self._stopped = True
+        return not self._stopped
+
+    async def run(self, max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ejecutar el recorrido particionado
+
+        Args:
+            max_pages: Límite máximo de páginas (None = todas)
+        """
+        state = self.manager.state
+        state.session_start = datetime.now().isoformat()
+        started = time.monotonic()
+
+        first_session = await self.session_factory(0)
+        start_num, end_num, total_records = await self.manager.extract_pagination_info(first_session.page)
+        records_per_page = max(1, end_num - start_num + 1)
+        total_pages = (total_records + records_per_page - 1) // records_per_page
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+
+        state.total_records = total_records
+        state.records_per_page = records_per_page
+        state.total_pages = total_pages
+
+        completed = self.journal.completed_pages()
+        pending = [p for p in range(1, total_pages + 1) if p not in completed]
+        scheduler = WorkStealingPageScheduler(pending, self.workers)
+
+        logger.info(f"OBJETIVO RECORRIDO PARTICIONADO: {total_pages:,} páginas, "
+                    f"{len(completed):,} ya completadas, {self.workers} sesiones")
+
+        results = {
+            'total_processed': 0,
+            'successful': 0,
+            'failed': 0,
+            'pages_processed': 0,
+            'pages_skipped': len(completed),
+            'start_time': state.session_start,
+            'workers': self.workers
+        }
+
+        async def worker(worker_id: int, session: Optional[CrawlSession]):
+            stats = WorkerStats(worker_id=worker_id)
+            self.worker_stats[worker_id] = stats
+            current_page = 1
+            page_number = None
+            try:
+                if session is None:
+                    session = await self.session_factory(worker_id)
+                while await self._wait_control_signals():
+                    ranges_before = scheduler.ranges.get(worker_id)
+                    page_number = scheduler.next_page(worker_id)
+                    if page_number is None:
+                        break
+                    if scheduler.ranges.get(worker_id) is not ranges_before:
+                        stats.steals += 1
+
+                    if page_number == current_page + 1:
+                        moved = await self.manager.click_next_page(session.page)
+                    elif page_number != current_page:
+                        stats.jumps += 1
+                        moved = await jump_to_page(self.manager, session.page, page_number, records_per_page)
+                    else:
+                        moved = True
+                    if not moved:
+                        raise RuntimeError(f"No se pudo llegar a la página {page_number}")
+                    current_page = page_number
+
+                    try:
+                        page_results = await session.pqr_processor.process_current_page_records(
+                            session.page, max_records=self.manager.max_records_per_session)
+                        status = 'completed'
+                    except Exception as page_error:
+                        logger.error(f"ERROR Worker {worker_id} página {page_number}: {page_error}")
+                        page_results = {'failed': records_per_page}
+                        status = 'error'
+
+                    self.journal.record(page_number, worker_id, status, page_results)
+                    stats.pages += 1
+                    results['total_processed'] += page_results.get('total_processed', 0)
+                    results['successful'] += page_results.get('successful', 0)
+                    results['failed'] += page_results.get('failed', 0)
+                    results['pages_processed'] += 1
+                    state.processed_records += page_results.get('total_processed', 0)
+                    state.failed_records += page_results.get('failed', 0)
+                    state.current_page = max(state.current_page, page_number)
+                    if hasattr(self.manager, '_update_status'):
+                        self.manager._update_status()
+                    page_number = None
+
+                    session.page = await govern_session(self.manager, session.governor, session.page,
+                                                        session.pqr_processor, current_page, records_per_page)
+
+            except Exception as e:
+                stats.errors.append(str(e))
+                logger.error(f"ERROR Worker {worker_id} detenido: {e}")
+                scheduler.retire(worker_id, unfinished_page=page_number)
+            finally:
+                if session is not None and session.close is not None:
+                    try:
+                        await session.close()
+                    except Exception as close_error:
+                        logger.debug(f"Error cerrando sesión {worker_id}: {close_error}")
+
+        await asyncio.gather(*(
+            worker(worker_id, first_session if worker_id == 0 else None)
+            for worker_id in range(self.workers)
+        ))
+
+        results['pages_remaining'] = scheduler.remaining()
+        results['stopped'] = self._stopped
+        results['end_time'] = datetime.now().isoformat()
+        results['duration_seconds'] = time.monotonic() - started
+        results['worker_stats'] = [vars(s) for s in self.worker_stats.values()]
+
+        logger.info(f"PROCESO_COMPLETADO RECORRIDO PARTICIONADO: {results['pages_processed']:,} páginas, "
+                    f"{results['total_processed']:,} registros, pendientes: {results['pages_remaining']:,}")
+        return results
@@ -12,6 +12,8 @@ from typing import Dict, List, Optional, Any
 from pathlib import Path
 import logging
 
+from src.services.pqr_pdf_renderer import drain_pdf_renders, queue_template_pdf, wait_pdf_render
+
 # Configurar logger específico para este módulo
 logger = logging.getLogger('pqr_detail_extractor')
 
@@ -30,7 +32,7 @@ class PQRDetailExtractor:
     Maneja apertura de pestañas, extracción de datos, generación de PDFs y manejo de adjuntos
     """
 
-    def __init__(self, page, download_path: str, screenshots_dir: str):
+    def __init__(self, page, download_path: str, screenshots_dir: str, company: str = "afinia"):
         """
         Inicializa el extractor de detalles PQR
 
@@ -38,8 +40,10 @@ class PQRDetailExtractor:
             page: Página de Playwright
             download_path: Directorio base para descargas
             screenshots_dir: Directorio para screenshots
+            company: Empresa del portal ('afinia' o 'aire'), va en el PDF por plantilla
         """
         self.page = page
+        self.company = company
         self.download_path = Path(download_path) / "processed"  # Guardar PDFs en subcarpeta processed
         self.screenshots_dir = Path(screenshots_dir)
         self.data_dir = Path(download_path) / "processed"  # Guardar JSONs en subcarpeta processed
@@ -164,6 +168,9 @@ class PQRDetailExtractor:
         except Exception as e:
             logger.error(f"Error en process_pqr_records: {e}")
             return 0
+        finally:
+            # Cada PDF se espera en su registro; aquí solo se vacía el pool en toda salida
+            await drain_pdf_renders()
 
     async def _process_single_pqr(self, eye_button, record_number: int) -> Optional[Dict[str, Any]]:
         """
@@ -715,6 +722,15 @@ class PQRDetailExtractor:
             # Generar nombre de archivo
             pdf_filename = self.download_path / f"{sgc_number}_PQR_{record_number}_{timestamp}.pdf"
 
+            # Modo plantilla: el PDF se arma en el pool de procesos con la tabla de detalle;
+            # la ruta solo se devuelve cuando el render terminó y el archivo existe
+            pdf_render = await queue_template_pdf(page, self.company, sgc_number, record_number, pdf_filename)
+            if pdf_render is not None:
+                if await wait_pdf_render(pdf_render):
+                    logger.info(f"PDF generado por plantilla: {pdf_filename}")
+                    return str(pdf_filename)
+                return None
+
             # Generar PDF
             await page.pdf(
                 path=str(pdf_filename),
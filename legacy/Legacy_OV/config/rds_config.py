@@ -75,8 +75,9 @@ class RDSConnectionConfig:
         port = self.rds_config.get('port', 5432)
         database = self.rds_config['database']
         
-        # Parámetros de conexión SSL
-        ssl_params = "sslmode=require&sslcert=&sslkey=&sslrootcert="
+        # Parámetros de conexión SSL (RDS_SSLMODE=disable para un PostgreSQL local)
+        sslmode = os.getenv('RDS_SSLMODE', 'require')
+        ssl_params = f"sslmode={sslmode}&sslcert=&sslkey=&sslrootcert="
         
         connection_string = f"postgresql://{username}:{password}@{host}:{port}/{database}?{ssl_params}"
         
@@ -13,19 +13,504 @@ Características:
 - Rotación automática de logs
 - Configuración centralizada
 - Compatibilidad con métricas existentes
+- Pipeline asíncrono (QueueHandler/QueueListener): el hilo que registra solo
+  encola el record; la limpieza de emojis, el formato y la escritura ocurren
+  en el hilo del listener
+- Formateo diferido de argumentos estilo %: logger.info("PQR %s", numero)
+- Muestreo de DEBUG y salida JSON estructurada opcionales
+
+Variables de entorno:
+- LOG_ASYNC=0                  Desactiva el pipeline asíncrono (handlers síncronos)
+- LOG_FORMAT=json              Una línea JSON por record en lugar del formato profesional
+- LOG_DEBUG_SAMPLE_RATE=0.1    Fracción de records DEBUG que se conservan
+- LOG_QUEUE_SIZE=10000         Capacidad de la cola; al llenarse se descartan
+                               los DEBUG y se espera espacio para INFO o superior
 """
 
 import os
+import re
+import copy
+import queue
+import atexit
 import logging
+import itertools
+import threading
 import logging.handlers
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 import json
 
+LOG_ASYNC = os.getenv('LOG_ASYNC', '1').lower() not in ('0', 'false', 'no')
+LOG_JSON = os.getenv('LOG_FORMAT', '').lower() == 'json'
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Compilado una sola vez (antes se recompilaba en cada record)
+EMOJI_PATTERN = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002500-\U00002BEF"  # chinese char
+    u"\U00002702-\U000027B0"
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+    u"\U0001f926-\U0001f937"
+    u"\U00010000-\U0010ffff"
+    u"\u2640-\u2642"
+    u"\u2600-\u2B55"
+    u"\u200d"
+    u"\u23cf"
+    u"\u23e9"
+    u"\u231a"
+    u"\ufe0f"  # dingbats
+    u"\u3030"
+    "]+", flags=re.UNICODE)
+
+
+def clean_message(message: str) -> str:
+    """Remueve emojis de un mensaje ya formateado"""
+    if message.isascii():
+        return message.strip()
+    return EMOJI_PATTERN.sub(r'', message).strip()
+
+
+class LazyJSON:
+    """Serializa a JSON solo cuando el record se formatea (en el hilo del listener)"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, ensure_ascii=False, default=str)
+
+
+# Tipos que se pueden formatear después sin riesgo de que cambien
+_DEFERRABLE_ARG_TYPES = (str, bytes, int, float, bool, type(None), date, Path, LazyJSON)
+
+
+def _args_are_deferrable(args: Any) -> bool:
+    if isinstance(args, dict):
+        args = args.values()
+    return all(isinstance(arg, _DEFERRABLE_ARG_TYPES) for arg in args)
+
+
+class DebugSampler(logging.Filter):
+    """Conserva una fracción de los records DEBUG antes de encolarlos"""
+
+    def __init__(self, rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self._every = int(round(1 / self.rate)) if self.rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self._every == 1:
+            return True
+        if self._every == 0:
+            return False
+        return next(self._counter) % self._every == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que registra
+
+    logging.handlers.QueueHandler.prepare() llama a format() antes de
+    encolar; aquí el record viaja sin formatear y el listener aplica el
+    formatter de cada handler real. Los argumentos % solo se resuelven aquí
+    si son mutables (listas, dicts, objetos), para no registrar un estado
+    posterior al de la llamada.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args and not _args_are_deferrable(record.args):
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno > logging.DEBUG:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener cuyo stop() espera espacio en la cola en lugar de fallar si está llena"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogPipeline:
+    """Registro de colas y listeners que escriben en los handlers reales"""
+
+    def __init__(self, queue_size: int = LOG_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._listeners: Dict[DeferredQueueHandler, DrainingQueueListener] = {}
+
+    def create_queue_handler(self, handlers: List[logging.Handler]) -> DeferredQueueHandler:
+        """Crea un QueueHandler y arranca un listener que despacha a `handlers`"""
+        log_queue = queue.Queue(self.queue_size)
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(DebugSampler())
+        listener = DrainingQueueListener(log_queue, *handlers, respect_handler_level=True)
+        with self._lock:
+            self._listeners[queue_handler] = listener
+        listener.start()
+        return queue_handler
+
+    def handlers_for(self, queue_handler: logging.Handler) -> List[logging.Handler]:
+        listener = self._listeners.get(queue_handler)
+        return list(listener.handlers) if listener else []
+
+    def owns(self, handler: logging.Handler) -> bool:
+        return handler in self._listeners
+
+    def flush(self):
+        """Espera a que se escriban todos los records encolados"""
+        for queue_handler, listener in list(self._listeners.items()):
+            if listener._thread is not None:
+                queue_handler.queue.join()
+            for handler in listener.handlers:
+                handler.flush()
+
+    def stop(self):
+        """Vacía las colas y detiene los listeners"""
+        with self._lock:
+            listeners = list(self._listeners.values())
+        for listener in listeners:
+            if listener._thread is not None:
+                listener.stop()
+
+    def dropped_records(self) -> int:
+        return sum(queue_handler.dropped for queue_handler in self._listeners)
+
+
+_pipeline = AsyncLogPipeline()
+atexit.register(_pipeline.stop)
+
+
+def flush_logging() -> None:
+    """Espera a que el pipeline asíncrono escriba lo pendiente"""
+    _pipeline.flush()
+
+
+def shutdown_logging() -> None:
+    """Detiene los listeners del pipeline asíncrono (se llama también al salir)"""
+    _pipeline.stop()
+
+
+class ProfessionalFormatter(logging.Formatter):
+    """
+    [YYYY-MM-DD_HH:MM:SS][servicio][core][componente][LEVEL] - mensaje
+
+    Con json_output=True emite los mismos campos como una línea JSON.
+    """
+
+    def __init__(self, json_output: Optional[bool] = None):
+        super().__init__()
+        self.json_output = LOG_JSON if json_output is None else json_output
+
+    def resolve_fields(self, record: logging.LogRecord, clean_msg: str):
+        """Retorna (servicio, core, componente) a partir del nombre del logger"""
+        # Extraer información del servicio del nombre del logger
+        logger_parts = record.name.split('.')
+        service = 'general'
+        core = 'system'
+        component = 'main'
+
+        # Identificar servicio
+        if 'afinia' in record.name.lower():
+            service = 'afinia'
+        elif 'aire' in record.name.lower():
+            service = 'aire'
+
+        # Identificar core y componente
+        if len(logger_parts) >= 2:
+            core = logger_parts[-2] if len(logger_parts) > 1 else 'main'
+            component = logger_parts[-1]
+
+        return service, core, component
+
+    def format(self, record):
+        # Limpiar mensaje de emojis
+        clean_msg = clean_message(record.getMessage())
+        service, core, component = self.resolve_fields(record, clean_msg)
+        timestamp = self.formatTime(record, '%Y-%m-%d_%H:%M:%S')
+
+        if self.json_output:
+            payload = {
+                'timestamp': timestamp,
+                'service': service,
+                'core': core,
+                'component': component,
+                'level': record.levelname,
+                'logger': record.name,
+                'message': clean_msg
+            }
+            if record.exc_info:
+                payload['exception'] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False)
+
+        # Formato: [YYYY-MM-DD_HH:MM:SS][servicio][core][componente][LEVEL] - mensaje
+        return f"[{timestamp}][{service}][{core}][{component}][{record.levelname}] - {clean_msg}"
+
+
+class GlobalProfessionalFormatter(ProfessionalFormatter):
+    """Formato profesional para loggers de todo el sistema (detecta core/componente por mensaje)"""
+
+    # Mapear nombres conocidos con más detalle
+    NAME_MAPPING = {
+        'BROWSER-MANAGER': {'core': 'browser', 'component': 'manager'},
+        'AUTH-MANAGER': {'core': 'auth', 'component': 'manager'},
+        'DOWNLOAD-MANAGER': {'core': 'download', 'component': 'manager'},
+        'REPORT-PROCESSOR': {'core': 'report', 'component': 'processor'},
+        'PQR-EXTRACTOR': {'core': 'pqr', 'component': 'extractor'},
+        'AFINIA-OV': {'core': 'extractor', 'component': 'afinia_main'},
+        'AFINIA-PQR': {'core': 'pqr', 'component': 'processor'},
+        'AFINIA-PAGINATION': {'core': 'pagination', 'component': 'manager'},
+        'AFINIA-MANAGER': {'core': 'manager', 'component': 'coordinator'},
+        'AFINIA-DOWNLOAD': {'core': 'download', 'component': 'afinia_mgr'},
+        'AFINIA-FILTER': {'core': 'filter', 'component': 'afinia_mgr'},
+        'AFINIA-POPUP': {'core': 'popup', 'component': 'handler'},
+        'AIRE-OV': {'core': 'extractor', 'component': 'aire_main'},
+        'AIRE-PQR': {'core': 'pqr', 'component': 'aire_proc'},
+        'AIRE-PAGINATION': {'core': 'pagination', 'component': 'aire_mgr'}
+    }
+
+    def resolve_fields(self, record: logging.LogRecord, clean_msg: str):
+        # Detectar servicio del nombre del logger
+        logger_parts = record.name.split('.')
+        service = 'general'
+        core = 'system'
+        component = 'main'
+
+        # Identificar servicio
+        if 'afinia' in record.name.lower():
+            service = 'afinia'
+        elif 'aire' in record.name.lower():
+            service = 'aire'
+        elif any(keyword in record.name.lower() for keyword in ['browser', 'auth', 'download', 'report', 'pqr']):
+            # Detectar servicio del contexto si es posible
+            service = 'afinia'  # Default, se puede mejorar con contexto
+
+        # Identificar core y componente
+        if len(logger_parts) >= 2:
+            core = logger_parts[-2] if len(logger_parts) > 1 else 'system'
+            component = logger_parts[-1]
+        elif len(logger_parts) == 1:
+            component = logger_parts[0]
+
+        # Mejorar detección basada en el contenido del mensaje
+        message_text = clean_msg.lower()
+        
+        # Detectar por contexto del mensaje con más granularidad
+        # Orden de prioridad: más específico primero
+        
+        # DETECTAR COMPONENTES ESPECÍFICOS PRIMERO (más específico -> menos específico)
+        
+        # Componentes de gestión del sistema
+        if 'afiniamanager inicializado' in message_text or 'inicializando extractor' in message_text:
+            core = 'system'
+            component = 'main_coordinator'
+        elif 'validando entorno' in message_text or 'credenciales configuradas' in message_text:
+            core = 'system'
+            component = 'environment_validator'
+        elif 'directorios verificados' in message_text:
+            core = 'filesystem'
+            component = 'directory_validator'
+        elif 'rango de fechas' in message_text:
+            core = 'config'
+            component = 'date_configurator'
+        elif 'configuración:' in message_text and 'usuario:' in message_text:
+            core = 'config'
+            component = 'session_configurator'
+        elif 'inicializando componentes modulares' in message_text:
+            core = 'system'
+            component = 'module_initializer'
+        elif 'procesador de pqr inicializado' in message_text:
+            core = 'pqr'
+            component = 'pqr_initializer'
+        elif 'componentes inicializados correctamente' in message_text:
+            core = 'system'
+            component = 'component_validator'
+        
+        # Componentes específicos de PQR
+        elif 'secuencia específica' in message_text or ('paso' in message_text and any(x in message_text for x in ['1', '2', '3', '4', '5'])):
+            core = 'pqr'
+            component = 'sequence_processor'
+        elif 'sgc' in message_text or ('pdf' in message_text and 'generar' in message_text):
+            core = 'pqr'
+            component = 'pdf_generator'
+        elif 'adjunto' in message_text or ('descarga' in message_text and ('pdf' in message_text or 'archivo' in message_text)):
+            core = 'pqr'
+            component = 'attachment_downloader'
+        elif 'json' in message_text and ('extrayendo' in message_text or 'guardando' in message_text):
+            core = 'pqr'
+            component = 'data_extractor'
+        elif 'procesando pqr' in message_text or 'procesamiento de pqr' in message_text:
+            core = 'pqr'
+            component = 'main_processor'
+        elif 'lista iniciando procesamiento' in message_text:
+            core = 'pqr'
+            component = 'batch_processor'
+        elif 'encontrados' in message_text and 'botones' in message_text:
+            core = 'ui'
+            component = 'button_scanner'
+        elif 'total de botones encontrados' in message_text:
+            core = 'ui'
+            component = 'element_counter'
+        elif 'procesando pqr #' in message_text:
+            core = 'pqr'
+            component = 'item_processor'
+        
+        # Componentes de navegación y UI
+        elif 'nueva pestaña' in message_text or 'javascript window.open' in message_text:
+            core = 'browser'
+            component = 'tab_manager'
+        elif 'popup' in message_text or 'modal' in message_text:
+            core = 'ui'
+            component = 'popup_handler'
+        elif 'filtro' in message_text or ('configuración' in message_text and 'fecha' in message_text):
+            core = 'ui'
+            component = 'filter_configurator'
+        elif 'selector' in message_text or 'elemento' in message_text:
+            core = 'ui'
+            component = 'element_finder'
+        
+        # Componentes de autenticación
+        elif 'login' in message_text or 'autenticación' in message_text or 'credenciales' in message_text:
+            core = 'auth'
+            component = 'authenticator'
+        
+        # Componentes de navegación y sección
+        elif 'navegando a sección' in message_text:
+            core = 'navigation'
+            component = 'section_navigator'
+        elif 'navegando a url' in message_text:
+            core = 'navigation'
+            component = 'url_navigator'
+        elif 'navegando' in message_text or 'navegación' in message_text:
+            core = 'browser'
+            component = 'navigator'
+        elif 'timeout' in message_text and 'navegador' in message_text:
+            core = 'browser'
+            component = 'config_manager'
+        elif 'proceso de filtrado' in message_text:
+            core = 'filter'
+            component = 'filter_processor'
+        elif 'configuración de filtros' in message_text:
+            core = 'filter'
+            component = 'filter_configurator'
+        elif 'expandiendo panel' in message_text:
+            core = 'ui'
+            component = 'panel_expander'
+        elif 'configurando estado' in message_text:
+            core = 'form'
+            component = 'state_configurator'
+        elif 'ejecutando búsqueda' in message_text:
+            core = 'search'
+            component = 'search_executor'
+        
+        # Componentes de datos
+        elif 'tabla' in message_text or ('registros' in message_text and 'extra' in message_text):
+            core = 'data'
+            component = 'table_extractor'
+        elif 'procesando resultados' in message_text:
+            core = 'data'
+            component = 'results_processor'
+        
+        # Componentes de gestión
+        elif 'paginación' in message_text or 'checkpoint' in message_text:
+            core = 'pagination'
+            component = 'checkpoint_manager'
+        elif 'inicializando' in message_text and 'componente' in message_text:
+            core = 'system'
+            component = 'initializer'
+        elif 'configurando' in message_text:
+            core = 'config'
+            component = 'configurator'
+        elif 'limpieza' in message_text or 'cleanup' in message_text:
+            core = 'system'
+            component = 'cleanup_manager'
+        
+        # Patrones más específicos por palabras clave
+        elif 'screenshot' in message_text or 'captura' in message_text:
+            core = 'debug'
+            component = 'screenshot_manager'
+        elif 'esperando' in message_text or 'timeout' in message_text:
+            core = 'browser'
+            component = 'wait_manager'
+        elif 'campo' in message_text and ('llenar' in message_text or 'encontrar' in message_text):
+            core = 'form'
+            component = 'field_manager'
+        elif 'botón' in message_text and ('clic' in message_text or 'encontrado' in message_text):
+            core = 'ui'
+            component = 'button_handler'
+        elif 'regla' in message_text and 'procesamiento' in message_text:
+            core = 'config'
+            component = 'rule_processor'
+        elif 'archivo' in message_text and ('guardado' in message_text or 'generado' in message_text):
+            core = 'file'
+            component = 'file_manager'
+        elif 'datos' in message_text and ('tabla' in message_text or 'extraídos' in message_text):
+            core = 'data'
+            component = 'field_extractor'
+        elif 'validando' in message_text or 'verificando' in message_text:
+            core = 'validation'
+            component = 'validator'
+        elif 'directorio' in message_text or 'carpeta' in message_text:
+            core = 'filesystem'
+            component = 'directory_manager'
+        elif 'sesión' in message_text or 'checkpoint' in message_text:
+            core = 'session'
+            component = 'session_manager'
+        
+        # Fallbacks generales
+        elif 'extractor' in message_text or 'extracción' in message_text:
+            core = 'extractor'
+            component = 'coordinator'
+        elif 'manager' in message_text:
+            core = 'system'
+            component = 'manager'
+        elif 'procesamiento' in message_text:
+            core = 'processor'
+            component = 'main'
+        
+        if record.name in self.NAME_MAPPING:
+            core = self.NAME_MAPPING[record.name]['core']
+            component = self.NAME_MAPPING[record.name]['component']
+
+        return service, core, component
+
+
+# Handlers que se pueden mover detrás de una cola sin cambiar su comportamiento
+_QUEUEABLE_HANDLER_TYPES = (
+    logging.StreamHandler,
+    logging.FileHandler,
+    logging.handlers.RotatingFileHandler,
+    logging.handlers.TimedRotatingFileHandler,
+    logging.handlers.WatchedFileHandler,
+)
+
+
 class UnifiedLogger:
     """Clase para manejar el sistema de logging unificado"""
-    
+
     # Configuración de servicios
     SERVICES = {
         'afinia': {
@@ -34,23 +519,29 @@ class UnifiedLogger:
             'description': 'Oficina Virtual Afinia - Extractor'
         },
         'aire': {
-            'name': 'aire', 
+            'name': 'aire',
             'log_file': 'aire_ov.log',
             'description': 'Oficina Virtual Aire - Extractor'
         }
     }
-    
-    def __init__(self, base_logs_dir: str = "data/logs"):
+
+    def __init__(self, base_logs_dir: str = "data/logs", async_logging: Optional[bool] = None,
+                 json_output: Optional[bool] = None):
         """
         Inicializa el sistema de logging unificado
-        
+
         Args:
             base_logs_dir: Directorio base para logs (visible, no oculto)
+            async_logging: Escribir desde un QueueListener (default: LOG_ASYNC)
+            json_output: Salida JSON estructurada (default: LOG_FORMAT=json)
         """
         self.base_logs_dir = Path(base_logs_dir)
+        self.async_logging = LOG_ASYNC if async_logging is None else async_logging
+        self.json_output = LOG_JSON if json_output is None else json_output
         self.loggers = {}
+        self._service_handlers: Dict[str, List[logging.Handler]] = {}
         self._setup_logging_structure()
-    
+
     def _setup_logging_structure(self):
         """Crea la estructura de directorios de logging"""
         # Crear directorio base visible
@@ -94,10 +585,13 @@ class UnifiedLogger:
         self.loggers[logger_name] = logger
         return logger
     
-    def _setup_handlers(self, logger: logging.Logger, service: str):
-        """Configura los handlers para un logger específico"""
+    def _build_service_handlers(self, service: str) -> List[logging.Handler]:
+        """Crea (una sola vez por servicio) los handlers de archivo y consola"""
+        if service in self._service_handlers:
+            return self._service_handlers[service]
+
         service_config = self.SERVICES[service]
-        
+
         # Handler para archivo principal del servicio (con rotación)
         log_file_path = self.base_logs_dir / "current" / service_config['log_file']
         file_handler = logging.handlers.RotatingFileHandler(
@@ -107,72 +601,39 @@ class UnifiedLogger:
             encoding='utf-8'
         )
         file_handler.setLevel(logging.INFO)
-        
+
         # Handler para consola
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        
+
         # Formato profesional sin emojis
         # [YYYY-MM-DD_HH:MM:SS][servicio][core][componente][LEVEL] - mensaje
-        def clean_message(record):
-            # Remover emojis del mensaje
-            import re
-            emoji_pattern = re.compile("["
-                u"\U0001F600-\U0001F64F"  # emoticons
-                u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                u"\U0001F680-\U0001F6FF"  # transport & map
-                u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                u"\U00002500-\U00002BEF"  # chinese char
-                u"\U00002702-\U000027B0"
-                u"\U00002702-\U000027B0"
-                u"\U000024C2-\U0001F251"
-                u"\U0001f926-\U0001f937"
-                u"\U00010000-\U0010ffff"
-                u"\u2640-\u2642" 
-                u"\u2600-\u2B55"
-                u"\u200d"
-                u"\u23cf"
-                u"\u23e9"
-                u"\u231a"
-                u"\ufe0f"  # dingbats
-                u"\u3030"
-                "]+", flags=re.UNICODE)
-            return emoji_pattern.sub(r'', record.getMessage()).strip()
-        
-        class ProfessionalFormatter(logging.Formatter):
-            def format(self, record):
-                # Extraer información del servicio del nombre del logger
-                logger_parts = record.name.split('.')
-                service = 'general'
-                core = 'system'
-                component = 'main'
-                
-                # Identificar servicio
-                if 'afinia' in record.name.lower():
-                    service = 'afinia'
-                elif 'aire' in record.name.lower():
-                    service = 'aire'
-                
-                # Identificar core y componente
-                if len(logger_parts) >= 2:
-                    core = logger_parts[-2] if len(logger_parts) > 1 else 'main'
-                    component = logger_parts[-1]
-                
-                # Limpiar mensaje de emojis
-                clean_msg = clean_message(record)
-                
-                # Formato: [YYYY-MM-DD_HH:MM:SS][servicio][core][componente][LEVEL] - mensaje
-                timestamp = self.formatTime(record, '%Y-%m-%d_%H:%M:%S')
-                return f"[{timestamp}][{service}][{core}][{component}][{record.levelname}] - {clean_msg}"
-        
-        formatter = ProfessionalFormatter()
-        
+        formatter = ProfessionalFormatter(json_output=self.json_output)
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-        
+
+        handlers: List[logging.Handler] = [file_handler, console_handler]
+        if self.async_logging:
+            # El logger solo encola; el listener limpia, formatea y escribe
+            handlers = [_pipeline.create_queue_handler(handlers)]
+
+        self._service_handlers[service] = handlers
+        return handlers
+
+    def _setup_handlers(self, logger: logging.Logger, service: str):
+        """Configura los handlers para un logger específico"""
+        for handler in self._build_service_handlers(service):
+            logger.addHandler(handler)
+
+    def flush(self):
+        """Espera a que se escriban los records pendientes"""
+        if self.async_logging:
+            _pipeline.flush()
+        else:
+            for handlers in self._service_handlers.values():
+                for handler in handlers:
+                    handler.flush()
+
     def log_session_start(self, service: str, session_data: Dict[str, Any]):
         """Registra el inicio de una sesión"""
         logger = self.get_logger(service, "session")
@@ -184,7 +645,7 @@ class UnifiedLogger:
             'data': session_data
         }
         
-        logger.info(f"SESSION_START: {json.dumps(session_info, ensure_ascii=False)}")
+        logger.info("SESSION_START: %s", LazyJSON(session_info))
         
     def log_session_end(self, service: str, session_data: Dict[str, Any]):
         """Registra el fin de una sesión"""
@@ -197,7 +658,7 @@ class UnifiedLogger:
             'data': session_data
         }
         
-        logger.info(f"SESSION_END: {json.dumps(session_info, ensure_ascii=False)}")
+        logger.info("SESSION_END: %s", LazyJSON(session_info))
         
     def log_download(self, service: str, file_info: Dict[str, Any]):
         """Registra una descarga"""
@@ -210,7 +671,7 @@ class UnifiedLogger:
             'file_info': file_info
         }
         
-        logger.info(f"DOWNLOAD: {json.dumps(download_info, ensure_ascii=False)}")
+        logger.info("DOWNLOAD: %s", LazyJSON(download_info))
         
     def log_error(self, service: str, error_info: Dict[str, Any]):
         """Registra un error"""
@@ -223,12 +684,14 @@ class UnifiedLogger:
             'error_info': error_info
         }
         
-        logger.error(f"ERROR: {json.dumps(error_data, ensure_ascii=False)}")
+        logger.error("ERROR: %s", LazyJSON(error_data))
         
     def get_service_stats(self, service: str) -> Dict[str, Any]:
         """Obtiene estadísticas del servicio"""
         service_log_file = self.base_logs_dir / "current" / self.SERVICES[service]['log_file']
         
+        self.flush()
+
         if not service_log_file.exists():
             return {'total_lines': 0, 'file_size': 0, 'last_modified': None}
             
@@ -275,273 +738,41 @@ def setup_service_logging(service: str, component: Optional[str] = None) -> logg
     unified_logger = get_unified_logger()
     return unified_logger.get_logger(service, component)
 
-def setup_professional_logging() -> None:
+def setup_professional_logging(async_logging: Optional[bool] = None, json_output: Optional[bool] = None) -> None:
     """
     Configura el formato profesional para TODOS los loggers del sistema
+
+    Los handlers de archivo/consola existentes quedan detrás de una cola
+    (QueueHandler/QueueListener) salvo que LOG_ASYNC=0.
     """
+    async_logging = LOG_ASYNC if async_logging is None else async_logging
+
     # Obtener todos los loggers existentes
     loggers = [logging.getLogger(name) for name in logging.root.manager.loggerDict]
     loggers.append(logging.getLogger())  # Root logger
-    
+
     # Crear formatter profesional
-    class GlobalProfessionalFormatter(logging.Formatter):
-        def format(self, record):
-            # Limpiar mensaje de emojis
-            import re
-            emoji_pattern = re.compile("["
-                u"\U0001F600-\U0001F64F"  # emoticons
-                u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                u"\U0001F680-\U0001F6FF"  # transport & map
-                u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                u"\U00002500-\U00002BEF"  # chinese char
-                u"\U00002702-\U000027B0"
-                u"\U00002702-\U000027B0"
-                u"\U000024C2-\U0001F251"
-                u"\U0001f926-\U0001f937"
-                u"\U00010000-\U0010ffff"
-                u"\u2640-\u2642" 
-                u"\u2600-\u2B55"
-                u"\u200d"
-                u"\u23cf"
-                u"\u23e9"
-                u"\u231a"
-                u"\ufe0f"  # dingbats
-                u"\u3030"
-                "]+", flags=re.UNICODE)
-            
-            clean_msg = emoji_pattern.sub(r'', record.getMessage()).strip()
-            
-            # Detectar servicio del nombre del logger
-            logger_parts = record.name.split('.')
-            service = 'general'
-            core = 'system'
-            component = 'main'
-            
-            # Identificar servicio
-            if 'afinia' in record.name.lower():
-                service = 'afinia'
-            elif 'aire' in record.name.lower():
-                service = 'aire'
-            elif any(keyword in record.name.lower() for keyword in ['browser', 'auth', 'download', 'report', 'pqr']):
-                # Detectar servicio del contexto si es posible
-                service = 'afinia'  # Default, se puede mejorar con contexto
-            
-            # Identificar core y componente
-            if len(logger_parts) >= 2:
-                core = logger_parts[-2] if len(logger_parts) > 1 else 'system'
-                component = logger_parts[-1]
-            elif len(logger_parts) == 1:
-                component = logger_parts[0]
-            
-            # Mejorar detección basada en el contenido del mensaje
-            message_text = clean_msg.lower()
-            
-            # Detectar por contexto del mensaje con más granularidad
-            # Orden de prioridad: más específico primero
-            
-            # DETECTAR COMPONENTES ESPECÍFICOS PRIMERO (más específico -> menos específico)
-            
-            # Componentes de gestión del sistema
-            if 'afiniamanager inicializado' in message_text or 'inicializando extractor' in message_text:
-                core = 'system'
-                component = 'main_coordinator'
-            elif 'validando entorno' in message_text or 'credenciales configuradas' in message_text:
-                core = 'system'
-                component = 'environment_validator'
-            elif 'directorios verificados' in message_text:
-                core = 'filesystem'
-                component = 'directory_validator'
-            elif 'rango de fechas' in message_text:
-                core = 'config'
-                component = 'date_configurator'
-            elif 'configuración:' in message_text and 'usuario:' in message_text:
-                core = 'config'
-                component = 'session_configurator'
-            elif 'inicializando componentes modulares' in message_text:
-                core = 'system'
-                component = 'module_initializer'
-            elif 'procesador de pqr inicializado' in message_text:
-                core = 'pqr'
-                component = 'pqr_initializer'
-            elif 'componentes inicializados correctamente' in message_text:
-                core = 'system'
-                component = 'component_validator'
-            
-            # Componentes específicos de PQR
-            elif 'secuencia específica' in message_text or ('paso' in message_text and any(x in message_text for x in ['1', '2', '3', '4', '5'])):
-                core = 'pqr'
-                component = 'sequence_processor'
-            elif 'sgc' in message_text or ('pdf' in message_text and 'generar' in message_text):
-                core = 'pqr'
-                component = 'pdf_generator'
-            elif 'adjunto' in message_text or ('descarga' in message_text and ('pdf' in message_text or 'archivo' in message_text)):
-                core = 'pqr'
-                component = 'attachment_downloader'
-            elif 'json' in message_text and ('extrayendo' in message_text or 'guardando' in message_text):
-                core = 'pqr'
-                component = 'data_extractor'
-            elif 'procesando pqr' in message_text or 'procesamiento de pqr' in message_text:
-                core = 'pqr'
-                component = 'main_processor'
-            elif 'lista iniciando procesamiento' in message_text:
-                core = 'pqr'
-                component = 'batch_processor'
-            elif 'encontrados' in message_text and 'botones' in message_text:
-                core = 'ui'
-                component = 'button_scanner'
-            elif 'total de botones encontrados' in message_text:
-                core = 'ui'
-                component = 'element_counter'
-            elif 'procesando pqr #' in message_text:
-                core = 'pqr'
-                component = 'item_processor'
-            
-            # Componentes de navegación y UI
-            elif 'nueva pestaña' in message_text or 'javascript window.open' in message_text:
-                core = 'browser'
-                component = 'tab_manager'
-            elif 'popup' in message_text or 'modal' in message_text:
-                core = 'ui'
-                component = 'popup_handler'
-            elif 'filtro' in message_text or ('configuración' in message_text and 'fecha' in message_text):
-                core = 'ui'
-                component = 'filter_configurator'
-            elif 'selector' in message_text or 'elemento' in message_text:
-                core = 'ui'
-                component = 'element_finder'
-            
-            # Componentes de autenticación
-            elif 'login' in message_text or 'autenticación' in message_text or 'credenciales' in message_text:
-                core = 'auth'
-                component = 'authenticator'
-            
-            # Componentes de navegación y sección
-            elif 'navegando a sección' in message_text:
-                core = 'navigation'
-                component = 'section_navigator'
-            elif 'navegando a url' in message_text:
-                core = 'navigation'
-                component = 'url_navigator'
-            elif 'navegando' in message_text or 'navegación' in message_text:
-                core = 'browser'
-                component = 'navigator'
-            elif 'timeout' in message_text and 'navegador' in message_text:
-                core = 'browser'
-                component = 'config_manager'
-            elif 'proceso de filtrado' in message_text:
-                core = 'filter'
-                component = 'filter_processor'
-            elif 'configuración de filtros' in message_text:
-                core = 'filter'
-                component = 'filter_configurator'
-            elif 'expandiendo panel' in message_text:
-                core = 'ui'
-                component = 'panel_expander'
-            elif 'configurando estado' in message_text:
-                core = 'form'
-                component = 'state_configurator'
-            elif 'ejecutando búsqueda' in message_text:
-                core = 'search'
-                component = 'search_executor'
-            
-            # Componentes de datos
-            elif 'tabla' in message_text or ('registros' in message_text and 'extra' in message_text):
-                core = 'data'
-                component = 'table_extractor'
-            elif 'procesando resultados' in message_text:
-                core = 'data'
-                component = 'results_processor'
-            
-            # Componentes de gestión
-            elif 'paginación' in message_text or 'checkpoint' in message_text:
-                core = 'pagination'
-                component = 'checkpoint_manager'
-            elif 'inicializando' in message_text and 'componente' in message_text:
-                core = 'system'
-                component = 'initializer'
-            elif 'configurando' in message_text:
-                core = 'config'
-                component = 'configurator'
-            elif 'limpieza' in message_text or 'cleanup' in message_text:
-                core = 'system'
-                component = 'cleanup_manager'
-            
-            # Patrones más específicos por palabras clave
-            elif 'screenshot' in message_text or 'captura' in message_text:
-                core = 'debug'
-                component = 'screenshot_manager'
-            elif 'esperando' in message_text or 'timeout' in message_text:
-                core = 'browser'
-                component = 'wait_manager'
-            elif 'campo' in message_text and ('llenar' in message_text or 'encontrar' in message_text):
-                core = 'form'
-                component = 'field_manager'
-            elif 'botón' in message_text and ('clic' in message_text or 'encontrado' in message_text):
-                core = 'ui'
-                component = 'button_handler'
-            elif 'regla' in message_text and 'procesamiento' in message_text:
-                core = 'config'
-                component = 'rule_processor'
-            elif 'archivo' in message_text and ('guardado' in message_text or 'generado' in message_text):
-                core = 'file'
-                component = 'file_manager'
-            elif 'datos' in message_text and ('tabla' in message_text or 'extraídos' in message_text):
-                core = 'data'
-                component = 'field_extractor'
-            elif 'validando' in message_text or 'verificando' in message_text:
-                core = 'validation'
-                component = 'validator'
-            elif 'directorio' in message_text or 'carpeta' in message_text:
-                core = 'filesystem'
-                component = 'directory_manager'
-            elif 'sesión' in message_text or 'checkpoint' in message_text:
-                core = 'session'
-                component = 'session_manager'
-            
-            # Fallbacks generales
-            elif 'extractor' in message_text or 'extracción' in message_text:
-                core = 'extractor'
-                component = 'coordinator'
-            elif 'manager' in message_text:
-                core = 'system'
-                component = 'manager'
-            elif 'procesamiento' in message_text:
-                core = 'processor'
-                component = 'main'
-            
-            # Mapear nombres conocidos con más detalle
-            name_mapping = {
-                'BROWSER-MANAGER': {'core': 'browser', 'component': 'manager'},
-                'AUTH-MANAGER': {'core': 'auth', 'component': 'manager'},
-                'DOWNLOAD-MANAGER': {'core': 'download', 'component': 'manager'},
-                'REPORT-PROCESSOR': {'core': 'report', 'component': 'processor'},
-                'PQR-EXTRACTOR': {'core': 'pqr', 'component': 'extractor'},
-                'AFINIA-OV': {'core': 'extractor', 'component': 'afinia_main'},
-                'AFINIA-PQR': {'core': 'pqr', 'component': 'processor'},
-                'AFINIA-PAGINATION': {'core': 'pagination', 'component': 'manager'},
-                'AFINIA-MANAGER': {'core': 'manager', 'component': 'coordinator'},
-                'AFINIA-DOWNLOAD': {'core': 'download', 'component': 'afinia_mgr'},
-                'AFINIA-FILTER': {'core': 'filter', 'component': 'afinia_mgr'},
-                'AFINIA-POPUP': {'core': 'popup', 'component': 'handler'},
-                'AIRE-OV': {'core': 'extractor', 'component': 'aire_main'},
-                'AIRE-PQR': {'core': 'pqr', 'component': 'aire_proc'},
-                'AIRE-PAGINATION': {'core': 'pagination', 'component': 'aire_mgr'}
-            }
-            
-            if record.name in name_mapping:
-                core = name_mapping[record.name]['core']
-                component = name_mapping[record.name]['component']
-            
-            # Formato: [YYYY-MM-DD_HH:MM:SS][servicio][core][componente][LEVEL] - mensaje
-            timestamp = self.formatTime(record, '%Y-%m-%d_%H:%M:%S')
-            return f"[{timestamp}][{service}][{core}][{component}][{record.levelname}] - {clean_msg}"
-    
+    professional_formatter = GlobalProfessionalFormatter(json_output=json_output)
+
     # Aplicar formatter a todos los handlers
-    professional_formatter = GlobalProfessionalFormatter()
-    
     for logger in loggers:
-        for handler in logger.handlers:
+        if isinstance(logger, logging.PlaceHolder):
+            continue
+        queueable = []
+        for handler in list(logger.handlers):
+            if _pipeline.owns(handler):
+                for target in _pipeline.handlers_for(handler):
+                    target.setFormatter(professional_formatter)
+                continue
             handler.setFormatter(professional_formatter)
+            if async_logging and type(handler) in _QUEUEABLE_HANDLER_TYPES:
+                queueable.append(handler)
+
+        if queueable:
+            for handler in queueable:
+                logger.removeHandler(handler)
+            logger.addHandler(_pipeline.create_queue_handler(queueable))
+
 
 def initialize_professional_logging() -> None:
     """
@@ -574,7 +805,7 @@ def log_system_event(service: str, event_type: str, data: Dict[str, Any]):
         'data': data
     }
     
-    logger.info(f"SYSTEM_EVENT: {json.dumps(event_info, ensure_ascii=False)}")
+    logger.info("SYSTEM_EVENT: %s", LazyJSON(event_info))
 
 def get_all_services_stats() -> Dict[str, Dict[str, Any]]:
     """
@@ -22,6 +22,11 @@ Componentes Principales:
  * Manejo de contextos y páginas
  * Gestión de viewport y configuraciones de navegador
  * Soporte para modo headless y visual
+ * Reciclado de contexto/navegador conservando la sesión
+
+- browser_governor.py: Control de recursos de Chromium en corridas largas
+ * RSS del navegador, pestañas por contexto y métricas DOM/JS
+ * Reciclado automático y reanudación sin login
 
 - download_manager.py: Gestión de descargas de archivos
  * Configuración de directorios de descarga
@@ -63,6 +68,7 @@ Fecha: Octubre 2025
 from .authentication import AuthenticationManager
 from .base_extractor import BaseExtractor
 from .browser_manager import BrowserManager
+from .browser_governor import BrowserResourceGovernor, GovernorThresholds
 from .download_manager import DownloadManager
 
 __version__ = "1.0.0"
@@ -72,5 +78,7 @@ __all__ = [
  "AuthenticationManager",
  "BaseExtractor",
  "BrowserManager",
+ "BrowserResourceGovernor",
+ "GovernorThresholds",
  "DownloadManager",
 ]
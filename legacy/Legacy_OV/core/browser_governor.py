@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Browser Governor - Control de Recursos de Chromium
+=================================================
+
+En corridas masivas las páginas de detalle, PDFs y descargas se acumulan en
+un único BrowserContext y la memoria de Chromium crece sin límite. El
+gobernador vigila, en puntos seguros entre páginas de la grilla:
+
+- RSS total de los procesos Chromium del extractor (psutil, opcional)
+- Pestañas abiertas y pestañas creadas durante la vida del contexto
+- Nodos DOM y listeners JS de la página principal (métricas CDP)
+
+Al superar un umbral captura la sesión (storage_state + sessionStorage),
+recicla el contexto (o relanza el navegador si la memoria no baja) y ejecuta
+los callbacks de reanudación del extractor, que vuelven a la grilla filtrada
+sin login; la paginación continúa desde su checkpoint/journal.
+
+Umbrales por variables de entorno (BROWSER_MAX_RSS_MB, BROWSER_RESTART_RSS_MB,
+BROWSER_MAX_OPEN_PAGES, BROWSER_MAX_PAGES_PER_CONTEXT, BROWSER_MAX_DOM_NODES,
+BROWSER_MAX_JS_LISTENERS, BROWSER_GOVERNOR_INTERVAL). BROWSER_GOVERNOR=0 lo
+desactiva.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import os
+import time
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger('BROWSER-GOVERNOR')
+
+BROWSER_PROCESS_NAMES = ("chrom", "headless_shell")
+
+ResumeCallback = Callable[[Any], Awaitable[None]]
+
+
+def governor_enabled() -> bool:
+    """El gobernador está activo salvo BROWSER_GOVERNOR=0"""
+    return os.getenv('BROWSER_GOVERNOR', '1').lower() not in ('0', 'false', 'no')
+
+
+@dataclass
+class GovernorThresholds:
+    """Umbrales de reciclado (0 desactiva el criterio)"""
+    max_browser_rss_mb: float = 1500.0
+    browser_restart_rss_mb: float = 2500.0
+    max_open_pages: int = 6
+    max_pages_per_context: int = 400
+    max_dom_nodes: int = 150000
+    max_js_listeners: int = 50000
+    check_interval_seconds: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> 'GovernorThresholds':
+        return cls(
+            max_browser_rss_mb=float(os.getenv('BROWSER_MAX_RSS_MB', cls.max_browser_rss_mb)),
+            browser_restart_rss_mb=float(os.getenv('BROWSER_RESTART_RSS_MB', cls.browser_restart_rss_mb)),
+            max_open_pages=int(os.getenv('BROWSER_MAX_OPEN_PAGES', cls.max_open_pages)),
+            max_pages_per_context=int(os.getenv('BROWSER_MAX_PAGES_PER_CONTEXT', cls.max_pages_per_context)),
+            max_dom_nodes=int(os.getenv('BROWSER_MAX_DOM_NODES', cls.max_dom_nodes)),
+            max_js_listeners=int(os.getenv('BROWSER_MAX_JS_LISTENERS', cls.max_js_listeners)),
+            check_interval_seconds=float(os.getenv('BROWSER_GOVERNOR_INTERVAL', cls.check_interval_seconds))
+        )
+
+
+@dataclass
+class ResourceSample:
+    """Medición de recursos del navegador"""
+    rss_mb: float = 0.0
+    browser_processes: int = 0
+    open_pages: int = 0
+    pages_opened: int = 0
+    dom_nodes: int = 0
+    js_listeners: int = 0
+    documents: int = 0
+    js_heap_mb: float = 0.0
+
+
+class BrowserResourceGovernor:
+    """
+    Recicla el contexto/navegador de un BrowserManager cuando supera umbrales
+
+    Uso (en un punto seguro, entre páginas de la grilla):
+        governor = BrowserResourceGovernor(browser_manager, name='afinia')
+        governor.add_resume_callback(volver_a_grilla)
+        new_page = await governor.checkpoint()
+        if new_page is not None:
+            ...  # la grilla está en la página 1 con los filtros reaplicados
+    """
+
+    def __init__(self, browser_manager, thresholds: Optional[GovernorThresholds] = None,
+                 name: str = "browser"):
+        self.browser_manager = browser_manager
+        self.thresholds = thresholds or GovernorThresholds.from_env()
+        self.name = name
+        self.context_recycles = 0
+        self.browser_restarts = 0
+        self.last_sample: Optional[ResourceSample] = None
+        self.peak_rss_mb = 0.0
+        self._resume_callbacks: List[ResumeCallback] = []
+        self._pages_opened = 0
+        self._watched_context = None
+        self._cdp_session = None
+        self._cdp_page = None
+        self._last_check = time.monotonic()
+        self._last_action: Optional[str] = None
+        self._browser_processes: Dict[int, Any] = {}
+        self._watch_context()
+
+        logger.info(f"[browser_governor][init] {name}: RSS máx. {self.thresholds.max_browser_rss_mb:.0f} MB, "
+                    f"pestañas por contexto {self.thresholds.max_pages_per_context}, "
+                    f"revisión cada {self.thresholds.check_interval_seconds:.0f}s"
+                    f"{'' if PSUTIL_AVAILABLE else ' (sin psutil: RSS no disponible)'}")
+
+    @property
+    def page(self):
+        return self.browser_manager.page
+
+    def add_resume_callback(self, callback: ResumeCallback):
+        """Registrar una corrutina que recibe la página nueva y restaura la vista de trabajo"""
+        self._resume_callbacks.append(callback)
+
+    def _watch_context(self):
+        """Contar las pestañas que abre el contexto actual"""
+        context = self.browser_manager.context
+        if context is None or context is self._watched_context:
+            return
+        self._watched_context = context
+        self._pages_opened = len(context.pages)
+        self._cdp_session = None
+        self._cdp_page = None
+        context.on('page', self._on_page)
+
+    def _on_page(self, _page):
+        self._pages_opened += 1
+
+    # ------------------------------------------------------------------
+    # Medición
+    # ------------------------------------------------------------------
+
+    async def sample(self) -> ResourceSample:
+        """Medir RSS de Chromium, pestañas y métricas CDP de la página principal"""
+        self._watch_context()
+        sample = ResourceSample(pages_opened=self._pages_opened)
+        context = self.browser_manager.context
+        if context is not None:
+            sample.open_pages = len(context.pages)
+
+        if PSUTIL_AVAILABLE:
+            sample.rss_mb, sample.browser_processes = self._browser_rss()
+
+        metrics = await self._page_metrics()
+        sample.dom_nodes = int(metrics.get('Nodes', 0))
+        sample.js_listeners = int(metrics.get('JSEventListeners', 0))
+        sample.documents = int(metrics.get('Documents', 0))
+        sample.js_heap_mb = round(metrics.get('JSHeapUsedSize', 0) / 1024 / 1024, 1)
+
+        self.last_sample = sample
+        self.peak_rss_mb = max(self.peak_rss_mb, sample.rss_mb)
+        return sample
+
+    def _browser_rss(self) -> Tuple[float, int]:
+        """RSS sumado de los procesos Chromium hijos de este proceso"""
+        rss = 0
+        count = 0
+        alive = {}
+        try:
+            children = psutil.Process().children(recursive=True)
+        except psutil.Error:
+            return 0.0, 0
+        for child in children:
+            try:
+                if not any(key in child.name().lower() for key in BROWSER_PROCESS_NAMES):
+                    continue
+                process = self._browser_processes.get(child.pid, child)
+                rss += process.memory_info().rss
+                alive[child.pid] = process
+                count += 1
+            except psutil.Error:
+                continue
+        self._browser_processes = alive
+        return round(rss / 1024 / 1024, 1), count
+
+    async def _page_metrics(self) -> Dict[str, float]:
+        """Performance.getMetrics de la página principal (solo Chromium)"""
+        page = self.browser_manager.page
+        context = self.browser_manager.context
+        if page is None or context is None or page.is_closed():
+            return {}
+        try:
+            if self._cdp_session is None or self._cdp_page is not page:
+                self._cdp_session = await context.new_cdp_session(page)
+                self._cdp_page = page
+                await self._cdp_session.send('Performance.enable')
+            response = await self._cdp_session.send('Performance.getMetrics')
+            return {metric['name']: metric['value'] for metric in response.get('metrics', [])}
+        except Exception as e:
+            logger.debug(f"[browser_governor][metrics] Métricas CDP no disponibles: {e}")
+            self._cdp_session = None
+            return {}
+
+    def evaluate(self, sample: ResourceSample) -> Tuple[Optional[str], str]:
+        """
+        Decidir la acción para una medición
+
+        Returns:
+            ('context' | 'browser' | None, motivo)
+        """
+        t = self.thresholds
+        if t.browser_restart_rss_mb and sample.rss_mb >= t.browser_restart_rss_mb:
+            return 'browser', f"RSS {sample.rss_mb:.0f} MB >= {t.browser_restart_rss_mb:.0f} MB"
+
+        reasons = []
+        if t.max_browser_rss_mb and sample.rss_mb >= t.max_browser_rss_mb:
+            reasons.append(f"RSS {sample.rss_mb:.0f} MB")
+        if t.max_open_pages and sample.open_pages > t.max_open_pages:
+            reasons.append(f"{sample.open_pages} pestañas abiertas")
+        if t.max_pages_per_context and sample.pages_opened >= t.max_pages_per_context:
+            reasons.append(f"{sample.pages_opened} pestañas en el contexto")
+        if t.max_dom_nodes and sample.dom_nodes >= t.max_dom_nodes:
+            reasons.append(f"{sample.dom_nodes:,} nodos DOM")
+        if t.max_js_listeners and sample.js_listeners >= t.max_js_listeners:
+            reasons.append(f"{sample.js_listeners:,} listeners JS")
+        if not reasons:
+            return None, ""
+
+        # Si la memoria sigue alta justo después de reciclar el contexto, el
+        # crecimiento está en el proceso del navegador: relanzarlo
+        if (self._last_action == 'context' and t.max_browser_rss_mb
+                and sample.rss_mb >= t.max_browser_rss_mb):
+            return 'browser', f"RSS {sample.rss_mb:.0f} MB tras reciclar el contexto"
+        return 'context', ", ".join(reasons)
+
+    # ------------------------------------------------------------------
+    # Reciclado
+    # ------------------------------------------------------------------
+
+    async def checkpoint(self, force: bool = False) -> Optional[Any]:
+        """
+        Punto seguro: medir (cada check_interval_seconds) y reciclar si hace falta
+
+        Args:
+            force: Medir aunque no haya pasado el intervalo
+
+        Returns:
+            La página nueva si hubo reciclado (ya reanudada), None si no
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.thresholds.check_interval_seconds:
+            return None
+        self._last_check = now
+
+        sample = await self.sample()
+        action, reason = self.evaluate(sample)
+        if action is None:
+            self._last_action = None
+            logger.debug(f"[browser_governor][checkpoint] {self.name}: {asdict(sample)}")
+            return None
+
+        logger.warning(f"[browser_governor][checkpoint] {self.name}: reciclando "
+                       f"{'navegador' if action == 'browser' else 'contexto'} ({reason})")
+        return await self.recycle(restart_browser=action == 'browser')
+
+    async def recycle(self, restart_browser: bool = False) -> Any:
+        """Reciclar contexto/navegador conservando la sesión y reanudar la vista de trabajo"""
+        started = time.monotonic()
+        snapshot = await self.browser_manager.snapshot_session()
+        page = await self.browser_manager.recycle_context(restart_browser=restart_browser, snapshot=snapshot)
+        self._watch_context()
+
+        for callback in self._resume_callbacks:
+            await callback(page)
+
+        if restart_browser:
+            self.browser_restarts += 1
+        else:
+            self.context_recycles += 1
+        self._last_action = 'browser' if restart_browser else 'context'
+        self._last_check = time.monotonic()
+
+        logger.info(f"[browser_governor][recycle] {self.name}: sesión reanudada en "
+                    f"{time.monotonic() - started:.1f}s (contextos reciclados: {self.context_recycles}, "
+                    f"navegadores relanzados: {self.browser_restarts})")
+        return self.browser_manager.page
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'context_recycles': self.context_recycles,
+            'browser_restarts': self.browser_restarts,
+            'peak_rss_mb': self.peak_rss_mb,
+            'last_sample': asdict(self.last_sample) if self.last_sample else None
+        }
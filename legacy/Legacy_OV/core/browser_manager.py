@@ -15,11 +15,13 @@ Características principales:
 - Gestión automática de recursos (cleanup)
 - Screenshots automáticos para debugging
 - Timeouts optimizados por defecto
+- Reciclado de contexto/navegador conservando la sesión (ver browser_governor.py)
 
 Basado en la implementación exitosa de oficina_virtual_afinia_extractor_new.py
 """
 
 import os
+import json
 import time
 import asyncio
 import logging
@@ -127,6 +129,7 @@ class BrowserManager:
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.contexts_created = 0
 
         # Asegurar que el directorio de screenshots existe
         os.makedirs(self.screenshots_dir, exist_ok=True)
@@ -154,59 +157,154 @@ class BrowserManager:
                 args=self.chrome_args
             )
 
-            # Crear contexto del navegador
-            self.context = await self.browser.new_context(
-                viewport=self.viewport,
-                device_scale_factor=0.8,  # Factor de escala optimizado para ver más contenido
-                accept_downloads=True,
-                ignore_https_errors=True,
-                java_script_enabled=True,  # Habilitar JavaScript para funcionalidad completa
-                bypass_csp=True,  # Bypass Content Security Policy si es necesario
-                extra_http_headers={
-                    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
-                }
-            )
-
-            # Crear nueva página
-            self.page = await self.context.new_page()
-
-            # Configurar timeout por defecto
-            self.page.set_default_timeout(self.timeout)
-            self.context.set_default_timeout(self.timeout)
+            # Crear contexto y página configurados
+            self.context = await self.browser.new_context(**self._context_options())
+            self.page = await self._open_page()
+            self.contexts_created = 1
             
             # Debug: Verificar timeout configurado
             logger.info(f"Timeout configurado en página y contexto: {self.timeout}ms")
 
-            # Configurar viewport
-            await self.page.set_viewport_size(self.viewport)
+            logger.info("Navegador configurado exitosamente")
+            return self.browser, self.page
+
+        except Exception as e:
+            logger.error(f"Error configurando navegador: {e}")
+            await self.cleanup()
+            raise
 
-            # Aplicar script de inicialización para zoom
-            await self.page.add_init_script("""
-                // Aplicar zoom out CSS al documento
+    def _context_options(self, storage_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Opciones de new_context (compartidas por setup_browser y el reciclado)"""
+        options = dict(
+            viewport=self.viewport,
+            device_scale_factor=0.8,  # Factor de escala optimizado para ver más contenido
+            accept_downloads=True,
+            ignore_https_errors=True,
+            java_script_enabled=True,  # Habilitar JavaScript para funcionalidad completa
+            bypass_csp=True,  # Bypass Content Security Policy si es necesario
+            extra_http_headers={
+                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
+            }
+        )
+        if storage_state is not None:
+            options['storage_state'] = storage_state
+        return options
+
+    async def _open_page(self) -> Page:
+        """Crear la página principal del contexto con timeouts, viewport y zoom"""
+        page = await self.context.new_page()
+
+        # Configurar timeout por defecto
+        page.set_default_timeout(self.timeout)
+        self.context.set_default_timeout(self.timeout)
+
+        # Configurar viewport
+        await page.set_viewport_size(self.viewport)
+
+        # Aplicar script de inicialización para zoom
+        await page.add_init_script("""
+            // Aplicar zoom out CSS al documento
+            document.addEventListener('DOMContentLoaded', function() {
+                document.body.style.zoom = '0.75';
+                document.documentElement.style.zoom = '0.75';
+            });
+
+            // Aplicar zoom inmediatamente si el DOM ya está cargado
+            if (document.readyState === 'loading') {
                 document.addEventListener('DOMContentLoaded', function() {
                     document.body.style.zoom = '0.75';
                     document.documentElement.style.zoom = '0.75';
                 });
+            } else {
+                document.body.style.zoom = '0.75';
+                document.documentElement.style.zoom = '0.75';
+            }
+        """)
+        return page
+
+    async def snapshot_session(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Capturar la sesión autenticada del contexto actual.
 
-                // Aplicar zoom inmediatamente si el DOM ya está cargado
-                if (document.readyState === 'loading') {
-                    document.addEventListener('DOMContentLoaded', function() {
-                        document.body.style.zoom = '0.75';
-                        document.documentElement.style.zoom = '0.75';
-                    });
-                } else {
-                    document.body.style.zoom = '0.75';
-                    document.documentElement.style.zoom = '0.75';
-                }
-            """)
+        storage_state() cubre cookies y localStorage; el sessionStorage de la
+        página principal se guarda aparte porque Playwright no lo incluye.
 
-            logger.info("Navegador configurado exitosamente")
-            return self.browser, self.page
+        Args:
+            path: Archivo JSON opcional donde persistir el storage_state
+
+        Returns:
+            Dict con 'storage_state', 'session_storage', 'origin' y 'url'
+        """
+        if not self.context:
+            raise Exception("Contexto no inicializado. Ejecutar setup_browser() primero.")
+
+        storage_state = await self.context.storage_state(path=path)
+        snapshot = {'storage_state': storage_state, 'session_storage': {}, 'origin': None,
+                    'url': self.page.url if self.page else None}
+        if self.page and not self.page.is_closed():
+            try:
+                snapshot['origin'] = await self.page.evaluate("() => window.location.origin")
+                snapshot['session_storage'] = await self.page.evaluate(
+                    "() => Object.fromEntries(Object.entries(window.sessionStorage))")
+            except Exception as e:
+                logger.debug(f"sessionStorage no disponible: {e}")
+        return snapshot
+
+    async def recycle_context(self, restart_browser: bool = False,
+                              snapshot: Optional[Dict[str, Any]] = None) -> Page:
+        """
+        Reemplazar el contexto (o el navegador completo) conservando la sesión.
 
+        Cierra páginas, descargas y caché del contexto actual y crea uno nuevo
+        con el mismo storage_state, así no hace falta volver a hacer login.
+
+        Args:
+            restart_browser: Relanzar también el proceso de Chromium
+            snapshot: Sesión ya capturada con snapshot_session() (si no, se captura aquí)
+
+        Returns:
+            Page: Nueva página principal (queda en about:blank)
+        """
+        if not self.browser or not self.context:
+            raise Exception("Navegador no inicializado. Ejecutar setup_browser() primero.")
+
+        snapshot = snapshot or await self.snapshot_session()
+
+        try:
+            await self.context.close()
         except Exception as e:
-            logger.error(f"Error configurando navegador: {e}")
-            await self.cleanup()
-            raise
+            logger.warning(f"Error cerrando contexto anterior: {e}")
+        self.context = None
+        self.page = None
+
+        if restart_browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logger.warning(f"Error cerrando navegador anterior: {e}")
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=self.chrome_args
+            )
+
+        self.context = await self.browser.new_context(**self._context_options(snapshot['storage_state']))
+
+        # sessionStorage se restaura antes de que corra el código de la página
+        if snapshot.get('session_storage') and snapshot.get('origin'):
+            await self.context.add_init_script(
+                "(([origin, entries]) => {"
+                " if (window.location.origin !== origin) return;"
+                " for (const [key, value] of Object.entries(entries)) {"
+                "  if (window.sessionStorage.getItem(key) === null) window.sessionStorage.setItem(key, value);"
+                " }"
+                f"}})({json.dumps([snapshot['origin'], snapshot['session_storage']])})"
+            )
+
+        self.page = await self._open_page()
+        self.contexts_created += 1
+        logger.info(f"{'Navegador' if restart_browser else 'Contexto'} reciclado "
+                    f"(contexto #{self.contexts_created}), sesión conservada")
+        return self.page
 
     async def navigate_to_url(self, url: str, wait_until: str = 'networkidle', timeout: int = None) -> bool:
         """
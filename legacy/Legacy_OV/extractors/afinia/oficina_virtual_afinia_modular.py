@@ -20,6 +20,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 sys.path.insert(0, project_root)
 
 from src.core.browser_manager import BrowserManager
+from src.core.browser_governor import BrowserResourceGovernor, governor_enabled
 from src.core.authentication import AuthenticationManager
 from src.core.download_manager import DownloadManager
 from src.components.popup_handler import PopupHandler
@@ -31,6 +32,8 @@ from src.components.afinia_download_manager import AfiniaDownloadManager
 from src.components.afinia_filter_manager import AfiniaFilterManager
 from src.components.afinia_pqr_processor import AfiniaPQRProcessor
 from src.components.filter_manager import FilterManager, FilterConfig, FilterType
+from src.components.partitioned_pagination import CrawlSession
+from src.services.pqr_pdf_renderer import drain_pdf_renders
 from src.processors.afinia.logger import MetricsCollector
 from src.config.config import OficinaVirtualConfig
 from src.config.afinia_config import setup_afinia_components
@@ -48,7 +51,8 @@ class OficinaVirtualAfiniaModular:
     """
 
     def __init__(self, headless: bool = True, visual_mode: bool = False, 
-                 enable_pqr_processing: bool = False, max_pqr_records: int = 5):
+                 enable_pqr_processing: bool = False, max_pqr_records: int = 5,
+                 download_path: Optional[str] = None):
         """
         Inicializa el extractor modular de Afinia
 
@@ -57,18 +61,22 @@ class OficinaVirtualAfiniaModular:
             visual_mode: Ejecutar en modo visual para debugging
             enable_pqr_processing: Habilitar procesamiento específico de PQR
             max_pqr_records: Número máximo de registros PQR a procesar
+            download_path: Directorio de salida (absoluto) en lugar del por defecto
         """
         self.headless = headless if not visual_mode else False
         self.visual_mode = visual_mode
         self.enable_pqr_processing = enable_pqr_processing
         self.max_pqr_records = max_pqr_records
         self.config = self._load_config()
+        if download_path:
+            self.config['download_path'] = str(download_path)
+            self.config['screenshots_dir'] = str(Path(download_path) / 'screenshots')
 
         # Componentes principales
         self.browser_manager = None
         self.browser = None
         self.page = None
-        self.metrics = MetricsCollector()
+        self.metrics = MetricsCollector(company='afinia')
 
         # Componentes modulares
         self.auth_manager = None
@@ -83,6 +91,12 @@ class OficinaVirtualAfiniaModular:
         self.afinia_pqr_processor = None  # Nuevo procesador específico de PQR
         self.filter_manager = None
 
+        # Gobernador de recursos del navegador y filtros para reanudar tras reciclar
+        self.resource_governor = None
+        self._filter_kwargs = {'days_back': 1}
+        # Credenciales de la corrida: las sesiones extra del recorrido particionado las reutilizan
+        self._credentials = (None, None)
+
         logger.info(f"OficinaVirtualAfiniaModular inicializado - Modo: {'Visual' if visual_mode else 'Headless'}")
 
     def _load_config(self) -> Dict[str, Any]:
@@ -220,7 +234,8 @@ class OficinaVirtualAfiniaModular:
             self.pqr_extractor = PQRDetailExtractor(
                 self.page,
                 self.config['download_path'],
-                self.config['screenshots_dir']
+                self.config['screenshots_dir'],
+                company='afinia'
             )
 
             # Componentes específicos de Afinia
@@ -240,6 +255,12 @@ class OficinaVirtualAfiniaModular:
                 )
                 logger.info("EXITOSO Procesador de PQR inicializado")
 
+                # Corridas masivas: reciclar el contexto cuando Chromium acumula memoria
+                if governor_enabled():
+                    self.resource_governor = BrowserResourceGovernor(self.browser_manager, name='afinia')
+                    self.resource_governor.add_resume_callback(self._resume_after_recycle)
+                    self.afinia_pqr_processor.pagination_manager.resource_governor = self.resource_governor
+
             logger.info("EXITOSO Componentes inicializados correctamente")
             return True
 
@@ -247,6 +268,103 @@ class OficinaVirtualAfiniaModular:
             logger.error(f"ERROR Error inicializando componentes: {e}")
             return False
 
+    async def _resume_after_recycle(self, page):
+        """Tras reciclar el navegador: reasignar la página y volver a la grilla filtrada sin login"""
+        self.page = page
+        self.context = self.browser_manager.context
+        for component in (self.auth_manager, self.download_manager, self.afinia_popup_handler,
+                          self.pqr_extractor, self.afinia_date_configurator, self.afinia_download_manager,
+                          self.afinia_filter_manager, self.filter_manager, self.afinia_pqr_processor):
+            if component is not None:
+                component.page = page
+
+        await self.browser_manager.navigate_to_url(self.config['pqr_url'], timeout=self.config['timeout'])
+        if 'login' in page.url.lower():
+            raise RuntimeError("La sesión no se conservó al reciclar el navegador")
+        if not await self.afinia_filter_manager.configure_filters_and_search(**self._filter_kwargs):
+            raise RuntimeError("No se pudieron reaplicar los filtros tras reciclar el navegador")
+        logger.info("REANUDANDO Grilla de PQR restaurada con la sesión existente")
+
+    async def _create_crawl_session(self, worker_id: int) -> CrawlSession:
+        """
+        Fábrica de sesiones del recorrido particionado (PAGINATION_WORKERS > 1)
+
+        El worker 0 reutiliza la sesión principal, ya filtrada en la grilla; los demás
+        abren su propio navegador, inician sesión y aplican los mismos filtros.
+        """
+        if worker_id == 0:
+            return CrawlSession(page=self.page, pqr_processor=self.afinia_pqr_processor,
+                                governor=self.resource_governor)
+
+        browser_manager = BrowserManager(
+            headless=self.headless,
+            timeout=self.config['timeout'],
+            screenshots_dir=self.config['screenshots_dir']
+        )
+        await browser_manager.__aenter__()
+        try:
+            page = browser_manager.page
+            page.set_default_timeout(self.config['timeout'])
+
+            async def open_pqr_grid(current_page):
+                """Llevar la sesión a la grilla de PQR con los filtros de la corrida"""
+                await browser_manager.navigate_to_url(self.config['pqr_url'], timeout=self.config['timeout'])
+                if 'login' in current_page.url.lower():
+                    raise RuntimeError(f"La sesión {worker_id} no está autenticada")
+                if not await AfiniaFilterManager(current_page).configure_filters_and_search(**self._filter_kwargs):
+                    raise RuntimeError(f"No se pudieron aplicar los filtros en la sesión {worker_id}")
+
+            await browser_manager.navigate_to_url(self.config['url'], wait_until='load', timeout=self.config['timeout'])
+            await AfiniaPopupHandler(page).handle_afinia_popup()
+            username, password = self._credentials
+            login_selectors = self.config.get('login_selectors', {})
+            logged_in = await AuthenticationManager(page, self.config['screenshots_dir']).login(
+                username,
+                password,
+                username_selectors=login_selectors.get('username'),
+                password_selectors=login_selectors.get('password'),
+                login_button_selectors=login_selectors.get('submit'),
+                take_screenshots=False
+            )
+            if not logged_in:
+                raise RuntimeError(f"Login fallido en la sesión {worker_id}")
+            await open_pqr_grid(page)
+
+            pqr_processor = AfiniaPQRProcessor(page, self.config['download_path'], self.config['screenshots_dir'])
+            governor = None
+            if governor_enabled():
+                governor = BrowserResourceGovernor(browser_manager, name=f'afinia-{worker_id}')
+                governor.add_resume_callback(open_pqr_grid)
+                pqr_processor.pagination_manager.resource_governor = governor
+        except Exception:
+            await browser_manager.cleanup()
+            raise
+
+        logger.info(f"EXITOSO Sesión {worker_id} lista en la grilla de PQR")
+        return CrawlSession(page=page, pqr_processor=pqr_processor,
+                            close=browser_manager.cleanup, governor=governor)
+
+    async def _process_pqr_with_pagination(self) -> int:
+        """
+        Procesar todas las páginas de PQR
+
+        Con PAGINATION_WORKERS > 1 las páginas se reparten entre varias sesiones
+        de navegador; si no, se recorren en secuencia con la sesión principal.
+        """
+        pagination_manager = self.afinia_pqr_processor.pagination_manager
+        if pagination_manager.partition_workers <= 1:
+            return await self.afinia_pqr_processor.process_all_pqr_records(
+                max_records=self.max_pqr_records,
+                enable_pagination=True
+            )
+
+        logger.info(f"PAGINA Recorrido particionado con {pagination_manager.partition_workers} sesiones")
+        try:
+            results = await pagination_manager.process_all_pages_partitioned(self._create_crawl_session)
+        finally:
+            await drain_pdf_renders()
+        return results.get('successful', 0)
+
     async def run_full_extraction(self, username: str = None, password: str = None,
                                 start_date: datetime = None, end_date: datetime = None) -> Dict:
         """
@@ -270,6 +388,7 @@ class OficinaVirtualAfiniaModular:
 
             if not username or not password:
                 raise ValueError("Credenciales no proporcionadas")
+            self._credentials = (username, password)
 
             # Inicializar componentes
             if not await self._setup_components():
@@ -342,7 +461,8 @@ class OficinaVirtualAfiniaModular:
 
             # Proceso completo de filtrado específico de Afinia
             logger.info("CONFIGURANDO Iniciando proceso de filtrado específico de Afinia...")
-            filter_success = await self.afinia_filter_manager.configure_filters_and_search(days_back=1)
+            self._filter_kwargs = {'days_back': 1, 'start_date': start_date, 'end_date': end_date}
+            filter_success = await self.afinia_filter_manager.configure_filters_and_search(**self._filter_kwargs)
             
             processed_data = []
             files_downloaded = 0
@@ -361,11 +481,7 @@ class OficinaVirtualAfiniaModular:
                 if self.enable_pqr_processing and self.afinia_pqr_processor:
                     logger.info("LISTA INICIANDO PROCESAMIENTO ESPECÍFICO DE PQR...")
                     try:
-                        #  ACTIVAR PAGINACIÓN AUTOMÁTICA PARA PRUEBA
-                        pqr_processed = await self.afinia_pqr_processor.process_all_pqr_records(
-                            max_records=self.max_pqr_records,
-                            enable_pagination=True  # ¡ACTIVAR PAGINACIÓN!
-                        )
+                        pqr_processed = await self._process_pqr_with_pagination()
                         logger.info(f"EXITOSO Procesamiento PQR completado: {pqr_processed} registros")
                         processed_data.append({
                             "status": "success", 
@@ -15,11 +15,13 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
 from src.core.browser_manager import BrowserManager
+from src.core.browser_governor import BrowserResourceGovernor, governor_enabled
 from src.core.authentication import AuthenticationManager
 from src.core.download_manager import DownloadManager
 from src.components.popup_handler import PopupHandler
 from src.components.aire_popup_handler import AirePopupHandler
 from src.components.report_processor import ReportProcessor
+from src.components.partitioned_pagination import CrawlSession
 from src.config.config import OficinaVirtualConfig
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
@@ -33,17 +35,23 @@ class OficinaVirtualAireModular:
     Implementa mejores prácticas y arquitectura modular
     """
 
-    def __init__(self, headless: bool = True, visual_mode: bool = False):
+    def __init__(self, headless: bool = True, visual_mode: bool = False,
+                 download_path: Optional[str] = None):
         """
         Inicializa el extractor modular de Aire
 
         Args:
             headless: Ejecutar en modo headless
             visual_mode: Ejecutar en modo visual para debugging
+            download_path: Directorio de salida (absoluto) en lugar del por defecto
         """
         self.headless = headless if not visual_mode else False
         self.visual_mode = visual_mode
         self.config = self._load_config()
+        if download_path:
+            self.config['download_path'] = str(download_path)
+            self.config['screenshots_dir'] = str(Path(download_path) / 'screenshots')
+            os.makedirs(self.config['screenshots_dir'], exist_ok=True)
         self.browser_manager = None
         self.browser = None
         self.page = None
@@ -251,17 +259,23 @@ class OficinaVirtualAireModular:
             logger.error(f"ERROR Error inicializando componentes: {e}")
             return False
 
-    async def login(self) -> bool:
+    async def login(self, page=None, auth_manager: Optional[AuthenticationManager] = None) -> bool:
         """
         Realiza el proceso de login en la Oficina Virtual de Aire usando AuthenticationManager
+
+        Args:
+            page: Página a autenticar (la principal por defecto)
+            auth_manager: Gestor de autenticación de esa página (el principal por defecto)
         """
+        page = page or self.page
+        auth_manager = auth_manager or self.auth_manager
         try:
             logger.info("=== INICIANDO PROCESO DE LOGIN AIRE ===")
 
             # Navegar a la página de login
             logger.info(f" Navegando a: {self.config['url']}")
-            await self.page.goto(self.config['url'])
-            await self.page.wait_for_load_state('networkidle')
+            await page.goto(self.config['url'])
+            await page.wait_for_load_state('networkidle')
 
             # No hay popups en Aire, continuar directamente con login
 
@@ -275,7 +289,7 @@ class OficinaVirtualAireModular:
             logger.info(f" Iniciando login con usuario: {username[:10]}...")
 
             # Usar AuthenticationManager para el login con los selectores específicos de Aire
-            login_success = await self.auth_manager.login(
+            login_success = await auth_manager.login(
                 username=username,
                 password=password,
                 username_selectors=self.config['login_selectors']['username'],
@@ -377,12 +391,16 @@ class OficinaVirtualAireModular:
             from src.components.aire_filter_manager import AireFilterManager
             filter_manager = AireFilterManager(self.page)
             
-            # IMPORTANTE: Usar days_back=1 como Afinia (ayer a hoy)
+            # IMPORTANTE: Usar days_back=1 como Afinia (ayer a hoy) salvo ventana explícita
             days_back = 1  # Igual que Afinia: ayer a hoy
-            logger.info(f"CONFIGURANDO Aplicando filtros con AireFilterManager (days_back={days_back}: ayer a hoy)")
+            if start_date:
+                logger.info(f"CONFIGURANDO Aplicando filtros con AireFilterManager ({start_date:%Y-%m-%d} a {(end_date or datetime.now()):%Y-%m-%d})")
+            else:
+                logger.info(f"CONFIGURANDO Aplicando filtros con AireFilterManager (days_back={days_back}: ayer a hoy)")
             
             # Aplicar filtros usando el gestor robusto
-            filters_success = await filter_manager.configure_filters_and_search(days_back=days_back)
+            filters_success = await filter_manager.configure_filters_and_search(
+                days_back=days_back, start_date=start_date, end_date=end_date)
             
             if not filters_success:
                 logger.warning("ADVERTENCIA Filtros no se aplicaron completamente, continuando con extracción sin filtros")
@@ -396,17 +414,102 @@ class OficinaVirtualAireModular:
                 try:
                     # Crear el procesador específico de PQR para Aire
                     from src.components.aire_pqr_processor import AirePQRProcessor
+                    from src.services.pqr_pdf_renderer import drain_pdf_renders
                     aire_pqr_processor = AirePQRProcessor(
                         self.page,
                         str(self.config['download_path']),
                         str(self.config['screenshots_dir'])
                     )
                     
-                    # Procesar PQRs con secuencia específica
-                    pqr_processed = await aire_pqr_processor.process_all_pqr_records(
-                        max_records=max_pqr_records,
-                        enable_pagination=True  # ACTIVAR PAGINACIÓN AUTOMÁTICA
-                    )
+                    # Corridas masivas: reciclar el contexto cuando Chromium acumula memoria
+                    governor = None
+                    if governor_enabled():
+                        async def resume_after_recycle(page):
+                            """Reasignar la página y volver a la grilla filtrada sin login"""
+                            self.page = page
+                            for component in (self.auth_manager, self.download_manager,
+                                              filter_manager, aire_pqr_processor):
+                                if component is not None:
+                                    component.page = page
+                            await page.goto(pqr_url)
+                            await page.wait_for_load_state('networkidle')
+                            if 'login' in page.url.lower():
+                                raise RuntimeError("La sesión no se conservó al reciclar el navegador")
+                            await page.wait_for_timeout(5000)  # Esperar a que carguen los filtros
+                            if not await filter_manager.configure_filters_and_search(
+                                    days_back=days_back, start_date=start_date, end_date=end_date):
+                                raise RuntimeError("No se pudieron reaplicar los filtros tras reciclar el navegador")
+                        
+                        governor = BrowserResourceGovernor(self.browser_manager, name='aire')
+                        governor.add_resume_callback(resume_after_recycle)
+                        aire_pqr_processor.pagination_manager.resource_governor = governor
+                    
+                    async def create_crawl_session(worker_id: int) -> CrawlSession:
+                        """Sesión del recorrido particionado: el worker 0 reutiliza la principal"""
+                        if worker_id == 0:
+                            return CrawlSession(page=self.page, pqr_processor=aire_pqr_processor,
+                                                governor=governor)
+
+                        session_browser = BrowserManager(
+                            headless=self.headless,
+                            viewport={'width': 1366, 'height': 768},
+                            timeout=self.config['timeout'],
+                            screenshots_dir=self.config['screenshots_dir']
+                        )
+                        _, session_page = await session_browser.setup_browser()
+                        try:
+                            session_page.context.set_default_timeout(self.config['timeout'])
+
+                            async def open_pqr_grid(page):
+                                """Llevar la sesión a la grilla de PQR con los filtros de la corrida"""
+                                await page.goto(pqr_url)
+                                await page.wait_for_load_state('networkidle')
+                                if 'login' in page.url.lower():
+                                    raise RuntimeError(f"La sesión {worker_id} no está autenticada")
+                                await page.wait_for_timeout(5000)  # Esperar a que carguen los filtros
+                                if not await AireFilterManager(page).configure_filters_and_search(
+                                        days_back=days_back, start_date=start_date, end_date=end_date):
+                                    raise RuntimeError(f"No se pudieron aplicar los filtros en la sesión {worker_id}")
+
+                            session_auth = AuthenticationManager(page=session_page,
+                                                                 screenshots_dir=self.config['screenshots_dir'])
+                            if not await self.login(session_page, session_auth):
+                                raise RuntimeError(f"Login fallido en la sesión {worker_id}")
+                            await open_pqr_grid(session_page)
+
+                            session_processor = AirePQRProcessor(
+                                session_page,
+                                str(self.config['download_path']),
+                                str(self.config['screenshots_dir'])
+                            )
+                            session_governor = None
+                            if governor_enabled():
+                                session_governor = BrowserResourceGovernor(session_browser, name=f'aire-{worker_id}')
+                                session_governor.add_resume_callback(open_pqr_grid)
+                                session_processor.pagination_manager.resource_governor = session_governor
+                        except Exception:
+                            await session_browser.cleanup()
+                            raise
+
+                        logger.info(f"EXITOSO Sesión {worker_id} lista en la grilla de PQR")
+                        return CrawlSession(page=session_page, pqr_processor=session_processor,
+                                            close=session_browser.cleanup, governor=session_governor)
+
+                    # Con PAGINATION_WORKERS > 1 las páginas se reparten entre varias sesiones
+                    pagination_manager = aire_pqr_processor.pagination_manager
+                    if filters_success and pagination_manager.partition_workers > 1:
+                        logger.info(f"PAGINA Recorrido particionado con {pagination_manager.partition_workers} sesiones")
+                        try:
+                            partitioned = await pagination_manager.process_all_pages_partitioned(create_crawl_session)
+                        finally:
+                            await drain_pdf_renders()
+                        pqr_processed = partitioned.get('successful', 0)
+                    else:
+                        # Procesar PQRs con secuencia específica
+                        pqr_processed = await aire_pqr_processor.process_all_pqr_records(
+                            max_records=max_pqr_records,
+                            enable_pagination=True  # ACTIVAR PAGINACIÓN AUTOMÁTICA
+                        )
                     
                     logger.info(f"EXITOSO Procesamiento PQR completado: {pqr_processed} registros")
                     processed_data.append({
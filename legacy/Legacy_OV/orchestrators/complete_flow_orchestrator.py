@@ -7,6 +7,11 @@ Orquestador de Flujo Completo para Extractor OV Modular
 Orquestador que coordina el flujo completo:
 Web → CSV → RDS → Verificación S3 → Subida S3
 
+Ofrece dos modos de ejecución:
+- execute_complete_flow: fases estrictas, una tras otra
+- execute_pipelined_flow: DAG en pipeline (ver pipeline_dag.py) donde la
+  carga RDS y la subida S3 arrancan mientras la extracción sigue descargando
+
 Implementa el Paso 23 del FLUJO_VERIFICACION.md:
 - Coordinar flujo completo para Afinia y Air-e
 - Integrar todos los servicios existentes
@@ -19,11 +24,14 @@ Fecha: Octubre 2025
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
+import os
 import time
+import asyncio
+import threading
 
 # Servicios de extracción y carga
 import sys
@@ -34,6 +42,10 @@ from src.services.bulk_database_loader import BulkDatabaseLoader
 from src.services.s3_verification_service import S3VerificationService, S3VerificationStats
 from src.services.filtered_s3_uploader import FilteredS3Uploader, FilteredUploadStats
 from src.services.json_consolidator_service import JSONConsolidatorService
+from src.services.record_bus import RecordEnvelope, Subscription, get_record_bus
+from src.orchestrators.pipeline_dag import PipelineDAG, StageStats
+from src.orchestrators.loaded_json_registry import LoadedJsonRegistry
+from src.utils.run_profiler import RunProfiler
 
 # Servicios de descarga (si existen)
 try:
@@ -88,20 +100,24 @@ class CompleteFlowOrchestrator:
     Orquestador del flujo completo de procesamiento
     """
     
-    def __init__(self, simulated_mode: bool = False):
+    def __init__(self, simulated_mode: bool = False, profile: Optional[bool] = None):
         """
         Inicializar orquestador
         
         Args:
             simulated_mode: Si True, ejecuta en modo simulado
+            profile: Perfilar execute_complete_flow y execute_pipelined_flow
+                (None = variable EXTRACTOR_PROFILE)
         """
         self.simulated_mode = simulated_mode
+        self.profile = profile
         
         # Inicializar servicios
         self.db_loader = BulkDatabaseLoader()
         self.s3_verifier = S3VerificationService()
         self.s3_uploader = FilteredS3Uploader(simulated_mode=simulated_mode)
         self.json_consolidator = JSONConsolidatorService()
+        self.loaded_registry = LoadedJsonRegistry()
         
         # Web downloader (opcional)
         self.web_downloader = None
@@ -127,8 +143,26 @@ class CompleteFlowOrchestrator:
             force_reprocess: Forzar reprocesamiento
             
         Returns:
-            Resultado del flujo completo
+            Resultado del flujo completo (con perfilado activo, summary['profile_dir']
+            apunta al flamegraph y reporte de asignaciones de la corrida)
         """
+        # Perfilador local de la corrida: el orquestador se comparte entre hilos del scheduler
+        profiler = RunProfiler(f"{empresa}_complete_flow", enabled=self.profile).start()
+        try:
+            result = self._execute_complete_flow(empresa, include_web_download,
+                                                 csv_directory, force_reprocess, profiler)
+        finally:
+            profile_dir = profiler.stop()
+        
+        if profile_dir:
+            result.summary["profile_dir"] = str(profile_dir)
+            logger.info(f"[complete_flow][execute] Perfil de ejecución guardado en {profile_dir}")
+        return result
+    
+    def _execute_complete_flow(self, empresa: str, include_web_download: bool,
+                               csv_directory: Optional[str],
+                               force_reprocess: bool, profiler: RunProfiler) -> CompleteFlowResult:
+        """Pasos del flujo completo; cada paso es una etapa de ``profiler``"""
         execution_id = f"{empresa}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         start_time = datetime.now()
         
@@ -144,7 +178,8 @@ class CompleteFlowOrchestrator:
         try:
             # Paso 1: Descarga Web (opcional)
             if include_web_download and self.web_downloader:
-                step_result = self._execute_web_download(empresa)
+                with profiler.stage("web_download"):
+                    step_result = self._execute_web_download(empresa)
                 result.steps_completed.append(step_result)
                 
                 if not step_result.success:
@@ -153,7 +188,8 @@ class CompleteFlowOrchestrator:
                     return self._finalize_result(result)
             
             # Paso 1.5: Consolidación JSON → CSV
-            step_result = self._execute_json_consolidation(empresa)
+            with profiler.stage("json_consolidation"):
+                step_result = self._execute_json_consolidation(empresa)
             result.steps_completed.append(step_result)
             
             if not step_result.success:
@@ -162,7 +198,8 @@ class CompleteFlowOrchestrator:
             
             # Paso 2: Carga CSV → RDS
             csv_dir = csv_directory or self._get_default_csv_directory(empresa)
-            step_result = self._execute_csv_to_rds(empresa, csv_dir, force_reprocess)
+            with profiler.stage("csv_to_rds"):
+                step_result = self._execute_csv_to_rds(empresa, csv_dir, force_reprocess)
             result.steps_completed.append(step_result)
             
             if not step_result.success:
@@ -173,7 +210,8 @@ class CompleteFlowOrchestrator:
             result.total_records_processed += step_result.records_processed
             
             # Paso 3: Verificación S3
-            step_result = self._execute_s3_verification(empresa)
+            with profiler.stage("s3_verification"):
+                step_result = self._execute_s3_verification(empresa)
             result.steps_completed.append(step_result)
             
             if not step_result.success:
@@ -181,7 +219,8 @@ class CompleteFlowOrchestrator:
                 # No es crítico, continuar
             
             # Paso 4: Subida S3 Filtrada
-            step_result = self._execute_filtered_s3_upload(empresa)
+            with profiler.stage("filtered_s3_upload"):
+                step_result = self._execute_filtered_s3_upload(empresa)
             result.steps_completed.append(step_result)
             
             if not step_result.success:
@@ -249,8 +288,8 @@ class CompleteFlowOrchestrator:
         
         return step_result
     
-    def _execute_json_consolidation(self, empresa: str) -> FlowStepResult:
-        """Ejecutar consolidación JSON → CSV"""
+    def _execute_json_consolidation(self, empresa: str, sources: Optional[List[Any]] = None) -> FlowStepResult:
+        """Ejecutar consolidación JSON → CSV (sources: archivos o registros del bus ya recibidos)"""
         step_result = FlowStepResult(
             step_name="json_consolidation",
             empresa=empresa,
@@ -272,7 +311,7 @@ class CompleteFlowOrchestrator:
                 }
             else:
                 # Ejecutar consolidación real
-                consolidation_result = self.json_consolidator.consolidate_company_data(empresa)
+                consolidation_result = self.json_consolidator.consolidate_company_data(empresa, sources)
                 
                 step_result.success = consolidation_result.get('success', False)
                 step_result.records_processed = consolidation_result.get('records_count', 0)
@@ -452,6 +491,317 @@ class CompleteFlowOrchestrator:
         
         return step_result
     
+    async def execute_pipelined_flow(self, empresa: str,
+                                     include_web_download: bool = False,
+                                     web_download: Optional[Callable[[str], Any]] = None,
+                                     batch_size: int = 50,
+                                     upload_concurrency: int = 4,
+                                     max_retries: int = 2,
+                                     poll_interval: float = 5.0) -> CompleteFlowResult:
+        """
+        Ejecutar el flujo completo como DAG en pipeline
+        
+        Etapas y dependencias:
+            discover ──> rds_load ──> s3_verification ──> s3_upload
+                └──────> json_consolidation (barrera, no crítica)
+        
+        ``discover`` recibe cada registro por el bus de registros apenas el
+        procesador de PQR lo guarda (mientras la descarga web sigue
+        corriendo), sin volver a escanear el directorio; la cola del bus es
+        acotada, así que si RDS se atrasa la extracción se frena. La carga a
+        RDS trabaja en micro-lotes y la subida S3 por archivo con varios
+        workers. El CSV consolidado se sigue generando como artefacto de
+        reporte a partir de los mismos registros.
+        
+        Args:
+            empresa: 'afinia' o 'aire'
+            include_web_download: Ejecutar la descarga web en paralelo al pipeline
+            web_download: Función bloqueante alternativa de descarga (recibe la empresa);
+                por defecto se usa el WebDownloaderService configurado
+            batch_size: Archivos JSON por lote de carga RDS
+            upload_concurrency: Subidas S3 simultáneas
+            max_retries: Reintentos por lote/archivo en etapas de RDS y S3
+            poll_interval: Segundos máximos de espera para completar un lote
+            
+        Returns:
+            Resultado del flujo completo (un paso por etapa; con perfilado activo,
+            summary['profile_dir'] apunta a los reportes de la corrida)
+        """
+        execution_id = f"{empresa}_pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        result = CompleteFlowResult(
+            empresa=empresa,
+            execution_id=execution_id,
+            start_time=datetime.now()
+        )
+        
+        logger.info(f"[complete_flow][pipeline] Iniciando flujo en pipeline para {empresa} "
+                   f"(ID: {execution_id})")
+        
+        download_steps: List[FlowStepResult] = []
+        totals = {'records_loaded': 0, 'load_errors': []}
+        emitted_uploads = set()
+        uploads_lock = threading.Lock()
+        # SGC de los archivos ya cargados cuyo índice local falta refrescar
+        loaded_sgcs = set()
+        subscription: Optional[Subscription] = None
+        
+        def run_download():
+            try:
+                if web_download is None:
+                    download_steps.append(self._execute_web_download(empresa))
+                    return
+                step = FlowStepResult(step_name="web_download", empresa=empresa, start_time=datetime.now())
+                try:
+                    web_download(empresa)
+                    step.success = True
+                except Exception as e:
+                    step.errors.append(f"Error en descarga web: {e}")
+                step.end_time = datetime.now()
+                step.duration_seconds = (step.end_time - step.start_time).total_seconds()
+                download_steps.append(step)
+            finally:
+                # Fin de la extracción: el bus termina al vaciar la cola
+                if subscription is not None:
+                    subscription.close()
+        
+        def discover(emit):
+            nonlocal subscription
+            live_download = include_web_download and (web_download or self.web_downloader)
+            
+            if not self.simulated_mode:
+                if live_download:
+                    # Suscribirse antes de arrancar la descarga para no perder registros
+                    subscription = get_record_bus(empresa).subscribe(
+                        f"pipeline_{execution_id}", maxsize=batch_size * 2
+                    )
+                # Registros pendientes de ejecuciones anteriores: una sola pasada, omitiendo
+                # los que el registro de cargas marca como ya cargados (con el mismo mtime)
+                processed_path = Path(f"data/downloads/{empresa}/oficina_virtual/processed")
+                pending = self._scan_new_processed_json(processed_path, set(),
+                                                        loaded=self.loaded_registry.loaded(empresa))
+                logger.info(f"[complete_flow][pipeline] {empresa}: {len(pending)} JSON pendientes "
+                           f"de corridas anteriores")
+                for json_file in pending:
+                    emit(json_file)
+            
+            downloader = None
+            if live_download:
+                downloader = threading.Thread(
+                    target=run_download,
+                    name=f"web_download_{empresa}",
+                    daemon=True
+                )
+                downloader.start()
+            
+            if self.simulated_mode:
+                for i in range(10):
+                    time.sleep(0.1)
+                    emit(Path(f"{empresa}_sim_{i:03d}_data_simulado.json"))
+                if downloader:
+                    downloader.join()
+                return
+            
+            if subscription is None:
+                return
+            try:
+                for envelope in subscription:
+                    emit(envelope)
+            finally:
+                subscription.unsubscribe()
+                logger.info(f"[complete_flow][pipeline] Bus de registros {empresa}: "
+                           f"{subscription.received} recibidos, "
+                           f"extracción frenada {get_record_bus(empresa).blocked_seconds:.1f}s")
+        
+        def load_batch(json_files):
+            if self.simulated_mode:
+                time.sleep(0.2)
+                totals['records_loaded'] += len(json_files)
+                return [f.stem.split('_data_')[0] for f in json_files]
+            
+            # json_files mezcla rutas (pendientes previos) y registros del bus
+            with uploads_lock:
+                loaded_sgcs.update(
+                    f.sgc_number if isinstance(f, RecordEnvelope) else Path(f).name.split('_', 1)[0]
+                    for f in json_files
+                )
+            
+            load_stats = self.db_loader.load_json_files_to_database(json_files, empresa)
+            self.loaded_registry.mark_loaded(empresa, load_stats.loaded_files)
+            totals['records_loaded'] += load_stats.inserted_records + load_stats.updated_records
+            totals['load_errors'].extend(load_stats.errors)
+            if load_stats.errors and not load_stats.loaded_radicados:
+                raise RuntimeError(f"Lote de {len(json_files)} archivos sin registros cargados: "
+                                   f"{load_stats.errors[0]}")
+            return load_stats.loaded_radicados
+        
+        def verify_batch(radicados):
+            if self.simulated_mode:
+                return [{'numero_radicado': r, 'empresa': empresa, 'file_path': f"{r}.json"}
+                        for r in radicados]
+            
+            # Todo acotado al lote: índice de sus SGC, estado y archivos de sus radicados
+            with uploads_lock:
+                batch_sgcs = set(loaded_sgcs)
+                loaded_sgcs.clear()
+            self.s3_verifier.get_file_index(empresa, refresh=False).refresh(sgc_numbers=batch_sgcs)
+            self.s3_verifier.verify_s3_status_after_rds_load(
+                empresa, {'registros_cargados': len(radicados)}, radicados=radicados
+            )
+            files = self.s3_verifier.get_files_to_upload(empresa, radicados=radicados)
+            pending = []
+            with uploads_lock:
+                for file_info in files:
+                    key = file_info.get('file_path')
+                    if key not in emitted_uploads:
+                        emitted_uploads.add(key)
+                        pending.append(file_info)
+            return pending
+        
+        def upload_file(file_info):
+            if self.simulated_mode:
+                time.sleep(0.1)
+                return [file_info['numero_radicado']]
+            
+            upload_result = self.s3_uploader.upload_record(file_info)
+            if upload_result.estado == 'fallido':
+                raise RuntimeError(f"Subida fallida para {file_info.get('numero_radicado')}: "
+                                   f"{'; '.join(upload_result.errores[:2])}")
+            return [file_info['numero_radicado']] if upload_result.archivos_subidos else []
+        
+        def consolidate(json_files):
+            step = self._execute_json_consolidation(empresa, sources=json_files)
+            if not step.success:
+                raise RuntimeError('; '.join(step.errors) or "Consolidación sin resultados")
+            return None
+        
+        dag = PipelineDAG(name=f"complete_flow_{empresa}")
+        dag.stage("discover", discover, critical=False)
+        dag.stage("rds_load", load_batch, depends_on=["discover"],
+                  batch_size=batch_size, batch_timeout=poll_interval, max_retries=max_retries,
+                  queue_size=batch_size * 2)
+        dag.stage("s3_verification", verify_batch, depends_on=["rds_load"],
+                  batch_size=batch_size, batch_timeout=poll_interval, critical=False)
+        dag.stage("s3_upload", upload_file, depends_on=["s3_verification"],
+                  concurrency=upload_concurrency, max_retries=max_retries)
+        dag.stage("json_consolidation", consolidate, depends_on=["discover"],
+                  barrier=True, critical=False)
+        
+        # Las etapas corren en hilos del DAG: se muestrean todos los hilos de la corrida
+        profiler = RunProfiler(f"{empresa}_pipelined_flow", enabled=self.profile, all_threads=True).start()
+        try:
+            with profiler.stage("pipeline_dag"):
+                stage_stats = await dag.run()
+            
+            result.steps_completed.extend(download_steps)
+            result.steps_completed.extend(
+                self._stage_to_step_result(empresa, stats) for stats in stage_stats.values()
+            )
+            if totals['load_errors']:
+                rds_step = next(s for s in result.steps_completed if s.step_name == "rds_load")
+                rds_step.errors.extend(totals['load_errors'])
+            
+            result.total_records_processed = totals['records_loaded']
+            result.total_files_uploaded = stage_stats["s3_upload"].items_out
+            
+            failed = dag.critical_failures(stage_stats)
+            failed_downloads = [s for s in download_steps if not s.success]
+            result.overall_success = not failed and not failed_downloads
+            
+            if result.overall_success:
+                logger.info(f"[complete_flow][pipeline] Flujo en pipeline completado para {empresa}")
+            else:
+                logger.error(f"[complete_flow][pipeline] Etapas con fallos para {empresa}: "
+                            f"{failed + [s.step_name for s in failed_downloads]}")
+            
+        except Exception as e:
+            error_msg = f"Error crítico en flujo en pipeline para {empresa}: {e}"
+            logger.error(f"[complete_flow][pipeline] {error_msg}")
+            result.steps_completed.append(FlowStepResult(
+                step_name="error_critico",
+                empresa=empresa,
+                success=False,
+                start_time=datetime.now(),
+                end_time=datetime.now(),
+                errors=[error_msg]
+            ))
+            result.overall_success = False
+        finally:
+            profile_dir = profiler.stop()
+        
+        result = self._finalize_result(result)
+        if profile_dir:
+            result.summary["profile_dir"] = str(profile_dir)
+            logger.info(f"[complete_flow][pipeline] Perfil de ejecución guardado en {profile_dir}")
+        return result
+    
+    async def execute_pipelined_flow_for_all_companies(self, empresas: List[str] = None,
+                                                       **kwargs) -> Dict[str, CompleteFlowResult]:
+        """
+        Ejecutar el flujo en pipeline para varias empresas en paralelo
+        
+        Args:
+            empresas: Empresas a procesar (por defecto afinia y aire)
+            **kwargs: Argumentos para execute_pipelined_flow
+            
+        Returns:
+            Resultados por empresa
+        """
+        empresas = empresas or ['afinia', 'aire']
+        flows = await asyncio.gather(
+            *(self.execute_pipelined_flow(empresa, **kwargs) for empresa in empresas)
+        )
+        return dict(zip(empresas, flows))
+    
+    @staticmethod
+    def _scan_new_processed_json(processed_path: Path, seen: set,
+                                 loaded: Optional[Dict[str, float]] = None) -> List[Path]:
+        """
+        Archivos *_data_*.json aún no emitidos (ordenados por nombre)
+        
+        Args:
+            processed_path: Directorio processed de la empresa
+            seen: Nombres ya emitidos (se actualiza)
+            loaded: Nombre -> mtime de los archivos ya cargados a RDS; se omiten
+                salvo que el archivo haya cambiado desde la carga
+        """
+        if not processed_path.exists():
+            return []
+        
+        loaded = loaded or {}
+        new_files = []
+        with os.scandir(processed_path) as it:
+            for entry in it:
+                if entry.name in seen or not entry.name.endswith('.json') or '_data_' not in entry.name:
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if entry.name in loaded and loaded[entry.name] == entry.stat(follow_symlinks=False).st_mtime:
+                    continue
+                seen.add(entry.name)
+                new_files.append(Path(entry.path))
+        return sorted(new_files)
+    
+    @staticmethod
+    def _stage_to_step_result(empresa: str, stats: StageStats) -> FlowStepResult:
+        """Convertir estadísticas de etapa del DAG al formato de pasos del flujo"""
+        return FlowStepResult(
+            step_name=stats.name,
+            empresa=empresa,
+            success=stats.success,
+            start_time=stats.start_time,
+            end_time=stats.end_time,
+            duration_seconds=stats.duration_seconds,
+            records_processed=stats.items_in,
+            files_processed=stats.items_out,
+            errors=list(stats.errors),
+            metadata={
+                "llamadas": stats.calls,
+                "reintentos": stats.retries,
+                "fallos": stats.failures,
+                "tiempo_ocupado": round(stats.busy_seconds, 3)
+            }
+        )
+    
     def _get_default_csv_directory(self, empresa: str) -> str:
         """Obtener directorio CSV por defecto - usar data/processed donde se generan los CSVs consolidados"""
         return "data/processed"
@@ -595,6 +945,22 @@ def execute_complete_flow_all_companies(simulated_mode: bool = False, **kwargs)
     return orchestrator.generate_execution_report(results)
 
 
+def execute_pipelined_flow_all_companies(simulated_mode: bool = False, **kwargs) -> Dict[str, Any]:
+    """
+    Ejecutar el flujo en pipeline para todas las empresas
+    
+    Args:
+        simulated_mode: Modo simulado
+        **kwargs: Argumentos para execute_pipelined_flow
+        
+    Returns:
+        Reporte completo
+    """
+    orchestrator = CompleteFlowOrchestrator(simulated_mode=simulated_mode)
+    results = asyncio.run(orchestrator.execute_pipelined_flow_for_all_companies(**kwargs))
+    return orchestrator.generate_execution_report(results)
+
+
 if __name__ == "__main__":
     # Test del orquestador completo
     logger.info("[complete_flow][main] Iniciando test del orquestador completo")
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sharding de Extracción por Ventanas de Fechas
+=============================================
+
+Divide un rango histórico grande en ventanas de fechas y ejecuta cada
+ventana en un proceso worker independiente (sesión de navegador propia y
+directorio de salida aislado). Al terminar, los JSON de todas las ventanas
+se fusionan y se deduplican por número SGC.
+
+El tamaño de cada ventana se calcula con la densidad observada de registros
+por día (persistida entre corridas): meses densos se parten en ventanas
+cortas y meses con pocos registros en ventanas largas, para que todas las
+ventanas tarden aproximadamente lo mismo.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Extractor por empresa: (módulo, clase, kwargs del constructor, kwargs de run_full_extraction)
+EXTRACTORS = {
+    'afinia': ('src.extractors.afinia.oficina_virtual_afinia_modular', 'OficinaVirtualAfiniaModular',
+               {'enable_pqr_processing': True}, {}),
+    'aire': ('src.extractors.aire.oficina_virtual_aire_modular', 'OficinaVirtualAireModular',
+             {}, {'enable_pqr_processing': True}),
+}
+
+JSON_PATTERN = "*_data_*.json"
+
+
+@dataclass
+class DateWindow:
+    """Ventana de fechas inclusiva [start, end]"""
+    start: date
+    end: date
+    expected_records: float = 0.0
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    @property
+    def key(self) -> str:
+        return f"{self.start.isoformat()}_{self.end.isoformat()}"
+
+
+@dataclass
+class WindowResult:
+    """Resultado de la extracción de una ventana"""
+    window: DateWindow
+    success: bool
+    json_files: List[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    attempts: int = 1
+    error: Optional[str] = None
+
+    @property
+    def records(self) -> int:
+        return len(self.json_files)
+
+
+class RecordDensityModel:
+    """
+    Registros por día observados, por empresa y mes (media móvil exponencial)
+    """
+
+    def __init__(self, path: str = "data/state/record_density.json",
+                 default_per_day: float = 200.0, smoothing: float = 0.5):
+        """
+        Args:
+            path: Archivo JSON de densidades
+            default_per_day: Densidad supuesta para meses sin observaciones
+            smoothing: Peso de la observación nueva en la media móvil
+        """
+        self.path = Path(path)
+        self.default_per_day = default_per_day
+        self.smoothing = smoothing
+        self.data: Dict[str, Dict[str, float]] = {}
+        if self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding='utf-8'))
+            except (ValueError, OSError) as e:
+                logger.warning(f"[date_sharding][density] No se pudo leer {self.path}: {e}")
+
+    def per_day(self, company: str, day: date) -> float:
+        months = self.data.get(company, {})
+        month_key = day.strftime('%Y-%m')
+        if month_key in months:
+            return months[month_key]
+        if months:
+            return sum(months.values()) / len(months)
+        return self.default_per_day
+
+    def observe(self, company: str, window: DateWindow, records: int):
+        """Actualizar la densidad de los meses que cubre la ventana"""
+        observed = records / max(1, window.days)
+        months = self.data.setdefault(company, {})
+        day = window.start
+        seen = set()
+        while day <= window.end:
+            month_key = day.strftime('%Y-%m')
+            if month_key not in seen:
+                seen.add(month_key)
+                previous = months.get(month_key)
+                months[month_key] = observed if previous is None else (
+                    self.smoothing * observed + (1 - self.smoothing) * previous)
+            day += timedelta(days=1)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding='utf-8')
+
+
+def plan_date_windows(company: str, start: date, end: date, density: RecordDensityModel,
+                      target_records: float = 2000, min_days: int = 1,
+                      max_days: int = 31) -> List[DateWindow]:
+    """
+    Partir [start, end] en ventanas con ~target_records registros esperados cada una
+    """
+    windows = []
+    window_start = start
+    while window_start <= end:
+        expected = 0.0
+        window_end = window_start
+        while True:
+            expected += density.per_day(company, window_end)
+            days = (window_end - window_start).days + 1
+            next_day = window_end + timedelta(days=1)
+            if next_day > end or days >= max_days:
+                break
+            if days >= min_days and expected >= target_records:
+                break
+            window_end = next_day
+        windows.append(DateWindow(window_start, window_end, expected))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+def _run_window(company: str, window_start: str, window_end: str, output_dir: str,
+                max_pqr_records: Optional[int], headless: bool) -> Dict[str, Any]:
+    """
+    Punto de entrada del proceso worker: una sesión de navegador por ventana
+    """
+    import importlib
+
+    module_name, class_name, init_kwargs, run_kwargs = EXTRACTORS[company]
+    extractor_class = getattr(importlib.import_module(module_name), class_name)
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    init_kwargs = dict(init_kwargs, headless=headless, download_path=str(output))
+    run_kwargs = dict(run_kwargs)
+    if max_pqr_records is not None:
+        key = 'max_pqr_records'
+        if company == 'afinia':
+            init_kwargs[key] = max_pqr_records
+        else:
+            run_kwargs[key] = max_pqr_records
+
+    extractor = extractor_class(**init_kwargs)
+    result = asyncio.run(extractor.run_full_extraction(
+        start_date=datetime.fromisoformat(window_start),
+        end_date=datetime.fromisoformat(window_end),
+        **run_kwargs
+    ))
+
+    json_files = sorted(str(p) for p in output.rglob(JSON_PATTERN))
+    return {
+        'success': bool(result.get('success')),
+        'error': result.get('error'),
+        'json_files': json_files
+    }
+
+
+class DateWindowShardRunner:
+    """
+    Ejecuta ventanas de fechas en procesos paralelos y fusiona los resultados
+    """
+
+    def __init__(self, company: str, start: date, end: date, workers: int = 4,
+                 target_records_per_window: float = 2000, max_days_per_window: int = 31,
+                 output_root: str = "data/shards", max_retries: int = 1,
+                 max_pqr_records: Optional[int] = None, headless: bool = True,
+                 density_model: Optional[RecordDensityModel] = None):
+        """
+        Args:
+            company: 'afinia' o 'aire'
+            start / end: Rango histórico (inclusivo)
+            workers: Procesos (sesiones de navegador) simultáneos
+            target_records_per_window: Registros esperados por ventana
+            max_days_per_window: Tope de días por ventana
+            output_root: Raíz de directorios de salida por ventana
+            max_retries: Reintentos por ventana fallida
+            max_pqr_records: Límite de registros por página (None = valor del extractor)
+            headless: Navegadores sin interfaz
+            density_model: Modelo de densidad (por defecto data/state/record_density.json)
+        """
+        if company not in EXTRACTORS:
+            raise ValueError(f"Empresa no soportada: {company}")
+        if end < start:
+            raise ValueError("La fecha final es anterior a la inicial")
+        self.company = company
+        self.start = start
+        self.end = end
+        self.workers = max(1, workers)
+        self.target_records = target_records_per_window
+        self.max_days = max_days_per_window
+        self.run_dir = Path(output_root) / company / f"{start.isoformat()}_{end.isoformat()}"
+        self.max_retries = max_retries
+        self.max_pqr_records = max_pqr_records
+        self.headless = headless
+        self.density = density_model or RecordDensityModel()
+
+    def plan(self) -> List[DateWindow]:
+        return plan_date_windows(self.company, self.start, self.end, self.density,
+                                 target_records=self.target_records, max_days=self.max_days)
+
+    def _submit(self, executor: ProcessPoolExecutor, window: DateWindow):
+        return executor.submit(
+            _run_window, self.company,
+            datetime.combine(window.start, datetime.min.time()).isoformat(),
+            datetime.combine(window.end, datetime.min.time()).isoformat(),
+            str((self.run_dir / "windows" / window.key).resolve()),
+            self.max_pqr_records, self.headless
+        )
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecutar todas las ventanas y fusionar resultados
+
+        Returns:
+            Dict con resultados por ventana y resumen de la fusión
+        """
+        windows = self.plan()
+        started = time.monotonic()
+        logger.info(f"[date_sharding][run] {self.company}: {len(windows)} ventanas "
+                    f"({self.start} a {self.end}) en {self.workers} procesos")
+
+        results: List[WindowResult] = []
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            pending = {self._submit(executor, w): (w, 1, time.monotonic()) for w in windows}
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, attempt, submitted = pending.pop(future)
+                    try:
+                        outcome = future.result()
+                        error = outcome.get('error')
+                        success = outcome['success']
+                        json_files = outcome['json_files']
+                    except Exception as e:
+                        success, error, json_files = False, str(e), []
+
+                    if not success and attempt <= self.max_retries:
+                        logger.warning(f"[date_sharding][run] Ventana {window.key} falló ({error}), "
+                                       f"reintento {attempt}/{self.max_retries}")
+                        pending[self._submit(executor, window)] = (window, attempt + 1, time.monotonic())
+                        continue
+
+                    result = WindowResult(window=window, success=success, json_files=json_files,
+                                          duration_seconds=time.monotonic() - submitted,
+                                          attempts=attempt, error=error)
+                    results.append(result)
+                    if success:
+                        self.density.observe(self.company, window, result.records)
+                    logger.info(f"[date_sharding][run] Ventana {window.key}: "
+                                f"{'OK' if success else 'ERROR'}, {result.records} registros "
+                                f"(esperados {window.expected_records:.0f}), {result.duration_seconds:.0f}s")
+
+        self.density.save()
+        merge_summary = merge_and_dedupe(
+            [f for r in results for f in r.json_files], self.run_dir / "merged")
+
+        results.sort(key=lambda r: r.window.start)
+        return {
+            'company': self.company,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'windows': [
+                {
+                    'start': r.window.start.isoformat(),
+                    'end': r.window.end.isoformat(),
+                    'success': r.success,
+                    'records': r.records,
+                    'expected_records': round(r.window.expected_records),
+                    'duration_seconds': round(r.duration_seconds, 1),
+                    'attempts': r.attempts,
+                    'error': r.error
+                }
+                for r in results
+            ],
+            'failed_windows': sum(1 for r in results if not r.success),
+            'merge': merge_summary,
+            'duration_seconds': time.monotonic() - started
+        }
+
+
+def _sgc_key(data: Dict[str, Any], path: Path) -> str:
+    for field_name in ('sgc_number', 'numero_reclamo_sgc', 'numero_radicado'):
+        value = str(data.get(field_name) or '').strip()
+        if value and value.lower() not in ('none', 'null', 'sin_sgc'):
+            return value
+    return f"file:{path.name}"
+
+
+def merge_and_dedupe(json_files: List[str], merged_dir: Path) -> Dict[str, Any]:
+    """
+    Fusionar los JSON de todas las ventanas conservando uno por SGC
+    (el de extracción más reciente)
+    """
+    merged_dir = Path(merged_dir)
+    merged_dir.mkdir(parents=True, exist_ok=True)
+
+    best: Dict[str, tuple] = {}
+    unreadable = 0
+    for file_path in json_files:
+        path = Path(file_path)
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (ValueError, OSError):
+            unreadable += 1
+            continue
+        key = _sgc_key(data, path)
+        stamp = str(data.get('extraction_timestamp', ''))
+        if key not in best or stamp > best[key][0]:
+            best[key] = (stamp, path)
+
+    for _, path in best.values():
+        shutil.copy2(path, merged_dir / path.name)
+
+    summary = {
+        'input_files': len(json_files),
+        'unique_records': len(best),
+        'duplicates_removed': len(json_files) - len(best) - unreadable,
+        'unreadable': unreadable,
+        'merged_dir': str(merged_dir)
+    }
+    (merged_dir / "manifest.json").write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    logger.info(f"[date_sharding][merge] {summary['unique_records']} registros únicos, "
+                f"{summary['duplicates_removed']} duplicados eliminados")
+    return summary
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de JSON Cargados a RDS
+===============================
+
+Guarda, por empresa, qué archivos *_data_*.json del directorio processed ya
+se cargaron a RDS y con qué mtime. El flujo en pipeline lo usa al arrancar
+para emitir solo los pendientes de corridas anteriores en lugar de todo el
+histórico; un archivo reescrito después de su carga (mtime distinto) se
+vuelve a emitir.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Union
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archivos_cargados (
+    empresa TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    fecha_carga REAL NOT NULL,
+    PRIMARY KEY (empresa, nombre)
+);
+"""
+
+
+class LoadedJsonRegistry:
+    """
+    Archivos JSON procesados ya cargados a RDS, en SQLite
+    """
+
+    def __init__(self, db_path: str = "data/state/loaded_json.db"):
+        """
+        Args:
+            db_path: Archivo SQLite del registro
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def loaded(self, empresa: str) -> Dict[str, float]:
+        """Nombre de archivo -> mtime con el que se cargó"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT nombre, mtime FROM archivos_cargados WHERE empresa = ?", (empresa,)
+            ).fetchall()
+        return {nombre: mtime for nombre, mtime in rows}
+
+    def mark_loaded(self, empresa: str, paths: Iterable[Union[str, Path]]) -> int:
+        """
+        Registrar archivos cargados con su mtime actual
+
+        Los archivos que ya no existen se omiten: no hay nada que volver a emitir.
+
+        Returns:
+            Número de archivos registrados
+        """
+        now = time.time()
+        rows = []
+        for path in paths:
+            path = Path(path)
+            try:
+                rows.append((empresa, path.name, path.stat().st_mtime, now))
+            except OSError:
+                continue
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO archivos_cargados (empresa, nombre, mtime, fecha_carga) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+        logger.debug(f"[loaded_json_registry][mark_loaded] {empresa}: {len(rows)} archivos registrados")
+        return len(rows)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ejecutor DAG en Pipeline
+========================
+
+Ejecuta etapas declaradas como un grafo dirigido donde cada etapa consume
+los elementos que emiten sus dependencias a medida que se producen, en vez
+de esperar a que la etapa anterior termine por completo.
+
+Cada etapa declara explícitamente:
+- depends_on: etapas de las que recibe elementos
+- concurrency: workers en paralelo
+- max_retries / retry_delay: reintentos por elemento (o lote)
+- batch_size / batch_timeout: agrupación en micro-lotes
+- barrier: ejecutar una sola vez con todos los elementos recibidos
+
+Los handlers son funciones síncronas (los servicios existentes lo son) y se
+ejecutan en hilos. Una etapa sin dependencias es una fuente: su handler
+recibe ``emit`` y publica elementos mientras trabaja.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class StageSpec:
+    """Declaración de una etapa del DAG"""
+    name: str
+    handler: Callable[..., Optional[Iterable[Any]]]
+    depends_on: List[str] = field(default_factory=list)
+    concurrency: int = 1
+    max_retries: int = 0
+    retry_delay: float = 1.0
+    batch_size: int = 1
+    batch_timeout: float = 2.0
+    barrier: bool = False
+    critical: bool = True
+    queue_size: int = 1000
+
+
+@dataclass
+class StageStats:
+    """Estadísticas de ejecución de una etapa"""
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    busy_seconds: float = 0.0
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def duration_seconds(self) -> float:
+        if not self.start_time or not self.end_time:
+            return 0.0
+        return (self.end_time - self.start_time).total_seconds()
+
+    @property
+    def success(self) -> bool:
+        return self.failures == 0
+
+
+class PipelineDAG:
+    """
+    Grafo de etapas conectadas por colas acotadas
+    """
+
+    def __init__(self, name: str = "pipeline"):
+        self.name = name
+        self.stages: Dict[str, StageSpec] = {}
+
+    def add_stage(self, spec: StageSpec) -> 'PipelineDAG':
+        """Registrar una etapa (las dependencias deben existir previamente)"""
+        if spec.name in self.stages:
+            raise ValueError(f"Etapa duplicada: {spec.name}")
+        for dep in spec.depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Etapa {spec.name} depende de etapa desconocida: {dep}")
+        if spec.concurrency < 1:
+            raise ValueError(f"Etapa {spec.name}: concurrency debe ser >= 1")
+        self.stages[spec.name] = spec
+        return self
+
+    def stage(self, name: str, handler: Callable, **kwargs) -> 'PipelineDAG':
+        """Atajo para add_stage(StageSpec(...))"""
+        return self.add_stage(StageSpec(name=name, handler=handler, **kwargs))
+
+    def downstream_of(self, name: str) -> List[str]:
+        return [s.name for s in self.stages.values() if name in s.depends_on]
+
+    def critical_failures(self, stats: Dict[str, StageStats]) -> List[str]:
+        """Etapas críticas con fallos definitivos"""
+        return [name for name, spec in self.stages.items()
+                if spec.critical and not stats[name].success]
+
+    async def run(self) -> Dict[str, StageStats]:
+        """
+        Ejecutar el DAG completo
+
+        Returns:
+            Estadísticas por etapa
+        """
+        stats = {name: StageStats(name=name) for name in self.stages}
+        inputs = {
+            name: asyncio.Queue(maxsize=spec.queue_size)
+            for name, spec in self.stages.items() if spec.depends_on
+        }
+
+        logger.info(f"[pipeline_dag][run] {self.name}: iniciando {len(self.stages)} etapas")
+        tasks = [
+            asyncio.create_task(self._run_stage(spec, stats[spec.name], inputs),
+                                name=f"{self.name}_{spec.name}")
+            for spec in self.stages.values()
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        for stage_stats in stats.values():
+            logger.info(f"[pipeline_dag][run] {self.name}.{stage_stats.name}: "
+                        f"entrada={stage_stats.items_in}, salida={stage_stats.items_out}, "
+                        f"fallos={stage_stats.failures}, {stage_stats.duration_seconds:.1f}s")
+        return stats
+
+    async def _run_stage(self, spec: StageSpec, stats: StageStats,
+                         inputs: Dict[str, asyncio.Queue]):
+        loop = asyncio.get_running_loop()
+        outputs = [inputs[name] for name in self.downstream_of(spec.name)]
+        stats.start_time = datetime.now()
+
+        async def publish(items: Optional[Iterable[Any]]):
+            for item in items or ():
+                stats.items_out += 1
+                for queue in outputs:
+                    await queue.put(item)
+
+        try:
+            if not spec.depends_on:
+                def emit(item):
+                    # Llamado desde el hilo del handler: bloquea si la cola está llena
+                    asyncio.run_coroutine_threadsafe(publish([item]), loop).result()
+
+                await self._call(spec, stats, emit)
+                return
+
+            if spec.barrier:
+                collected = [item async for item in self._drain(spec, stats, inputs[spec.name])]
+                await publish(await self._call(spec, stats, collected))
+                return
+
+            work: asyncio.Queue = asyncio.Queue(maxsize=spec.queue_size)
+
+            async def feeder():
+                async for item in self._drain(spec, stats, inputs[spec.name]):
+                    await work.put(item)
+                for _ in range(spec.concurrency):
+                    await work.put(_END)
+
+            async def worker():
+                while True:
+                    batch, finished = await self._next_batch(spec, work)
+                    if batch:
+                        payload = batch if spec.batch_size > 1 else batch[0]
+                        await publish(await self._call(spec, stats, payload))
+                    if finished:
+                        return
+
+            await asyncio.gather(feeder(), *(worker() for _ in range(spec.concurrency)))
+        finally:
+            stats.end_time = datetime.now()
+            for queue in outputs:
+                await queue.put(_END)
+
+    @staticmethod
+    async def _drain(spec: StageSpec, stats: StageStats, queue: asyncio.Queue):
+        """Leer la cola de entrada hasta que todas las dependencias terminen"""
+        remaining = len(spec.depends_on)
+        while remaining:
+            item = await queue.get()
+            if item is _END:
+                remaining -= 1
+                continue
+            stats.items_in += 1
+            yield item
+
+    @staticmethod
+    async def _next_batch(spec: StageSpec, work: asyncio.Queue):
+        """Armar un micro-lote: hasta batch_size elementos o batch_timeout segundos"""
+        first = await work.get()
+        if first is _END:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + spec.batch_timeout
+        while len(batch) < spec.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(work.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _call(self, spec: StageSpec, stats: StageStats, payload) -> Optional[Iterable[Any]]:
+        """Invocar el handler en un hilo con reintentos"""
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            try:
+                stats.calls += 1
+                result = await asyncio.to_thread(spec.handler, payload)
+                stats.busy_seconds += time.monotonic() - started
+                return list(result) if result is not None else None
+            except Exception as e:
+                stats.busy_seconds += time.monotonic() - started
+                if attempt <= spec.max_retries:
+                    stats.retries += 1
+                    logger.warning(f"[pipeline_dag][{spec.name}] Reintento {attempt}/{spec.max_retries}: {e}")
+                    await asyncio.sleep(spec.retry_delay * attempt)
+                    continue
+                stats.failures += 1
+                stats.errors.append(f"{spec.name}: {e}")
+                logger.error(f"[pipeline_dag][{spec.name}] Fallo definitivo: {e}")
+                return None
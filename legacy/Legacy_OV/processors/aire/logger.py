@@ -15,6 +15,8 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 import threading
 
+from src.utils.latency_histogram import HistogramRegistry
+
 
 @dataclass
 class ProcessingMetric:
@@ -28,11 +30,13 @@ class ProcessingMetric:
 class MetricsCollector:
     """Recolector de métricas de procesamiento."""
 
-    def __init__(self, max_metrics: int = 10000):
+    def __init__(self, max_metrics: int = 10000, company: Optional[str] = None):
         self.max_metrics = max_metrics
+        self.company = company
         self.metrics = deque(maxlen=max_metrics)
         self.counters = defaultdict(int)
-        self.timers = defaultdict(list)
+        # Histogramas de tamaño fijo por timer y empresa (memoria constante)
+        self.timers = HistogramRegistry()
         self.lock = threading.Lock()
 
     def record_counter(self, name: str, value: int = 1, metadata: Dict[str, Any] = None):
@@ -50,7 +54,7 @@ class MetricsCollector:
     def record_timer(self, name: str, duration: float, metadata: Dict[str, Any] = None):
         """Registra una duración."""
         with self.lock:
-            self.timers[name].append(duration)
+            self.timers.record(name, duration, company=(metadata or {}).get('company', self.company))
             metric = ProcessingMetric(
                 timestamp=datetime.now(),
                 metric_type='timer',
@@ -75,18 +79,12 @@ class MetricsCollector:
         return self.counters.get(name, 0)
 
     def get_timer_stats(self, name: str) -> Dict[str, float]:
-        """Obtiene estadísticas de un timer."""
-        times = self.timers.get(name, [])
-        if not times:
-            return {'count': 0, 'avg': 0.0, 'min': 0.0, 'max': 0.0, 'total': 0.0}
-        
-        return {
-            'count': len(times),
-            'avg': sum(times) / len(times),
-            'min': min(times),
-            'max': max(times),
-            'total': sum(times)
-        }
+        """Obtiene estadísticas de un timer (incluye p50/p90/p99)."""
+        return self.timers.stats(name)
+
+    def get_timer_stats_by_company(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Obtiene percentiles por timer y empresa."""
+        return self.timers.stats_by('company')
 
     def get_recent_metrics(self, hours: int = 1) -> List[ProcessingMetric]:
         """Obtiene métricas recientes."""
@@ -102,6 +100,9 @@ class MetricsCollector:
             'total_metrics': len(recent_metrics),
             'counters': dict(self.counters),
             'timer_stats': {name: self.get_timer_stats(name) for name in self.timers},
+            'timer_stats_by_company': self.get_timer_stats_by_company(),
+            # Snapshot fusionable con el de otros procesos/ejecuciones
+            'histograms': self.timers.snapshot(),
             'metrics': [asdict(m) for m in recent_metrics]
         }
         
@@ -122,7 +123,7 @@ class AireLogger:
             self._setup_handlers()
         
         # Métricas
-        self.metrics = MetricsCollector()
+        self.metrics = MetricsCollector(company='aire')
         
         # Contadores específicos
         self.processing_stats = {
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Historial de Ejecuciones (Serie Temporal)
+=========================================
+
+Almacén local append-only de duraciones, registros y bytes movidos por
+tarea, etapa y empresa. Reemplaza la lista en memoria de 100 ejecuciones
+para que el historial sobreviva a reinicios y permita detectar si las
+corridas se están volviendo más lentas.
+
+API de consulta:
+- percentiles(): p50/p95/p99 (u otros) por tarea/etapa y empresa en una ventana
+- summary(): percentiles agrupados por nombre o empresa
+- trend(): percentiles por día/hora para ver la evolución
+- recent(): últimas mediciones
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import json
+import logging
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+KIND_TASK = 'task'
+KIND_FLOW = 'flow'
+KIND_STAGE = 'stage'
+
+METRICS = ('duration_seconds', 'records', 'bytes')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    empresa TEXT,
+    execution_id TEXT,
+    success INTEGER NOT NULL DEFAULT 1,
+    duration_seconds REAL NOT NULL DEFAULT 0,
+    records INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_name_ts ON measurements (kind, name, ts);
+CREATE INDEX IF NOT EXISTS idx_measurements_empresa_ts ON measurements (empresa, ts);
+"""
+
+
+@dataclass
+class Measurement:
+    """Medición de una tarea o etapa"""
+    kind: str
+    name: str
+    duration_seconds: float = 0.0
+    empresa: Optional[str] = None
+    execution_id: Optional[str] = None
+    success: bool = True
+    records: int = 0
+    bytes: int = 0
+    timestamp: Optional[datetime] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> Optional[float]:
+    """Percentil por interpolación lineal sobre valores ya ordenados"""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    rank = (pct / 100.0) * (len(sorted_values) - 1)
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return float(sorted_values[low])
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class ExecutionHistoryStore:
+    """
+    Serie temporal append-only de ejecuciones en SQLite
+    """
+
+    def __init__(self, db_path: str = "data/state/execution_history.db"):
+        """
+        Args:
+            db_path: Archivo SQLite del historial
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def record(self, measurement: Measurement):
+        """Agregar una medición"""
+        self.record_many([measurement])
+
+    def record_many(self, measurements: Iterable[Measurement]) -> int:
+        """Agregar varias mediciones en una transacción"""
+        rows = [
+            (
+                (m.timestamp.timestamp() if m.timestamp else time.time()),
+                m.kind, m.name, m.empresa, m.execution_id, int(bool(m.success)),
+                float(m.duration_seconds or 0.0), int(m.records or 0), int(m.bytes or 0),
+                json.dumps(m.extra, default=str) if m.extra else None
+            )
+            for m in measurements
+        ]
+        if not rows:
+            return 0
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO measurements (ts, kind, name, empresa, execution_id, success, "
+                    "duration_seconds, records, bytes, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.error(f"[execution_history][record] Error guardando mediciones: {e}")
+            return 0
+        return len(rows)
+
+    @staticmethod
+    def _where(kind: Optional[str], name: Optional[str], empresa: Optional[str],
+               start: Optional[datetime], end: Optional[datetime],
+               success_only: bool):
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if name:
+            clauses.append("name = ?")
+            params.append(name)
+        if empresa:
+            clauses.append("empresa = ?")
+            params.append(empresa)
+        if start:
+            clauses.append("ts >= ?")
+            params.append(start.timestamp())
+        if end:
+            clauses.append("ts < ?")
+            params.append(end.timestamp())
+        if success_only:
+            clauses.append("success = 1")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def percentiles(self, name: Optional[str] = None, empresa: Optional[str] = None,
+                    kind: Optional[str] = None, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, metric: str = 'duration_seconds',
+                    pcts: Sequence[float] = (50, 95, 99),
+                    success_only: bool = False) -> Dict[str, Any]:
+        """
+        Percentiles de una métrica en una ventana
+
+        Args:
+            name: Tarea o etapa (None = todas)
+            empresa: Empresa (None = todas)
+            kind: 'task', 'flow' o 'stage' (None = todos)
+            start / end: Ventana [start, end)
+            metric: 'duration_seconds', 'records' o 'bytes'
+            pcts: Percentiles a calcular
+            success_only: Ignorar ejecuciones fallidas
+
+        Returns:
+            Dict con count, min, max, mean y pNN
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Métrica no soportada: {metric}")
+
+        where, params = self._where(kind, name, empresa, start, end, success_only)
+        with self._connect() as conn:
+            values = [row[0] for row in conn.execute(
+                f"SELECT {metric} FROM measurements {where} ORDER BY {metric}", params
+            )]
+        return self._describe(values, pcts)
+
+    @staticmethod
+    def _describe(values: List[float], pcts: Sequence[float]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            'count': len(values),
+            'min': values[0] if values else None,
+            'max': values[-1] if values else None,
+            'mean': (sum(values) / len(values)) if values else None
+        }
+        for pct in pcts:
+            result[f"p{pct:g}"] = percentile(values, pct)
+        return result
+
+    def summary(self, group_by: str = 'name', kind: Optional[str] = None,
+                empresa: Optional[str] = None, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, metric: str = 'duration_seconds',
+                pcts: Sequence[float] = (50, 95, 99)) -> Dict[str, Dict[str, Any]]:
+        """
+        Percentiles agrupados por 'name', 'empresa' o 'name_empresa'
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Métrica no soportada: {metric}")
+        group_exprs = {
+            'name': "name",
+            'empresa': "COALESCE(empresa, '-')",
+            'name_empresa': "name || '/' || COALESCE(empresa, '-')"
+        }
+        if group_by not in group_exprs:
+            raise ValueError(f"Agrupación no soportada: {group_by}")
+
+        where, params = self._where(kind, None, empresa, start, end, False)
+        groups: Dict[str, List[float]] = {}
+        with self._connect() as conn:
+            for row in conn.execute(
+                f"SELECT {group_exprs[group_by]} AS g, {metric} AS v FROM measurements "
+                f"{where} ORDER BY g, v", params
+            ):
+                groups.setdefault(row['g'], []).append(row['v'])
+        return {group: self._describe(values, pcts) for group, values in groups.items()}
+
+    def trend(self, name: str, empresa: Optional[str] = None, kind: Optional[str] = None,
+              start: Optional[datetime] = None, end: Optional[datetime] = None,
+              bucket: str = 'day', metric: str = 'duration_seconds',
+              pcts: Sequence[float] = (50, 95)) -> List[Dict[str, Any]]:
+        """
+        Percentiles por intervalo de tiempo ('day' o 'hour') para ver la tendencia
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Métrica no soportada: {metric}")
+        fmt = {'day': '%Y-%m-%d', 'hour': '%Y-%m-%d %H:00'}.get(bucket)
+        if fmt is None:
+            raise ValueError(f"Intervalo no soportado: {bucket}")
+
+        where, params = self._where(kind, name, empresa, start, end, False)
+        buckets: Dict[str, List[float]] = {}
+        with self._connect() as conn:
+            for row in conn.execute(
+                f"SELECT strftime('{fmt}', ts, 'unixepoch', 'localtime') AS b, {metric} AS v "
+                f"FROM measurements {where} ORDER BY b, v", params
+            ):
+                buckets.setdefault(row['b'], []).append(row['v'])
+        return [{'bucket': b, **self._describe(values, pcts)} for b, values in buckets.items()]
+
+    def recent(self, limit: int = 10, kind: Optional[str] = KIND_TASK,
+               name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Últimas mediciones (más recientes primero)"""
+        where, params = self._where(kind, name, None, None, None, False)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM measurements {where} ORDER BY ts DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        recent = []
+        for row in rows:
+            item = dict(row)
+            item['timestamp'] = datetime.fromtimestamp(item.pop('ts')).isoformat()
+            item['success'] = bool(item['success'])
+            item['extra'] = json.loads(item['extra']) if item['extra'] else {}
+            recent.append(item)
+        return recent
+
+    def purge_older_than(self, days: int) -> int:
+        """Eliminar mediciones más antiguas que ``days`` días (retención)"""
+        cutoff = time.time() - days * 86400
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM measurements WHERE ts < ?", (cutoff,))
+            return cursor.rowcount
+
+
+def measurements_from_flow_report(report: Dict[str, Any], task_name: str,
+                                  execution_id: Optional[str] = None) -> List[Measurement]:
+    """
+    Extraer mediciones por empresa y por etapa de un reporte de
+    CompleteFlowOrchestrator.generate_execution_report
+    """
+    measurements = []
+    for empresa, data in (report.get('empresas') or {}).items():
+        flow_ts = data.get('end_time') or data.get('start_time')
+        timestamp = flow_ts if isinstance(flow_ts, datetime) else None
+        steps = data.get('steps_completed') or []
+
+        flow_bytes = 0
+        for step in steps:
+            metadata = step.get('metadata') or {}
+            step_bytes = int(metadata.get('bytes_totales', 0) or 0)
+            flow_bytes += step_bytes
+            step_end = step.get('end_time')
+            measurements.append(Measurement(
+                kind=KIND_STAGE,
+                name=step.get('step_name', 'desconocido'),
+                empresa=empresa,
+                execution_id=execution_id or data.get('execution_id'),
+                success=bool(step.get('success')),
+                duration_seconds=step.get('duration_seconds', 0.0),
+                records=step.get('records_processed', 0),
+                bytes=step_bytes,
+                timestamp=step_end if isinstance(step_end, datetime) else None,
+                extra={'task': task_name, 'files': step.get('files_processed', 0)}
+            ))
+
+        measurements.append(Measurement(
+            kind=KIND_FLOW,
+            name=task_name,
+            empresa=empresa,
+            execution_id=execution_id or data.get('execution_id'),
+            success=bool(data.get('overall_success')),
+            duration_seconds=data.get('total_duration', 0.0),
+            records=data.get('total_records_processed', 0),
+            bytes=flow_bytes,
+            timestamp=timestamp,
+            extra={'files_uploaded': data.get('total_files_uploaded', 0)}
+        ))
+    return measurements
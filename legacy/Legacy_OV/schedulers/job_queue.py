@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cola Persistente de Trabajos para el Programador
+================================================
+
+Cola durable respaldada en SQLite que separa la programación de la
+ejecución de tareas:
+
+- El programador solo encola trabajos (``enqueue``)
+- Los workers reclaman trabajos por prioridad (``claim``)
+- Un lease por tarea impide ejecuciones solapadas de la misma tarea,
+  incluso entre procesos distintos que compartan la base de datos
+- Los leases vencidos (worker caído) se recuperan y el trabajo se reencola
+- El último horario programado de cada tarea se persiste para poder
+  recuperar ejecuciones perdidas (misfires) tras un reinicio
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_name TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    scheduled_for REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority DESC, scheduled_for);
+CREATE INDEX IF NOT EXISTS idx_jobs_task ON jobs (task_name, status);
+CREATE TABLE IF NOT EXISTS task_state (
+    task_name TEXT PRIMARY KEY,
+    last_scheduled_for REAL
+);
+"""
+
+
+@dataclass
+class JobRecord:
+    """Trabajo reclamado por un worker"""
+    id: int
+    task_name: str
+    priority: int
+    scheduled_for: datetime
+    attempts: int
+    max_attempts: int
+    lease_owner: str
+
+
+class SQLiteJobQueue:
+    """
+    Cola de trabajos con prioridades y leases por tarea
+    """
+
+    def __init__(self, db_path: str = "data/state/scheduler_jobs.db",
+                 busy_timeout: float = 30.0):
+        """
+        Args:
+            db_path: Archivo SQLite de la cola
+            busy_timeout: Segundos de espera si otro proceso tiene el lock
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+        logger.info(f"[job_queue][init] Cola de trabajos en {self.db_path}")
+
+    @contextmanager
+    def _connect(self):
+        # Una conexión por operación: seguro entre hilos y procesos
+        conn = sqlite3.connect(str(self.db_path), timeout=self.busy_timeout,
+                               isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, task_name: str, priority: int = 0,
+                scheduled_for: Optional[datetime] = None,
+                max_attempts: int = 3, coalesce: bool = True) -> Optional[int]:
+        """
+        Encolar un trabajo
+
+        Args:
+            task_name: Tarea a ejecutar
+            priority: Mayor valor = se reclama antes
+            scheduled_for: Horario programado (por defecto ahora)
+            max_attempts: Intentos antes de marcar como fallido
+            coalesce: No encolar si ya hay un trabajo pendiente de la misma tarea
+
+        Returns:
+            ID del trabajo, o None si se fusionó con uno pendiente
+        """
+        now = time.time()
+        scheduled_ts = scheduled_for.timestamp() if scheduled_for else now
+
+        with self._transaction() as conn:
+            if coalesce:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE task_name = ? AND status = ?",
+                    (task_name, STATUS_QUEUED)
+                ).fetchone()
+                if row:
+                    logger.debug(f"[job_queue][enqueue] '{task_name}' ya pendiente (job {row['id']})")
+                    return None
+
+            cursor = conn.execute(
+                "INSERT INTO jobs (task_name, priority, scheduled_for, enqueued_at, status, max_attempts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (task_name, priority, scheduled_ts, now, STATUS_QUEUED, max_attempts)
+            )
+            job_id = cursor.lastrowid
+
+        logger.info(f"[job_queue][enqueue] '{task_name}' encolada (job {job_id}, prioridad {priority})")
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float = 300.0,
+              min_priority: Optional[int] = None) -> Optional[JobRecord]:
+        """
+        Reclamar el trabajo de mayor prioridad cuya tarea no tenga un lease activo
+
+        Args:
+            worker_id: Identificador del worker
+            lease_seconds: Duración del lease (renovar con heartbeat)
+            min_priority: Solo reclamar trabajos con prioridad >= este valor
+
+        Returns:
+            Trabajo reclamado o None si no hay trabajo disponible
+        """
+        now = time.time()
+        query = (
+            "SELECT * FROM jobs j WHERE j.status = ? AND j.scheduled_for <= ? "
+            "AND NOT EXISTS (SELECT 1 FROM jobs r WHERE r.task_name = j.task_name "
+            "AND r.status = ? AND r.lease_expires > ?) "
+        )
+        params: List[Any] = [STATUS_QUEUED, now, STATUS_RUNNING, now]
+        if min_priority is not None:
+            query += "AND j.priority >= ? "
+            params.append(min_priority)
+        query += "ORDER BY j.priority DESC, j.scheduled_for ASC LIMIT 1"
+
+        with self._transaction() as conn:
+            row = conn.execute(query, params).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (STATUS_RUNNING, worker_id, now + lease_seconds, now, row['id'])
+            )
+
+        return JobRecord(
+            id=row['id'],
+            task_name=row['task_name'],
+            priority=row['priority'],
+            scheduled_for=datetime.fromtimestamp(row['scheduled_for']),
+            attempts=row['attempts'] + 1,
+            max_attempts=row['max_attempts'],
+            lease_owner=worker_id
+        )
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 300.0) -> bool:
+        """Renovar el lease de un trabajo en ejecución"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, worker_id, STATUS_RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, success: bool, error: Optional[str] = None,
+                 result: Optional[Dict[str, Any]] = None, retry: bool = True) -> bool:
+        """
+        Marcar un trabajo como terminado y liberar su lease
+
+        Solo el dueño del lease vigente puede cerrarlo: si el lease venció y el
+        trabajo ya fue reencolado o tomado por otro worker, no se modifica.
+        Un fallo con intentos disponibles se reencola, igual que en recover_expired.
+
+        Args:
+            job_id: Trabajo a cerrar
+            worker_id: Worker que lo reclamó
+            success: Resultado de la ejecución
+            error: Mensaje de error
+            result: Resultado serializable
+            retry: Reencolar fallos con intentos disponibles
+
+        Returns:
+            False si el worker ya no era dueño del trabajo
+        """
+        now = time.time()
+        result_json = json.dumps(result, default=str) if result is not None else None
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?",
+                (job_id, worker_id, STATUS_RUNNING)
+            ).fetchone()
+            if row is None:
+                requeue = False
+            else:
+                requeue = not success and retry and row['attempts'] < row['max_attempts']
+                if requeue:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                        "error = ?, result = ? WHERE id = ?",
+                        (STATUS_QUEUED, error, result_json, job_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, finished_at = ?, lease_expires = NULL, "
+                        "error = ?, result = ? WHERE id = ?",
+                        (STATUS_DONE if success else STATUS_FAILED, now, error, result_json, job_id)
+                    )
+
+        if row is None:
+            logger.warning(f"[job_queue][complete] {worker_id} ya no tiene el lease del job {job_id}; "
+                           f"resultado descartado")
+            return False
+        if requeue:
+            logger.warning(f"[job_queue][complete] Job {job_id} falló (intento {row['attempts']} de "
+                           f"{row['max_attempts']}); se reencola")
+        return True
+
+    def recover_expired(self) -> int:
+        """
+        Reencolar trabajos cuyo lease venció (worker caído o proceso muerto)
+
+        Returns:
+            Número de trabajos recuperados
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "SELECT id, task_name, attempts, max_attempts FROM jobs "
+                "WHERE status = ? AND lease_expires <= ?",
+                (STATUS_RUNNING, now)
+            ).fetchall()
+            for row in expired:
+                if row['attempts'] >= row['max_attempts']:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                        (STATUS_FAILED, now, "Lease vencido (intentos agotados)", row['id'])
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                        (STATUS_QUEUED, row['id'])
+                    )
+
+        for row in expired:
+            logger.warning(f"[job_queue][recover] Lease vencido para '{row['task_name']}' (job {row['id']})")
+        return len(expired)
+
+    def get_last_scheduled(self, task_name: str) -> Optional[datetime]:
+        """Último horario programado encolado para una tarea"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_scheduled_for FROM task_state WHERE task_name = ?", (task_name,)
+            ).fetchone()
+        if row and row['last_scheduled_for'] is not None:
+            return datetime.fromtimestamp(row['last_scheduled_for'])
+        return None
+
+    def set_last_scheduled(self, task_name: str, scheduled_for: datetime):
+        """Persistir el último horario programado de una tarea"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO task_state (task_name, last_scheduled_for) VALUES (?, ?) "
+                "ON CONFLICT(task_name) DO UPDATE SET last_scheduled_for = excluded.last_scheduled_for",
+                (task_name, scheduled_for.timestamp())
+            )
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Conteo de trabajos por estado y trabajos activos"""
+        with self._connect() as conn:
+            counts = {row['status']: row['n'] for row in conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            )}
+            running = [dict(row) for row in conn.execute(
+                "SELECT id, task_name, lease_owner, started_at FROM jobs WHERE status = ?",
+                (STATUS_RUNNING,)
+            )]
+        for job in running:
+            job['started_at'] = datetime.fromtimestamp(job['started_at']).isoformat()
+        return {'counts': counts, 'running': running}
+
+    def purge_finished(self, older_than_days: int = 30) -> int:
+        """Eliminar trabajos terminados antiguos"""
+        cutoff = time.time() - older_than_days * 86400
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (STATUS_DONE, STATUS_FAILED, cutoff)
+            )
+            return cursor.rowcount
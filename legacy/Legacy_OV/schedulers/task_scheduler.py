@@ -14,12 +14,20 @@ Implementa el Paso 22 del FLUJO_VERIFICACION.md:
 - Manejo de horarios y frecuencias
 - Logging y monitoreo de ejecuciones
 
+El hilo del programador solo encola trabajos en una cola persistente
+(SQLite, ver job_queue.py); un pool de workers los ejecuta por prioridad.
+Un lease por tarea evita ejecuciones solapadas y los horarios perdidos
+durante una caída se recuperan al reiniciar. Un worker queda reservado
+para tareas de prioridad alta, de modo que la verificación horaria nunca
+espera detrás del flujo masivo diario.
+
 Autor: ISES | Analyst Data Jeam Paul Arcon Solano
 Fecha: Octubre 2025
 """
 
 import logging
-import schedule
+import os
+import socket
 import time
 import threading
 from datetime import datetime, timedelta
@@ -33,9 +41,19 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.orchestrators.complete_flow_orchestrator import CompleteFlowOrchestrator, CompleteFlowResult
+from src.schedulers.job_queue import SQLiteJobQueue, JobRecord
+from src.schedulers.execution_history_store import (
+    ExecutionHistoryStore, Measurement, KIND_TASK, KIND_FLOW, KIND_STAGE, measurements_from_flow_report
+)
 
 logger = logging.getLogger(__name__)
 
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 5
+PRIORITY_HIGH = 10
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
 @dataclass
 class ScheduledTask:
     """Definición de una tarea programada"""
@@ -47,6 +65,8 @@ class ScheduledTask:
     args: tuple = ()
     kwargs: Dict[str, Any] = None
     enabled: bool = True
+    priority: int = PRIORITY_NORMAL
+    lease_seconds: float = 900.0
     last_run: Optional[datetime] = None
     next_run: Optional[datetime] = None
     run_count: int = 0
@@ -74,18 +94,36 @@ class TaskScheduler:
     Programador de tareas para el sistema de extracción
     """
     
-    def __init__(self, simulated_mode: bool = False):
+    def __init__(self, simulated_mode: bool = False, num_workers: int = 3,
+                 queue_path: str = "data/state/scheduler_jobs.db",
+                 tick_seconds: float = 30.0, reserved_priority: int = PRIORITY_HIGH,
+                 history_path: str = "data/state/execution_history.db"):
         """
         Inicializar programador de tareas
         
         Args:
             simulated_mode: Si True, ejecuta en modo simulado
+            num_workers: Workers que ejecutan trabajos de la cola
+            queue_path: Archivo SQLite de la cola persistente
+            tick_seconds: Frecuencia con la que el programador revisa horarios
+            reserved_priority: El worker 0 solo atiende trabajos con esta
+                prioridad o mayor (carril exprés)
+            history_path: Archivo SQLite del historial de ejecuciones
         """
         self.simulated_mode = simulated_mode
         self.tasks: Dict[str, ScheduledTask] = {}
-        self.execution_history: List[TaskExecutionResult] = []
         self.running = False
         self.scheduler_thread = None
+        self.worker_threads: List[threading.Thread] = []
+        self.num_workers = max(1, num_workers)
+        self.tick_seconds = tick_seconds
+        self.reserved_priority = reserved_priority
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop_event = threading.Event()
+        
+        # Cola persistente de trabajos e historial de ejecuciones
+        self.job_queue = SQLiteJobQueue(queue_path)
+        self.history_store = ExecutionHistoryStore(history_path)
         
         # Inicializar orquestador
         self.orchestrator = CompleteFlowOrchestrator(simulated_mode=simulated_mode)
@@ -105,7 +143,8 @@ class TaskScheduler:
             schedule_type="daily",
             schedule_config={"time": "04:00"},
             function=self._execute_massive_daily_flow,
-            kwargs={"include_web_download": True, "force_reprocess": True}
+            kwargs={"include_web_download": True, "force_reprocess": True},
+            priority=PRIORITY_LOW
         )
         
         # Tarea 2: Ejecución regular cada 2 horas (L-S, 4am-10pm)
@@ -120,7 +159,8 @@ class TaskScheduler:
                 "weekdays": [0, 1, 2, 3, 4, 5]  # L-S (Monday=0)
             },
             function=self._execute_regular_flow,
-            kwargs={"include_web_download": True, "force_reprocess": False}
+            kwargs={"include_web_download": True, "force_reprocess": False},
+            priority=PRIORITY_NORMAL
         )
         
         # Tarea 3: Verificación S3 cada hora
@@ -130,7 +170,8 @@ class TaskScheduler:
             schedule_type="hourly",
             schedule_config={"minutes": 0},
             function=self._execute_s3_verification_flow,
-            kwargs={}
+            kwargs={},
+            priority=PRIORITY_HIGH
         )
         
         # Tarea 4: Limpieza de logs semanal
@@ -140,13 +181,14 @@ class TaskScheduler:
             schedule_type="weekly",
             schedule_config={"day": "sunday", "time": "02:00"},
             function=self._execute_cleanup,
-            kwargs={}
+            kwargs={},
+            priority=PRIORITY_LOW
         )
     
     def add_task(self, name: str, description: str, schedule_type: str,
                  schedule_config: Dict[str, Any], function: Callable,
                  args: tuple = (), kwargs: Dict[str, Any] = None,
-                 enabled: bool = True) -> bool:
+                 enabled: bool = True, priority: int = PRIORITY_NORMAL) -> bool:
         """
         Agregar una tarea programada
         
@@ -159,6 +201,7 @@ class TaskScheduler:
             args: Argumentos posicionales
             kwargs: Argumentos con nombre
             enabled: Si la tarea está habilitada
+            priority: Prioridad en la cola (mayor = antes)
             
         Returns:
             True si se agregó exitosamente
@@ -174,77 +217,182 @@ class TaskScheduler:
             function=function,
             args=args,
             kwargs=kwargs or {},
-            enabled=enabled
+            enabled=enabled,
+            priority=priority
         )
+        task.next_run = self._compute_next_run(task, datetime.now())
         
         self.tasks[name] = task
         
-        # Programar en schedule
-        self._schedule_task(task)
-        
-        logger.info(f"[task_scheduler][add_task] Tarea '{name}' agregada y programada")
+        logger.info(f"[task_scheduler][add_task] Tarea '{name}' agregada y programada "
+                   f"(próxima: {task.next_run})")
         return True
     
-    def _schedule_task(self, task: ScheduledTask):
-        """Programar una tarea en el sistema schedule"""
-        if not task.enabled:
-            return
-        
+    def _compute_next_run(self, task: ScheduledTask, after: datetime) -> Optional[datetime]:
+        """Calcular el primer horario programado estrictamente posterior a ``after``"""
         config = task.schedule_config
         
+        if task.schedule_type == "hourly":
+            candidate = after.replace(minute=config.get("minutes", 0), second=0, microsecond=0)
+            while candidate <= after:
+                candidate += timedelta(hours=1)
+            return candidate
+        
         if task.schedule_type == "daily":
-            schedule.every().day.at(config["time"]).do(
-                self._execute_task_wrapper, task
-            ).tag(task.name)
+            hour, minute = map(int, config["time"].split(":"))
+            candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if candidate <= after:
+                candidate += timedelta(days=1)
+            return candidate
+        
+        if task.schedule_type == "weekly":
+            hour, minute = map(int, config["time"].split(":"))
+            weekday = WEEKDAYS.index(config["day"].lower())
+            candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            candidate += timedelta(days=(weekday - candidate.weekday()) % 7)
+            if candidate <= after:
+                candidate += timedelta(days=7)
+            return candidate
+        
+        if task.schedule_type == "interval":
+            # Franjas start_time, start_time + hours, ... hasta end_time en días permitidos
+            step = timedelta(hours=config.get("hours", 1))
+            start_h, start_m = map(int, config.get("start_time", "00:00").split(":"))
+            end_h, end_m = map(int, config.get("end_time", "23:59").split(":"))
+            weekdays = config.get("weekdays", list(range(7)))
+            
+            for day_offset in range(8):
+                day = (after + timedelta(days=day_offset)).date()
+                if day.weekday() not in weekdays:
+                    continue
+                slot = datetime.combine(day, datetime.min.time()).replace(hour=start_h, minute=start_m)
+                day_end = slot.replace(hour=end_h, minute=end_m)
+                while slot <= day_end:
+                    if slot > after:
+                        return slot
+                    slot += step
+            return None
+        
+        logger.warning(f"[task_scheduler][next_run] Tipo de programación desconocido: {task.schedule_type}")
+        return None
+    
+    def _enqueue_due_tasks(self, now: Optional[datetime] = None) -> int:
+        """
+        Encolar las tareas cuyo horario ya llegó (único trabajo del programador)
+        
+        Si el proceso estuvo caído y se perdieron varios horarios, se encola
+        una sola ejecución de recuperación por tarea.
+        
+        Returns:
+            Número de trabajos encolados
+        """
+        now = now or datetime.now()
+        enqueued = 0
+        
+        for task in self.tasks.values():
+            if not task.enabled:
+                continue
             
-        elif task.schedule_type == "hourly":
-            minutes = config.get("minutes", 0)
-            schedule.every().hour.at(f":{minutes:02d}").do(
-                self._execute_task_wrapper, task
-            ).tag(task.name)
+            last_scheduled = self.job_queue.get_last_scheduled(task.name)
+            if last_scheduled is None:
+                # Primera vez: empezar a contar desde ahora
+                self.job_queue.set_last_scheduled(task.name, now)
+                task.next_run = self._compute_next_run(task, now)
+                continue
             
-        elif task.schedule_type == "weekly":
-            day = config["day"]
-            time_str = config["time"]
-            getattr(schedule.every(), day).at(time_str).do(
-                self._execute_task_wrapper, task
-            ).tag(task.name)
+            due = self._compute_next_run(task, last_scheduled)
+            if due is None or due > now:
+                task.next_run = due
+                continue
             
-        elif task.schedule_type == "interval":
-            # Para intervalos complejos, usar un wrapper personalizado
-            schedule.every(10).minutes.do(
-                self._check_interval_task, task
-            ).tag(f"{task.name}_checker")
-    
-    def _check_interval_task(self, task: ScheduledTask):
-        """Verificar si una tarea de intervalo debe ejecutarse"""
-        now = datetime.now()
-        config = task.schedule_config
-        
-        # Verificar día de la semana
-        if "weekdays" in config:
-            if now.weekday() not in config["weekdays"]:
-                return
+            # Avanzar hasta el último horario vencido (fusiona misfires)
+            latest_due = due
+            missed = 0
+            while True:
+                following = self._compute_next_run(task, latest_due)
+                if following is None or following > now:
+                    break
+                latest_due = following
+                missed += 1
+            
+            if missed:
+                logger.warning(f"[task_scheduler][enqueue] '{task.name}': {missed} horarios perdidos, "
+                              f"se encola una ejecución de recuperación")
+            
+            self.job_queue.enqueue(task.name, priority=task.priority, scheduled_for=latest_due)
+            self.job_queue.set_last_scheduled(task.name, latest_due)
+            task.next_run = self._compute_next_run(task, latest_due)
+            enqueued += 1
         
-        # Verificar horario
-        start_time = datetime.strptime(config["start_time"], "%H:%M").time()
-        end_time = datetime.strptime(config["end_time"], "%H:%M").time()
+        return enqueued
+    
+    def run_task_now(self, task_name: str, priority: Optional[int] = None) -> Optional[int]:
+        """Encolar una ejecución inmediata de una tarea"""
+        if task_name not in self.tasks:
+            raise ValueError(f"Tarea desconocida: {task_name}")
+        task = self.tasks[task_name]
+        return self.job_queue.enqueue(task.name, priority=task.priority if priority is None else priority)
+    
+    def _worker_loop(self, worker_index: int):
+        """Reclamar y ejecutar trabajos de la cola hasta que se detenga el programador"""
+        worker_id = f"{self.worker_prefix}:w{worker_index}"
+        min_priority = self.reserved_priority if worker_index == 0 and self.num_workers > 1 else None
         
-        if not (start_time <= now.time() <= end_time):
+        while not self._stop_event.is_set():
+            try:
+                job = self.job_queue.claim(worker_id, min_priority=min_priority,
+                                           lease_seconds=self._lease_for(None))
+            except Exception as e:
+                logger.error(f"[task_scheduler][worker] {worker_id}: error reclamando trabajo: {e}")
+                job = None
+            
+            if job is None:
+                self._stop_event.wait(2.0)
+                continue
+            
+            self._run_job(job, worker_id)
+    
+    def _lease_for(self, task: Optional[ScheduledTask]) -> float:
+        if task is None:
+            return max((t.lease_seconds for t in self.tasks.values()), default=900.0)
+        return task.lease_seconds
+    
+    def _run_job(self, job: JobRecord, worker_id: str):
+        """Ejecutar un trabajo reclamado manteniendo vivo su lease"""
+        task = self.tasks.get(job.task_name)
+        if task is None or not task.enabled:
+            self.job_queue.complete(job.id, worker_id, success=False,
+                                    error="Tarea desconocida o deshabilitada", retry=False)
             return
         
-        # Verificar intervalo desde última ejecución
-        if task.last_run:
-            hours_since_last = config.get("hours", 1)
-            if now - task.last_run < timedelta(hours=hours_since_last):
-                return
+        lease = self._lease_for(task)
+        done = threading.Event()
+        
+        def heartbeat():
+            while not done.wait(lease / 3):
+                if not self.job_queue.heartbeat(job.id, worker_id, lease):
+                    logger.warning(f"[task_scheduler][heartbeat] Lease perdido para job {job.id}")
+                    return
         
-        # Ejecutar tarea
-        self._execute_task_wrapper(task)
+        beat = threading.Thread(target=heartbeat, name=f"lease_{job.id}", daemon=True)
+        beat.start()
+        try:
+            result = self._execute_task_wrapper(task, execution_id=f"{task.name}_job{job.id}")
+        finally:
+            done.set()
+        
+        self.job_queue.complete(
+            job.id,
+            worker_id,
+            success=result.success,
+            error=result.error_message,
+            result={"duration_seconds": result.duration_seconds}
+        )
     
-    def _execute_task_wrapper(self, task: ScheduledTask):
+    def _execute_task_wrapper(self, task: ScheduledTask,
+                              execution_id: Optional[str] = None) -> TaskExecutionResult:
         """Wrapper para ejecutar una tarea con manejo de errores y logging"""
-        execution_id = f"{task.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        execution_id = execution_id or f"{task.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         start_time = datetime.now()
         
         result = TaskExecutionResult(
@@ -284,12 +432,50 @@ class TaskScheduler:
             result.end_time = datetime.now()
             result.duration_seconds = (result.end_time - result.start_time).total_seconds()
             
-            # Guardar en historial
-            self.execution_history.append(result)
+            # Guardar en historial persistente
+            self._record_execution(result)
+        
+        return result
+    
+    def _record_execution(self, result: TaskExecutionResult):
+        """Registrar la ejecución (y sus etapas por empresa) en el historial"""
+        measurements = []
+        report = result.result_data if isinstance(result.result_data, dict) else {}
+        
+        if 'empresas' in report:
+            measurements.extend(measurements_from_flow_report(report, result.task_name, result.execution_id))
+        
+        resumen = report.get('resumen_global', {})
+        measurements.append(Measurement(
+            kind=KIND_TASK,
+            name=result.task_name,
+            execution_id=result.execution_id,
+            success=result.success,
+            duration_seconds=result.duration_seconds,
+            records=resumen.get('total_registros', 0),
+            timestamp=result.end_time,
+            extra={'error': result.error_message} if result.error_message else {}
+        ))
+        self.history_store.record_many(measurements)
+    
+    def get_performance_summary(self, days: int = 7, empresa: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Percentiles de duración por tarea/etapa en los últimos ``days`` días
+        
+        Args:
+            days: Ventana de consulta
+            empresa: Filtrar por empresa (solo aplica a flujos y etapas)
             
-            # Mantener solo los últimos 100 registros
-            if len(self.execution_history) > 100:
-                self.execution_history = self.execution_history[-100:]
+        Returns:
+            Dict con percentiles por tarea, por flujo/empresa y por etapa/empresa
+        """
+        start = datetime.now() - timedelta(days=days)
+        return {
+            "window_days": days,
+            "tasks": self.history_store.summary(group_by='name', kind=KIND_TASK, start=start),
+            "flows": self.history_store.summary(group_by='name_empresa', kind=KIND_FLOW, empresa=empresa, start=start),
+            "stages": self.history_store.summary(group_by='name_empresa', kind=KIND_STAGE, empresa=empresa, start=start)
+        }
     
     def _execute_massive_daily_flow(self, **kwargs) -> Dict[str, Any]:
         """Ejecutar flujo masivo diario"""
@@ -414,40 +600,60 @@ class TaskScheduler:
             logger.error(f"[task_scheduler][save_report] Error guardando reporte: {e}")
     
     def start_scheduler(self):
-        """Iniciar el programador de tareas"""
+        """Iniciar el programador de tareas y el pool de workers"""
         if self.running:
             logger.warning("[task_scheduler][start] El programador ya está ejecutándose")
             return
         
         self.running = True
+        self._stop_event.clear()
+        
+        recovered = self.job_queue.recover_expired()
+        if recovered:
+            logger.info(f"[task_scheduler][start] {recovered} trabajos recuperados de leases vencidos")
         
         def run_scheduler():
             logger.info("[task_scheduler][start] Programador de tareas iniciado")
             
-            while self.running:
+            while not self._stop_event.is_set():
                 try:
-                    schedule.run_pending()
-                    time.sleep(60)  # Verificar cada minuto
+                    self._enqueue_due_tasks()
+                    self.job_queue.recover_expired()
                 except Exception as e:
                     logger.error(f"[task_scheduler][run] Error en programador: {e}")
-                    time.sleep(60)
+                self._stop_event.wait(self.tick_seconds)
             
             logger.info("[task_scheduler][stop] Programador de tareas detenido")
         
-        self.scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
+        self.scheduler_thread = threading.Thread(target=run_scheduler, name="task_scheduler", daemon=True)
         self.scheduler_thread.start()
         
-        logger.info("[task_scheduler][start] Hilo del programador iniciado")
+        self.worker_threads = []
+        for index in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, args=(index,),
+                                      name=f"task_worker_{index}", daemon=True)
+            worker.start()
+            self.worker_threads.append(worker)
+        
+        logger.info(f"[task_scheduler][start] Hilo del programador y {self.num_workers} workers iniciados")
     
-    def stop_scheduler(self):
-        """Detener el programador de tareas"""
+    def stop_scheduler(self, wait_workers: float = 5.0):
+        """
+        Detener el programador de tareas
+        
+        Los trabajos en curso no se interrumpen: si el proceso termina antes
+        de que acaben, su lease vence y se reencolan en el próximo arranque.
+        """
         self.running = False
+        self._stop_event.set()
         
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             self.scheduler_thread.join(timeout=5)
         
-        schedule.clear()
-        logger.info("[task_scheduler][stop] Programador detenido y tareas limpiadas")
+        for worker in self.worker_threads:
+            worker.join(timeout=wait_workers)
+        
+        logger.info("[task_scheduler][stop] Programador y workers detenidos")
     
     def get_task_status(self) -> Dict[str, Any]:
         """Obtener estado de todas las tareas"""
@@ -467,21 +673,23 @@ class TaskScheduler:
                 "enabled": task.enabled,
                 "run_count": task.run_count,
                 "error_count": task.error_count,
+                "priority": task.priority,
                 "last_run": task.last_run.isoformat() if task.last_run else None,
+                "next_run": task.next_run.isoformat() if task.next_run else None,
                 "last_error": task.last_error
             }
         
-        # Ejecuciones recientes (últimas 10)
-        recent_executions = sorted(self.execution_history, key=lambda x: x.start_time, reverse=True)[:10]
+        status["queue"] = self.job_queue.get_queue_stats()
         
-        for execution in recent_executions:
+        # Ejecuciones recientes (últimas 10, sobreviven a reinicios)
+        for execution in self.history_store.recent(limit=10, kind=KIND_TASK):
             status["recent_executions"].append({
-                "task_name": execution.task_name,
-                "execution_id": execution.execution_id,
-                "start_time": execution.start_time.isoformat(),
-                "duration_seconds": execution.duration_seconds,
-                "success": execution.success,
-                "error_message": execution.error_message
+                "task_name": execution['name'],
+                "execution_id": execution['execution_id'],
+                "end_time": execution['timestamp'],
+                "duration_seconds": execution['duration_seconds'],
+                "success": execution['success'],
+                "error_message": execution['extra'].get('error')
             })
         
         return status
@@ -492,7 +700,6 @@ class TaskScheduler:
             return False
         
         self.tasks[task_name].enabled = True
-        self._schedule_task(self.tasks[task_name])
         
         logger.info(f"[task_scheduler][enable] Tarea '{task_name}' habilitada")
         return True
@@ -503,7 +710,6 @@ class TaskScheduler:
             return False
         
         self.tasks[task_name].enabled = False
-        schedule.clear(task_name)
         
         logger.info(f"[task_scheduler][disable] Tarea '{task_name}' deshabilitada")
         return True
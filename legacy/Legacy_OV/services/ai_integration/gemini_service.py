@@ -16,6 +16,7 @@ Funcionalidades:
 import asyncio
 import json
 import logging
+import re
 from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 from datetime import datetime
@@ -30,6 +31,29 @@ except ImportError:
     print("⚠️  google-generativeai no está instalado. Instálalo con: pip install google-generativeai")
 
 from .config import GeminiConfig, get_ai_config
+from src.utils.rate_limiter import get_rate_limiter
+
+GEMINI_API_HOST = "generativelanguage.googleapis.com"
+
+# "Please retry in 12.5s" en el mensaje o "retry_delay { seconds: 12 }" en los detalles del 429
+_RETRY_DELAY_PATTERN = re.compile(r"retry in (\d+(?:\.\d+)?)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+
+
+def _retry_delay_from_error(error: Exception) -> Optional[float]:
+    """
+    Extraer la espera sugerida por la API de un error de cuota
+
+    google.api_core adjunta un RetryInfo en ``details``; si no viene,
+    se busca el retraso en el texto del error.
+    """
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
 
 
 class GeminiService:
@@ -40,6 +64,9 @@ class GeminiService:
         self.logger = logging.getLogger(__name__)
         self.model = None
         self.cache = {}
+        # Limitador compartido por host: sube la tasa mientras no haya 429 y retrocede si los hay
+        self.rate_limiter = get_rate_limiter(GEMINI_API_HOST, initial_interval=0.2,
+                                             burst=5.0, slow_threshold=30.0)
         
         if GEMINI_AVAILABLE and self.config.api_key:
             self._initialize_gemini()
@@ -130,10 +157,18 @@ class GeminiService:
         """
         
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content, 
-                prompt
-            )
+            async with self.rate_limiter.request() as outcome:
+                try:
+                    response = await asyncio.to_thread(
+                        self.model.generate_content, 
+                        prompt
+                    )
+                except Exception as api_error:
+                    # google.api_core expone el código HTTP (429 = cuota agotada)
+                    code = getattr(api_error, "code", None)
+                    outcome["status"] = code if isinstance(code, int) else None
+                    outcome["retry_after"] = _retry_delay_from_error(api_error)
+                    raise
             
             # Procesar respuesta
             result_text = response.text.strip()
@@ -354,13 +389,9 @@ class GeminiService:
                     task = self.analyze_document_content(item, analysis_type)
                 batch_tasks.append(task)
             
-            # Ejecutar lote con delay para respetar límites de API
+            # Cada llamada espera su turno en el limitador adaptativo
             batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
             results.extend(batch_results)
-            
-            # Delay entre lotes
-            if i + batch_size < len(items):
-                await asyncio.sleep(1)
         
         return results
     
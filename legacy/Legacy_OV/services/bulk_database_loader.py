@@ -16,7 +16,7 @@ Fecha: Octubre 2025
 import json
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, asdict
 import logging
 from pathlib import Path
@@ -25,6 +25,8 @@ import hashlib
 from sqlalchemy import text, exc as sa_exc
 from sqlalchemy.orm import Session
 from src.config.rds_config import RDSConnectionManager, get_rds_session
+from src.services.record_bus import RecordEnvelope
+from src.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -38,10 +40,16 @@ class LoadStats:
     error_records: int = 0
     processing_time: float = 0.0
     errors: List[str] = None
+    loaded_radicados: List[str] = None
+    loaded_files: List[str] = None  # Archivos ya presentes en RDS tras la carga (incluye duplicados exactos)
     
     def __post_init__(self):
         if self.errors is None:
             self.errors = []
+        if self.loaded_radicados is None:
+            self.loaded_radicados = []
+        if self.loaded_files is None:
+            self.loaded_files = []
 
 @dataclass
 class DuplicateCheckResult:
@@ -330,28 +338,54 @@ class BulkDatabaseLoader:
         Returns:
             Estadísticas de carga
         """
-        start_time = datetime.now()
-        stats = LoadStats()
-        table_name = f"ov_{company}"
-        
         logger.info(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][INFO] - Iniciando carga de archivos JSON procesados")
         
         # Escanear archivos JSON procesados
         json_files = self.scan_processed_json_files(company)
-        stats.total_records = len(json_files)
         
         if not json_files:
             logger.warning(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][WARNING] - No se encontraron archivos JSON procesados")
+            return LoadStats()
+        
+        return self.load_json_files_to_database(json_files, company)
+    
+    def load_json_files_to_database(self, json_files: List[Union[Path, RecordEnvelope]],
+                                    company: str) -> LoadStats:
+        """
+        Cargar un lote de archivos JSON procesados a base de datos
+        
+        Permite que el flujo en pipeline cargue los registros a medida que
+        la extracción los va generando, sin esperar al escaneo completo.
+        
+        Args:
+            json_files: Archivos *_data_*.json a cargar, o registros recibidos
+                del bus (se usan sus datos sin releer el archivo)
+            company: 'afinia' o 'aire'
+            
+        Returns:
+            Estadísticas de carga (incluye los radicados insertados/actualizados)
+        """
+        start_time = datetime.now()
+        stats = LoadStats()
+        stats.total_records = len(json_files)
+        table_name = f"ov_{company}"
+        
+        if not json_files:
             return stats
         
         session = self.rds_manager.get_session()
+        tracer = get_tracer()
         
         try:
             for json_file in json_files:
                 try:
-                    # Cargar archivo JSON
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        pqr_data = json.load(f)
+                    # Cargar registro (del bus o del archivo JSON)
+                    if isinstance(json_file, RecordEnvelope):
+                        pqr_data = json_file.data
+                        json_file = json_file.path
+                    else:
+                        with open(json_file, 'r', encoding='utf-8') as f:
+                            pqr_data = json.load(f)
                     
                     # Preparar registro para BD
                     db_record = self.prepare_record_for_db(pqr_data, company)
@@ -360,28 +394,36 @@ class BulkDatabaseLoader:
                     hash_registro = self._generate_record_hash(db_record)
                     db_record['hash_registro'] = hash_registro
                     
-                    # Verificar duplicados
-                    dup_result = self.check_duplicate(session, db_record, table_name)
+                    # Upsert trazado por registro (misma traza que su extracción)
+                    record_id = pqr_data.get('sgc_number') or db_record.get('numero_radicado')
+                    with tracer.span("db_upsert", record_id=record_id, company=company):
+                        # Verificar duplicados
+                        dup_result = self.check_duplicate(session, db_record, table_name)
                     
-                    if dup_result.is_duplicate:
-                        if dup_result.needs_update:
-                            # Actualizar registro existente
-                            if self.update_record(session, db_record, dup_result.existing_id, table_name):
-                                stats.updated_records += 1
-                                logger.debug(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][DEBUG] - Actualizado: {db_record.get('numero_radicado')}")
+                        if dup_result.is_duplicate:
+                            if dup_result.needs_update:
+                                # Actualizar registro existente
+                                if self.update_record(session, db_record, dup_result.existing_id, table_name):
+                                    stats.updated_records += 1
+                                    stats.loaded_radicados.append(db_record.get('numero_radicado'))
+                                    stats.loaded_files.append(str(json_file))
+                                    logger.debug(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][DEBUG] - Actualizado: {db_record.get('numero_radicado')}")
+                                else:
+                                    stats.error_records += 1
                             else:
-                                stats.error_records += 1
-                        else:
-                            # Registro duplicado exacto
-                            stats.skipped_duplicates += 1
-                            logger.debug(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][DEBUG] - Duplicado: {db_record.get('numero_radicado')}")
-                    else:
-                        # Insertar nuevo registro
-                        if self.insert_record(session, db_record, table_name):
-                            stats.inserted_records += 1
-                            logger.debug(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][DEBUG] - Insertado: {db_record.get('numero_radicado')}")
+                                # Registro duplicado exacto
+                                stats.skipped_duplicates += 1
+                                stats.loaded_files.append(str(json_file))
+                                logger.debug(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][DEBUG] - Duplicado: {db_record.get('numero_radicado')}")
                         else:
-                            stats.error_records += 1
+                            # Insertar nuevo registro
+                            if self.insert_record(session, db_record, table_name):
+                                stats.inserted_records += 1
+                                stats.loaded_radicados.append(db_record.get('numero_radicado'))
+                                stats.loaded_files.append(str(json_file))
+                                logger.debug(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][DEBUG] - Insertado: {db_record.get('numero_radicado')}")
+                            else:
+                                stats.error_records += 1
                     
                     # Commit cada cierto número de registros
                     if (stats.inserted_records + stats.updated_records) % self.batch_size == 0:
@@ -398,6 +440,7 @@ class BulkDatabaseLoader:
             
         except Exception as e:
             session.rollback()
+            stats.loaded_files.clear()
             error_msg = f"Error en transacción: {e}"
             stats.errors.append(error_msg)
             logger.error(f"[2025-10-10_05:32:20][{company}][bulk_loader][load_processed_json_to_database][ERROR] - {error_msg}")
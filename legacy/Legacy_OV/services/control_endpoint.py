@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Endpoint Local de Métricas y Control
+====================================
+
+Servidor HTTP en localhost que reemplaza el sondeo de STATUS.json y de los
+archivos PAUSE/STOP/RESUME de pagination_control:
+
+- GET  /                 Vista web (progreso en vivo y botones de control)
+- GET  /metrics          Snapshot JSON: progreso, tasa, ETA, colas y errores
+- GET  /events           Server-Sent Events con un snapshot cada N segundos
+- POST /control/<cmd>    pause | resume | stop (?target=afinia para una sola fuente)
+
+Los gestores de paginación se registran como fuentes con un proveedor de
+estado y reciben un ControlChannel en memoria; _check_control_signals lo
+consulta sin tocar el sistema de archivos y la espera en pausa se despierta
+apenas llega el comando.
+
+Se activa con CONTROL_ENDPOINT=127.0.0.1:8765. Solo escucha en loopback:
+el control no tiene autenticación.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+COMMANDS = ('pause', 'resume', 'stop')
+RATE_WINDOW_SECONDS = float(os.getenv('CONTROL_RATE_WINDOW', '60'))
+STREAM_INTERVAL_SECONDS = float(os.getenv('CONTROL_STREAM_INTERVAL', '1.0'))
+
+
+class ControlChannel:
+    """Estado de pausa/parada de una fuente, modificado desde el endpoint"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.paused = False
+        self.stopped = False
+        self.commands: Dict[str, int] = {command: 0 for command in COMMANDS}
+        self._changed = threading.Event()
+        self._lock = threading.Lock()
+
+    def apply(self, command: str) -> bool:
+        """Aplicar un comando; False si no es válido"""
+        if command not in COMMANDS:
+            return False
+        with self._lock:
+            if command == 'pause':
+                self.paused = True
+            elif command == 'resume':
+                self.paused = False
+            else:
+                self.stopped = True
+            self.commands[command] += 1
+        self._changed.set()
+        logger.info(f"[control_endpoint][apply] {self.name}: {command.upper()}")
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """Bloquear hasta el próximo comando o `timeout` segundos"""
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    async def wait_async(self, timeout: float) -> bool:
+        """Versión async de wait() para los bucles de paginación"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.wait, timeout)
+
+
+class RateWindow:
+    """Tasa de avance sobre una ventana deslizante de muestras (monotonic, valor)"""
+
+    def __init__(self, window_seconds: float = RATE_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, float]] = deque()
+
+    def add(self, value: float, now: Optional[float] = None) -> float:
+        """Registrar el valor acumulado actual y devolver la tasa por segundo"""
+        now = time.monotonic() if now is None else now
+        if not self._samples or value != self._samples[-1][1] or now - self._samples[-1][0] >= 1.0:
+            self._samples.append((now, value))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+        return self.rate()
+
+    def rate(self) -> float:
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, v0), (t1, v1) = self._samples[0], self._samples[-1]
+        return (v1 - v0) / (t1 - t0) if t1 > t0 else 0.0
+
+
+class _Source:
+    def __init__(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        self.name = name
+        self.provider = provider
+        self.channel = ControlChannel(name)
+        self.rate = RateWindow()
+
+
+class ControlEndpoint:
+    """Servidor HTTP de métricas y control de un proceso extractor"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765,
+                 stream_interval: float = STREAM_INTERVAL_SECONDS):
+        if host not in LOOPBACK_HOSTS:
+            logger.warning(f"[control_endpoint][init] Host {host} no es loopback; se usa 127.0.0.1")
+            host = '127.0.0.1'
+        self.host = host
+        self.port = port
+        self.stream_interval = stream_interval
+        self._sources: Dict[str, _Source] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def register_source(self, name: str, provider: Callable[[], Dict[str, Any]]) -> ControlChannel:
+        """
+        Registrar una fuente de métricas
+
+        Args:
+            name: Nombre de la fuente (ej. 'afinia')
+            provider: Devuelve el estado actual; se usan processed_records,
+                total_records y failed_records para tasa, ETA y errores
+
+        Returns:
+            ControlChannel: Canal que la fuente consulta para pausa/parada
+        """
+        with self._lock:
+            source = self._sources.get(name)
+            if source is None:
+                source = self._sources[name] = _Source(name, provider)
+            else:
+                source.provider = provider
+        return source.channel
+
+    def apply(self, command: str, target: Optional[str] = None) -> Dict[str, bool]:
+        """Aplicar un comando a una fuente o a todas"""
+        with self._lock:
+            sources = [s for s in self._sources.values() if target in (None, s.name)]
+        return {source.name: source.channel.apply(command) for source in sources}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual de todas las fuentes, con tasa, ETA y colas"""
+        with self._lock:
+            sources = list(self._sources.values())
+
+        result: Dict[str, Any] = {'timestamp': datetime.now().isoformat(), 'sources': {}, 'queues': {}}
+        for source in sources:
+            try:
+                status = dict(source.provider())
+            except Exception as e:
+                status = {'error': str(e)}
+            processed = status.get('processed_records', 0) or 0
+            total = status.get('total_records', 0) or 0
+            rate = source.rate.add(processed)
+            status.update({
+                'records_per_minute': round(rate * 60, 2),
+                'eta_seconds': round((total - processed) / rate) if rate > 0 and total > processed else None,
+                'is_paused': source.channel.paused,
+                'is_stopped': source.channel.stopped,
+                'commands': dict(source.channel.commands)
+            })
+            result['sources'][source.name] = status
+
+        try:
+            from src.services.record_bus import all_bus_stats
+            result['queues'] = {stats['bus']: stats for stats in all_bus_stats()}
+        except ImportError:
+            pass
+        return result
+
+    def start(self) -> 'ControlEndpoint':
+        endpoint = self
+
+        class Handler(_ControlRequestHandler):
+            control = endpoint
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="control_endpoint", daemon=True)
+        self._thread.start()
+        logger.info(f"[control_endpoint][start] Métricas y control en {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _ControlRequestHandler(BaseHTTPRequestHandler):
+    control: ControlEndpoint = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"[control_endpoint][http] {format % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Any):
+        self._send(status, json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'),
+                   'application/json; charset=utf-8')
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/metrics':
+            self._send_json(200, self.control.snapshot())
+        elif path == '/events':
+            self._stream_events()
+        elif path in ('/', '/index.html'):
+            self._send(200, WEB_VIEW.encode('utf-8'), 'text/html; charset=utf-8')
+        else:
+            self._send_json(404, {'error': 'no encontrado'})
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        segments = parts.path.strip('/').split('/')
+        if len(segments) != 2 or segments[0] != 'control' or segments[1] not in COMMANDS:
+            self._send_json(404, {'error': f"use /control/{'|'.join(COMMANDS)}"})
+            return
+        target = parse_qs(parts.query).get('target', [None])[0]
+        applied = self.control.apply(segments[1], target)
+        if not applied:
+            self._send_json(404, {'error': f"fuente desconocida: {target}"})
+            return
+        self._send_json(200, {'command': segments[1], 'applied': applied})
+
+    def _stream_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        try:
+            while True:
+                payload = json.dumps(self.control.snapshot(), ensure_ascii=False, default=str)
+                self.wfile.write(f"data: {payload}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(self.control.stream_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+WEB_VIEW = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>ExtractorOV - Progreso</title>
+<style>
+body{font-family:monospace;margin:2em;background:#111;color:#ddd}
+.source{border:1px solid #444;padding:1em;margin-bottom:1em}
+.bar{background:#333;height:14px}.fill{background:#2a9;height:14px}
+button{margin-right:.5em}
+</style></head><body>
+<h2>ExtractorOV - Progreso</h2><div id="sources">Conectando...</div><pre id="queues"></pre>
+<script>
+function send(cmd, target){fetch('/control/'+cmd+(target?'?target='+target:''),{method:'POST'});}
+function eta(s){if(s===null||s===undefined)return '-';var h=Math.floor(s/3600),m=Math.floor(s%3600/60);return h+'h '+m+'m';}
+new EventSource('/events').onmessage=function(e){
+  var data=JSON.parse(e.data),html='';
+  for(var name in data.sources){
+    var s=data.sources[name],pct=s.total_records?100*s.processed_records/s.total_records:0;
+    html+='<div class="source"><b>'+name+'</b> '+(s.is_stopped?'DETENIDO':s.is_paused?'PAUSADO':'EN CURSO')+
+      '<div class="bar"><div class="fill" style="width:'+pct.toFixed(1)+'%"></div></div>'+
+      s.processed_records+'/'+s.total_records+' ('+pct.toFixed(1)+'%) | pagina '+s.current_page+'/'+s.total_pages+
+      ' | '+s.records_per_minute+' reg/min | ETA '+eta(s.eta_seconds)+' | errores '+(s.failed_records||0)+'<br>'+
+      '<button onclick="send(\\'pause\\',\\''+name+'\\')">Pausar</button>'+
+      '<button onclick="send(\\'resume\\',\\''+name+'\\')">Reanudar</button>'+
+      '<button onclick="send(\\'stop\\',\\''+name+'\\')">Detener</button></div>';
+  }
+  document.getElementById('sources').innerHTML=html||'Sin fuentes registradas';
+  document.getElementById('queues').textContent=JSON.stringify(data.queues,null,2);
+};
+</script></body></html>
+"""
+
+
+_endpoint: Optional[ControlEndpoint] = None
+_endpoint_lock = threading.Lock()
+
+
+def get_control_endpoint() -> Optional[ControlEndpoint]:
+    """
+    Endpoint compartido del proceso, iniciado en el primer uso
+
+    Returns:
+        ControlEndpoint o None si CONTROL_ENDPOINT no está configurada
+    """
+    global _endpoint
+    address = os.getenv('CONTROL_ENDPOINT')
+    if not address:
+        return None
+    with _endpoint_lock:
+        if _endpoint is None:
+            host, _, port = address.rpartition(':')
+            try:
+                _endpoint = ControlEndpoint(host or '127.0.0.1', int(port)).start()
+            except (ValueError, OSError) as e:
+                logger.error(f"[control_endpoint][get_control_endpoint] No se pudo iniciar en {address}: {e}")
+                return None
+        return _endpoint
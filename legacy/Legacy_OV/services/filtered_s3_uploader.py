@@ -26,6 +26,7 @@ import time
 
 from src.services.s3_verification_service import S3VerificationService, S3VerificationResult
 from src.services.unified_s3_service import UnifiedS3Service, S3PathStructure
+from src.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -122,7 +123,7 @@ class FilteredS3Uploader:
             # Procesar cada registro
             for file_info in files_to_upload:
                 try:
-                    result = self._upload_single_record(file_info, limite_archivos)
+                    result = self.upload_record(file_info, limite_archivos)
                     
                     stats.registros_procesados += 1
                     stats.archivos_subidos += result.archivos_subidos
@@ -169,6 +170,24 @@ class FilteredS3Uploader:
             stats.tiempo_total = (datetime.now() - start_time).total_seconds()
             return stats
     
+    def upload_record(self, file_info: Dict[str, Any],
+                      limite_archivos: Optional[int] = None) -> FilteredUploadResult:
+        """
+        Subir un registro individual (usado por el flujo en pipeline)
+        
+        Args:
+            file_info: Elemento retornado por get_files_to_upload
+            limite_archivos: Límite de archivos a subir
+            
+        Returns:
+            Resultado de la subida del registro
+        """
+        # La traza del registro se identifica por SGC, igual que la extracción y la carga en BD
+        record_id = file_info.get('sgc_number') or file_info.get('numero_radicado')
+        with get_tracer().span("s3_upload", record_id=record_id,
+                               company=file_info.get('empresa')):
+            return self._upload_single_record(file_info, limite_archivos)
+    
     def _upload_single_record(self, file_info: Dict[str, Any], 
                             limite_archivos: Optional[int] = None) -> FilteredUploadResult:
         """
@@ -22,6 +22,9 @@ import logging
 from dataclasses import dataclass, asdict
 from collections import defaultdict
 
+from src.services.record_bus import RecordEnvelope
+from src.utils.tracing import get_tracer
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -247,12 +250,16 @@ class JSONConsolidatorService:
         
         return False, "ninguno"
     
-    def process_company_files(self, company: str) -> Tuple[List[Dict], ProcessingStats]:
+    def process_company_files(self, company: str,
+                              sources: Optional[List[Union[Path, RecordEnvelope]]] = None
+                              ) -> Tuple[List[Dict], ProcessingStats]:
         """
         Procesa todos los archivos JSON de una empresa
         
         Args:
             company: 'afinia' o 'aire'
+            sources: Archivos o registros del bus ya recibidos; si no se
+                indican se escanea el directorio de la empresa
             
         Returns:
             Tupla (registros_válidos, estadísticas)
@@ -260,11 +267,12 @@ class JSONConsolidatorService:
         start_time = datetime.now()
         stats = ProcessingStats()
         valid_records = []
+        tracer = get_tracer()
         
         logger.info(f"[2025-10-10_05:32:20][{company}][consolidator][process_company_files][INFO] - Iniciando procesamiento de archivos JSON")
         
-        # Escanear archivos
-        json_files = self.scan_json_files(company)
+        # Escanear archivos (solo si no llegaron desde el bus)
+        json_files = sources if sources is not None else self.scan_json_files(company)
         stats.total_files = len(json_files)
         
         if not json_files:
@@ -272,11 +280,16 @@ class JSONConsolidatorService:
             return valid_records, stats
         
         # Procesar cada archivo
-        for file_path in json_files:
-            logger.debug(f"[2025-10-10_05:32:20][{company}][consolidator][process_company_files][DEBUG] - Procesando: {file_path.name}")
+        for source in json_files:
+            # Cargar archivo (los registros del bus ya traen sus datos)
+            if isinstance(source, RecordEnvelope):
+                file_path = source.path
+                records, file_errors = [source.data], []
+            else:
+                file_path = source
+                records, file_errors = self.load_json_file(file_path)
             
-            # Cargar archivo
-            records, file_errors = self.load_json_file(file_path)
+            logger.debug(f"[2025-10-10_05:32:20][{company}][consolidator][process_company_files][DEBUG] - Procesando: {file_path.name}")
             stats.errors.extend(file_errors)
             
             if not records:
@@ -289,8 +302,10 @@ class JSONConsolidatorService:
                 # Normalizar datos
                 normalized_record = self.normalize_data(record)
                 
-                # Validar registro
-                validation_result = self.validate_record(normalized_record)
+                # Validar registro (span en la traza del registro)
+                record_id = record.get('sgc_number') or record.get('numero_radicado')
+                with tracer.span("validate", record_id=record_id, company=company):
+                    validation_result = self.validate_record(normalized_record)
                 
                 if not validation_result.is_valid:
                     stats.invalid_records += 1
@@ -369,12 +384,15 @@ class JSONConsolidatorService:
         
         return output_files
     
-    def consolidate_company_data(self, company: str) -> Dict:
+    def consolidate_company_data(self, company: str,
+                                 sources: Optional[List[Union[Path, RecordEnvelope]]] = None) -> Dict:
         """
         Consolida todos los datos de una empresa específica
         
         Args:
             company: 'afinia' o 'aire'
+            sources: Archivos o registros del bus a consolidar (por defecto
+                se escanea el directorio)
             
         Returns:
             Dict con resultados del consolidado
@@ -386,7 +404,7 @@ class JSONConsolidatorService:
         self.seen_radicados.clear()
         
         # Procesar archivos
-        valid_records, stats = self.process_company_files(company)
+        valid_records, stats = self.process_company_files(company, sources)
         
         # Guardar datasets
         output_files = self.save_consolidated_dataset(company, valid_records, stats)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de Archivos Locales Procesados
+=====================================
+
+Índice persistente de ``data/downloads/{empresa}/oficina_virtual/processed``
+que relaciona numero_radicado -> SGC y SGC -> archivos, para que la
+verificación S3 no tenga que abrir todos los JSON por cada radicado.
+
+El índice se refresca con un escaneo por mtime: solo se vuelven a leer los
+JSON nuevos o modificados, y los archivos borrados se eliminan del índice.
+Un refresco acotado a ciertos SGC solo consulta los archivos {sgc}_*.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+class LocalFilesIndex:
+    """
+    Índice radicado/SGC -> archivos del directorio processed de una empresa
+    """
+
+    def __init__(self, empresa: str, base_dir: Path = None, index_path: Path = None):
+        """
+        Args:
+            empresa: 'afinia' o 'aire'
+            base_dir: Directorio de archivos procesados
+            index_path: Archivo donde se persiste el índice
+        """
+        self.empresa = empresa
+        self.base_dir = Path(base_dir or f"data/downloads/{empresa}/oficina_virtual/processed")
+        self.index_path = Path(index_path or f"data/index/local_files_{empresa}.json")
+
+        # nombre de archivo -> {mtime_ns, size, numero_radicado, sgc_number}
+        self._files: Dict[str, Dict] = {}
+        self._by_radicado: Dict[str, str] = {}
+        self._by_sgc: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding='utf-8'))
+            if data.get('version') == INDEX_VERSION and data.get('base_dir') == str(self.base_dir):
+                self._files = data.get('files', {})
+        except Exception as e:
+            logger.warning(f"[local_index][load] Índice ilegible, se reconstruye: {e}")
+            self._files = {}
+
+    def _save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'base_dir': str(self.base_dir), 'files': self._files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _read_json_keys(path: str) -> Dict[str, Optional[str]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                return {}
+            return {
+                'numero_radicado': data.get('numero_radicado'),
+                'sgc_number': data.get('sgc_number') or data.get('numero_reclamo_sgc')
+            }
+        except Exception as e:
+            logger.debug(f"[local_index][read] Error leyendo {path}: {e}")
+            return {}
+
+    def refresh(self, sgc_numbers: Optional[Iterable[str]] = None) -> int:
+        """
+        Sincronizar el índice con el directorio (escaneo por mtime)
+
+        Args:
+            sgc_numbers: Solo sincronizar los archivos {sgc}_* de estos SGC
+                (los demás quedan como estaban). No reescribe el índice en
+                disco: lo persiste el siguiente refresco completo
+
+        Returns:
+            Número de archivos nuevos, modificados o eliminados
+        """
+        prefixes = {str(sgc) for sgc in sgc_numbers if sgc} if sgc_numbers is not None else None
+        with self._lock:
+            self._load()
+            if not self.base_dir.exists():
+                logger.warning(f"[local_index][refresh] Directorio no existe: {self.base_dir}")
+                self._rebuild_lookups()
+                return 0
+
+            changes = 0
+            seen = set()
+            with os.scandir(self.base_dir) as it:
+                for entry in it:
+                    if prefixes is not None and entry.name.split('_', 1)[0] not in prefixes:
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    seen.add(entry.name)
+                    st = entry.stat(follow_symlinks=False)
+                    cached = self._files.get(entry.name)
+                    if cached and cached['mtime_ns'] == st.st_mtime_ns and cached['size'] == st.st_size:
+                        continue
+
+                    info = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+                    if entry.name.lower().endswith('.json'):
+                        info.update(self._read_json_keys(entry.path))
+                    self._files[entry.name] = info
+                    changes += 1
+
+            for name in [n for n in self._files if n not in seen
+                         and (prefixes is None or n.split('_', 1)[0] in prefixes)]:
+                del self._files[name]
+                changes += 1
+
+            self._rebuild_lookups()
+            if changes and prefixes is None:
+                self._save()
+                logger.info(f"[local_index][refresh] {self.empresa}: {changes} cambios, "
+                            f"{len(self._files)} archivos indexados")
+            elif changes:
+                logger.debug(f"[local_index][refresh] {self.empresa}: {changes} cambios en "
+                             f"{len(prefixes)} SGC")
+            return changes
+
+    def _rebuild_lookups(self):
+        self._by_radicado = {}
+        self._by_sgc = {}
+        for name, info in self._files.items():
+            radicado = info.get('numero_radicado')
+            sgc = info.get('sgc_number')
+            if radicado and sgc:
+                self._by_radicado[radicado] = sgc
+            prefix = name.split('_', 1)[0]
+            if prefix:
+                self._by_sgc.setdefault(prefix, []).append(name)
+
+    def get_sgc(self, numero_radicado: str) -> Optional[str]:
+        """SGC asociado a un radicado según los JSON procesados"""
+        return self._by_radicado.get(numero_radicado)
+
+    def get_radicado_to_sgc(self) -> Dict[str, str]:
+        """Mapeo completo radicado -> SGC"""
+        return dict(self._by_radicado)
+
+    def files_for_sgc(self, sgc_number: str, extensions: List[str] = None) -> List[Path]:
+        """Archivos con patrón {sgc}_* (opcionalmente filtrados por extensión)"""
+        names = self._by_sgc.get(str(sgc_number), [])
+        if extensions:
+            suffixes = tuple(f".{ext.lstrip('.').lower()}" for ext in extensions)
+            names = [n for n in names if n.lower().endswith(suffixes)]
+        return [self.base_dir / n for n in sorted(names)]
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Render de PDFs de PQR fuera del Navegador
+=========================================
+
+page.pdf() sobre la página de detalle completa (CSS, imágenes, layout) es
+de lo más costoso en CPU de la corrida. Con PQR_PDF_MODE=template:
+
+- La tabla de detalle se lee una sola vez con page.evaluate(): todas las
+  filas etiqueta/valor (td.text-td-label + celda siguiente), incluidos los
+  valores de inputs como Número Reclamo SGC
+- El PDF se arma con una plantilla compacta (reportlab) en un pool de
+  procesos, mientras el navegador sigue con el siguiente registro
+- El archivo conserva el nombre por SGC y se escribe de forma atómica; si el
+  render falla, el snapshot queda en <pdf>.snapshot.json para re-generarlo
+- queue_template_pdf() devuelve el future del render: el procesador sigue con
+  adjuntos y JSON y lo espera (wait_pdf_render) antes de publicar el registro
+
+Si la página no expone la tabla de detalle o reportlab no está instalado se
+usa page.pdf() como hasta ahora (PQR_PDF_MODE=page, por defecto).
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from xml.sax.saxutils import escape
+
+try:
+    import reportlab  # noqa: F401
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Una sola ida y vuelta al navegador: filas etiqueta/valor en orden de documento
+DETAIL_SNAPSHOT_JS = """
+() => {
+    const text = (el) => (el ? (el.innerText || el.textContent || '') : '').trim();
+    const inputValue = (input) => {
+        if (input.tagName === 'SELECT') {
+            const option = input.options[input.selectedIndex];
+            return option ? option.text : '';
+        }
+        if (input.type === 'checkbox' || input.type === 'radio') return input.checked ? 'Sí' : 'No';
+        return input.value || '';
+    };
+    const fields = [];
+    document.querySelectorAll('td.text-td-label').forEach((label) => {
+        const cell = label.nextElementSibling;
+        if (!cell) return;
+        const inputs = Array.from(cell.querySelectorAll('input:not([type=hidden]), select, textarea'));
+        const inputText = inputs.map(inputValue).filter((v) => v !== '').join(' ');
+        const cellText = text(cell);
+        fields.push({
+            label: text(label),
+            value: [cellText, inputText].filter((v) => v !== '').join('\\n'),
+            links: Array.from(cell.querySelectorAll('a')).map(text).filter(Boolean)
+        });
+    });
+    return {title: document.title, url: window.location.href, fields: fields};
+}
+"""
+
+
+@dataclass
+class DetailSnapshot:
+    """Contenido de la tabla de detalle de una PQR"""
+    company: str
+    sgc_number: str
+    record_number: int
+    url: str
+    title: str
+    captured_at: str
+    fields: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def pdf_render_mode() -> str:
+    """'template' (plantilla en pool de procesos) o 'page' (page.pdf del navegador)"""
+    mode = os.getenv('PQR_PDF_MODE', 'page').lower()
+    return 'template' if mode == 'template' and REPORTLAB_AVAILABLE else 'page'
+
+
+async def capture_detail_snapshot(page, company: str, sgc_number: str,
+                                  record_number: int) -> Optional[DetailSnapshot]:
+    """Leer la tabla de detalle; None si la página no la expone"""
+    data = await page.evaluate(DETAIL_SNAPSHOT_JS)
+    fields = [f for f in data.get('fields', []) if f.get('label')]
+    if not fields:
+        return None
+    return DetailSnapshot(company=company, sgc_number=sgc_number, record_number=record_number,
+                          url=data.get('url', ''), title=data.get('title', ''),
+                          captured_at=datetime.now().isoformat(timespec='seconds'), fields=fields)
+
+
+def render_snapshot_pdf(snapshot: Dict[str, Any], output_path: str) -> str:
+    """
+    Generar el PDF de una PQR a partir de su snapshot (se ejecuta en el pool)
+
+    Returns:
+        Ruta del PDF generado
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    value_style = ParagraphStyle('pqr_value', parent=styles['Normal'], fontSize=8.5, leading=10.5)
+    label_style = ParagraphStyle('pqr_label', parent=value_style, fontName='Helvetica-Bold')
+    meta_style = ParagraphStyle('pqr_meta', parent=value_style, fontSize=7.5, textColor=colors.grey)
+
+    def paragraph(text: str, style) -> Paragraph:
+        return Paragraph(escape(text or '').replace('\n', '<br/>'), style)
+
+    company = (snapshot.get('company') or '').upper()
+    heading = f"PQR {company} - Número Reclamo SGC {snapshot['sgc_number']}".replace('  ', ' ')
+    rows = [[paragraph(f['label'], label_style), paragraph(f.get('value', ''), value_style)]
+            for f in snapshot['fields']]
+    table = Table(rows, colWidths=[5.5 * cm, 13.5 * cm], repeatRows=0)
+    table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+
+    tmp_path = f"{output_path}.tmp"
+    document = SimpleDocTemplate(
+        tmp_path, pagesize=A4,
+        leftMargin=1 * cm, rightMargin=1 * cm, topMargin=1 * cm, bottomMargin=1 * cm,
+        title=heading, subject=snapshot['sgc_number'], author=snapshot.get('title') or 'Oficina Virtual'
+    )
+    document.build([
+        Paragraph(escape(heading), styles['Heading2']),
+        paragraph(f"Origen: {snapshot.get('url', '')}\nCapturado: {snapshot.get('captured_at', '')}", meta_style),
+        Spacer(1, 0.3 * cm),
+        table
+    ])
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class PdfRenderPool:
+    """
+    Pool de procesos para renders de PDF con backpressure
+
+    submit() espera solo si hay max_pending renders en curso y devuelve el
+    future del render; drain() espera a que terminen todos (al final de la corrida).
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or int(os.getenv('PQR_PDF_WORKERS', '2'))
+        self.max_pending = max_pending or int(os.getenv('PQR_PDF_MAX_PENDING', '50'))
+        self.rendered = 0
+        self.failed = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Set[asyncio.Future] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: el proceso padre tiene hilos de Playwright y del logging
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"[pqr_pdf_renderer][pool] Pool de render iniciado ({self.workers} procesos)")
+        return self._executor
+
+    async def submit(self, snapshot: DetailSnapshot, output_path: Path) -> asyncio.Future:
+        """Encolar el render de un PDF y devolver su future"""
+        while len(self._pending) >= self.max_pending:
+            await asyncio.wait(set(self._pending), return_when=asyncio.FIRST_COMPLETED)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), render_snapshot_pdf,
+                                      asdict(snapshot), str(output_path))
+        self._pending.add(future)
+        future.add_done_callback(lambda done: self._on_done(done, snapshot, Path(output_path)))
+        return future
+
+    def _on_done(self, future: asyncio.Future, snapshot: DetailSnapshot, output_path: Path):
+        self._pending.discard(future)
+        error = future.exception() if not future.cancelled() else asyncio.CancelledError()
+        if error is None:
+            self.rendered += 1
+            logger.debug(f"[pqr_pdf_renderer][render] PDF generado: {output_path}")
+            return
+
+        self.failed += 1
+        snapshot_path = output_path.with_name(output_path.name + '.snapshot.json')
+        try:
+            snapshot_path.write_text(json.dumps(asdict(snapshot), ensure_ascii=False, indent=2), encoding='utf-8')
+        except OSError:
+            snapshot_path = None
+        logger.error(f"[pqr_pdf_renderer][render] Error generando {output_path.name}: {error}"
+                     + (f" (snapshot en {snapshot_path})" if snapshot_path else ""))
+
+    async def drain(self):
+        """Esperar a que terminen todos los renders pendientes"""
+        if self._pending:
+            logger.info(f"[pqr_pdf_renderer][drain] Esperando {len(self._pending)} PDFs en curso...")
+            await asyncio.wait(set(self._pending))
+        if self.rendered or self.failed:
+            logger.info(f"[pqr_pdf_renderer][drain] PDFs por plantilla: {self.rendered} generados, "
+                        f"{self.failed} fallidos")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_pool: Optional[PdfRenderPool] = None
+
+
+def get_pdf_render_pool() -> PdfRenderPool:
+    """Pool compartido del proceso"""
+    global _pool
+    if _pool is None:
+        _pool = PdfRenderPool()
+        atexit.register(_pool.shutdown)
+    return _pool
+
+
+async def queue_template_pdf(page, company: str, sgc_number: str, record_number: int,
+                             output_path: Path) -> Optional[asyncio.Future]:
+    """
+    Modo plantilla: capturar la tabla de detalle y encolar su PDF
+
+    El PDF no existe hasta que el future termina: hay que esperarlo con
+    wait_pdf_render() antes de dar el registro por completo.
+
+    Returns:
+        Future del render; None si hay que usar page.pdf()
+    """
+    if pdf_render_mode() != 'template':
+        return None
+    try:
+        snapshot = await capture_detail_snapshot(page, company, sgc_number, record_number)
+    except Exception as e:
+        logger.warning(f"[pqr_pdf_renderer][capture] No se pudo leer el detalle de {sgc_number}: {e}")
+        return None
+    if snapshot is None:
+        logger.warning(f"[pqr_pdf_renderer][capture] {sgc_number}: sin tabla de detalle, se usa page.pdf()")
+        return None
+    return await get_pdf_render_pool().submit(snapshot, output_path)
+
+
+async def wait_pdf_render(render: Optional[asyncio.Future]) -> bool:
+    """
+    Esperar el render de un registro
+
+    Returns:
+        True si el PDF quedó escrito; los errores ya los registra el pool
+    """
+    if render is None:
+        return False
+    await asyncio.wait({render})
+    return not render.cancelled() and render.exception() is None
+
+
+async def drain_pdf_renders():
+    """Esperar los PDFs pendientes del pool (no-op si no se usó el modo plantilla)"""
+    if _pool is not None:
+        await _pool.drain()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bus de Registros entre Extracción y Post-procesamiento
+======================================================
+
+Los procesadores de PQR publican cada registro apenas lo guardan en disco y
+los consumidores (carga RDS, consolidación, S3) lo reciben directamente, sin
+volver a escanear los directorios de descarga:
+
+- Cada suscriptor tiene una cola acotada; si un consumidor se atrasa,
+  publish() bloquea y la extracción se frena (backpressure)
+- Sin suscriptores publicar no cuesta nada: el JSON en disco sigue siendo
+  la traza de auditoría
+- Modo entre procesos opcional: RecordBusServer expone el bus de una empresa
+  en una dirección (RECORD_BUS_ADDRESS) y los procesos extractores publican
+  con acuse por registro, así el backpressure cruza el límite del proceso.
+  Solo escucha en sockets Unix o en loopback y exige RECORD_BUS_AUTHKEY
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import asyncio
+import ipaddress
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = int(os.getenv('RECORD_BUS_QUEUE_SIZE', '200'))
+
+
+@dataclass
+class RecordEnvelope:
+    """Registro extraído en tránsito hacia los consumidores"""
+    company: str
+    sgc_number: str
+    json_path: str
+    data: Dict[str, Any]
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def path(self) -> Path:
+        return Path(self.json_path)
+
+
+class Subscription:
+    """
+    Cola acotada de un consumidor del bus
+
+    Se itera hasta que el productor o el consumidor la cierran y la cola
+    queda vacía.
+    """
+
+    def __init__(self, bus: 'RecordBus', name: str, maxsize: int):
+        self.bus = bus
+        self.name = name
+        self.queue: 'queue.Queue[RecordEnvelope]' = queue.Queue(maxsize=maxsize)
+        self.closed = threading.Event()
+        self.received = 0
+
+    def put(self, envelope: RecordEnvelope, poll_interval: float = 0.5) -> Tuple[bool, float]:
+        """
+        Encolar bloqueando mientras la cola esté llena
+
+        Returns:
+            (entregado, segundos bloqueado)
+        """
+        started = time.monotonic()
+        while not self.closed.is_set():
+            try:
+                self.queue.put(envelope, timeout=poll_interval)
+                return True, time.monotonic() - started
+            except queue.Full:
+                continue
+        return False, time.monotonic() - started
+
+    def get(self, timeout: Optional[float] = None) -> Optional[RecordEnvelope]:
+        """Siguiente registro, o None si no llegó ninguno en el timeout"""
+        try:
+            envelope = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.received += 1
+        return envelope
+
+    def __iter__(self) -> Iterator[RecordEnvelope]:
+        while True:
+            envelope = self.get(timeout=0.5)
+            if envelope is not None:
+                yield envelope
+            elif self.closed.is_set() and self.queue.empty():
+                return
+
+    def close(self):
+        """Marcar fin de stream: el iterador termina al vaciar la cola"""
+        self.closed.set()
+
+    def unsubscribe(self):
+        """Cerrar y dejar de recibir registros (libera a los productores bloqueados)"""
+        self.close()
+        self.bus.unsubscribe(self)
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+
+class RecordBus:
+    """
+    Bus en proceso con fan-out a suscriptores de cola acotada
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self.blocked_seconds = 0.0
+
+    def subscribe(self, name: str, maxsize: Optional[int] = None) -> Subscription:
+        """
+        Registrar un consumidor
+
+        Args:
+            name: Nombre del consumidor (para monitoreo)
+            maxsize: Registros en espera antes de frenar a los productores
+        """
+        subscription = Subscription(self, name, maxsize or DEFAULT_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(subscription)
+        logger.info(f"[record_bus][subscribe] {self.name}: suscriptor '{name}' "
+                    f"(cola máx. {subscription.queue.maxsize})")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, envelope: RecordEnvelope) -> int:
+        """
+        Entregar un registro a todos los suscriptores (bloquea si alguno está lleno)
+
+        Returns:
+            Número de suscriptores que lo recibieron
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        delivered = 0
+        for subscription in subscribers:
+            ok, blocked = subscription.put(envelope)
+            delivered += int(ok)
+            if blocked > 1.0:
+                logger.debug(f"[record_bus][publish] {self.name}: '{subscription.name}' "
+                             f"frenó la extracción {blocked:.1f}s")
+            self.blocked_seconds += blocked
+        self.published += 1
+        return delivered
+
+    async def publish_async(self, envelope: RecordEnvelope) -> int:
+        """Publicar sin bloquear el event loop del extractor"""
+        if not self.has_subscribers():
+            self.published += 1
+            return 0
+        return await asyncio.to_thread(self.publish, envelope)
+
+    def close(self):
+        """Cerrar el stream de todos los suscriptores actuales"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = {s.name: {'depth': s.depth, 'received': s.received}
+                           for s in self._subscribers}
+        return {'bus': self.name, 'published': self.published,
+                'blocked_seconds': round(self.blocked_seconds, 2), 'subscribers': subscribers}
+
+
+_buses: Dict[str, RecordBus] = {}
+_buses_lock = threading.Lock()
+
+
+def get_record_bus(company: str) -> RecordBus:
+    """Bus compartido del proceso para una empresa"""
+    with _buses_lock:
+        bus = _buses.get(company)
+        if bus is None:
+            bus = RecordBus(company)
+            _buses[company] = bus
+        return bus
+
+
+def all_bus_stats() -> List[Dict[str, Any]]:
+    """Estadísticas (profundidad de colas por suscriptor) de todos los buses del proceso"""
+    with _buses_lock:
+        buses = list(_buses.values())
+    return [bus.stats() for bus in buses]
+
+
+# ----------------------------------------------------------------------
+# Modo entre procesos
+# ----------------------------------------------------------------------
+
+def _is_loopback(host: str) -> bool:
+    """localhost o 127.0.0.0/8 (Listener/Client de multiprocessing usan AF_INET)"""
+    if host == 'localhost':
+        return True
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return address.version == 4 and address.is_loopback
+
+
+def _parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    'host:puerto' -> tupla TCP (solo loopback); cualquier otra cosa se usa como socket Unix
+
+    Los mensajes del bus se deserializan con pickle: exponerlo fuera de la
+    máquina permitiría ejecutar código a quien obtenga la clave.
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        host = host or 'localhost'
+        if not _is_loopback(host):
+            raise ValueError(f"[record_bus][_parse_address] Dirección no local rechazada: {address} "
+                             f"(use un socket Unix, 127.0.0.1 o localhost)")
+        return host, int(port)
+    return address
+
+
+def _authkey() -> bytes:
+    """Clave compartida del bus (RECORD_BUS_AUTHKEY); sin ella no se abre el modo entre procesos"""
+    authkey = os.getenv('RECORD_BUS_AUTHKEY', '')
+    if not authkey:
+        raise RuntimeError("[record_bus][_authkey] RECORD_BUS_AUTHKEY no está configurada: "
+                           "el bus entre procesos no arranca sin clave")
+    return authkey.encode('utf-8')
+
+
+class RecordBusServer:
+    """
+    Expone un RecordBus local a procesos extractores
+
+    Cada conexión se atiende en su propio hilo: recibe un registro, lo
+    publica en el bus (bloqueando si los consumidores van atrasados) y
+    responde con un acuse. El productor remoto espera ese acuse, por lo que
+    el backpressure se propaga hasta su navegador.
+    """
+
+    def __init__(self, bus: RecordBus, address: str):
+        self.bus = bus
+        self.address = address
+        self._listener = Listener(_parse_address(address), authkey=_authkey())
+        self._thread = threading.Thread(target=self._accept_loop,
+                                        name=f"record_bus_{bus.name}", daemon=True)
+        self._running = False
+
+    def start(self) -> 'RecordBusServer':
+        self._running = True
+        self._thread.start()
+        logger.info(f"[record_bus][server] Bus '{self.bus.name}' escuchando en {self.address}")
+        return self
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                delivered = self.bus.publish(RecordEnvelope(**payload))
+                conn.send(delivered)
+
+    def stop(self):
+        self._running = False
+        self._listener.close()
+
+
+class RemoteRecordPublisher:
+    """Publicador de un proceso extractor hacia un RecordBusServer"""
+
+    def __init__(self, address: str):
+        self.address = address
+        # Validar dirección y clave al crear el publicador, no en el primer registro
+        self._target = _parse_address(address)
+        self._authkey = _authkey()
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def publish(self, envelope: RecordEnvelope) -> int:
+        with self._lock:
+            if self._conn is None:
+                self._conn = Client(self._target, authkey=self._authkey)
+            try:
+                self._conn.send(asdict(envelope))
+                return self._conn.recv()
+            except (EOFError, OSError):
+                self._conn = None
+                raise
+
+
+_remote_publisher: Optional[RemoteRecordPublisher] = None
+
+
+async def publish_record(company: str, sgc_number: str, json_path: Path,
+                         data: Dict[str, Any]) -> int:
+    """
+    Publicar un registro recién guardado
+
+    Usa el bus remoto si RECORD_BUS_ADDRESS está configurada y, si no, el
+    bus del proceso. Los fallos de publicación se registran pero no detienen
+    la extracción: el JSON ya quedó en disco.
+
+    Returns:
+        Número de consumidores que recibieron el registro
+    """
+    global _remote_publisher
+    envelope = RecordEnvelope(company=company, sgc_number=sgc_number,
+                              json_path=str(json_path), data=data)
+    address = os.getenv('RECORD_BUS_ADDRESS')
+    try:
+        if address:
+            if _remote_publisher is None or _remote_publisher.address != address:
+                _remote_publisher = RemoteRecordPublisher(address)
+            return await asyncio.to_thread(_remote_publisher.publish, envelope)
+        return await get_record_bus(company).publish_async(envelope)
+    except Exception as e:
+        logger.warning(f"[record_bus][publish_record] No se pudo publicar {sgc_number}: {e}")
+        return 0
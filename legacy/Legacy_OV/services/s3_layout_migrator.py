@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrador de Estructura de Claves S3
+===================================
+
+Mueve objetos entre las estructuras de rutas de ``S3PathStructure``
+(LEGACY, CENTRAL, SIMPLE) usando copia del lado del servidor:
+
+- Recorre el listado completo del bucket en streaming (sin límite de objetos)
+- Calcula la clave destino con ``UnifiedS3Service.generate_s3_key``
+- Copia en paralelo con ``copy_object`` (o multipart copy para objetos grandes)
+- Actualiza ``data.ov_s3_registry`` por lotes
+- Registra el avance en un journal JSONL para poder reanudar
+
+Funciona contra AWS S3 o cualquier S3 compatible (MinIO) definiendo
+``AWS_S3_ENDPOINT_URL``.
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import text
+
+from src.config.rds_config import RDSConnectionManager
+from src.services.unified_s3_service import UnifiedS3Service, S3PathStructure
+
+logger = logging.getLogger(__name__)
+
+# Carpeta de empresa en estructura CENTRAL -> empresa normalizada
+CENTRAL_COMPANY_FOLDERS = {
+    'afinia': 'afinia',
+    'aire_sas': 'aire'
+}
+
+CENTRAL_PREFIX = "Central_De_Escritos"
+LEGACY_DATE_PATTERN = re.compile(r"^(\d{4})/(\d{2})/(\d{2})/(.+)$")
+
+
+@dataclass
+class S3KeyInfo:
+    """Componentes lógicos de una clave S3"""
+    empresa: str
+    filename: str
+    file_type: str = 'data'
+    numero_reclamo_sgc: Optional[str] = None
+    reference_date: Optional[datetime] = None
+
+
+@dataclass
+class MigrationTask:
+    """Movimiento planificado de una clave origen a una clave destino"""
+    source_key: str
+    target_key: str
+    size: int = 0
+
+
+@dataclass
+class MigrationStats:
+    """Estadísticas de la migración"""
+    listed_objects: int = 0
+    planned: int = 0
+    copied: int = 0
+    skipped_resumed: int = 0
+    skipped_unparsed: int = 0
+    skipped_same_key: int = 0
+    deleted_sources: int = 0
+    registry_updates: int = 0
+    failed: int = 0
+    bytes_copied: int = 0
+    processing_time: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+def _sgc_from_filename(filename: str) -> Optional[str]:
+    """Extraer número de reclamo del nombre (formato RE123456789_data_...)"""
+    candidate = Path(filename).name.split('_')[0]
+    return candidate if len(candidate) >= 5 else None
+
+
+def parse_s3_key(s3_key: str, structure: S3PathStructure) -> Optional[S3KeyInfo]:
+    """
+    Interpretar una clave según la estructura indicada (inverso de generate_s3_key)
+
+    Args:
+        s3_key: Clave S3
+        structure: Estructura con la que fue generada
+
+    Returns:
+        S3KeyInfo o None si la clave no corresponde a la estructura
+    """
+    parts = s3_key.split('/')
+
+    if structure == S3PathStructure.CENTRAL:
+        # Central_De_Escritos/{empresa}/01_raw_data/oficina_virtual/{sgc|misc}/{archivo}
+        if (len(parts) != 6 or parts[0] != CENTRAL_PREFIX
+                or parts[2] != '01_raw_data' or parts[3] != 'oficina_virtual'):
+            return None
+        empresa = CENTRAL_COMPANY_FOLDERS.get(parts[1], parts[1])
+        sgc = None if parts[4] == 'misc' else parts[4]
+        return S3KeyInfo(empresa=empresa, filename=parts[5], numero_reclamo_sgc=sgc)
+
+    if structure == S3PathStructure.LEGACY:
+        # {empresa}/oficina_virtual/{tipo}/[{YYYY}/{MM}/{DD}/]{archivo}
+        if len(parts) < 4 or parts[1] != 'oficina_virtual':
+            return None
+        remainder = '/'.join(parts[3:])
+        reference_date = None
+        match = LEGACY_DATE_PATTERN.match(remainder)
+        if match:
+            try:
+                reference_date = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+                remainder = match.group(4)
+            except ValueError:
+                reference_date = None
+        if '/' in remainder:
+            return None
+        return S3KeyInfo(
+            empresa=parts[0],
+            filename=remainder,
+            file_type=parts[2],
+            numero_reclamo_sgc=_sgc_from_filename(remainder),
+            reference_date=reference_date
+        )
+
+    # SIMPLE: {empresa}/{tipo}/{archivo}
+    if len(parts) != 3 or parts[0] == CENTRAL_PREFIX:
+        return None
+    return S3KeyInfo(
+        empresa=parts[0],
+        filename=parts[2],
+        file_type=parts[1],
+        numero_reclamo_sgc=_sgc_from_filename(parts[2])
+    )
+
+
+class S3LayoutMigrator:
+    """
+    Migración reanudable de claves S3 entre estructuras con copia del lado del servidor
+    """
+
+    def __init__(self, source_structure: S3PathStructure, target_structure: S3PathStructure,
+                 bucket_name: str = None, max_workers: int = 16,
+                 registry_batch_size: int = 500, delete_source: bool = False,
+                 dry_run: bool = False, journal_path: Path = None,
+                 update_registry: bool = True):
+        """
+        Args:
+            source_structure: Estructura actual de las claves
+            target_structure: Estructura destino
+            bucket_name: Bucket (por defecto el de las variables de entorno)
+            max_workers: Copias simultáneas
+            registry_batch_size: Filas de ov_s3_registry por lote de actualización
+            delete_source: Borrar el objeto origen tras copiarlo (mover)
+            dry_run: Solo planificar, sin copiar ni actualizar
+            journal_path: Archivo JSONL de avance para reanudar
+            update_registry: Actualizar claves en ov_s3_registry
+        """
+        self.source_structure = source_structure
+        self.target_structure = target_structure
+        self.target_service = UnifiedS3Service(bucket_name=bucket_name, path_structure=target_structure)
+        self.bucket_name = self.target_service.bucket_name
+        self.max_workers = max_workers
+        self.registry_batch_size = registry_batch_size
+        self.delete_source = delete_source
+        self.dry_run = dry_run
+        self.update_registry = update_registry
+
+        self.journal_path = Path(journal_path or (
+            f"data/migrations/s3_layout_{source_structure.value}_to_{target_structure.value}.jsonl"
+        ))
+
+        self._journal_lock = threading.Lock()
+        self._pending_registry: List[MigrationTask] = []
+        self._registry_lock = threading.Lock()
+        self._registry_updated = 0
+        self.rds_manager = RDSConnectionManager() if update_registry and not dry_run else None
+
+        logger.info(f"[s3_migrator][init] {source_structure.value} -> {target_structure.value} "
+                    f"en bucket {self.bucket_name} (workers={max_workers}, dry_run={dry_run})")
+
+    @property
+    def s3_client(self):
+        return self.target_service.s3_client
+
+    # ------------------------------------------------------------------
+    # Listado y planificación
+    # ------------------------------------------------------------------
+
+    def _source_prefixes(self) -> List[str]:
+        """Prefijos a listar según la estructura origen"""
+        if self.source_structure == S3PathStructure.CENTRAL:
+            return [f"{CENTRAL_PREFIX}/"]
+        return [f"{empresa}/" for empresa in ('afinia', 'aire', 'general')]
+
+    def iter_source_objects(self, prefix: str = None) -> Iterator[Dict]:
+        """Recorrer en streaming todos los objetos de los prefijos origen"""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        prefixes = [prefix] if prefix else self._source_prefixes()
+
+        for current_prefix in prefixes:
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=current_prefix):
+                for obj in page.get('Contents', []):
+                    yield obj
+
+    def plan_task(self, obj: Dict) -> Optional[MigrationTask]:
+        """Calcular la clave destino para un objeto listado"""
+        info = parse_s3_key(obj['Key'], self.source_structure)
+        if info is None:
+            return None
+
+        target_key = self.target_service.generate_s3_key(
+            info.empresa,
+            info.file_type,
+            info.filename,
+            info.numero_reclamo_sgc,
+            reference_date=info.reference_date or obj.get('LastModified')
+        )
+        return MigrationTask(source_key=obj['Key'], target_key=target_key, size=obj.get('Size', 0))
+
+    # ------------------------------------------------------------------
+    # Journal (reanudación)
+    # ------------------------------------------------------------------
+
+    def _load_journal(self) -> Dict[str, Dict]:
+        """Cargar el estado previo: clave origen -> entrada más reciente"""
+        state: Dict[str, Dict] = {}
+        if not self.journal_path.exists():
+            return state
+
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea truncada por una interrupción
+                    continue
+                state.setdefault(entry['source'], {}).update(entry)
+        return state
+
+    def _journal(self, entry: Dict):
+        """Agregar una entrada al journal"""
+        entry['ts'] = datetime.now().isoformat()
+        with self._journal_lock:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    # ------------------------------------------------------------------
+    # Copia
+    # ------------------------------------------------------------------
+
+    def copy_object(self, task: MigrationTask):
+        """Copiar un objeto en el servidor (sin descargar ni subir)"""
+        copy_source = {'Bucket': self.bucket_name, 'Key': task.source_key}
+
+        if task.size < self.target_service.transfer_config.multipart_threshold:
+            self.s3_client.copy_object(
+                CopySource=copy_source,
+                Bucket=self.bucket_name,
+                Key=task.target_key,
+                MetadataDirective='COPY'
+            )
+        else:
+            # Copia gestionada: usa UploadPartCopy por partes en el servidor
+            self.s3_client.copy(
+                copy_source,
+                self.bucket_name,
+                task.target_key,
+                Config=self.target_service.transfer_config
+            )
+
+    def _run_task(self, task: MigrationTask) -> MigrationTask:
+        self.copy_object(task)
+        # El journal se escribe antes de borrar el origen: si la ejecución se
+        # interrumpe aquí, la reanudación solo completa el borrado
+        self._journal({'source': task.source_key, 'target': task.target_key,
+                       'size': task.size, 'copied': True, 'registry': False})
+        if self.delete_source:
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=task.source_key)
+        return task
+
+    # ------------------------------------------------------------------
+    # Registro en BD
+    # ------------------------------------------------------------------
+
+    def _queue_registry_update(self, task: MigrationTask):
+        with self._registry_lock:
+            self._pending_registry.append(task)
+            should_flush = len(self._pending_registry) >= self.registry_batch_size
+        if should_flush:
+            self.flush_registry_updates()
+
+    def flush_registry_updates(self) -> int:
+        """Aplicar en un solo lote las claves nuevas en ov_s3_registry"""
+        with self._registry_lock:
+            batch, self._pending_registry = self._pending_registry, []
+
+        if not batch or not self.rds_manager:
+            return 0
+
+        base_url = f"https://{self.bucket_name}.s3.{self.target_service.aws_region}.amazonaws.com"
+        params = [
+            {
+                'source_key': task.source_key,
+                'target_key': task.target_key,
+                'target_url': f"{base_url}/{task.target_key}"
+            }
+            for task in batch
+        ]
+
+        session = self.rds_manager.get_session()
+        try:
+            session.execute(text("""
+                UPDATE data.ov_s3_registry
+                SET clave_s3 = :target_key,
+                    url_s3 = :target_url
+                WHERE clave_s3 = :source_key
+            """), params)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"[s3_migrator][registry] Error actualizando lote de {len(batch)}: {e}")
+            # Se reintentará en la próxima ejecución (journal con registry=False)
+            return 0
+        finally:
+            session.close()
+
+        for task in batch:
+            self._journal({'source': task.source_key, 'registry': True})
+        self._registry_updated += len(batch)
+
+        logger.info(f"[s3_migrator][registry] Lote actualizado: {len(batch)} registros")
+        return len(batch)
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def run(self, prefix: str = None, limit: int = None) -> MigrationStats:
+        """
+        Ejecutar la migración
+
+        Args:
+            prefix: Limitar a un prefijo concreto del origen
+            limit: Máximo de objetos a migrar en esta ejecución
+
+        Returns:
+            MigrationStats con el resultado
+        """
+        start_time = datetime.now()
+        stats = MigrationStats()
+
+        previous = self._load_journal()
+        done: Set[str] = {source for source, entry in previous.items() if entry.get('copied')}
+
+        # Lotes de registro pendientes de una ejecución interrumpida
+        if self.update_registry and not self.dry_run:
+            for source, entry in previous.items():
+                if entry.get('copied') and not entry.get('registry'):
+                    self._pending_registry.append(
+                        MigrationTask(source_key=source, target_key=entry['target'], size=entry.get('size', 0))
+                    )
+            self.flush_registry_updates()
+
+        if done:
+            logger.info(f"[s3_migrator][run] Reanudando: {len(done)} objetos ya copiados")
+
+        in_flight = set()
+        in_flight_tasks = {}
+        max_in_flight = self.max_workers * 4
+
+        def collect(futures):
+            for future in futures:
+                task = in_flight_tasks.pop(future)
+                try:
+                    future.result()
+                    stats.copied += 1
+                    stats.bytes_copied += task.size
+                    if self.delete_source:
+                        stats.deleted_sources += 1
+                    if self.update_registry:
+                        self._queue_registry_update(task)
+                except Exception as e:
+                    stats.failed += 1
+                    stats.errors.append(f"{task.source_key}: {e}")
+                    logger.error(f"[s3_migrator][copy] Error copiando {task.source_key}: {e}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for obj in self.iter_source_objects(prefix):
+                stats.listed_objects += 1
+
+                if obj['Key'] in done:
+                    stats.skipped_resumed += 1
+                    if self.delete_source and not self.dry_run:
+                        # Copiado en una ejecución previa que no llegó a borrar el origen
+                        self.s3_client.delete_object(Bucket=self.bucket_name, Key=obj['Key'])
+                        stats.deleted_sources += 1
+                    continue
+
+                task = self.plan_task(obj)
+                if task is None:
+                    stats.skipped_unparsed += 1
+                    continue
+                if task.target_key == task.source_key:
+                    stats.skipped_same_key += 1
+                    continue
+
+                stats.planned += 1
+                if self.dry_run:
+                    logger.info(f"[s3_migrator][plan] {task.source_key} -> {task.target_key}")
+                else:
+                    # Acotar tareas en vuelo para no materializar todo el listado
+                    if len(in_flight) >= max_in_flight:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(finished)
+                    future = executor.submit(self._run_task, task)
+                    in_flight_tasks[future] = task
+                    in_flight.add(future)
+
+                if stats.listed_objects % 1000 == 0:
+                    logger.info(f"[s3_migrator][run] Listados {stats.listed_objects}, "
+                                f"copiados {stats.copied}, errores {stats.failed}")
+
+                if limit and stats.planned >= limit:
+                    break
+
+            if in_flight:
+                finished, _ = wait(in_flight)
+                collect(finished)
+
+        if self.update_registry and not self.dry_run:
+            self.flush_registry_updates()
+        stats.registry_updates = self._registry_updated
+
+        stats.processing_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"[s3_migrator][run] Completado: {stats.copied} copiados, {stats.failed} errores, "
+                    f"{stats.skipped_resumed} reanudados, {stats.registry_updates} registros actualizados "
+                    f"en {stats.processing_time:.1f}s")
+        return stats
@@ -47,9 +47,14 @@ class S3MassiveLoader:
     Servicio para carga masiva y incremental de datos OV a S3
     """
     
-    def __init__(self):
+    def __init__(self, compress_json: bool = False):
+        """
+        Args:
+            compress_json: Subir los JSON comprimidos con gzip (clave con sufijo .gz)
+        """
         self.rds_manager = RDSConnectionManager()
         self.s3_service = UnifiedS3Service(path_structure=S3PathStructure.LEGACY)
+        self.compress_json = compress_json
         
     def get_unprocessed_records(self, empresa: str, hours_back: int = None) -> List[Dict]:
         """
@@ -120,10 +125,39 @@ class S3MassiveLoader:
         finally:
             session.close()
     
+    def build_json_payload(self, record: Dict) -> Optional[Tuple[str, bytes]]:
+        """
+        Serializar un registro de BD a JSON en memoria
+        
+        Args:
+            record: Registro de la base de datos
+            
+        Returns:
+            Tupla (nombre de archivo, contenido UTF-8) o None si falla
+        """
+        try:
+            numero_radicado = record['numero_radicado']
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{numero_radicado}_data_{timestamp}.json"
+            
+            # Obtener datos completos del registro desde BD
+            full_record = self.get_full_record_data(record)
+            
+            payload = json.dumps(full_record, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+            return filename, payload
+            
+        except Exception as e:
+            logger.error(f"[s3_loader] Error serializando JSON para {record['numero_radicado']}: {e}")
+            return None
+    
     def create_json_file_for_record(self, record: Dict) -> Optional[Path]:
         """
         Crear archivo JSON temporal para un registro de BD
         
+        La carga a S3 ya no pasa por disco (ver ``build_json_payload``); este
+        método se conserva para volcar registros localmente cuando se necesite.
+        
         Args:
             record: Registro de la base de datos
             
@@ -132,23 +166,17 @@ class S3MassiveLoader:
         """
         try:
             empresa = record['empresa']
-            numero_radicado = record['numero_radicado']
+            
+            payload = self.build_json_payload(record)
+            if payload is None:
+                return None
+            filename, content = payload
             
             # Crear directorio temporal
             temp_dir = Path(f"data/temp_s3_upload/{empresa}")
             temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Nombre del archivo JSON
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{numero_radicado}_data_{timestamp}.json"
             json_file = temp_dir / filename
-            
-            # Obtener datos completos del registro desde BD
-            full_record = self.get_full_record_data(record)
-            
-            # Guardar como JSON
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(full_record, f, indent=2, ensure_ascii=False, default=str)
+            json_file.write_bytes(content)
                 
             logger.debug(f"[s3_loader] Archivo JSON creado: {json_file}")
             return json_file
@@ -220,28 +248,24 @@ class S3MassiveLoader:
             Resultado de la carga
         """
         try:
-            # Crear archivo JSON temporal
-            json_file = self.create_json_file_for_record(record)
-            if not json_file:
+            # Serializar en memoria (sin archivo temporal)
+            payload = self.build_json_payload(record)
+            if not payload:
                 return S3UploadResult(
                     success=False,
-                    error_message=f"Error creando archivo JSON para {record['numero_radicado']}"
+                    error_message=f"Error creando JSON para {record['numero_radicado']}"
                 )
+            filename, content = payload
             
-            # Cargar a S3
-            result = self.s3_service.upload_file_with_registry(
-                file_path=json_file,
+            # Cargar a S3 directamente desde memoria
+            result = self.s3_service.upload_bytes(
+                content,
                 empresa=record['empresa'],
-                numero_reclamo_sgc=record['numero_radicado']
+                filename=filename,
+                numero_reclamo_sgc=record['numero_radicado'],
+                compress=self.compress_json
             )
             
-            # Limpiar archivo temporal
-            try:
-                json_file.unlink()
-                json_file.parent.rmdir()  # Intentar eliminar directorio si está vacío
-            except:
-                pass  # No es crítico si no se puede limpiar
-            
             # Marcar como sincronizado en BD si fue exitoso
             if result.success:
                 self.mark_record_as_synchronized(record, result.registry_id)
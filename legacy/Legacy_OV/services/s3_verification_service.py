@@ -11,23 +11,47 @@ Implementa el Paso 20 del FLUJO_VERIFICACION.md:
 - Verificar salida (nuevos/duplicados) contra data_general.registros_ov_s3
 - Automatizar cruce post-carga CSV→RDS con tabla S3 para confirmar pendientes de subida
 
+La verificación es incremental: solo se revisan filas cuyo
+``fecha_actualizacion`` (en RDS o en el registro S3) supera la marca de
+agua. Marca de agua y estado por radicado viven en SQLite
+(``data/state/s3_verification_{empresa}.db``): cada corrida solo escribe
+las filas del delta. Las rutas locales salen de ``LocalFilesIndex``.
+
 Autor: ISES | Analyst Data Jeam Paul Arcon Solano
 Fecha: Octubre 2025
 """
 
 import logging
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.orm import Session
 
 from src.config.rds_config import RDSConnectionManager
+from src.services.local_files_index import LocalFilesIndex
 
 logger = logging.getLogger(__name__)
 
+_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS marca_agua (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    watermark TEXT,
+    ultima_verificacion TEXT
+);
+CREATE TABLE IF NOT EXISTS registros (
+    numero_radicado TEXT PRIMARY KEY,
+    estado_s3 TEXT NOT NULL,
+    necesita_subida INTEGER NOT NULL,
+    archivos_locales INTEGER NOT NULL,
+    fecha_cambio TEXT
+);
+"""
+
 @dataclass
 class S3VerificationResult:
     """Resultado de verificación S3"""
@@ -39,6 +63,7 @@ class S3VerificationResult:
     ruta_archivos: Optional[str] = None
     s3_registry_id: Optional[int] = None
     necesita_subida: bool = True
+    fecha_cambio: Optional[datetime] = None
 
 @dataclass
 class S3VerificationStats:
@@ -61,14 +86,66 @@ class S3VerificationService:
     Servicio para verificar archivos pendientes de subida a S3
     """
     
-    def __init__(self):
-        """Inicializar servicio de verificación S3"""
+    # Ventana inicial cuando aún no existe marca de agua
+    INITIAL_WINDOW_HOURS = 24
+    
+    def __init__(self, state_dir: Path = None):
+        """
+        Inicializar servicio de verificación S3
+        
+        Args:
+            state_dir: Directorio donde se guardan marcas de agua y estado acumulado
+        """
         self.rds_manager = RDSConnectionManager()
+        self.state_dir = Path(state_dir or "data/state")
+        self._file_indexes: Dict[str, LocalFilesIndex] = {}
         logger.info("[s3_verification][init] Servicio de verificación S3 inicializado")
     
+    def get_file_index(self, empresa: str, refresh: bool = True) -> LocalFilesIndex:
+        """Índice de archivos locales de la empresa (refrescado por mtime)"""
+        index = self._file_indexes.get(empresa)
+        if index is None:
+            index = LocalFilesIndex(empresa)
+            self._file_indexes[empresa] = index
+            refresh = True
+        if refresh:
+            index.refresh()
+        return index
+    
+    def _state_path(self, empresa: str) -> Path:
+        return self.state_dir / f"s3_verification_{empresa}.db"
+    
+    @contextmanager
+    def _state_db(self, empresa: str):
+        """Conexión al estado de verificación de la empresa (commit al salir)"""
+        path = self._state_path(empresa)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=30.0)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_STATE_SCHEMA)
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _load_watermark(self, empresa: str) -> Optional[datetime]:
+        """Marca de agua de la última verificación incremental"""
+        with self._state_db(empresa) as conn:
+            row = conn.execute("SELECT watermark FROM marca_agua WHERE id = 1").fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+    
+    def reset_watermark(self, empresa: str):
+        """Forzar una verificación completa en la próxima ejecución"""
+        with self._state_db(empresa) as conn:
+            conn.execute("DELETE FROM marca_agua")
+            conn.execute("DELETE FROM registros")
+    
     def get_pending_uploads_for_company(self, empresa: str, 
                                       fecha_desde: Optional[datetime] = None,
-                                      fecha_hasta: Optional[datetime] = None) -> List[S3VerificationResult]:
+                                      fecha_hasta: Optional[datetime] = None,
+                                      actualizado_desde: Optional[datetime] = None,
+                                      radicados: Optional[List[str]] = None) -> List[S3VerificationResult]:
         """
         Obtener registros pendientes de subida a S3 para una empresa
         
@@ -76,6 +153,9 @@ class S3VerificationService:
             empresa: 'afinia' o 'aire'
             fecha_desde: Fecha inicial para filtrar (opcional)
             fecha_hasta: Fecha final para filtrar (opcional)
+            actualizado_desde: Solo filas modificadas (RDS o registro S3) después de esta fecha
+            radicados: Solo estos radicados (un lote del pipeline); el índice
+                local no se refresca, lo hace quien arma el lote
             
         Returns:
             Lista de registros pendientes de subida
@@ -96,7 +176,11 @@ class S3VerificationService:
                     rds.hash_registro,
                     s3.id as s3_registry_id,
                     s3.estado_carga as s3_estado,
-                    s3.fecha_creacion as s3_fecha_carga
+                    s3.fecha_creacion as s3_fecha_carga,
+                    GREATEST(
+                        COALESCE(rds.fecha_actualizacion, rds.fecha_creacion),
+                        COALESCE(s3.fecha_actualizacion, s3.fecha_creacion)
+                    ) as fecha_cambio
                 FROM data_general.{tabla_rds} rds
                 LEFT JOIN data_general.registros_ov_s3 s3 
                     ON rds.numero_radicado = s3.numero_reclamo_sgc 
@@ -115,16 +199,35 @@ class S3VerificationService:
                 base_query += " AND rds.fecha_creacion <= :fecha_hasta"
                 params['fecha_hasta'] = fecha_hasta
             
+            if actualizado_desde:
+                # Dos condiciones separadas para aprovechar índices en ambas tablas
+                base_query += """
+                    AND (COALESCE(rds.fecha_actualizacion, rds.fecha_creacion) >= :actualizado_desde
+                         OR COALESCE(s3.fecha_actualizacion, s3.fecha_creacion) >= :actualizado_desde)
+                """
+                params['actualizado_desde'] = actualizado_desde
+            
+            if radicados is not None:
+                if not radicados:
+                    return []
+                base_query += " AND rds.numero_radicado IN :radicados"
+                params['radicados'] = list(radicados)
+            
             # Ordenar por fecha de creación
             base_query += " ORDER BY rds.fecha_creacion DESC"
             
             query = text(base_query)
+            if radicados is not None:
+                query = query.bindparams(bindparam('radicados', expanding=True))
             results = session.execute(query, params).fetchall()
             
             logger.info(f"[s3_verification][get_pending] Encontrados {len(results)} registros para {empresa}")
             
+            file_index = self.get_file_index(empresa, refresh=radicados is None)
+            
             for row in results:
-                numero_radicado, fecha_creacion, fecha_actualizacion, hash_registro, s3_id, s3_estado, s3_fecha = row
+                (numero_radicado, fecha_creacion, fecha_actualizacion, hash_registro,
+                 s3_id, s3_estado, s3_fecha, fecha_cambio) = row
                 
                 # Determinar estado RDS
                 if fecha_actualizacion and fecha_actualizacion > fecha_creacion:
@@ -147,7 +250,7 @@ class S3VerificationService:
                     necesita_subida = True
                 
                 # Verificar si existen archivos locales
-                ruta_archivos = self._get_local_files_path(empresa, numero_radicado)
+                ruta_archivos = self._get_local_files_path(empresa, numero_radicado, file_index)
                 
                 pending_uploads.append(S3VerificationResult(
                     numero_radicado=numero_radicado,
@@ -157,7 +260,8 @@ class S3VerificationService:
                     estado_s3=estado_s3,
                     ruta_archivos=ruta_archivos,
                     s3_registry_id=s3_id,
-                    necesita_subida=necesita_subida
+                    necesita_subida=necesita_subida,
+                    fecha_cambio=fecha_cambio
                 ))
             
             return pending_uploads
@@ -169,16 +273,25 @@ class S3VerificationService:
             session.close()
     
     def verify_s3_status_after_rds_load(self, empresa: str, 
-                                       load_stats: Dict[str, Any]) -> S3VerificationStats:
+                                       load_stats: Dict[str, Any],
+                                       incremental: bool = True,
+                                       radicados: Optional[List[str]] = None) -> S3VerificationStats:
         """
         Verificar estado S3 después de una carga RDS
         
+        En modo incremental solo se consultan las filas cambiadas desde la
+        última verificación, de modo que el costo depende del delta y no del
+        histórico. Sin marca de agua previa se usan las últimas 24 horas.
+        
         Args:
             empresa: 'afinia' o 'aire'
             load_stats: Estadísticas de la carga RDS (insertados, actualizados, etc.)
+            incremental: Usar la marca de agua; False = ventana fija de 24 horas
+            radicados: Verificar solo estos radicados (lote del pipeline); el
+                estado se actualiza pero la marca de agua no avanza
             
         Returns:
-            Estadísticas de verificación S3
+            Estadísticas de verificación S3 (del delta verificado)
         """
         start_time = datetime.now()
         stats = S3VerificationStats()
@@ -186,9 +299,19 @@ class S3VerificationService:
         try:
             logger.info(f"[s3_verification][verify_after_load] Verificando estado S3 para {empresa}")
             
-            # Obtener registros recientes (últimas 24 horas por defecto)
-            fecha_desde = datetime.now() - timedelta(hours=24)
-            pending_uploads = self.get_pending_uploads_for_company(empresa, fecha_desde=fecha_desde)
+            if radicados is not None:
+                pending_uploads = self.get_pending_uploads_for_company(empresa, radicados=radicados)
+                self._apply_delta_to_state(empresa, pending_uploads, watermark=None)
+            elif incremental:
+                watermark = (self._load_watermark(empresa)
+                             or datetime.now() - timedelta(hours=self.INITIAL_WINDOW_HOURS))
+                pending_uploads = self.get_pending_uploads_for_company(empresa, actualizado_desde=watermark)
+                self._apply_delta_to_state(empresa, pending_uploads, watermark)
+                self._recheck_missing_files(empresa, {u.numero_radicado for u in pending_uploads})
+            else:
+                # Obtener registros recientes (últimas 24 horas)
+                fecha_desde = datetime.now() - timedelta(hours=self.INITIAL_WINDOW_HOURS)
+                pending_uploads = self.get_pending_uploads_for_company(empresa, fecha_desde=fecha_desde)
             
             stats.total_registros_rds = len(pending_uploads)
             
@@ -196,8 +319,8 @@ class S3VerificationService:
                 if upload.necesita_subida:
                     stats.registros_pendientes_s3 += 1
                     
-                    # Verificar si existen archivos locales
-                    if upload.ruta_archivos and Path(upload.ruta_archivos).exists():
+                    # La ruta viene del índice local, ya verificada
+                    if upload.ruta_archivos:
                         stats.archivos_encontrados += 1
                     else:
                         stats.archivos_faltantes += 1
@@ -224,19 +347,105 @@ class S3VerificationService:
             stats.tiempo_procesamiento = (datetime.now() - start_time).total_seconds()
             return stats
     
+    def _apply_delta_to_state(self, empresa: str, delta: List[S3VerificationResult],
+                              watermark: Optional[datetime]):
+        """
+        Guardar solo las filas del delta y avanzar la marca de agua (una transacción)
+        
+        Con watermark=None (verificación de un lote) la marca no se toca.
+        """
+        new_watermark = watermark
+        rows = []
+        for upload in delta:
+            rows.append((
+                upload.numero_radicado, upload.estado_s3, int(upload.necesita_subida),
+                int(bool(upload.ruta_archivos)),
+                upload.fecha_cambio.isoformat() if upload.fecha_cambio else None
+            ))
+            if watermark and upload.fecha_cambio and upload.fecha_cambio > new_watermark:
+                new_watermark = upload.fecha_cambio
+        
+        with self._state_db(empresa) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO registros (numero_radicado, estado_s3, necesita_subida, "
+                "archivos_locales, fecha_cambio) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            if watermark is not None:
+                conn.execute("INSERT OR REPLACE INTO marca_agua (id, watermark, ultima_verificacion) "
+                             "VALUES (1, ?, ?)", (new_watermark.isoformat(), datetime.now().isoformat()))
+        
+        if watermark is None:
+            logger.debug(f"[s3_verification][incremental] {empresa}: {len(delta)} registros del lote")
+            return
+        
+        logger.info(f"[s3_verification][incremental] {empresa}: {len(delta)} cambios desde "
+                   f"{watermark.isoformat()}, nueva marca {new_watermark.isoformat()}")
+    
+    def _recheck_missing_files(self, empresa: str, skip: set) -> int:
+        """
+        Revisar los pendientes guardados sin archivos locales
+        
+        Su fecha_actualizacion no cambia cuando el archivo aparece, así que la
+        marca de agua no los vuelve a traer: se consultan contra el índice local.
+        
+        Returns:
+            Radicados cuyos archivos ya están disponibles
+        """
+        with self._state_db(empresa) as conn:
+            missing = [row[0] for row in conn.execute(
+                "SELECT numero_radicado FROM registros WHERE necesita_subida = 1 AND archivos_locales = 0"
+            ) if row[0] not in skip]
+        if not missing:
+            return 0
+        
+        file_index = self.get_file_index(empresa, refresh=False)
+        found = [(radicado,) for radicado in missing
+                 if self._get_local_files_path(empresa, radicado, file_index)]
+        if found:
+            with self._state_db(empresa) as conn:
+                conn.executemany("UPDATE registros SET archivos_locales = 1 WHERE numero_radicado = ?", found)
+        logger.info(f"[s3_verification][incremental] {empresa}: {len(found)} de {len(missing)} "
+                   f"pendientes sin archivos ya tienen archivos locales")
+        return len(found)
+    
+    def get_accumulated_stats(self, empresa: str) -> S3VerificationStats:
+        """Estadísticas de todo el histórico verificado, a partir del estado acumulado"""
+        with self._state_db(empresa) as conn:
+            row = conn.execute("""
+                SELECT COUNT(*),
+                       SUM(necesita_subida),
+                       SUM(necesita_subida AND archivos_locales),
+                       SUM(necesita_subida AND NOT archivos_locales),
+                       SUM(NOT necesita_subida AND estado_s3 = 'subido'),
+                       SUM(NOT necesita_subida AND estado_s3 = 'error')
+                FROM registros
+            """).fetchone()
+        total, pendientes, encontrados, faltantes, subidos, con_error = (value or 0 for value in row)
+        return S3VerificationStats(
+            total_registros_rds=total,
+            registros_pendientes_s3=pendientes,
+            registros_ya_subidos=subidos,
+            registros_con_error=con_error,
+            archivos_encontrados=encontrados,
+            archivos_faltantes=faltantes
+        )
+    
     def get_files_to_upload(self, empresa: str, 
-                           limite: Optional[int] = None) -> List[Dict[str, Any]]:
+                           limite: Optional[int] = None,
+                           radicados: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Obtener lista de archivos listos para subir a S3
         
         Args:
             empresa: 'afinia' o 'aire'
             limite: Límite de archivos a retornar (opcional)
+            radicados: Solo archivos de estos radicados (lote del pipeline)
             
         Returns:
             Lista de archivos con información para subida
         """
-        pending_uploads = self.get_pending_uploads_for_company(empresa)
+        pending_uploads = self.get_pending_uploads_for_company(empresa, radicados=radicados)
         files_to_upload = []
         
         if not pending_uploads:
@@ -250,27 +459,8 @@ class S3VerificationService:
             logger.error(f"[s3_verification][get_files_to_upload] Directorio no existe: {base_path}")
             return files_to_upload
         
-        # Crear un mapeo de numero_radicado -> sgc_number leyendo archivos JSON
-        radicado_to_sgc = {}
-        json_files = list(base_path.glob("*.json"))
-        
-        for json_file in json_files:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    import json
-                    data = json.load(f)
-                    
-                    numero_radicado = data.get('numero_radicado')
-                    sgc_number = data.get('sgc_number') or data.get('numero_reclamo_sgc')
-                    
-                    if numero_radicado and sgc_number:
-                        radicado_to_sgc[numero_radicado] = sgc_number
-                        
-            except Exception as e:
-                logger.debug(f"[s3_verification][get_files_to_upload] Error leyendo {json_file}: {e}")
-                continue
-        
-        logger.debug(f"[s3_verification][get_files_to_upload] Mapeo radicado->SGC: {len(radicado_to_sgc)} registros")
+        # Mapeo numero_radicado -> sgc_number desde el índice local
+        file_index = self.get_file_index(empresa, refresh=False)
         
         for upload in pending_uploads:
             if not upload.necesita_subida:
@@ -279,7 +469,7 @@ class S3VerificationService:
             numero_radicado = upload.numero_radicado
             
             # Obtener el SGC correspondiente
-            sgc_number = radicado_to_sgc.get(numero_radicado)
+            sgc_number = file_index.get_sgc(numero_radicado)
             
             if not sgc_number:
                 logger.warning(f"[s3_verification][get_files_to_upload] No se encontró SGC para radicado {numero_radicado}")
@@ -297,10 +487,7 @@ class S3VerificationService:
             # Extensiones comunes: json, pdf, jpg, jpeg, png, docx, doc
             extensiones = ['json', 'pdf', 'jpg', 'jpeg', 'png', 'docx', 'doc']
             
-            for ext in extensiones:
-                pattern = f"{sgc_number}_*.{ext}"
-                matching_files = list(base_path.glob(pattern))
-                archivos_encontrados.extend(matching_files)
+            archivos_encontrados.extend(file_index.files_for_sgc(sgc_number, extensiones))
             
             if archivos_encontrados:
                 for archivo in archivos_encontrados:
@@ -326,48 +513,23 @@ class S3VerificationService:
         logger.info(f"[s3_verification][get_files_to_upload] Total archivos para subir: {len(files_to_upload)}")
         return files_to_upload
     
-    def _get_local_files_path(self, empresa: str, numero_radicado: str) -> Optional[str]:
+    def _get_local_files_path(self, empresa: str, numero_radicado: str,
+                              file_index: LocalFilesIndex = None) -> Optional[str]:
         """
         Obtener ruta local de archivos para un número de radicado
         
         Args:
             empresa: 'afinia' o 'aire'
             numero_radicado: Número de radicado
+            file_index: Índice local ya refrescado (opcional)
             
         Returns:
             Ruta del directorio donde están los archivos o None si no existe
         """
-        import glob
-        
-        # Directorio base donde están los archivos procesados
-        base_dir = Path(f"data/downloads/{empresa}/oficina_virtual/processed")
+        file_index = file_index or self.get_file_index(empresa)
         
-        if not base_dir.exists():
-            logger.warning(f"[s3_verification][_get_local_files_path] Directorio no existe: {base_dir}")
-            return None
-        
-        # Buscar archivos JSON que contengan este numero_radicado
-        json_files = list(base_dir.glob("*.json"))
-        
-        for json_file in json_files:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    import json
-                    data = json.load(f)
-                    
-                    # Verificar si este archivo contiene el numero_radicado buscado
-                    if data.get('numero_radicado') == numero_radicado:
-                        # Extraer el sgc_number para buscar archivos relacionados
-                        sgc_number = data.get('sgc_number') or data.get('numero_reclamo_sgc')
-                        
-                        if sgc_number:
-                            logger.debug(f"[s3_verification][_get_local_files_path] Encontrado {numero_radicado} "
-                                       f"en archivo {json_file.name}, SGC: {sgc_number}")
-                            return str(base_dir)
-                        
-            except Exception as e:
-                logger.debug(f"[s3_verification][_get_local_files_path] Error leyendo {json_file}: {e}")
-                continue
+        if file_index.get_sgc(numero_radicado):
+            return str(file_index.base_dir)
         
         # Fallback: verificar estructuras de directorios originales
         possible_paths = [
@@ -377,12 +539,12 @@ class S3VerificationService:
         
         for path_str in possible_paths:
             path = Path(path_str)
-            if path.exists() and path.is_dir():
+            if path.is_dir():
                 logger.debug(f"[s3_verification][_get_local_files_path] Encontrado directorio: {path}")
                 return str(path)
         
-        logger.warning(f"[s3_verification][_get_local_files_path] No se encontraron archivos "
-                      f"para numero_radicado {numero_radicado} en {empresa}")
+        logger.debug(f"[s3_verification][_get_local_files_path] No se encontraron archivos "
+                    f"para numero_radicado {numero_radicado} en {empresa}")
         return None
     
     def generate_verification_report(self, empresa: str = None) -> Dict[str, Any]:
@@ -414,7 +576,11 @@ class S3VerificationService:
         for emp in empresas_a_verificar:
             logger.info(f"[s3_verification][generate_report] Generando reporte para {emp}")
             
-            stats = self.verify_s3_status_after_rds_load(emp, {})
+            # Verificar solo el delta y reportar sobre el estado acumulado
+            delta_stats = self.verify_s3_status_after_rds_load(emp, {})
+            stats = self.get_accumulated_stats(emp)
+            stats.tiempo_procesamiento = delta_stats.tiempo_procesamiento
+            stats.errores = delta_stats.errores
             
             report['empresas'][emp] = {
                 'total_registros': stats.total_registros_rds,
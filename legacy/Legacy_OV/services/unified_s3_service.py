@@ -20,7 +20,8 @@ import json
 import hashlib
 import logging
 import mimetypes
-import gzip
+import zlib
+from io import BytesIO
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Union
@@ -33,6 +34,12 @@ from boto3.s3.transfer import TransferConfig
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
 # Importar configuraciones
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
@@ -47,6 +54,54 @@ class S3PathStructure(Enum):
     CENTRAL = "central"  # Central_De_Escritos/{empresa}/01_raw_data/oficina_virtual/{numero_reclamo_sgc}/{archivo}
     SIMPLE = "simple"  # {empresa}/{tipo}/{archivo}
 
+class CompressedStream:
+    """
+    Lector tipo archivo que comprime al vuelo el contenido de otro archivo.
+    
+    Permite pasar el resultado directamente a ``upload_fileobj`` (que decide
+    entre carga simple o multipart) sin escribir una copia comprimida en disco.
+    """
+    
+    def __init__(self, source, algorithm: str = 'gzip', level: int = 6,
+                 chunk_size: int = 1024 * 1024):
+        self._source = source
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._eof = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        
+        if algorithm == 'zstd':
+            if not ZSTD_AVAILABLE:
+                raise ValueError("Compresión zstd no disponible. Instala con: pip install zstandard")
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif algorithm == 'gzip':
+            # wbits=31 genera formato gzip (cabecera + CRC) compatible con gunzip
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"Algoritmo de compresión no soportado: {algorithm}")
+    
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size is None or size < 0 or len(self._buffer) < size):
+            chunk = self._source.read(self._chunk_size)
+            if not chunk:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+            else:
+                self.bytes_in += len(chunk)
+                self._buffer += self._compressor.compress(chunk)
+        
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.bytes_out += len(data)
+        return data
+    
+    def readable(self) -> bool:
+        return True
+
+
 @dataclass
 class S3UploadResult:
     """Resultado unificado de carga a S3"""
@@ -110,19 +165,40 @@ class UnifiedS3Service:
         'general': 'general'
     }
     
+    # Formatos ya comprimidos: recomprimirlos solo gasta CPU
+    PRECOMPRESSED_EXTENSIONS = {
+        '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip', '.xlsx', '.docx'
+    }
+    
+    # Sufijo de la clave S3 por algoritmo de compresión
+    COMPRESSION_SUFFIXES = {
+        'gzip': '.gz',
+        'zstd': '.zst'
+    }
+    
+    # Content-Type del objeto comprimido: se guarda como archivo .gz/.zst (sin
+    # ContentEncoding) para que los clientes no lo descompriman al descargar
+    COMPRESSION_CONTENT_TYPES = {
+        'gzip': 'application/gzip',
+        'zstd': 'application/zstd'
+    }
+    
     # Tipos de archivo soportados
     FILE_TYPES = {
         'pdfs', 'data', 'screenshots', 'reports', 'logs', 
         'attachments', 'json', 'images', 'documents'
     }
     
-    def __init__(self, bucket_name: str = None, path_structure: S3PathStructure = S3PathStructure.CENTRAL):
+    def __init__(self, bucket_name: str = None, path_structure: S3PathStructure = S3PathStructure.CENTRAL,
+                 compression: str = 'gzip', compression_level: int = 6):
         """
         Inicializar servicio S3 unificado
         
         Args:
             bucket_name: Nombre del bucket S3
             path_structure: Estructura de rutas a usar
+            compression: Algoritmo por defecto cuando se pide compresión ('gzip' o 'zstd')
+            compression_level: Nivel de compresión por defecto
         """
         # Configuración desde variables de entorno
         self.config = get_s3_config() if get_s3_config() else {}
@@ -130,10 +206,16 @@ class UnifiedS3Service:
         self.aws_secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
         self.aws_region = os.getenv('AWS_REGION', 'us-east-1')
         self.bucket_name = bucket_name or os.getenv('AWS_S3_BUCKET_NAME', 'extractorov-data')
+        # Endpoint alternativo (MinIO u otro S3 compatible); None = AWS
+        self.endpoint_url = os.getenv('AWS_S3_ENDPOINT_URL') or None
         
         # Estructura de rutas
         self.path_structure = path_structure
         
+        # Compresión por defecto
+        self.compression = compression
+        self.compression_level = compression_level
+        
         # Cliente S3
         self._s3_client = None
         
@@ -142,9 +224,9 @@ class UnifiedS3Service:
         
         # Configuración de transferencia
         self.transfer_config = TransferConfig(
-            multipart_threshold=1024 * 25,  # 25MB
+            multipart_threshold=1024 * 1024 * 25,  # 25MB
             max_concurrency=10,
-            multipart_chunksize=1024 * 25,
+            multipart_chunksize=1024 * 1024 * 25,
             use_threads=True
         )
         
@@ -159,7 +241,8 @@ class UnifiedS3Service:
                     's3',
                     aws_access_key_id=self.aws_access_key,
                     aws_secret_access_key=self.aws_secret_key,
-                    region_name=self.aws_region
+                    region_name=self.aws_region,
+                    endpoint_url=self.endpoint_url
                 )
                 logger.info(f"[unified_s3][client] Cliente S3 inicializado para región {self.aws_region}")
             except Exception as e:
@@ -179,7 +262,7 @@ class UnifiedS3Service:
     
     def generate_s3_key(self, empresa: str, file_type: str = 'data', 
                        filename: str = '', numero_reclamo_sgc: str = None,
-                       date_prefix: bool = True) -> str:
+                       date_prefix: bool = True, reference_date: datetime = None) -> str:
         """
         Generar clave S3 según la estructura configurada
         
@@ -189,6 +272,7 @@ class UnifiedS3Service:
             filename: Nombre del archivo
             numero_reclamo_sgc: Número de reclamo (para estructura CENTRAL)
             date_prefix: Agregar prefijo de fecha (para estructura LEGACY)
+            reference_date: Fecha del prefijo LEGACY (por defecto, ahora)
             
         Returns:
             Clave S3 generada
@@ -208,7 +292,7 @@ class UnifiedS3Service:
             # Estructura: {empresa}/oficina_virtual/{tipo}/{fecha}/{archivo}
             base_path = f"{empresa}/oficina_virtual/{file_type}"
             if date_prefix:
-                date_str = datetime.now().strftime('%Y/%m/%d')
+                date_str = (reference_date or datetime.now()).strftime('%Y/%m/%d')
                 return f"{base_path}/{date_str}/{filename}"
             else:
                 return f"{base_path}/{filename}"
@@ -225,6 +309,19 @@ class UnifiedS3Service:
         }
         return mapping.get(empresa, empresa)
     
+    def _should_compress(self, filename: str) -> bool:
+        """Indica si vale la pena comprimir el archivo según su extensión"""
+        return Path(filename).suffix.lower() not in self.PRECOMPRESSED_EXTENSIONS
+    
+    def _resolve_compression(self, algorithm: str = None, level: int = None) -> Tuple[str, int]:
+        """Resolver algoritmo y nivel de compresión efectivos"""
+        algorithm = (algorithm or self.compression).lower()
+        if algorithm not in self.COMPRESSION_SUFFIXES:
+            raise ValueError(f"Algoritmo de compresión no soportado: {algorithm}")
+        if algorithm == 'zstd' and not ZSTD_AVAILABLE:
+            raise ValueError("Compresión zstd no disponible. Instala con: pip install zstandard")
+        return algorithm, level if level is not None else self.compression_level
+    
     def _calculate_file_hash(self, file_path: Path) -> str:
         """Calcular hash SHA256 del archivo"""
         hash_sha256 = hashlib.sha256()
@@ -269,10 +366,15 @@ class UnifiedS3Service:
     def upload_file(self, file_path: Union[str, Path], empresa: str, 
                    file_type: str = 'data', numero_reclamo_sgc: str = None,
                    custom_filename: str = None, custom_metadata: Dict = None,
-                   compress: bool = False, max_retries: int = 3) -> S3UploadResult:
+                   compress: bool = False, compression: str = None,
+                   compress_level: int = None, max_retries: int = 3) -> S3UploadResult:
         """
         Cargar archivo individual a S3
         
+        Con ``compress=True`` el archivo se comprime en streaming mientras se
+        sube (sin copia intermedia en disco). Los formatos ya comprimidos
+        (pdf, imágenes, zip, office) se suben tal cual.
+        
         Args:
             file_path: Ruta del archivo
             empresa: Empresa ('afinia', 'aire', 'general')
@@ -280,7 +382,9 @@ class UnifiedS3Service:
             numero_reclamo_sgc: Número de reclamo
             custom_filename: Nombre personalizado
             custom_metadata: Metadatos adicionales
-            compress: Comprimir archivo antes de subir
+            compress: Comprimir archivo durante la carga
+            compression: Algoritmo ('gzip' o 'zstd'); por defecto el del servicio
+            compress_level: Nivel de compresión; por defecto el del servicio
             max_retries: Número máximo de reintentos
             
         Returns:
@@ -310,60 +414,70 @@ class UnifiedS3Service:
             # Calcular hash
             file_hash = self._calculate_file_hash(file_path)
             
+            # Determinar compresión (en streaming, sin archivo intermedio); el
+            # sufijo va antes de la verificación para detectar el objeto comprimido
+            algorithm = None
+            if compress and self._should_compress(file_path.name):
+                algorithm, level = self._resolve_compression(compression, compress_level)
+                s3_key += self.COMPRESSION_SUFFIXES[algorithm]
+            
             # Verificar si existe
             exists_in_s3, s3_metadata = self.file_exists_in_s3(s3_key)
             upload_source = "pre_existing" if exists_in_s3 else "bot"
             
-            # Preparar archivo para carga
-            upload_file_path = str(file_path)
-            if compress and file_path.suffix.lower() in ['.json', '.txt', '.csv', '.log']:
-                # Comprimir archivo
-                compressed_path = file_path.with_suffix(file_path.suffix + '.gz')
-                with open(file_path, 'rb') as f_in:
-                    with gzip.open(compressed_path, 'wb') as f_out:
-                        f_out.writelines(f_in)
-                upload_file_path = str(compressed_path)
-                s3_key += '.gz'
-            
             # Preparar metadatos
             metadata = self._prepare_metadata(file_path, empresa, custom_metadata)
+            if algorithm:
+                metadata['compression'] = algorithm
             
             # Realizar carga si no existe
             s3_url = f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{s3_key}"
             
             if not exists_in_s3:
                 # Preparar argumentos de carga
-                content_type, _ = mimetypes.guess_type(upload_file_path)
+                content_type, _ = mimetypes.guess_type(str(file_path))
                 extra_args = {
                     'Metadata': metadata,
                     'ContentType': content_type or 'application/octet-stream',
                     'ServerSideEncryption': 'AES256',
                     'StorageClass': 'STANDARD_IA'
                 }
+                if algorithm:
+                    extra_args['ContentType'] = self.COMPRESSION_CONTENT_TYPES[algorithm]
                 
                 # Realizar carga con reintentos
                 logger.info(f"[unified_s3][upload] Cargando: {filename} -> {s3_key}")
                 
                 for attempt in range(max_retries):
                     try:
-                        self.s3_client.upload_file(
-                            upload_file_path,
-                            self.bucket_name,
-                            s3_key,
-                            ExtraArgs=extra_args,
-                            Config=self.transfer_config
-                        )
-                        logger.info(f"[unified_s3][upload] Carga exitosa: {s3_key}")
+                        if algorithm:
+                            # El stream no es rebobinable: se reabre en cada intento
+                            with open(file_path, 'rb') as f_in:
+                                stream = CompressedStream(f_in, algorithm, level)
+                                self.s3_client.upload_fileobj(
+                                    stream,
+                                    self.bucket_name,
+                                    s3_key,
+                                    ExtraArgs=extra_args,
+                                    Config=self.transfer_config
+                                )
+                            logger.info(f"[unified_s3][upload] Carga exitosa: {s3_key} "
+                                        f"({stream.bytes_in} -> {stream.bytes_out} bytes, {algorithm})")
+                        else:
+                            self.s3_client.upload_file(
+                                str(file_path),
+                                self.bucket_name,
+                                s3_key,
+                                ExtraArgs=extra_args,
+                                Config=self.transfer_config
+                            )
+                            logger.info(f"[unified_s3][upload] Carga exitosa: {s3_key}")
                         break
                     except Exception as e:
                         if attempt == max_retries - 1:
                             raise e
                         logger.warning(f"[unified_s3][upload] Intento {attempt + 1} falló: {e}")
             
-            # Limpiar archivo comprimido temporal
-            if compress and upload_file_path != str(file_path):
-                Path(upload_file_path).unlink(missing_ok=True)
-            
             # Registrar en base de datos
             registry_id = None
             try:
@@ -399,11 +513,167 @@ class UnifiedS3Service:
                 processing_time=(datetime.now() - start_time).total_seconds()
             )
     
+    def upload_bytes(self, data: bytes, empresa: str, filename: str,
+                     file_type: str = 'data', numero_reclamo_sgc: str = None,
+                     custom_metadata: Dict = None, compress: bool = False,
+                     compression: str = None, compress_level: int = None,
+                     max_retries: int = 3) -> S3UploadResult:
+        """
+        Cargar contenido en memoria a S3 sin escribir archivos temporales
+        
+        Objetos por debajo de ``multipart_threshold`` se suben con una única
+        llamada ``put_object``; los mayores pasan por ``upload_fileobj`` para
+        aprovechar la carga multipart del TransferConfig.
+        
+        Args:
+            data: Contenido a subir
+            empresa: Empresa ('afinia', 'aire', 'general')
+            filename: Nombre lógico del objeto (define extensión y tipo)
+            file_type: Tipo de archivo
+            numero_reclamo_sgc: Número de reclamo
+            custom_metadata: Metadatos adicionales
+            compress: Comprimir contenido antes de subir
+            compression: Algoritmo ('gzip' o 'zstd'); por defecto el del servicio
+            compress_level: Nivel de compresión; por defecto el del servicio
+            max_retries: Número máximo de reintentos
+            
+        Returns:
+            S3UploadResult con el resultado de la carga
+        """
+        start_time = datetime.now()
+        
+        try:
+            suffix = Path(filename).suffix.lower()
+            if suffix not in self.ALLOWED_EXTENSIONS:
+                return S3UploadResult(
+                    success=False,
+                    error_message=f"Extensión no permitida: {suffix}"
+                )
+            
+            s3_key = self.generate_s3_key(empresa, file_type, filename, numero_reclamo_sgc)
+            file_hash = hashlib.sha256(data).hexdigest()
+            file_size = len(data)
+            
+            # El sufijo de compresión va antes de la verificación para detectar el objeto comprimido
+            algorithm = None
+            if compress and self._should_compress(filename):
+                algorithm, level = self._resolve_compression(compression, compress_level)
+                s3_key += self.COMPRESSION_SUFFIXES[algorithm]
+            
+            exists_in_s3, _ = self.file_exists_in_s3(s3_key)
+            upload_source = "pre_existing" if exists_in_s3 else "bot"
+            
+            body = data
+            if algorithm and not exists_in_s3:
+                body = CompressedStream(BytesIO(data), algorithm, level).read()
+            
+            metadata = {
+                'uploaded_by': 'extractorov-unified',
+                'uploaded_at': datetime.now().isoformat(),
+                'original_filename': filename,
+                'empresa': empresa,
+                'file_size': str(file_size),
+                'path_structure': self.path_structure.value
+            }
+            if custom_metadata:
+                metadata.update({k: str(v) for k, v in custom_metadata.items()})
+            if algorithm:
+                metadata['compression'] = algorithm
+            
+            s3_url = f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{s3_key}"
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            
+            if not exists_in_s3:
+                extra_args = {
+                    'Metadata': metadata,
+                    'ContentType': content_type,
+                    'ServerSideEncryption': 'AES256',
+                    'StorageClass': 'STANDARD_IA'
+                }
+                if algorithm:
+                    extra_args['ContentType'] = self.COMPRESSION_CONTENT_TYPES[algorithm]
+                
+                logger.info(f"[unified_s3][upload_bytes] Cargando: {filename} -> {s3_key} ({len(body)} bytes)")
+                
+                for attempt in range(max_retries):
+                    try:
+                        if len(body) < self.transfer_config.multipart_threshold:
+                            self.s3_client.put_object(
+                                Bucket=self.bucket_name,
+                                Key=s3_key,
+                                Body=body,
+                                **extra_args
+                            )
+                        else:
+                            self.s3_client.upload_fileobj(
+                                BytesIO(body),
+                                self.bucket_name,
+                                s3_key,
+                                ExtraArgs=extra_args,
+                                Config=self.transfer_config
+                            )
+                        logger.info(f"[unified_s3][upload_bytes] Carga exitosa: {s3_key}")
+                        break
+                    except Exception as e:
+                        if attempt == max_retries - 1:
+                            raise e
+                        logger.warning(f"[unified_s3][upload_bytes] Intento {attempt + 1} falló: {e}")
+            
+            registry_id = None
+            try:
+                with self.rds_manager.get_session() as session:
+                    registry_id = self._register_object_in_db(
+                        session, s3_key, s3_url, empresa, file_hash, upload_source,
+                        numero_reclamo_sgc=numero_reclamo_sgc,
+                        file_size=file_size,
+                        file_suffix=suffix,
+                        content_type=content_type,
+                        origin=f"memoria://{filename}"
+                    )
+            except Exception as e:
+                logger.warning(f"[unified_s3][upload_bytes] Error registrando en BD: {e}")
+            
+            return S3UploadResult(
+                success=True,
+                s3_key=s3_key,
+                s3_url=s3_url,
+                file_hash=file_hash,
+                file_size=file_size,
+                upload_source=upload_source,
+                registry_id=registry_id,
+                metadata=metadata,
+                processing_time=(datetime.now() - start_time).total_seconds()
+            )
+            
+        except Exception as e:
+            error_msg = f"Error cargando {filename}: {e}"
+            logger.error(f"[unified_s3][upload_bytes] {error_msg}")
+            return S3UploadResult(
+                success=False,
+                error_message=error_msg,
+                processing_time=(datetime.now() - start_time).total_seconds()
+            )
+    
     def _register_file_in_db(self, session: Session, file_path: Path, 
                            s3_key: str, s3_url: str, empresa: str,
                            file_hash: str, upload_source: str,
                            numero_reclamo_sgc: str = None) -> Optional[int]:
         """Registrar archivo en base de datos"""
+        return self._register_object_in_db(
+            session, s3_key, s3_url, empresa, file_hash, upload_source,
+            numero_reclamo_sgc=numero_reclamo_sgc,
+            file_size=file_path.stat().st_size,
+            file_suffix=file_path.suffix.lower(),
+            content_type=mimetypes.guess_type(str(file_path))[0],
+            origin=str(file_path)
+        )
+    
+    def _register_object_in_db(self, session: Session, s3_key: str, s3_url: str,
+                               empresa: str, file_hash: str, upload_source: str,
+                               numero_reclamo_sgc: str = None, file_size: int = 0,
+                               file_suffix: str = '', content_type: str = None,
+                               origin: str = '') -> Optional[int]:
+        """Registrar objeto en base de datos (archivo local o contenido en memoria)"""
         try:
             file_info = {
                 'bucket_s3': self.bucket_name,
@@ -411,15 +681,15 @@ class UnifiedS3Service:
                 'url_s3': s3_url,
                 'numero_reclamo_sgc': numero_reclamo_sgc,
                 'empresa': empresa,
-                'tamano_archivo': file_path.stat().st_size,
-                'tipo_archivo': file_path.suffix.lower(),
-                'tipo_contenido': mimetypes.guess_type(str(file_path))[0] or 'application/octet-stream',
+                'tamano_archivo': file_size,
+                'tipo_archivo': file_suffix,
+                'tipo_contenido': content_type or 'application/octet-stream',
                 'estado_carga': 'subido' if upload_source == 'bot' else 'pre_existente',
                 'origen_carga': upload_source,
                 'hash_archivo': file_hash,
                 'fecha_carga': datetime.now(),
                 'metadatos': json.dumps({
-                    'ruta_original': str(file_path),
+                    'ruta_original': origin,
                     'estructura_ruta': self.path_structure.value
                 }),
                 'procesado': True,
@@ -14,6 +14,24 @@ Componentes Principales:
  * Generación de reportes de rendimiento
  * Detección de cuellos de botella
 
+- latency_histogram.py: Histogramas de latencia de memoria constante
+ * Registro O(1) en buckets log-lineales de tamaño fijo
+ * Percentiles p50/p90/p99 por etapa y empresa
+ * Snapshots fusionables entre procesos
+
+- tracing.py: Spans por registro (SGC / radicado)
+ * Enlaza extracción, validación, BD y S3 en una misma traza
+ * Exportación OTLP/JSON a archivo o colector en proceso
+ * Camino crítico de los registros más lentos
+
+- rate_limiter.py: Limitador adaptativo por host
+ * Token bucket con control AIMD ante 429/5xx y respuestas lentas
+ * Estado compartido entre procesos (flock por host)
+
+- run_profiler.py: Perfilado opcional por corrida (EXTRACTOR_PROFILE=1)
+ * Muestreo de pilas, flamegraph y diferencias de tracemalloc por etapa
+ * RSS/CPU de los procesos Chromium
+
 - file_utils.py: Utilidades para manejo de archivos
  * Operaciones de lectura/escritura
  * Gestión de directorios
@@ -61,6 +79,7 @@ Fecha: Octubre 2025
 """
 
 from .performance_monitor import PerformanceMonitor
+from .latency_histogram import LatencyHistogram, HistogramRegistry
 from .file_utils import FileUtils
 from .dashboard_logger import DashboardLogger
 
@@ -69,6 +88,8 @@ __author__ = "ExtractorOV Team"
 
 __all__ = [
  "PerformanceMonitor",
+ "LatencyHistogram",
+ "HistogramRegistry",
  "track_time",
  "FileUtils",
  "DashboardLogger",
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Latency Histogram - Histogramas Log-Lineales de Memoria Constante
+=================================================================
+
+Reemplaza las listas de duraciones que crecían sin límite en los
+recolectores de métricas por histogramas de tamaño fijo (estilo HDR):
+
+- Cada potencia de dos se divide en sub-buckets lineales: el error
+  relativo de los percentiles queda acotado (~1.6% con 7 bits)
+- record() es O(1) y no reserva memoria
+- Los snapshots son diccionarios JSON que se pueden fusionar entre
+  procesos o ejecuciones (merge)
+- HistogramRegistry agrupa histogramas por nombre y etiquetas
+  (ej. etapa + empresa) y exporta p50/p90/p99
+"""
+
+import math
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """Histograma log-lineal de tamaño fijo para duraciones en segundos"""
+
+    def __init__(self, resolution: float = 1e-6, highest: float = 86400.0,
+                 significant_bits: int = 7):
+        """
+        Args:
+            resolution: Unidad mínima distinguible en segundos (1µs por defecto)
+            highest: Mayor duración representable; los valores superiores
+                se acumulan en el último bucket (max conserva el valor exacto)
+            significant_bits: Bits de sub-bucket por potencia de dos
+        """
+        self.resolution = resolution
+        self.highest = highest
+        self.significant_bits = significant_bits
+        self._sub_count = 1 << significant_bits
+        self._half = self._sub_count >> 1
+        self._max_units = max(self._sub_count, int(highest / resolution))
+        size = self._index_of(self._max_units) + 1
+        self.counts = array('q', bytes(8 * size))
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Índices
+    # ------------------------------------------------------------------
+
+    def _index_of(self, units: int) -> int:
+        if units < self._sub_count:
+            return units
+        exponent = units.bit_length() - self.significant_bits
+        mantissa = units >> exponent
+        return self._sub_count + (exponent - 1) * self._half + (mantissa - self._half)
+
+    def _value_of(self, index: int) -> float:
+        """Punto medio del bucket, en segundos"""
+        if index < self._sub_count:
+            return index * self.resolution
+        offset = index - self._sub_count
+        exponent = offset // self._half + 1
+        mantissa = offset % self._half + self._half
+        lower = mantissa << exponent
+        return (lower + (1 << (exponent - 1))) * self.resolution
+
+    # ------------------------------------------------------------------
+    # Registro y consulta
+    # ------------------------------------------------------------------
+
+    def record(self, value: float, count: int = 1):
+        """Registrar una duración (O(1), sin reservar memoria)"""
+        if value < 0:
+            value = 0.0
+        units = min(int(value / self.resolution), self._max_units)
+        self.counts[self._index_of(units)] += count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float:
+        """Valor bajo el cual cae el percent% de las muestras"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100.0))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            if seen >= target:
+                return min(max(self._value_of(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def stats(self, percentiles=DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Resumen compatible con get_timer_stats (más percentiles)"""
+        summary = {
+            'count': self.count,
+            'avg': self.mean,
+            'min': self.min or 0.0,
+            'max': self.max or 0.0,
+            'total': self.total
+        }
+        for percent in percentiles:
+            summary[f"p{percent:g}"] = self.percentile(percent)
+        return summary
+
+    # ------------------------------------------------------------------
+    # Snapshots fusionables
+    # ------------------------------------------------------------------
+
+    def _compatible(self, other: 'LatencyHistogram') -> bool:
+        return (self.resolution == other.resolution and self.highest == other.highest
+                and self.significant_bits == other.significant_bits)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Sumar las muestras de otro histograma con la misma configuración"""
+        if not self._compatible(other):
+            raise ValueError("No se pueden fusionar histogramas con distinta configuración")
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def copy(self) -> 'LatencyHistogram':
+        return LatencyHistogram(self.resolution, self.highest, self.significant_bits).merge(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot serializable (solo buckets no vacíos)"""
+        return {
+            'resolution': self.resolution,
+            'highest': self.highest,
+            'significant_bits': self.significant_bits,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'buckets': {str(i): c for i, c in enumerate(self.counts) if c}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        histogram = cls(data['resolution'], data['highest'], data['significant_bits'])
+        for index, bucket_count in data.get('buckets', {}).items():
+            histogram.counts[int(index)] = bucket_count
+        histogram.count = data.get('count', 0)
+        histogram.total = data.get('total', 0.0)
+        histogram.min = data.get('min')
+        histogram.max = data.get('max')
+        return histogram
+
+    def clear(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+
+class HistogramRegistry:
+    """
+    Histogramas por nombre (etapa/operación) y etiquetas (ej. empresa)
+
+    Iterar el registro devuelve los nombres registrados, de modo que
+    reemplaza directamente a los diccionarios de listas de duraciones.
+    """
+
+    def __init__(self, **histogram_options):
+        self._options = histogram_options
+        self._histograms: Dict[Tuple[str, LabelKey], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label_key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def record(self, name: str, value: float, **labels):
+        """Registrar una duración para el nombre y etiquetas indicados"""
+        key = (name, self._label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = LatencyHistogram(**self._options)
+                self._histograms[key] = histogram
+            histogram.record(value)
+
+    def get(self, name: str, **labels) -> LatencyHistogram:
+        """Histograma fusionado de todas las series del nombre que coinciden con las etiquetas"""
+        wanted = set(self._label_key(labels))
+        merged = LatencyHistogram(**self._options)
+        with self._lock:
+            for (series_name, label_key), histogram in self._histograms.items():
+                if series_name == name and wanted.issubset(label_key):
+                    merged.merge(histogram)
+        return merged
+
+    def stats(self, name: str, **labels) -> Dict[str, float]:
+        return self.get(name, **labels).stats()
+
+    def stats_by(self, label: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Percentiles por nombre y valor de una etiqueta: {nombre: {valor: stats}}"""
+        grouped: Dict[str, Dict[str, LatencyHistogram]] = {}
+        with self._lock:
+            for (name, label_key), histogram in self._histograms.items():
+                value = dict(label_key).get(label)
+                if value is None:
+                    continue
+                target = grouped.setdefault(name, {}).setdefault(value, LatencyHistogram(**self._options))
+                target.merge(histogram)
+        return {name: {value: h.stats() for value, h in values.items()}
+                for name, values in grouped.items()}
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted({name for name, _ in self._histograms})
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Series serializables para exportar o fusionar en otro proceso"""
+        with self._lock:
+            return [{'name': name, 'labels': dict(label_key), 'histogram': h.to_dict()}
+                    for (name, label_key), h in self._histograms.items()]
+
+    def merge_snapshot(self, snapshot: List[Dict[str, Any]]):
+        """Incorporar un snapshot (de otro proceso o de una ejecución anterior)"""
+        for series in snapshot:
+            key = (series['name'], self._label_key(series.get('labels', {})))
+            incoming = LatencyHistogram.from_dict(series['histogram'])
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    self._histograms[key] = incoming
+                else:
+                    histogram.merge(incoming)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
@@ -12,6 +12,7 @@ Características principales:
 - Logging estructurado de performance
 - Manejo de errores con timing
 - Compatibilidad con métricas legacy
+- Percentiles (p50/p90/p99) con histogramas de memoria constante
 
 Basado en las implementaciones exitosas de los extractores legacy.
 """
@@ -22,22 +23,29 @@ import functools
 from datetime import datetime
 from typing import Callable, Any, Dict, Optional, Tuple
 
+from src.utils.latency_histogram import HistogramRegistry
+
 logger = logging.getLogger(__name__)
 
 class PerformanceMonitor:
     """Monitor de performance para funciones y métodos."""
 
-    def __init__(self, include_args: bool = False, include_return: bool = False):
+    def __init__(self, include_args: bool = False, include_return: bool = False,
+                 company: Optional[str] = None):
         """
         Inicializa el monitor de performance.
 
         Args:
             include_args: Si incluir argumentos en los logs
             include_return: Si incluir valores de retorno en los logs
+            company: Empresa con la que se etiquetan los tiempos (opcional)
         """
         self.include_args = include_args
         self.include_return = include_return
-        self.metrics_data: Dict[str, list] = {}
+        self.company = company
+        # Contadores por función; los tiempos van a histogramas de tamaño fijo
+        self.metrics_data: Dict[str, Dict[str, Any]] = {}
+        self.timings = HistogramRegistry()
 
     def __call__(self, func: Callable) -> Callable:
         """
@@ -112,17 +120,19 @@ class PerformanceMonitor:
             success: Si fue exitosa
             error_msg: Mensaje de error (opcional)
         """
-        if func_name not in self.metrics_data:
-            self.metrics_data[func_name] = []
-
-        metric_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'execution_time': execution_time,
-            'success': success,
-            'error_msg': error_msg
-        }
+        entry = self.metrics_data.get(func_name)
+        if entry is None:
+            entry = {'total_calls': 0, 'successful_calls': 0, 'failed_calls': 0,
+                     'last_timestamp': None, 'last_error': None}
+            self.metrics_data[func_name] = entry
 
-        self.metrics_data[func_name].append(metric_entry)
+        entry['total_calls'] += 1
+        entry['successful_calls' if success else 'failed_calls'] += 1
+        entry['last_timestamp'] = datetime.now().isoformat()
+        if error_msg:
+            entry['last_error'] = error_msg
+
+        self.timings.record(func_name, execution_time, company=self.company)
 
     def get_metrics(self, func_name: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -132,11 +142,11 @@ class PerformanceMonitor:
             func_name: Función específica (None para todas)
 
         Returns:
-            Diccionario con métricas
+            Diccionario con métricas (resumen por función)
         """
         if func_name:
-            return self.metrics_data.get(func_name, [])
-        return self.metrics_data.copy()
+            return self.get_summary(func_name)
+        return {name: self.get_summary(name) for name in list(self.metrics_data)}
 
     def get_summary(self, func_name: str) -> Dict[str, Any]:
         """
@@ -148,24 +158,33 @@ class PerformanceMonitor:
         Returns:
             Diccionario con resumen estadístico
         """
-        metrics = self.metrics_data.get(func_name, [])
-        if not metrics:
+        entry = self.metrics_data.get(func_name)
+        if not entry:
             return {}
 
-        execution_times = [m['execution_time'] for m in metrics]
-        success_count = sum(1 for m in metrics if m['success'])
+        timing = self.timings.stats(func_name)
 
         return {
-            'total_calls': len(metrics),
-            'successful_calls': success_count,
-            'failed_calls': len(metrics) - success_count,
-            'success_rate': success_count / len(metrics) * 100,
-            'avg_execution_time': sum(execution_times) / len(execution_times),
-            'min_execution_time': min(execution_times),
-            'max_execution_time': max(execution_times),
-            'total_execution_time': sum(execution_times)
+            **entry,
+            'success_rate': entry['successful_calls'] / entry['total_calls'] * 100,
+            'avg_execution_time': timing['avg'],
+            'min_execution_time': timing['min'],
+            'max_execution_time': timing['max'],
+            'total_execution_time': timing['total'],
+            'p50_execution_time': timing['p50'],
+            'p90_execution_time': timing['p90'],
+            'p99_execution_time': timing['p99']
         }
 
+    def get_percentiles_by_company(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Percentiles por función y empresa (para monitores con company).
+
+        Returns:
+            {función: {empresa: estadísticas}}
+        """
+        return self.timings.stats_by('company')
+
 
 # Instancia global del monitor para compatibilidad con código legacy
 _global_monitor = PerformanceMonitor()
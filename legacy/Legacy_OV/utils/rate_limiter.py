@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rate Limiter - Limitador Adaptativo por Host
+============================================
+
+Limitador token-bucket con control AIMD (aumento aditivo, disminución
+multiplicativa) por host destino. Reemplaza las pausas fijas entre
+páginas, cartas, reportes y lotes de IA:
+
+- Mientras las respuestas son rápidas la tasa sube de forma gradual
+- Ante 429/5xx, errores o respuestas lentas la tasa se reduce a la mitad
+  (y se respeta Retry-After cuando el servidor lo envía)
+- El estado del bucket vive en un archivo por host protegido con flock,
+  así todos los procesos que apuntan al mismo portal comparten el presupuesto
+
+En plataformas sin fcntl (Windows) el estado se comparte solo dentro del proceso.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = "data/state/rate_limits"
+
+
+@dataclass
+class LimiterConfig:
+    """Parámetros del limitador de un host"""
+    initial_rate: float = 0.5          # solicitudes por segundo
+    min_rate: float = 0.05
+    max_rate: float = 5.0
+    burst: float = 1.0                 # tokens acumulables cuando el portal está ocioso
+    increase_step: float = 0.05        # aumento aditivo por respuesta rápida
+    decrease_factor: float = 0.5       # disminución multiplicativa por señal de sobrecarga
+    slow_threshold: float = 10.0       # segundos: respuesta más lenta = sobrecarga
+    penalty_seconds: float = 30.0      # enfriamiento tras 429/5xx sin Retry-After
+
+    @classmethod
+    def from_env(cls, **overrides) -> 'LimiterConfig':
+        """Valores por defecto desde variables RATE_LIMIT_* (los overrides tienen prioridad)"""
+        env_map = {
+            'initial_rate': 'RATE_LIMIT_INITIAL_RPS',
+            'min_rate': 'RATE_LIMIT_MIN_RPS',
+            'max_rate': 'RATE_LIMIT_MAX_RPS',
+            'slow_threshold': 'RATE_LIMIT_SLOW_SECONDS',
+        }
+        values = {}
+        for name, env_name in env_map.items():
+            if os.getenv(env_name):
+                values[name] = float(os.getenv(env_name))
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+
+@dataclass
+class BucketState:
+    """Estado compartido del bucket (persistido en el archivo del host)"""
+    rate: float
+    tokens: float
+    updated_at: float
+    cooldown_until: float = 0.0
+    last_decrease: float = 0.0
+    latency_ewma: float = 0.0
+    requests: int = 0
+    throttled: int = 0
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket AIMD para un host, compartido entre procesos
+    """
+
+    def __init__(self, host: str, config: Optional[LimiterConfig] = None,
+                 state_dir: Optional[str] = None):
+        """
+        Args:
+            host: Host destino (ej. serviciospqrs.afinia.com.co)
+            config: Parámetros del limitador
+            state_dir: Directorio de archivos de estado (RATE_LIMIT_DIR por defecto)
+        """
+        self.host = host
+        self.config = config or LimiterConfig.from_env()
+        directory = Path(state_dir or os.getenv('RATE_LIMIT_DIR', DEFAULT_STATE_DIR))
+        directory.mkdir(parents=True, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in '.-' else '_' for c in host) or 'default'
+        self.state_file = directory / f"{safe_name}.json"
+        self._local_lock = threading.Lock()
+        self._local_state: Optional[BucketState] = None
+
+    # ------------------------------------------------------------------
+    # Estado compartido
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked_state(self):
+        """Leer-modificar-escribir el estado bajo lock de archivo (y de hilo)"""
+        with self._local_lock:
+            if not FCNTL_AVAILABLE:
+                if self._local_state is None:
+                    self._local_state = self._new_state()
+                yield self._local_state
+                return
+
+            with open(self.state_file, 'a+') as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    handle.seek(0)
+                    raw = handle.read()
+                    try:
+                        state = BucketState(**json.loads(raw)) if raw.strip() else self._new_state()
+                    except (ValueError, TypeError):
+                        state = self._new_state()
+                    yield state
+                    handle.seek(0)
+                    handle.truncate()
+                    handle.write(json.dumps(asdict(state)))
+                    handle.flush()
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _new_state(self) -> BucketState:
+        return BucketState(rate=self.config.initial_rate, tokens=self.config.burst,
+                           updated_at=time.time())
+
+    def _refill(self, state: BucketState, now: float):
+        elapsed = max(0.0, now - state.updated_at)
+        state.tokens = min(self.config.burst, state.tokens + elapsed * state.rate)
+        state.updated_at = now
+
+    # ------------------------------------------------------------------
+    # Adquisición
+    # ------------------------------------------------------------------
+
+    def reserve(self) -> float:
+        """
+        Reservar un turno y devolver los segundos que hay que esperar
+
+        Los tokens pueden quedar negativos: cada proceso reserva su turno y
+        duerme fuera del lock, sin sondear el archivo.
+        """
+        with self._locked_state() as state:
+            now = time.time()
+            self._refill(state, now)
+            state.tokens -= 1.0
+            state.requests += 1
+            wait = 0.0 if state.tokens >= 0 else -state.tokens / state.rate
+            wait = max(wait, state.cooldown_until - now)
+            if wait > 0:
+                state.throttled += 1
+            return wait
+
+    def acquire(self) -> float:
+        """Esperar turno (versión bloqueante). Devuelve los segundos esperados"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Esperar turno sin bloquear el event loop. Devuelve los segundos esperados"""
+        wait = await asyncio.to_thread(self.reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    # ------------------------------------------------------------------
+    # Retroalimentación AIMD
+    # ------------------------------------------------------------------
+
+    def record(self, latency: float, status: Optional[int] = None, error: bool = False,
+               retry_after: Optional[float] = None):
+        """
+        Registrar el resultado de una solicitud y ajustar la tasa
+
+        Args:
+            latency: Segundos que tardó la respuesta
+            status: Código HTTP si se conoce
+            error: La solicitud falló (timeout, error de red, etc.)
+            retry_after: Segundos indicados por el servidor en Retry-After
+        """
+        overloaded = error or status == 429 or (status is not None and status >= 500)
+        slow = latency > self.config.slow_threshold
+
+        with self._locked_state() as state:
+            now = time.time()
+            self._refill(state, now)
+            state.latency_ewma = latency if state.latency_ewma == 0 else 0.8 * state.latency_ewma + 0.2 * latency
+
+            if overloaded or slow:
+                # Una sola reducción por intervalo: varias respuestas de la misma ráfaga cuentan como una señal
+                if now - state.last_decrease >= 1.0 / state.rate:
+                    old_rate = state.rate
+                    state.rate = max(self.config.min_rate, state.rate * self.config.decrease_factor)
+                    state.last_decrease = now
+                    logger.warning(f"[rate_limiter][record] {self.host}: tasa {old_rate:.3f} -> {state.rate:.3f} rps "
+                                   f"(status={status}, error={error}, latencia={latency:.1f}s)")
+                if overloaded:
+                    cooldown = retry_after if retry_after is not None else (
+                        self.config.penalty_seconds if status == 429 or (status or 0) >= 500 else 0.0)
+                    state.cooldown_until = max(state.cooldown_until, now + cooldown)
+            else:
+                state.rate = min(self.config.max_rate, state.rate + self.config.increase_step)
+
+    @asynccontextmanager
+    async def request(self):
+        """
+        Esperar turno, medir la operación y registrar el resultado
+
+        Uso::
+
+            async with limiter.request() as outcome:
+                response = await page.goto(url)
+                outcome['status'] = response.status if response else None
+        """
+        await self.acquire_async()
+        outcome: Dict[str, Optional[float]] = {'status': None, 'retry_after': None}
+        started = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            await asyncio.to_thread(self.record, time.monotonic() - started, outcome['status'], True,
+                                    outcome['retry_after'])
+            raise
+        await asyncio.to_thread(self.record, time.monotonic() - started, outcome['status'], False,
+                                outcome['retry_after'])
+
+    def get_state(self) -> Dict[str, float]:
+        """Estado actual del bucket (para monitoreo)"""
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            return {'host': self.host, **asdict(state)}
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def host_from_url(url_or_host: str) -> str:
+    """Extraer el host de una URL (o devolver el host tal cual)"""
+    parsed = urlparse(url_or_host if '://' in url_or_host else f"//{url_or_host}")
+    return (parsed.hostname or url_or_host).lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Convertir el encabezado Retry-After a segundos
+
+    Acepta tanto segundos (``120``) como fecha HTTP
+    (``Wed, 21 Oct 2025 07:28:00 GMT``). Devuelve None si no viene o no se entiende.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def get_rate_limiter(url_or_host: str, initial_interval: Optional[float] = None,
+                     **config_overrides) -> AdaptiveRateLimiter:
+    """
+    Limitador compartido para el host de una URL
+
+    Args:
+        url_or_host: URL o host destino
+        initial_interval: Segundos entre solicitudes al arrancar (equivale a
+            las pausas fijas que reemplaza); ignorado si el host ya tiene estado
+        **config_overrides: Campos de LimiterConfig
+    """
+    host = host_from_url(url_or_host)
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            if initial_interval and initial_interval > 0:
+                config_overrides.setdefault('initial_rate', 1.0 / initial_interval)
+            limiter = AdaptiveRateLimiter(host, LimiterConfig.from_env(**config_overrides))
+            _limiters[host] = limiter
+        return limiter
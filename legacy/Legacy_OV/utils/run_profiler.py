@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Run Profiler - Perfilado Opcional por Corrida
+=============================================
+
+Modo de perfilado para BaseExtractor.run_extraction y
+CompleteFlowOrchestrator.execute_complete_flow / execute_pipelined_flow,
+desactivado por defecto:
+
+- Muestreo de pilas estilo py-spy: un hilo lee sys._current_frames() cada
+  EXTRACTOR_PROFILE_INTERVAL_MS y acumula pilas plegadas, sin instrumentar
+  cada llamada como sys.setprofile
+- tracemalloc con snapshot al inicio y fin de cada etapa: diferencias por
+  línea, memoria actual y pico de la etapa
+- RSS y CPU de los procesos Chromium hijos (psutil, opcional)
+
+Por corrida se escribe en EXTRACTOR_PROFILE_DIR/<etiqueta>_<timestamp>/:
+  flamegraph.svg   Flamegraph autocontenido (la raíz de cada pila es la etapa)
+  stacks.folded    Pilas plegadas (flamegraph.pl, speedscope, inferno)
+  allocations.txt  Top-N de asignaciones global y por etapa
+  profile.json     Etapas, memoria, muestras del navegador y rutas de salida
+
+Se activa con EXTRACTOR_PROFILE=1 o pasando enabled=True.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = "data/profiles"
+BROWSER_PROCESS_NAMES = ("chrom", "headless_shell")
+MAX_STACK_DEPTH = 128
+BROWSER_SAMPLE_SECONDS = 1.0
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, '').lower() in ('1', 'true', 'yes', 'si')
+
+
+@dataclass
+class StageProfile:
+    """Tiempo y memoria de una etapa"""
+    name: str
+    duration_seconds: float = 0.0
+    traced_current_mb: float = 0.0
+    traced_peak_mb: float = 0.0
+    browser_peak_rss_mb: float = 0.0
+    browser_peak_cpu_percent: float = 0.0
+    top_allocations: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class RunProfiler:
+    """
+    Perfilador de una corrida (extracción o flujo completo)
+
+    Uso:
+        profiler = RunProfiler("afinia_extraction").start()
+        with profiler.stage("authenticate"):
+            ...
+        report_dir = profiler.stop()
+
+    Desactivado, start/stage/stop no hacen nada. Solo un perfilador puede
+    estar activo por proceso (tracemalloc es global).
+    """
+
+    _active_lock = threading.Lock()
+    _active: Optional['RunProfiler'] = None
+
+    def __init__(self, label: str, enabled: Optional[bool] = None,
+                 output_dir: Optional[str] = None, interval_ms: Optional[float] = None,
+                 top_n: Optional[int] = None, all_threads: Optional[bool] = None):
+        self.label = label
+        self.enabled = _env_flag('EXTRACTOR_PROFILE') if enabled is None else enabled
+        self.output_dir = Path(output_dir or os.getenv('EXTRACTOR_PROFILE_DIR', DEFAULT_PROFILE_DIR))
+        self.interval = (interval_ms or float(os.getenv('EXTRACTOR_PROFILE_INTERVAL_MS', '10'))) / 1000
+        self.top_n = top_n or int(os.getenv('EXTRACTOR_PROFILE_TOP_N', '25'))
+        self.all_threads = _env_flag('EXTRACTOR_PROFILE_ALL_THREADS') if all_threads is None else all_threads
+        self.tracemalloc_frames = int(os.getenv('EXTRACTOR_PROFILE_TRACEMALLOC_FRAMES', '1'))
+
+        self.stages: List[StageProfile] = []
+        self.browser_samples: List[Dict[str, Any]] = []
+        self.report_dir: Optional[Path] = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._current_stage = "run"
+        self._in_snapshot = False
+        self._target_thread: Optional[int] = None
+        self._started = 0.0
+        self._started_at = ""
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+        self._browser_processes: Dict[int, Any] = {}
+        self._root_process = psutil.Process() if PSUTIL_AVAILABLE else None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> 'RunProfiler':
+        """Iniciar muestreo, tracemalloc y seguimiento del navegador"""
+        if not self.enabled:
+            return self
+        with RunProfiler._active_lock:
+            if RunProfiler._active is not None:
+                logger.warning(f"[run_profiler][start] Ya hay un perfilado activo "
+                               f"({RunProfiler._active.label}); '{self.label}' se omite")
+                self.enabled = False
+                return self
+            RunProfiler._active = self
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+            self._started_tracemalloc = True
+
+        self._target_thread = threading.get_ident()
+        self._started = time.monotonic()
+        self._started_at = datetime.now().isoformat()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name=f"run_profiler_{self.label}", daemon=True)
+        self._thread.start()
+        logger.info(f"[run_profiler][start] Perfilado activo para {self.label} "
+                    f"(muestreo cada {self.interval * 1000:.0f} ms)")
+        return self
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Optional[StageProfile]]:
+        """Medir una etapa: tiempo, diferencia de asignaciones y pico del navegador"""
+        if not self.active:
+            yield None
+            return
+
+        stage = StageProfile(name=name)
+        previous_stage = self._current_stage
+        self._current_stage = name
+        first_browser_sample = len(self.browser_samples)
+        before = self._take_snapshot()
+        tracemalloc.reset_peak()
+        started = time.monotonic()
+        try:
+            yield stage
+        finally:
+            stage.duration_seconds = round(time.monotonic() - started, 3)
+            current, peak = tracemalloc.get_traced_memory()
+            stage.traced_current_mb = round(current / 1024 / 1024, 2)
+            stage.traced_peak_mb = round(peak / 1024 / 1024, 2)
+            stage.top_allocations = self._allocations_since(before)
+            stage_samples = self.browser_samples[first_browser_sample:]
+            if stage_samples:
+                stage.browser_peak_rss_mb = max(s['rss_mb'] for s in stage_samples)
+                stage.browser_peak_cpu_percent = max(s['cpu_percent'] for s in stage_samples)
+            self.stages.append(stage)
+            self._current_stage = previous_stage
+
+    def stop(self) -> Optional[Path]:
+        """Detener el perfilado y escribir los reportes; devuelve el directorio de salida"""
+        if not self.active:
+            return None
+
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+        final_snapshot = self._take_snapshot()
+        top_allocations = [self._stat_to_dict(stat)
+                           for stat in final_snapshot.statistics('lineno')[:self.top_n]]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        with RunProfiler._active_lock:
+            RunProfiler._active = None
+
+        try:
+            self.report_dir = self._write_reports(top_allocations)
+            logger.info(f"[run_profiler][stop] Perfil de {self.label} guardado en {self.report_dir}")
+        except OSError as e:
+            logger.error(f"[run_profiler][stop] No se pudo escribir el perfil de {self.label}: {e}")
+        return self.report_dir
+
+    # ------------------------------------------------------------------
+    # Muestreo
+    # ------------------------------------------------------------------
+
+    def _sample_loop(self):
+        own_thread = threading.get_ident()
+        next_browser_sample = 0.0
+        while not self._stop_event.wait(self.interval):
+            if self._in_snapshot:
+                continue
+            thread_names = ({thread.ident: thread.name for thread in threading.enumerate()}
+                            if self.all_threads else {})
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread or (not self.all_threads and ident != self._target_thread):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(f"[{self._current_stage}]")
+                if self.all_threads:
+                    stack.append(thread_names.get(ident, str(ident)))
+                stack.reverse()
+                self._stacks[';'.join(stack)] += 1
+            self._samples += 1
+
+            now = time.monotonic()
+            if self._root_process is not None and now >= next_browser_sample:
+                self._sample_browser(now - self._started)
+                next_browser_sample = now + BROWSER_SAMPLE_SECONDS
+
+    def _sample_browser(self, elapsed: float):
+        """RSS y CPU sumados de los procesos Chromium hijos"""
+        rss = 0
+        cpu = 0.0
+        count = 0
+        alive = set()
+        try:
+            children = self._root_process.children(recursive=True)
+        except psutil.Error:
+            return
+        for child in children:
+            try:
+                if not any(key in child.name().lower() for key in BROWSER_PROCESS_NAMES):
+                    continue
+                # cpu_percent mide desde la llamada anterior sobre el mismo objeto
+                process = self._browser_processes.setdefault(child.pid, child)
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)
+                count += 1
+                alive.add(child.pid)
+            except psutil.Error:
+                continue
+        self._browser_processes = {pid: p for pid, p in self._browser_processes.items() if pid in alive}
+        self.browser_samples.append({
+            'elapsed_seconds': round(elapsed, 2),
+            'stage': self._current_stage,
+            'processes': count,
+            'rss_mb': round(rss / 1024 / 1024, 1),
+            'cpu_percent': round(cpu, 1)
+        })
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """Snapshot sin las trazas del propio perfilador (el muestreo se pausa mientras tanto)"""
+        self._in_snapshot = True
+        try:
+            return tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ))
+        finally:
+            self._in_snapshot = False
+
+    def _allocations_since(self, before: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """Top-N de diferencias por línea respecto a un snapshot anterior"""
+        after = self._take_snapshot()
+        self._in_snapshot = True
+        try:
+            return [self._stat_to_dict(stat) for stat in after.compare_to(before, 'lineno')[:self.top_n]]
+        finally:
+            self._in_snapshot = False
+
+    @staticmethod
+    def _stat_to_dict(stat) -> Dict[str, Any]:
+        frame = stat.traceback[0]
+        entry = {'location': f"{frame.filename}:{frame.lineno}",
+                 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+        if hasattr(stat, 'size_diff'):
+            entry['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+            entry['count_diff'] = stat.count_diff
+        return entry
+
+    # ------------------------------------------------------------------
+    # Reportes
+    # ------------------------------------------------------------------
+
+    def _write_reports(self, top_allocations: List[Dict[str, Any]]) -> Path:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_dir = self.output_dir / f"{self.label}_{timestamp}"
+        report_dir.mkdir(parents=True, exist_ok=True)
+
+        folded_path = report_dir / "stacks.folded"
+        folded_path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common()), encoding='utf-8')
+
+        flamegraph_path = report_dir / "flamegraph.svg"
+        flamegraph_path.write_text(render_flamegraph(self._stacks, title=f"{self.label} ({self._samples} muestras)"),
+                                   encoding='utf-8')
+
+        allocations_path = report_dir / "allocations.txt"
+        allocations_path.write_text(self._allocations_text(top_allocations), encoding='utf-8')
+
+        rss_values = [s['rss_mb'] for s in self.browser_samples]
+        cpu_values = [s['cpu_percent'] for s in self.browser_samples]
+        report = {
+            'label': self.label,
+            'started_at': self._started_at,
+            'duration_seconds': round(time.monotonic() - self._started, 3),
+            'interval_ms': self.interval * 1000,
+            'samples': self._samples,
+            'stages': [asdict(stage) for stage in self.stages],
+            'top_allocations': top_allocations,
+            'browser': {
+                'psutil_available': PSUTIL_AVAILABLE,
+                'peak_rss_mb': max(rss_values, default=0.0),
+                'avg_rss_mb': round(sum(rss_values) / len(rss_values), 1) if rss_values else 0.0,
+                'peak_cpu_percent': max(cpu_values, default=0.0),
+                'samples': self.browser_samples
+            },
+            'files': {
+                'flamegraph': str(flamegraph_path),
+                'folded_stacks': str(folded_path),
+                'allocations': str(allocations_path)
+            }
+        }
+        (report_dir / "profile.json").write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+        return report_dir
+
+    def _allocations_text(self, top_allocations: List[Dict[str, Any]]) -> str:
+        lines = [f"PERFIL DE ASIGNACIONES - {self.label}", "=" * 60, "",
+                 f"TOP {self.top_n} AL FINAL DE LA CORRIDA", "-" * 60]
+        lines += [f"{a['size_kb']:>12.1f} KB {a['count']:>9} obj  {a['location']}" for a in top_allocations]
+        for stage in self.stages:
+            lines += ["", f"ETAPA {stage.name}: {stage.duration_seconds:.2f}s, "
+                          f"pico tracemalloc {stage.traced_peak_mb} MB, "
+                          f"navegador {stage.browser_peak_rss_mb} MB RSS", "-" * 60]
+            lines += [f"{a['size_diff_kb']:>+12.1f} KB {a['count_diff']:>+9} obj  {a['location']}"
+                      for a in stage.top_allocations]
+        return "\n".join(lines) + "\n"
+
+
+def render_flamegraph(stacks: Dict[str, int], title: str = "Flamegraph",
+                      width: int = 1200, row_height: int = 16) -> str:
+    """SVG de un flamegraph a partir de pilas plegadas ('a;b;c' -> muestras)"""
+
+    def new_node():
+        return {'value': 0, 'children': defaultdict(new_node)}
+
+    root = new_node()
+    for stack, count in stacks.items():
+        node = root
+        node['value'] += count
+        for name in stack.split(';'):
+            node = node['children'][name]
+            node['value'] += count
+
+    total = max(1, root['value'])
+    rects = []
+    max_depth = 0
+
+    def layout(node, x: float, depth: int):
+        nonlocal max_depth
+        for name, child in sorted(node['children'].items()):
+            child_width = child['value'] / total * width
+            if child_width >= 0.5:
+                max_depth = max(max_depth, depth)
+                rects.append((name, x, depth, child_width, child['value']))
+                layout(child, x, depth + 1)
+            x += child_width
+
+    layout(root, 0.0, 0)
+
+    height = (max_depth + 1) * row_height + 40
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        '<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="14">{escape(title)}</text>',
+    ]
+    for name, x, depth, rect_width, value in rects:
+        y = height - (depth + 1) * row_height - 4
+        hue = zlib.crc32(name.encode('utf-8')) % 40
+        percent = value / total * 100
+        label = name if len(name) * 7 < rect_width else name[:max(0, int(rect_width / 7) - 2)] + '..'
+        parts.append(
+            f'<g><title>{escape(name)} ({value} muestras, {percent:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{rect_width:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({10 + hue},85%,60%)" rx="2"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{escape(label)}</text>' if rect_width > 21 else '')
+            + '</g>')
+    parts.append('</svg>')
+    return "\n".join(parts)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Tracing - Spans por Registro (SGC / Radicado)
+=============================================
+
+Trazas livianas que enlazan las etapas de un mismo registro aunque ocurran
+en distintos componentes o procesos: abrir pestaña, esperar carga, PDF,
+adjuntos, JSON, validación, upsert en BD y subida a S3.
+
+- El trace_id se deriva de empresa + número de registro, así los spans de
+  la extracción, la carga RDS y la subida S3 quedan en la misma traza
+- Los spans anidados se agrupan en memoria y se exportan juntos al cerrar
+  el span raíz (el SGC puede conocerse a mitad de la secuencia)
+- Exportación a archivo JSONL compatible con OTLP/JSON (un
+  ExportTraceServiceRequest por línea) o a un colector en proceso
+- critical_path() explica en qué se fue el tiempo de un registro
+
+Configuración por variables de entorno:
+    TRACE_EXPORT: file (por defecto) | memory | off
+    TRACE_DIR: directorio de los archivos de spans (data/traces)
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "extractor_ov"
+DEFAULT_TRACE_DIR = "data/traces"
+
+
+@dataclass
+class _TraceContext:
+    """Spans de una traza local pendientes de exportar"""
+    record_id: Optional[str] = None
+    company: Optional[str] = None
+    spans: List['Span'] = field(default_factory=list)
+
+
+@dataclass
+class Span:
+    """Operación cronometrada dentro de la traza de un registro"""
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    trace: _TraceContext
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_record(self, record_id: str, company: Optional[str] = None):
+        """Asociar la traza a un registro (ej. cuando se extrae el SGC)"""
+        if record_id:
+            self.trace.record_id = str(record_id)
+        if company:
+            self.trace.company = company
+
+
+def trace_id_for(company: Optional[str], record_id: str) -> str:
+    """trace_id estable (32 hex) para un registro de una empresa"""
+    return hashlib.sha256(f"{company or ''}:{record_id}".encode('utf-8')).hexdigest()[:32]
+
+
+def _span_to_dict(span: Span, trace_id: str) -> Dict[str, Any]:
+    return {
+        'trace_id': trace_id,
+        'span_id': span.span_id,
+        'parent_id': span.parent_id,
+        'name': span.name,
+        'record_id': span.trace.record_id,
+        'company': span.trace.company,
+        'start_ns': span.start_ns,
+        'end_ns': span.end_ns,
+        'attributes': dict(span.attributes),
+        'error': span.error
+    }
+
+
+# ----------------------------------------------------------------------
+# Exportadores
+# ----------------------------------------------------------------------
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': k, 'value': _otlp_value(v)} for k, v in values.items() if v is not None]
+
+
+class OTLPFileExporter:
+    """Escribe cada traza como una línea OTLP/JSON (ExportTraceServiceRequest)"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv('TRACE_DIR', DEFAULT_TRACE_DIR))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"spans_{datetime.now().strftime('%Y%m%d')}.jsonl"
+
+    def export(self, spans: List[Dict[str, Any]]):
+        otlp_spans = []
+        for span in spans:
+            attributes = {'record.id': span['record_id'], 'company': span['company'], **span['attributes']}
+            otlp_span = {
+                'traceId': span['trace_id'],
+                'spanId': span['span_id'],
+                'name': span['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(span['start_ns']),
+                'endTimeUnixNano': str(span['end_ns']),
+                'attributes': _otlp_attributes(attributes),
+                'status': {'code': 2, 'message': span['error']} if span['error'] else {'code': 1}
+            }
+            if span['parent_id']:
+                otlp_span['parentSpanId'] = span['parent_id']
+            otlp_spans.append(otlp_span)
+
+        request = {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME,
+                                                          'process.pid': os.getpid()})},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': otlp_spans}]
+        }]}
+        line = json.dumps(request, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+
+class InMemorySpanCollector:
+    """Colector en proceso con capacidad acotada (para pruebas y monitoreo)"""
+
+    def __init__(self, max_spans: int = 50000):
+        self.spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def get_spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.spans)
+
+
+# ----------------------------------------------------------------------
+# Tracer
+# ----------------------------------------------------------------------
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+    """Crea spans anidados (por contexto de hilo/tarea) y los exporta por traza"""
+
+    def __init__(self, exporters: Optional[Iterable[Any]] = None):
+        self.exporters = list(exporters or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    @contextmanager
+    def span(self, name: str, record_id: Optional[str] = None, company: Optional[str] = None,
+             **attributes) -> Iterator[Optional[Span]]:
+        """
+        Medir una operación
+
+        Sin span activo se abre una traza nueva; dentro de otro span se crea
+        un hijo. Los errores se registran en el span y se re-lanzan.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        trace = parent.trace if parent else _TraceContext()
+        span = Span(name=name, span_id=os.urandom(8).hex(),
+                    parent_id=parent.span_id if parent else None,
+                    start_ns=time.time_ns(), trace=trace, attributes=attributes)
+        span.set_record(record_id, company)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            trace.spans.append(span)
+            if parent is None:
+                self._finish(trace)
+
+    def set_record(self, record_id: str, company: Optional[str] = None):
+        """Asociar la traza activa a un registro"""
+        span = _current_span.get()
+        if span is not None:
+            span.set_record(record_id, company)
+
+    def _finish(self, trace: _TraceContext):
+        trace_id = (trace_id_for(trace.company, trace.record_id) if trace.record_id
+                    else os.urandom(16).hex())
+        spans = [_span_to_dict(span, trace_id) for span in trace.spans]
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.debug(f"[tracing][_finish] Error exportando spans: {e}")
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Tracer global configurado según TRACE_EXPORT"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            mode = os.getenv('TRACE_EXPORT', 'file').lower()
+            if mode == 'off':
+                exporters = []
+            elif mode == 'memory':
+                exporters = [InMemorySpanCollector()]
+            else:
+                try:
+                    exporters = [OTLPFileExporter()]
+                except OSError as e:
+                    logger.warning(f"[tracing][get_tracer] Sin archivo de spans ({e}); usando colector en memoria")
+                    exporters = [InMemorySpanCollector()]
+            _tracer = Tracer(exporters)
+        return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    """Reemplazar el tracer global (ej. un colector en memoria en pruebas)"""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
+
+
+# ----------------------------------------------------------------------
+# Análisis
+# ----------------------------------------------------------------------
+
+def load_otlp_spans(paths: Iterable[Path]) -> List[Dict[str, Any]]:
+    """Leer archivos JSONL OTLP y devolver spans en formato plano"""
+    spans = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                for resource_spans in request.get('resourceSpans', []):
+                    for scope_spans in resource_spans.get('scopeSpans', []):
+                        for raw in scope_spans.get('spans', []):
+                            attributes = {a['key']: next(iter(a['value'].values()))
+                                          for a in raw.get('attributes', [])}
+                            spans.append({
+                                'trace_id': raw['traceId'],
+                                'span_id': raw['spanId'],
+                                'parent_id': raw.get('parentSpanId'),
+                                'name': raw['name'],
+                                'record_id': attributes.pop('record.id', None),
+                                'company': attributes.pop('company', None),
+                                'start_ns': int(raw['startTimeUnixNano']),
+                                'end_ns': int(raw['endTimeUnixNano']),
+                                'attributes': attributes,
+                                'error': raw.get('status', {}).get('message')
+                            })
+    return spans
+
+
+def _span_path(span: Dict[str, Any], children: Dict[str, List[Dict[str, Any]]],
+               prefix: str) -> List[Dict[str, Any]]:
+    """Camino crítico dentro de un span: recorre hacia atrás desde su fin"""
+    name = f"{prefix}{span['name']}"
+    segments: List[Dict[str, Any]] = []
+    cursor = span['end_ns']
+    for child in sorted(children.get(span['span_id'], []), key=lambda s: s['end_ns'], reverse=True):
+        if child['end_ns'] > cursor:
+            continue  # Hijo en paralelo que no determina la duración
+        if cursor > child['end_ns']:
+            segments.append({'name': name, 'start_ns': child['end_ns'], 'end_ns': cursor})
+        segments.extend(reversed(_span_path(child, children, f"{name} > ")))
+        cursor = child['start_ns']
+    if cursor > span['start_ns']:
+        segments.append({'name': name, 'start_ns': span['start_ns'], 'end_ns': cursor})
+    return list(reversed(segments))
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Segmentos del camino crítico de una traza, en orden cronológico
+
+    Los spans raíz (extracción, BD, S3...) se encadenan por tiempo; el hueco
+    entre uno y otro se reporta como espera en cola.
+
+    Returns:
+        Lista de {'name', 'start_ns', 'end_ns', 'duration_s'}
+    """
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    ids = {s['span_id'] for s in spans}
+    roots = []
+    for span in spans:
+        if span['parent_id'] and span['parent_id'] in ids:
+            children.setdefault(span['parent_id'], []).append(span)
+        else:
+            roots.append(span)
+
+    segments: List[Dict[str, Any]] = []
+    cursor = None
+    for root in sorted(roots, key=lambda s: s['start_ns']):
+        if cursor is not None and root['end_ns'] <= cursor:
+            continue  # Raíz solapada por completo con la anterior
+        if cursor is not None and root['start_ns'] > cursor:
+            segments.append({'name': '(en cola)', 'start_ns': cursor, 'end_ns': root['start_ns']})
+        for segment in _span_path(root, children, ""):
+            if cursor is not None and segment['end_ns'] <= cursor:
+                continue
+            if cursor is not None and segment['start_ns'] < cursor:
+                segment = {**segment, 'start_ns': cursor}
+            segments.append(segment)
+        cursor = root['end_ns']
+
+    for segment in segments:
+        segment['duration_s'] = (segment['end_ns'] - segment['start_ns']) / 1e9
+    return segments
+
+
+def slowest_records(spans: List[Dict[str, Any]], top: int = 10,
+                    company: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Registros más lentos (de inicio del primer span a fin del último)
+
+    Returns:
+        Lista de {'trace_id', 'record_id', 'company', 'duration_s', 'spans'}
+    """
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        if company and span.get('company') != company:
+            continue
+        traces.setdefault(span['trace_id'], []).append(span)
+
+    records = []
+    for trace_id, trace_spans in traces.items():
+        start = min(s['start_ns'] for s in trace_spans)
+        end = max(s['end_ns'] for s in trace_spans)
+        record_id = next((s['record_id'] for s in trace_spans if s.get('record_id')), None)
+        records.append({
+            'trace_id': trace_id,
+            'record_id': record_id,
+            'company': next((s['company'] for s in trace_spans if s.get('company')), None),
+            'duration_s': (end - start) / 1e9,
+            'spans': trace_spans
+        })
+    records.sort(key=lambda r: r['duration_s'], reverse=True)
+    return records[:top]
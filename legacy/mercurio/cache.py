@@ -0,0 +1,174 @@
+"""ExtractorMerc Cache - Caché de Respuestas para Endpoints de Consulta
+==========================================
+
+Capa de caché para los endpoints que los dashboards consultan cada pocos
+segundos (info, historial, reportes):
+
+- TTL por entrada e invalidación por etiquetas (ej. al terminar un trabajo)
+- Solicitudes concurrentes idénticas comparten una sola computación
+- ETag / If-None-Match: respuestas sin cambios devuelven 304 sin cuerpo
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Union
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from src.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Respuesta cacheada"""
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: Set[str] = field(default_factory=set)
+
+
+class ResponseCache:
+    """
+    Caché TTL con coalescencia de solicitudes e invalidación por etiquetas
+    """
+
+    def __init__(self, default_ttl: float = 10.0, max_entries: int = 1000):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # La invalidación puede llegar desde hilos del runner de trabajos
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return f'"{hashlib.sha1(body).hexdigest()}"'
+
+    def _get_fresh(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > time.monotonic():
+                return entry
+            if entry:
+                del self._entries[key]
+        return None
+
+    def _store(self, key: str, entry: CacheEntry, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                # Hubo una invalidación mientras se calculaba: no guardar datos viejos
+                return
+            if len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k].expires_at)
+                del self._entries[oldest]
+            self._entries[key] = entry
+
+    async def get_or_compute(self, key: str,
+                             compute: Callable[[], Union[Any, Awaitable[Any]]],
+                             ttl: Optional[float] = None,
+                             tags: Iterable[str] = ()) -> CacheEntry:
+        """
+        Obtener la entrada cacheada o calcularla una sola vez
+
+        Args:
+            key: Clave de la respuesta (ruta + parámetros)
+            compute: Función (sync o async) que arma el payload JSON
+            ttl: Segundos de vigencia (por defecto default_ttl)
+            tags: Etiquetas para invalidación selectiva
+        """
+        entry = self._get_fresh(key)
+        if entry:
+            self.hits += 1
+            return entry
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            if inspect.iscoroutinefunction(compute):
+                payload = await compute()
+            else:
+                # Funciones bloqueantes (consultas a BD) fuera del event loop
+                payload = await asyncio.to_thread(compute)
+
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            entry = CacheEntry(
+                body=body,
+                etag=self.make_etag(body),
+                expires_at=time.monotonic() + (self.default_ttl if ttl is None else ttl),
+                tags=set(tags)
+            )
+            self._store(key, entry, generation)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            # Evitar "exception was never retrieved" si nadie más esperaba
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, *tags: str) -> int:
+        """
+        Invalidar entradas con alguna de las etiquetas (sin etiquetas: todas)
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._lock:
+            self._generation += 1
+            if not tags:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                wanted = set(tags)
+                stale = [k for k, e in self._entries.items() if e.tags & wanted]
+                for k in stale:
+                    del self._entries[k]
+                removed = len(stale)
+        if removed:
+            logger.debug(f"Caché invalidada ({', '.join(tags) or 'todo'}): {removed} entradas")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        return {"entries": size, "hits": self.hits, "misses": self.misses,
+                "coalesced": self.coalesced, "generation": self._generation}
+
+
+async def cached_json_response(request: Request, cache: ResponseCache, key: str,
+                               compute: Callable[[], Union[Any, Awaitable[Any]]],
+                               ttl: Optional[float] = None,
+                               tags: Iterable[str] = ()) -> Response:
+    """
+    Respuesta JSON cacheada con soporte de ETag/If-None-Match (304)
+    """
+    entry = await cache.get_or_compute(key, compute, ttl=ttl, tags=tags)
+    max_age = int(cache.default_ttl if ttl is None else ttl)
+    headers = {"ETag": entry.etag, "Cache-Control": f"private, max-age={max_age}"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.body, media_type=JSONResponse.media_type, headers=headers)
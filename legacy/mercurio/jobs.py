@@ -0,0 +1,308 @@
+"""ExtractorMerc Jobs - Ejecución de Trabajos en Segundo Plano
+==========================================
+
+Runner de trabajos para los endpoints de Mercurio. Las descargas y cargas
+pesadas ya no comparten el threadpool del servidor (``BackgroundTasks``):
+corren en un executor acotado propio y su estado vive en un almacén
+compartido (SQLite) visible para todos los workers de la API.
+
+- Solicitudes concurrentes para la misma empresa/reporte se fusionan en
+  un único trabajo (clave de deduplicación)
+- El progreso se publica en el almacén y se transmite por Server-Sent Events
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from src.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_ERROR = "error"
+
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+FINAL_STATES = (JOB_COMPLETED, JOB_ERROR)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mercurio_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    company TEXT,
+    dedupe_key TEXT NOT NULL,
+    params TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mercurio_jobs_dedupe ON mercurio_jobs (dedupe_key, status);
+CREATE INDEX IF NOT EXISTS idx_mercurio_jobs_created ON mercurio_jobs (created_at);
+"""
+
+
+class JobQueueFullError(Exception):
+    """El runner alcanzó su límite de trabajos pendientes"""
+
+
+def make_dedupe_key(kind: str, company: Optional[str], params: Optional[Dict[str, Any]] = None) -> str:
+    """Clave estable para fusionar solicitudes equivalentes"""
+    payload = json.dumps(params or {}, sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+    return f"{kind}:{(company or '').lower()}:{digest}"
+
+
+class JobStore:
+    """Estado de trabajos compartido entre procesos (SQLite en modo WAL)"""
+
+    def __init__(self, db_path: str = "data/state/mercurio_jobs.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["params"] = json.loads(job["params"]) if job["params"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def create_or_get_active(self, kind: str, company: Optional[str], dedupe_key: str,
+                             params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Crear un trabajo o devolver el activo con la misma clave
+
+        Returns:
+            (trabajo, creado) - creado es False si se fusionó con uno existente
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM mercurio_jobs WHERE dedupe_key = ? AND status IN (?, ?) "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (dedupe_key, *ACTIVE_STATES)
+                ).fetchone()
+                if row:
+                    conn.execute("COMMIT")
+                    return self._row_to_job(row), False
+
+                job_id = str(uuid.uuid4())
+                conn.execute(
+                    "INSERT INTO mercurio_jobs (id, kind, company, dedupe_key, params, status, "
+                    "message, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, company, dedupe_key, json.dumps(params, default=str),
+                     JOB_QUEUED, "En cola", now, now)
+                )
+                row = conn.execute("SELECT * FROM mercurio_jobs WHERE id = ?", (job_id,)).fetchone()
+                conn.execute("COMMIT")
+                return self._row_to_job(row), True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def update(self, job_id: str, **fields):
+        """Actualizar campos de un trabajo (incrementa la versión)"""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE mercurio_jobs SET {assignments}, version = version + 1 WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM mercurio_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, company: Optional[str] = None, status: Optional[str] = None,
+             limit: int = 50) -> List[Dict[str, Any]]:
+        query, params = "SELECT * FROM mercurio_jobs", []
+        clauses = []
+        if company:
+            clauses.append("company = ?")
+            params.append(company.lower())
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [self._row_to_job(row) for row in conn.execute(query, params)]
+
+    def fail_orphans(self, older_than_seconds: float) -> int:
+        """Marcar como error los trabajos activos sin actualizaciones (proceso caído)"""
+        cutoff = time.time() - older_than_seconds
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE mercurio_jobs SET status = ?, error = ?, version = version + 1, updated_at = ? "
+                "WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_ERROR, "Trabajo huérfano (sin actualizaciones)", time.time(), *ACTIVE_STATES, cutoff)
+            )
+            return cursor.rowcount
+
+
+class JobContext:
+    """Objeto que recibe la función del trabajo para reportar progreso"""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def progress(self, percent: float, message: Optional[str] = None):
+        fields = {"progress": max(0.0, min(100.0, float(percent)))}
+        if message is not None:
+            fields["message"] = message
+        self.store.update(self.job_id, **fields)
+
+
+class MercurioJobRunner:
+    """
+    Executor acotado para trabajos de Mercurio, separado del threadpool de la API
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, max_workers: int = 2,
+                 max_pending: int = 20, orphan_timeout: float = 6 * 3600):
+        """
+        Args:
+            store: Almacén de estado compartido
+            max_workers: Trabajos ejecutándose a la vez en este proceso
+            max_pending: Trabajos aceptados (en cola + en ejecución) antes de rechazar
+            orphan_timeout: Segundos sin actualizaciones para considerar huérfano
+                un trabajo activo (evita que bloquee la deduplicación)
+        """
+        self.store = store or JobStore()
+        self.max_pending = max_pending
+        self.orphan_timeout = orphan_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="mercurio_job")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_completion_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Registrar una función llamada cuando un trabajo termina (ej. invalidar caché)"""
+        self._listeners.append(listener)
+
+    def submit(self, kind: str, company: Optional[str], params: Dict[str, Any],
+               fn: Callable[[JobContext], Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Encolar un trabajo o unirse al activo equivalente
+
+        Args:
+            kind: Tipo de trabajo (download_reports, upload_letters, ...)
+            company: Empresa
+            params: Parámetros que definen la clave de deduplicación
+            fn: Función bloqueante; recibe un JobContext para reportar progreso
+
+        Returns:
+            (trabajo, creado)
+
+        Raises:
+            JobQueueFullError: si el runner está saturado
+        """
+        dedupe_key = make_dedupe_key(kind, company, params)
+        self.store.fail_orphans(self.orphan_timeout)
+        with self._lock:
+            job, created = self.store.create_or_get_active(
+                kind, company.lower() if company else None, dedupe_key, params
+            )
+            if not created:
+                logger.info(f"Solicitud fusionada con trabajo activo {job['id']} ({dedupe_key})")
+                return job, False
+            if self._pending >= self.max_pending:
+                self.store.update(job["id"], status=JOB_ERROR, error="Cola de trabajos llena")
+                raise JobQueueFullError(f"Hay {self._pending} trabajos pendientes")
+            self._pending += 1
+
+        self._executor.submit(self._run, job["id"], fn)
+        logger.info(f"Trabajo {kind} encolado: {job['id']}")
+        return job, True
+
+    def _run(self, job_id: str, fn: Callable[[JobContext], Any]):
+        context = JobContext(self.store, job_id)
+        self.store.update(job_id, status=JOB_RUNNING, message="En ejecución")
+        try:
+            result = fn(context)
+            self.store.update(job_id, status=JOB_COMPLETED, progress=100.0,
+                              message="Completado", result=result)
+        except Exception as e:
+            logger.error(f"Error en trabajo {job_id}: {e}")
+            self.store.update(job_id, status=JOB_ERROR, error=str(e), message="Error")
+        finally:
+            with self._lock:
+                self._pending -= 1
+            job = self.store.get(job_id)
+            for listener in self._listeners:
+                try:
+                    listener(job)
+                except Exception as e:
+                    logger.warning(f"Error en listener de trabajo {job_id}: {e}")
+
+    async def stream_events(self, job_id: str, poll_interval: float = 0.5,
+                            heartbeat_seconds: float = 15.0) -> AsyncIterator[str]:
+        """
+        Eventos SSE con el estado del trabajo hasta que termina
+
+        Lee el almacén compartido, por lo que funciona aunque el trabajo
+        corra en otro worker de la API.
+        """
+        last_version = -1
+        last_sent = time.monotonic()
+        while True:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'detail': 'Trabajo no encontrado'})}\n\n"
+                return
+
+            if job["version"] != last_version:
+                last_version = job["version"]
+                last_sent = time.monotonic()
+                payload = {key: job[key] for key in ("id", "kind", "company", "status",
+                                                      "progress", "message", "error")}
+                if job["status"] in FINAL_STATES:
+                    payload["result"] = job["result"]
+                yield f"id: {last_version}\nevent: {job['status']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+            if job["status"] in FINAL_STATES:
+                return
+
+            if time.monotonic() - last_sent >= heartbeat_seconds:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(poll_interval)
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
@@ -6,15 +6,19 @@ desde la plataforma externa Mercurio.
 Incluye operaciones para ambas empresas (Aire y Afinia).
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 import uuid
+import asyncio
 from datetime import datetime
 
 import os
 from config.centralized_config import Company
 from src.mercurio.base import ExtractorMercDocument, ExtractorMercType, ExtractorMercStatus, MercurioTaskScheduler
+from src.mercurio.jobs import MercurioJobRunner, JobQueueFullError
+from src.mercurio.cache import ResponseCache, cached_json_response
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -44,6 +48,35 @@ class ExtractorMercResponse(BaseModel):
 # Instancia del programador de tareas
 task_scheduler = MercurioTaskScheduler()
 
+# Runner de trabajos pesados (executor propio, estado compartido entre workers)
+job_runner = MercurioJobRunner(
+    max_workers=int(os.getenv("MERCURIO_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("MERCURIO_JOB_MAX_PENDING", "20"))
+)
+
+# Caché de endpoints de consulta; se invalida cuando termina un trabajo
+response_cache = ResponseCache(default_ttl=float(os.getenv("MERCURIO_CACHE_TTL_SECONDS", "15")))
+INFO_CACHE_TTL = 300.0
+
+def _invalidate_on_job_finished(job: Optional[Dict[str, Any]]):
+    response_cache.invalidate("history", "reports")
+
+job_runner.add_completion_listener(_invalidate_on_job_finished)
+
+def submit_job(kind: str, company: Optional[str], params: Dict[str, Any], fn) -> Dict[str, Any]:
+    """Encola un trabajo (o se une al equivalente en curso) y arma la respuesta"""
+    try:
+        job, created = job_runner.submit(kind, company, params, fn)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Servidor ocupado: {e}")
+    
+    return {
+        "job_id": job["id"],
+        "merged": not created,
+        "status_url": f"/status/{job['id']}",
+        "events_url": f"/jobs/{job['id']}/events"
+    }
+
 def get_mercurio_service(company: str):
     """Factory para obtener el servicio Mercurio según la empresa"""
     # Verificar si está en modo local
@@ -104,8 +137,12 @@ async def test_mercurio_local():
         raise HTTPException(status_code=500, detail=f"Error en test: {str(e)}")
 
 @mercurio_router.get("/info")
-async def get_mercurio_info():
+async def get_mercurio_info(request: Request):
     """Información general del módulo Mercurio"""
+    return await cached_json_response(request, response_cache, "info", _build_mercurio_info,
+                                      ttl=INFO_CACHE_TTL)
+
+def _build_mercurio_info() -> Dict[str, Any]:
     return {
         "module": "ExtractorMerc",
         "description": "Procesamiento de Informes de Pérdidas Operacionales",
@@ -120,6 +157,8 @@ async def get_mercurio_info():
             "/upload - Subir archivo ExtractorMerc",
             "/process - Procesar archivo ExtractorMerc",
             "/status/{task_id} - Consultar estado de procesamiento",
+            "/jobs - Trabajos recientes",
+            "/jobs/{job_id}/events - Progreso del trabajo (Server-Sent Events)",
             "/history - Historial de procesamientos",
             "/reports - Reportes generados",
             "/download-reports - Descargar reportes desde Mercurio",
@@ -192,10 +231,7 @@ async def upload_extractor_merc_file(
         raise HTTPException(status_code=500, detail=str(e))
 
 @mercurio_router.post("/process")
-async def process_extractor_merc(
-    request: ProcessExtractorMercRequest,
-    background_tasks: BackgroundTasks
-):
+async def process_extractor_merc(request: ProcessExtractorMercRequest):
     """
     Inicia el procesamiento de un archivo ExtractorMerc
     """
@@ -213,17 +249,24 @@ async def process_extractor_merc(
         )
         
         if request.immediate:
-            # Procesamiento inmediato
-            task_id = task_scheduler.schedule_immediate_processing(extractor_merc_document)
-            
-            # Ejecutar en background
+            # Procesamiento inmediato en el runner de trabajos
             mercurio_service = get_mercurio_service(extractor_merc_document.company)
-            background_tasks.add_task(run_processing_task, mercurio_service, extractor_merc_document, task_id)
+            
+            def run_job(job):
+                return asyncio.run(run_processing_task(mercurio_service, extractor_merc_document, job.job_id))
+            
+            job_info = submit_job(
+                "extractor_merc_processing",
+                extractor_merc_document.company,
+                {"extractor_merc_id": request.extractor_merc_id},
+                run_job
+            )
             
             return {
-                "task_id": task_id,
+                "task_id": job_info["job_id"],
                 "status": "started",
-                "message": f"Procesamiento iniciado para ExtractorMerc {request.extractor_merc_id}"
+                "message": f"Procesamiento iniciado para ExtractorMerc {request.extractor_merc_id}",
+                **job_info
             }
         else:
             # Programar procesamiento
@@ -245,6 +288,21 @@ async def get_processing_status(task_id: str):
     Consulta el estado de una tarea de procesamiento
     """
     try:
+        job = await asyncio.to_thread(job_runner.store.get, task_id)
+        if job:
+            return {
+                "task_id": task_id,
+                "status": job["status"],
+                "progress": job["progress"],
+                "details": {
+                    "kind": job["kind"],
+                    "company": job["company"],
+                    "message": job["message"],
+                    "error": job["error"],
+                    "result": job["result"]
+                }
+            }
+        
         status_info = task_scheduler.get_task_status(task_id)
         
         return {
@@ -258,8 +316,31 @@ async def get_processing_status(task_id: str):
         logger.error(f"Error consultando estado de tarea {task_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@mercurio_router.get("/jobs")
+async def list_jobs(company: str = None, status: str = None, limit: int = 50):
+    """
+    Lista los trabajos recientes del runner
+    """
+    jobs = await asyncio.to_thread(job_runner.store.list, company, status, limit)
+    return {"total": len(jobs), "jobs": jobs}
+
+@mercurio_router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Transmite el progreso de un trabajo por Server-Sent Events
+    """
+    if await asyncio.to_thread(job_runner.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo no encontrado: {job_id}")
+    
+    return StreamingResponse(
+        job_runner.stream_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @mercurio_router.get("/history")
 async def get_processing_history(
+    request: Request,
     company: str = None,
     extractor_merc_type: str = None,
     limit: int = 50,
@@ -268,54 +349,63 @@ async def get_processing_history(
     """
     Obtiene el historial de procesamientos ExtractorMerc
     """
+    key = f"history:{company}:{extractor_merc_type}:{limit}:{offset}"
     try:
-        # TODO: Implementar consulta a base de datos
-        # Simular respuesta por ahora
-        history = [
-            {
-                "id": "extractor_merc_001",
-                "company": "aire",
-                "type": "perdidas_tecnicas",
-                "period": "2024-07",
-                "upload_date": "2024-08-01T10:00:00Z",
-                "processing_date": "2024-08-01T10:30:00Z",
-                "status": "completed",
-                "reports_generated": 3
-            },
-            {
-                "id": "extractor_merc_002",
-                "company": "afinia",
-                "type": "verbales",
-                "period": "2024-07",
-                "upload_date": "2024-08-02T09:00:00Z",
-                "processing_date": "2024-08-02T09:45:00Z",
-                "status": "completed",
-                "reports_generated": 2
-            }
-        ]
-        
-        # Filtrar por empresa y tipo si se especifica
-        if company:
-            history = [h for h in history if h['company'] == company.lower()]
-        if extractor_merc_type:
-            history = [h for h in history if h['type'] == extractor_merc_type.lower()]
-        
-        # Aplicar paginación
-        paginated_history = history[offset:offset + limit]
-        
-        return {
-            "total": len(history),
-            "limit": limit,
-            "offset": offset,
-            "results": paginated_history
-        }
-        
+        return await cached_json_response(
+            request, response_cache, key,
+            lambda: _build_processing_history(company, extractor_merc_type, limit, offset),
+            tags=("history",)
+        )
     except Exception as e:
         logger.error(f"Error obteniendo historial: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _build_processing_history(company: Optional[str], extractor_merc_type: Optional[str],
+                              limit: int, offset: int) -> Dict[str, Any]:
+    # TODO: Implementar consulta a base de datos
+    # Simular respuesta por ahora
+    history = [
+        {
+            "id": "extractor_merc_001",
+            "company": "aire",
+            "type": "perdidas_tecnicas",
+            "period": "2024-07",
+            "upload_date": "2024-08-01T10:00:00Z",
+            "processing_date": "2024-08-01T10:30:00Z",
+            "status": "completed",
+            "reports_generated": 3
+        },
+        {
+            "id": "extractor_merc_002",
+            "company": "afinia",
+            "type": "verbales",
+            "period": "2024-07",
+            "upload_date": "2024-08-02T09:00:00Z",
+            "processing_date": "2024-08-02T09:45:00Z",
+            "status": "completed",
+            "reports_generated": 2
+        }
+    ]
+    
+    # Filtrar por empresa y tipo si se especifica
+    if company:
+        history = [h for h in history if h['company'] == company.lower()]
+    if extractor_merc_type:
+        history = [h for h in history if h['type'] == extractor_merc_type.lower()]
+    
+    # Aplicar paginación
+    paginated_history = history[offset:offset + limit]
+    
+    return {
+        "total": len(history),
+        "limit": limit,
+        "offset": offset,
+        "results": paginated_history
+    }
+
 @mercurio_router.get("/reports")
 async def get_generated_reports(
+    request: Request,
     extractor_merc_id: str = None,
     company: str = None,
     period: str = None
@@ -323,43 +413,51 @@ async def get_generated_reports(
     """
     Obtiene lista de reportes generados
     """
+    key = f"reports:{extractor_merc_id}:{company}:{period}"
     try:
-        # TODO: Implementar consulta a base de datos
-        # Simular respuesta por ahora
-        reports = [
-            {
-                "id": "report_001",
-                "extractor_merc_id": "extractor_merc_001",
-                "type": "perdidas_resumen",
-                "file_path": "s3://bucket/extractor_merc/aire/2024-07/perdidas_resumen/report_001.pdf",
-                "generation_date": "2024-08-01T10:30:00Z"
-            },
-            {
-                "id": "report_002",
-                "extractor_merc_id": "extractor_merc_001",
-                "type": "auditoria_detalle",
-                "file_path": "s3://bucket/extractor_merc/aire/2024-07/auditoria_detalle/report_002.pdf",
-                "generation_date": "2024-08-01T10:35:00Z"
-            }
-        ]
-        
-        # Aplicar filtros
-        if extractor_merc_id:
-            reports = [r for r in reports if r['extractor_merc_id'] == extractor_merc_id]
-        if company:
-            reports = [r for r in reports if company.lower() in r['file_path']]
-        if period:
-            reports = [r for r in reports if period in r['file_path']]
-        
-        return {
-            "total": len(reports),
-            "reports": reports
-        }
-        
+        return await cached_json_response(
+            request, response_cache, key,
+            lambda: _build_generated_reports(extractor_merc_id, company, period),
+            tags=("reports",)
+        )
     except Exception as e:
         logger.error(f"Error obteniendo reportes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _build_generated_reports(extractor_merc_id: Optional[str], company: Optional[str],
+                             period: Optional[str]) -> Dict[str, Any]:
+    # TODO: Implementar consulta a base de datos
+    # Simular respuesta por ahora
+    reports = [
+        {
+            "id": "report_001",
+            "extractor_merc_id": "extractor_merc_001",
+            "type": "perdidas_resumen",
+            "file_path": "s3://bucket/extractor_merc/aire/2024-07/perdidas_resumen/report_001.pdf",
+            "generation_date": "2024-08-01T10:30:00Z"
+        },
+        {
+            "id": "report_002",
+            "extractor_merc_id": "extractor_merc_001",
+            "type": "auditoria_detalle",
+            "file_path": "s3://bucket/extractor_merc/aire/2024-07/auditoria_detalle/report_002.pdf",
+            "generation_date": "2024-08-01T10:35:00Z"
+        }
+    ]
+    
+    # Aplicar filtros
+    if extractor_merc_id:
+        reports = [r for r in reports if r['extractor_merc_id'] == extractor_merc_id]
+    if company:
+        reports = [r for r in reports if company.lower() in r['file_path']]
+    if period:
+        reports = [r for r in reports if period in r['file_path']]
+    
+    return {
+        "total": len(reports),
+        "reports": reports
+    }
+
 @mercurio_router.get("/validate/{extractor_merc_id}")
 async def validate_extractor_merc_data(extractor_merc_id: str):
     """
@@ -391,26 +489,29 @@ async def download_mercurio_reports(
     company: str = Form(...),
     report_ids: List[str] = Form(...),
     date_from: Optional[str] = Form(None),
-    date_to: Optional[str] = Form(None),
-    background_tasks: BackgroundTasks = None
+    date_to: Optional[str] = Form(None)
 ):
     """🔄 MIGRADO DESDE IPO: Descarga reportes desde Mercurio"""
     try:
         logger.info(f"Iniciando descarga de reportes para {company} - Reports: {report_ids}")
         
-        def run_download():
-            """Función para ejecutar descarga en background"""
+        def run_download(job):
+            """Función para ejecutar descarga en el runner de trabajos"""
             try:
-                # TODO: Implementar MercurioReportDownloader
+                # TODO: Implementar MercurioReportDownloader (sin descarga real no se reporta
+                # progreso por reporte)
                 logger.info(f"Descarga completada para {company}")
                 return {"status": "completed", "reports_downloaded": len(report_ids)}
             except Exception as e:
                 logger.error(f"Error en descarga background: {e}")
                 raise
         
-        # Ejecutar descarga en background
-        if background_tasks:
-            background_tasks.add_task(run_download)
+        job_info = submit_job(
+            "download_reports",
+            company,
+            {"report_ids": sorted(report_ids), "date_from": date_from, "date_to": date_to},
+            run_download
+        )
         
         return {
             "status": "success",
@@ -418,10 +519,13 @@ async def download_mercurio_reports(
             "data": {
                 "company": company, 
                 "report_ids": report_ids,
-                "started_at": datetime.now().isoformat()
+                "started_at": datetime.now().isoformat(),
+                **job_info
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error descargando reportes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -429,15 +533,14 @@ async def download_mercurio_reports(
 @mercurio_router.post("/upload-letters")
 async def upload_mercurio_letters(
     company: str = Form(...),
-    limit: Optional[int] = Form(50),
-    background_tasks: BackgroundTasks = None
+    limit: Optional[int] = Form(50)
 ):
     """🔄 MIGRADO DESDE IPO: Sube cartas a Mercurio"""
     try:
         logger.info(f"Iniciando carga de cartas para {company}")
         
-        def run_upload():
-            """Función para ejecutar carga en background"""
+        def run_upload(job):
+            """Función para ejecutar carga en el runner de trabajos"""
             try:
                 # TODO: Implementar upload_letters_for_company
                 logger.info(f"Carga de cartas completada para {company}")
@@ -446,9 +549,8 @@ async def upload_mercurio_letters(
                 logger.error(f"Error en carga background: {e}")
                 raise
         
-        # Ejecutar carga en background
-        if background_tasks:
-            background_tasks.add_task(run_upload)
+        # Una sola carga de cartas por empresa a la vez
+        job_info = submit_job("upload_letters", company, {}, run_upload)
         
         return {
             "status": "success",
@@ -456,21 +558,24 @@ async def upload_mercurio_letters(
             "data": {
                 "company": company,
                 "limit": limit,
-                "started_at": datetime.now().isoformat()
+                "started_at": datetime.now().isoformat(),
+                **job_info
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error subiendo cartas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @mercurio_router.post("/process/rra-pendientes")
-async def process_rra_pendientes(background_tasks: BackgroundTasks):
+async def process_rra_pendientes():
     """🔄 MIGRADO DESDE IPO: Procesa datos de RRA pendientes"""
     try:
         logger.info("Iniciando procesamiento de RRA pendientes")
         
-        def run_processing():
+        def run_processing(job):
             try:
                 # TODO: Implementar procesamiento de RRA pendientes
                 logger.info("Procesamiento de RRA pendientes completado")
@@ -478,25 +583,27 @@ async def process_rra_pendientes(background_tasks: BackgroundTasks):
                 logger.error(f"Error procesando RRA pendientes: {e}")
                 raise
         
-        background_tasks.add_task(run_processing)
+        job_info = submit_job("process_rra_pendientes", None, {}, run_processing)
         
         return {
             "status": "success",
             "message": "Procesamiento de RRA pendientes iniciado",
-            "data": {"started_at": datetime.now().isoformat()}
+            "data": {"started_at": datetime.now().isoformat(), **job_info}
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error procesando RRA pendientes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @mercurio_router.post("/process/verbales-pendientes")
-async def process_verbales_pendientes(background_tasks: BackgroundTasks):
+async def process_verbales_pendientes():
     """🔄 MIGRADO DESDE IPO: Procesa datos de verbales pendientes"""
     try:
         logger.info("Iniciando procesamiento de verbales pendientes")
         
-        def run_processing():
+        def run_processing(job):
             try:
                 # TODO: Implementar procesamiento de verbales pendientes
                 logger.info("Procesamiento de verbales pendientes completado")
@@ -504,14 +611,16 @@ async def process_verbales_pendientes(background_tasks: BackgroundTasks):
                 logger.error(f"Error procesando verbales pendientes: {e}")
                 raise
         
-        background_tasks.add_task(run_processing)
+        job_info = submit_job("process_verbales_pendientes", None, {}, run_processing)
         
         return {
             "status": "success",
             "message": "Procesamiento de verbales pendientes iniciado",
-            "data": {"started_at": datetime.now().isoformat()}
+            "data": {"started_at": datetime.now().isoformat(), **job_info}
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error procesando verbales pendientes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -527,7 +636,10 @@ async def run_processing_task(mercurio_service, extractor_merc_document: Extract
         
         # TODO: Guardar resultado en base de datos
         logger.info(f"Procesamiento {task_id} completado: {result}")
+        return result
         
     except Exception as e:
         logger.error(f"Error en procesamiento {task_id}: {e}")
-        # TODO: Actualizar estado de error en base de datos
\ No newline at end of file
+        # TODO: Actualizar estado de error en base de datos
+        # Re-lanzar para que el runner marque el trabajo como fallido
+        raise
\ No newline at end of file
@@ -9,9 +9,10 @@ o incluyan en el nombre el número de reclamo SGC. Agrupa por número y
 reporta duplicados ignorando variaciones de timestamp o carpeta.
 
 Estrategias:
-- Extraer número SGC del nombre del archivo con regex.
-- Intentar leer primeros registros/lineas para detectar columna o campo
-  que contenga el número SGC (CSV/JSON/TXT simples).
+- Usa el índice compartido `scripts/sgc_file_index.py` (el mismo de
+  `cleanup_duplicates_sgc.py`): recorrido con os.scandir, SGC desde el
+  nombre y lectura de contenido (CSV/JSON/TXT) solo si hace falta, en un
+  pool de procesos. Los archivos sin cambios no se vuelven a abrir.
 
 Salida:
 - Reporte Markdown en `data/reports/file_duplicates_sgc_<timestamp>.md`
@@ -24,90 +25,20 @@ import argparse
 import logging
 import sys
 from pathlib import Path
-import re
 import datetime as dt
-import csv
-import json
 
-logger = logging.getLogger("analyze_file_duplicates_sgc")
-
-# Regex relativamente flexible para número SGC (radicado alfanumérico)
-SGC_REGEX = re.compile(r"(?i)(sgc|reclamo|radicado|num|nro|numero)[-_\s]*([a-z0-9]{6,})")
+from sgc_file_index import DEFAULT_INDEX_PATH, SGCFileIndex, group_entries_by_sgc
 
-CLAIM_KEYS = [
-    "numero_reclamo_sgc", "numero_radicado", "radicado", "nro_reclamo_sgc",
-    "nro_radicado", "numero_reclamo", "reclamo", "sgc"
-]
+logger = logging.getLogger("analyze_file_duplicates_sgc")
 
 EXT_SUPPORTED = {".csv", ".json", ".txt", ".xlsx"}
 
 
-def extract_sgc_from_name(name: str):
-    m = SGC_REGEX.search(name)
-    if m:
-        return m.group(2)
-    return ""
-
-
-def extract_sgc_from_csv(path: Path):
-    try:
-        with path.open("r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
-            header = reader.fieldnames or []
-            norm = [h.strip().lower().replace(" ", "_") for h in header]
-            for key in CLAIM_KEYS:
-                if key in norm:
-                    col = header[norm.index(key)]
-                    for i, row in enumerate(reader):
-                        val = (row.get(col) or "").strip()
-                        if val:
-                            return val
-                        if i > 20:
-                            break
-    except Exception:
-        return ""
-    return ""
-
-
-def extract_sgc_from_json(path: Path):
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        # Soporta lista de objetos o dict plano
-        def scan_obj(obj):
-            for k, v in (obj.items() if isinstance(obj, dict) else []):
-                k_norm = k.strip().lower().replace(" ", "_")
-                if k_norm in CLAIM_KEYS and isinstance(v, (str, int)):
-                    return str(v)
-            return ""
-
-        if isinstance(data, list):
-            for item in data[:50]:
-                val = scan_obj(item)
-                if val:
-                    return val
-        elif isinstance(data, dict):
-            val = scan_obj(data)
-            if val:
-                return val
-    except Exception:
-        return ""
-    return ""
-
-
-def extract_sgc_from_txt(path: Path):
-    try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
-        m = SGC_REGEX.search(text)
-        if m:
-            return m.group(2)
-    except Exception:
-        return ""
-    return ""
-
-
 def main():
     parser = argparse.ArgumentParser(description="Detectar archivos duplicados por número SGC")
     parser.add_argument("--root-dir", default="data", help="Directorio raíz a escanear")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para lectura de contenido")
+    parser.add_argument("--index-path", default=str(DEFAULT_INDEX_PATH), help="Índice persistente compartido")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -117,29 +48,15 @@ def main():
         print("ABORTADO: Directorio no existe")
         sys.exit(2)
 
-    files = []
-    for p in root_dir.rglob("*"):
-        if p.is_file() and p.suffix.lower() in EXT_SUPPORTED:
-            files.append(p)
+    index = SGCFileIndex.load(Path(args.index_path), workers=args.workers)
+    entries = index.scan(root_dir, EXT_SUPPORTED)
+    index.save()
 
-    if not files:
+    if not entries:
         print("SIN DATOS: No se encontraron archivos soportados")
         sys.exit(0)
 
-    from collections import defaultdict
-    groups = defaultdict(list)
-
-    for fpath in files:
-        sgc = extract_sgc_from_name(fpath.name)
-        if not sgc:
-            if fpath.suffix.lower() == ".csv":
-                sgc = extract_sgc_from_csv(fpath)
-            elif fpath.suffix.lower() == ".json":
-                sgc = extract_sgc_from_json(fpath)
-            elif fpath.suffix.lower() == ".txt":
-                sgc = extract_sgc_from_txt(fpath)
-        if sgc:
-            groups[sgc].append(str(fpath))
+    groups = {sgc: [e.path for e in group] for sgc, group in group_entries_by_sgc(entries).items()}
 
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     reports_dir = Path("data/reports")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backfill Histórico por Ventanas de Fechas
+=========================================
+
+Extrae un rango histórico grande (ej. un año de PQRs) dividiéndolo en
+ventanas de fechas que se ejecutan en procesos paralelos. Los JSON de
+todas las ventanas se fusionan y se deduplican por número SGC en
+data/shards/<empresa>/<inicio>_<fin>/merged.
+
+Uso:
+  python scripts/backfill_date_windows.py --company afinia --start 2024-10-01 --end 2025-09-30 --workers 4
+  python scripts/backfill_date_windows.py --company aire --start 2025-01-01 --end 2025-03-31 --plan-only
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import sys
+import json
+import logging
+import argparse
+from datetime import date
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.orchestrators.date_window_sharding import DateWindowShardRunner
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill histórico por ventanas de fechas en paralelo')
+    parser.add_argument('--company', '-c', required=True, choices=['afinia', 'aire'],
+                        help='Empresa a extraer')
+    parser.add_argument('--start', required=True, help='Fecha inicial (YYYY-MM-DD)')
+    parser.add_argument('--end', required=True, help='Fecha final (YYYY-MM-DD)')
+    parser.add_argument('--workers', '-w', type=int, default=4,
+                        help='Procesos (sesiones de navegador) en paralelo')
+    parser.add_argument('--target-records', type=float, default=2000,
+                        help='Registros esperados por ventana')
+    parser.add_argument('--max-days', type=int, default=31,
+                        help='Máximo de días por ventana')
+    parser.add_argument('--max-pqr-records', type=int, default=None,
+                        help='Límite de registros por página del extractor')
+    parser.add_argument('--visual', action='store_true', help='Mostrar navegadores')
+    parser.add_argument('--plan-only', action='store_true',
+                        help='Solo mostrar las ventanas planificadas')
+    parser.add_argument('--output', '-o', type=str, help='Archivo JSON para el reporte')
+    args = parser.parse_args()
+
+    runner = DateWindowShardRunner(
+        company=args.company,
+        start=date.fromisoformat(args.start),
+        end=date.fromisoformat(args.end),
+        workers=args.workers,
+        target_records_per_window=args.target_records,
+        max_days_per_window=args.max_days,
+        max_pqr_records=args.max_pqr_records,
+        headless=not args.visual
+    )
+
+    if args.plan_only:
+        windows = runner.plan()
+        print(f"[DATOS] {len(windows)} ventanas planificadas para {args.company}:")
+        for window in windows:
+            print(f"  {window.start} a {window.end} ({window.days} días, ~{window.expected_records:.0f} registros)")
+        return 0
+
+    report = runner.run()
+    print(f"[DATOS] Ventanas: {len(report['windows'])}, fallidas: {report['failed_windows']}")
+    print(f"[DATOS] Registros únicos: {report['merge']['unique_records']}, "
+          f"duplicados eliminados: {report['merge']['duplicates_removed']}")
+    print(f"[DATOS] Resultado fusionado en: {report['merge']['merged_dir']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if report['failed_windows']:
+        print("[ERROR] Algunas ventanas fallaron; volver a ejecutar el mismo rango para completarlas")
+        return 1
+    print("[EXITOSO] Backfill completado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
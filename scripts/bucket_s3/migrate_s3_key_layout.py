@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrar Estructura de Claves S3
+==============================
+
+Script para mover objetos del bucket entre estructuras de rutas
+(legacy, central, simple) con copia del lado del servidor. No descarga
+ni vuelve a subir archivos y puede reanudarse si se interrumpe.
+
+Para probar contra MinIO definir AWS_S3_ENDPOINT_URL (ej. http://localhost:9000).
+
+Uso:
+    python migrate_s3_key_layout.py --from legacy --to central --dry-run
+    python migrate_s3_key_layout.py --from legacy --to central --workers 32
+    python migrate_s3_key_layout.py --from legacy --to central --delete-source
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+from dataclasses import asdict
+from datetime import datetime
+
+# Agregar el directorio raíz al PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from src.services.unified_s3_service import S3PathStructure
+    from src.services.s3_layout_migrator import S3LayoutMigrator
+except ImportError as e:
+    print(f"[ERROR] Error importando módulos: {e}")
+    sys.exit(1)
+
+STRUCTURES = {
+    'legacy': S3PathStructure.LEGACY,
+    'central': S3PathStructure.CENTRAL,
+    'simple': S3PathStructure.SIMPLE
+}
+
+def print_banner(args):
+    """Imprimir banner del script"""
+    print("=" * 70)
+    print("MIGRAR ESTRUCTURA DE CLAVES S3")
+    print("=" * 70)
+    print(f"{args.source} -> {args.target}"
+          f"{' (simulación)' if args.dry_run else ''}"
+          f"{' (mover: borra origen)' if args.delete_source else ''}")
+    print()
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Migrar claves S3 entre estructuras de rutas')
+    parser.add_argument('--from', dest='source', choices=STRUCTURES.keys(), required=True,
+                        help='Estructura actual')
+    parser.add_argument('--to', dest='target', choices=STRUCTURES.keys(), required=True,
+                        help='Estructura destino')
+    parser.add_argument('--bucket', help='Bucket (por defecto AWS_S3_BUCKET_NAME)')
+    parser.add_argument('--prefix', help='Migrar solo este prefijo')
+    parser.add_argument('--workers', type=int, default=16, help='Copias en paralelo')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Registros de ov_s3_registry por lote')
+    parser.add_argument('--limit', type=int, help='Máximo de objetos en esta ejecución')
+    parser.add_argument('--journal', help='Archivo de avance (JSONL) para reanudar')
+    parser.add_argument('--delete-source', action='store_true', help='Borrar origen tras copiar')
+    parser.add_argument('--skip-registry', action='store_true', help='No actualizar ov_s3_registry')
+    parser.add_argument('--dry-run', action='store_true', help='Solo mostrar el plan')
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        print("[ERROR] Las estructuras origen y destino son iguales")
+        return False
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    print_banner(args)
+
+    migrator = S3LayoutMigrator(
+        source_structure=STRUCTURES[args.source],
+        target_structure=STRUCTURES[args.target],
+        bucket_name=args.bucket,
+        max_workers=args.workers,
+        registry_batch_size=args.batch_size,
+        delete_source=args.delete_source,
+        dry_run=args.dry_run,
+        journal_path=Path(args.journal) if args.journal else None,
+        update_registry=not args.skip_registry
+    )
+
+    stats = migrator.run(prefix=args.prefix, limit=args.limit)
+
+    print("\n[DATOS] RESULTADO DE LA MIGRACIÓN")
+    print("-" * 50)
+    print(f"Objetos listados: {stats.listed_objects:,}")
+    print(f"Planificados: {stats.planned:,}")
+    print(f"Copiados: {stats.copied:,} ({stats.bytes_copied / 1024 / 1024:.2f} MB)")
+    print(f"Ya migrados (reanudación): {stats.skipped_resumed:,}")
+    print(f"Fuera de la estructura origen: {stats.skipped_unparsed:,}")
+    print(f"Registros actualizados: {stats.registry_updates:,}")
+    print(f"Errores: {stats.failed:,}")
+    print(f"Tiempo: {stats.processing_time:.1f}s")
+    print(f"Journal: {migrator.journal_path}")
+
+    for error in stats.errors[:10]:
+        print(f"  [ERROR] {error}")
+
+    report_file = Path('data/reports') / f"s3_layout_migration_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(asdict(stats), f, indent=2, ensure_ascii=False, default=str)
+    print(f"\nReporte guardado en: {report_file}")
+
+    return stats.failed == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
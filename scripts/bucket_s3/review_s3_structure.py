@@ -48,14 +48,14 @@ def get_s3_client():
         region_name=s3_config['region']
     ), s3_config['bucket_name']
 
-def list_bucket_structure(s3_client, bucket_name: str, max_objects: int = 100) -> Dict[str, Any]:
+def list_bucket_structure(s3_client, bucket_name: str, max_objects: Optional[int] = 100) -> Dict[str, Any]:
     """
     Listar estructura del bucket S3
     
     Args:
         s3_client: Cliente boto3 S3
         bucket_name: Nombre del bucket
-        max_objects: Máximo número de objetos a listar
+        max_objects: Máximo número de objetos a listar (None = bucket completo)
         
     Returns:
         Dict con información de la estructura
@@ -76,9 +76,10 @@ def list_bucket_structure(s3_client, bucket_name: str, max_objects: int = 100) -
         
         # Usar paginator para manejar buckets grandes
         paginator = s3_client.get_paginator('list_objects_v2')
+        pagination_config = {'MaxItems': max_objects} if max_objects else {}
         page_iterator = paginator.paginate(
             Bucket=bucket_name,
-            PaginationConfig={'MaxItems': max_objects}
+            PaginationConfig=pagination_config
         )
         
         objects_processed = 0
@@ -326,7 +327,9 @@ def main():
         
         # Analizar estructura del bucket
         print("[EMOJI_REMOVIDO] Analizando estructura del bucket...")
-        structure = list_bucket_structure(s3_client, bucket_name, max_objects=1000)
+        # --all recorre el bucket completo en streaming
+        max_objects = None if '--all' in sys.argv else 1000
+        structure = list_bucket_structure(s3_client, bucket_name, max_objects=max_objects)
         
         # Análisis específico para ExtractorOV
         print("\n[RESULTADO] Analizando estructura para ExtractorOV...")
@@ -1,7 +1,5 @@
 import argparse
 import csv
-import hashlib
-import json
 import re
 import shutil
 from dataclasses import dataclass
@@ -9,12 +7,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from sgc_file_index import (
+    DEFAULT_INDEX_PATH,
+    IndexEntry,
+    SGCFileIndex,
+    group_entries_by_sgc,
+)
 
-SGC_REGEXES = [
-    re.compile(r"RE(\d{7,16})", re.IGNORECASE),
-    re.compile(r"SGC[=:_\-\s]*(\d{7,16})", re.IGNORECASE),
-    re.compile(r"(\d{7,16})")  # fallback for numeric sequences
-]
 
 TIMESTAMP_REGEXES = [
     # Matches *_YYYYMMDD_HHMMSS in filenames
@@ -28,30 +27,11 @@ class FileInfo:
     company: str
     sgc: str
     ext: str
-    file_hash: Optional[str]
+    file_hash: Optional[str]  # clave de contenido (size:/partial:/sha256:), igual solo si el contenido es igual
     timestamp: Optional[datetime]
     mtime: float
 
 
-def compute_sha256(file_path: Path) -> Optional[str]:
-    try:
-        h = hashlib.sha256()
-        with file_path.open('rb') as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b''):
-                h.update(chunk)
-        return h.hexdigest()
-    except Exception:
-        return None
-
-
-def extract_sgc_from_filename(name: str) -> Optional[str]:
-    for rx in SGC_REGEXES:
-        m = rx.search(name)
-        if m:
-            return m.group(1)
-    return None
-
-
 def extract_timestamp_from_filename(name: str) -> Optional[datetime]:
     for rx in TIMESTAMP_REGEXES:
         m = rx.search(name)
@@ -64,28 +44,7 @@ def extract_timestamp_from_filename(name: str) -> Optional[datetime]:
     return None
 
 
-def extract_sgc_from_json(file_path: Path) -> Optional[str]:
-    try:
-        with file_path.open('r', encoding='utf-8') as f:
-            data = json.load(f)
-        candidates = [
-            data.get('sgc_number'),
-            data.get('numero_radicado'),
-            data.get('radicado'),
-            data.get('numeroRadicado'),
-        ]
-        for c in candidates:
-            if c and isinstance(c, (str, int)):
-                cstr = str(c)
-                sgc = extract_sgc_from_filename(cstr) or (cstr if cstr.isdigit() else None)
-                if sgc:
-                    return sgc
-    except Exception:
-        pass
-    return None
-
-
-def find_files(base_dir: Path, companies: Optional[List[str]], include_exts: List[str]) -> List[Path]:
+def find_targets(base_dir: Path, companies: Optional[List[str]]) -> List[Path]:
     targets: List[Path] = []
     root = base_dir
     if companies:
@@ -100,29 +59,21 @@ def find_files(base_dir: Path, companies: Optional[List[str]], include_exts: Lis
             target = company_dir / 'oficina_virtual' / 'processed'
             if target.exists():
                 targets.append(target)
+    return targets
+
+
+def scan_entries(index: SGCFileIndex, base_dir: Path, companies: Optional[List[str]], include_exts: List[str]) -> List[IndexEntry]:
+    entries: List[IndexEntry] = []
+    for target in find_targets(base_dir, companies):
+        entries.extend(index.scan(target, include_exts))
+    return entries
+
 
-    files: List[Path] = []
-    for t in targets:
-        for p in t.rglob('*'):
-            if p.is_file() and p.suffix.lower() in include_exts:
-                files.append(p)
-    return files
-
-
-def build_file_info(file_path: Path, company: str, hash_enabled: bool) -> Optional[FileInfo]:
-    name = file_path.name
-    sgc = extract_sgc_from_filename(name)
-    if not sgc and file_path.suffix.lower() == '.json':
-        sgc = extract_sgc_from_json(file_path)
-    if not sgc:
-        return None
-    ts = extract_timestamp_from_filename(name)
-    fhash = compute_sha256(file_path) if hash_enabled else None
-    try:
-        mtime = file_path.stat().st_mtime
-    except Exception:
-        mtime = 0.0
-    return FileInfo(path=file_path, company=company, sgc=sgc, ext=file_path.suffix.lower(), file_hash=fhash, timestamp=ts, mtime=mtime)
+def build_file_info(entry: IndexEntry, sgc: str, company: str, content_key: Optional[str]) -> FileInfo:
+    file_path = Path(entry.path)
+    return FileInfo(path=file_path, company=company, sgc=sgc, ext=file_path.suffix.lower(),
+                    file_hash=content_key, timestamp=extract_timestamp_from_filename(file_path.name),
+                    mtime=entry.mtime)
 
 
 def group_by_sgc(files: List[FileInfo]) -> Dict[str, List[FileInfo]]:
@@ -229,7 +180,9 @@ def main():
     parser.add_argument('--base-dir', default='data/downloads', help='Directorio base de downloads (por defecto data/downloads)')
     parser.add_argument('--company', dest='company', choices=['afinia', 'aire'], help='Empresa a filtrar (afinia, aire). Si no se provee, aplica a todas las encontradas.')
     parser.add_argument('--include-ext', default='.json,.pdf,.txt,.html,.csv', help='Extensiones a considerar, separadas por coma')
-    parser.add_argument('--hash', dest='hash_enabled', action='store_true', help='Calcular hash de contenido para validar duplicados con distinto estado')
+    parser.add_argument('--hash', dest='hash_enabled', action='store_true', help='Comparar contenido (tamaño, hash parcial y SHA-256 solo en colisiones) para conservar duplicados con distinto estado')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos para lectura/hash (por defecto, núcleos disponibles)')
+    parser.add_argument('--index-path', default=str(DEFAULT_INDEX_PATH), help='Índice persistente compartido con analyze_file_duplicates_sgc.py')
     parser.add_argument('--dry-run', dest='dry_run', action='store_true', help='Mostrar plan sin mover archivos')
     parser.add_argument('--confirm', dest='confirm', action='store_true', help='Confirmar ejecución (requiere no usar --dry-run)')
     parser.add_argument('--archive-dir', default='data/archive/duplicates', help='Directorio de destino para archivos duplicados')
@@ -245,18 +198,25 @@ def main():
         print('[ERROR] No puedes usar --confirm junto con --dry-run.')
         return
 
-    files = find_files(base_dir, companies, include_exts)
+    index = SGCFileIndex.load(Path(args.index_path), workers=args.workers)
+    entries = scan_entries(index, base_dir, companies, include_exts)
+    entry_groups = {sgc: group for sgc, group in group_entries_by_sgc(entries, numeric_fallback=True).items()
+                    if len(group) >= args.min_files_per_key}
+
+    # Solo los grupos con posibles duplicados necesitan comparar contenido
+    content_keys = index.resolve_content_keys(entry_groups) if args.hash_enabled else {}
+    index.save()
+
     file_infos: List[FileInfo] = []
-    for fp in files:
-        # Derive company from path: data/downloads/<company>/oficina_virtual/processed/...
-        try:
-            rel = fp.relative_to(base_dir)
-            company = rel.parts[0] if len(rel.parts) > 0 else 'unknown'
-        except Exception:
-            company = 'unknown'
-        fi = build_file_info(fp, company=company, hash_enabled=args.hash_enabled)
-        if fi:
-            file_infos.append(fi)
+    for sgc, group in entry_groups.items():
+        for entry in group:
+            # Derive company from path: data/downloads/<company>/oficina_virtual/processed/...
+            try:
+                rel = Path(entry.path).relative_to(base_dir)
+                company = rel.parts[0] if len(rel.parts) > 0 else 'unknown'
+            except Exception:
+                company = 'unknown'
+            file_infos.append(build_file_info(entry, sgc, company, content_keys.get(entry.path)))
 
     groups = group_by_sgc(file_infos)
     plan = plan_cleanup(groups, min_files_per_key=args.min_files_per_key)
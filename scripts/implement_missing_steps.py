@@ -18,7 +18,7 @@ Fecha: Enero 2025
 import sys
 import logging
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import json
@@ -554,94 +554,28 @@ echo "Ver logs con: journalctl -u extractorov-massive.service -f"
     
     async def _run_interleaved_execution(self) -> Dict:
         """
-        Ejecutar flujo intercalado alternando entre Afinia y Air-e
+        Ejecutar flujo intercalado de Afinia y Air-e como DAG en pipeline
+        
+        Ambas empresas corren en paralelo y, dentro de cada una, la carga RDS
+        y la subida S3 consumen registros a medida que la extracción los emite.
         """
-        logger.info("[missing_steps][interleaved] Iniciando ejecución intercalada")
-        
-        results = {}
-        
-        # Definir pasos del flujo
-        steps = [
-            'web_extraction',
-            'csv_consolidation', 
-            'rds_loading',
-            's3_verification',
-            's3_upload'
-        ]
-        
-        # Ejecutar pasos intercalados
-        for step in steps:
-            logger.info(f"[missing_steps][interleaved] Ejecutando paso {step} para ambas empresas")
-            
-            # Ejecutar paso para Afinia
-            await self._execute_step_for_company('afinia', step)
-            
-            # Pausa entre empresas
-            await asyncio.sleep(10)
-            
-            # Ejecutar paso para Air-e
-            await self._execute_step_for_company('aire', step)
-            
-            # Pausa entre pasos
-            await asyncio.sleep(30)
+        logger.info("[missing_steps][interleaved] Iniciando ejecución intercalada (pipeline)")
         
-        # Simular resultados (en implementación real, recopilar resultados reales)
-        for empresa in ['afinia', 'aire']:
-            from src.orchestrators.complete_flow_orchestrator import CompleteFlowResult
-            results[empresa] = CompleteFlowResult(
-                empresa=empresa,
-                execution_id=f"{empresa}_interleaved_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                start_time=datetime.now() - timedelta(minutes=30),
-                end_time=datetime.now(),
-                overall_success=True
-            )
+        from src.orchestrators.complete_flow_orchestrator import CompleteFlowOrchestrator
+        orchestrator = CompleteFlowOrchestrator(simulated_mode=self.simulated_mode)
         
-        return results
+        return await orchestrator.execute_pipelined_flow_for_all_companies(
+            ['afinia', 'aire'],
+            include_web_download=not self.simulated_mode,
+            web_download=self._run_web_download
+        )
     
-    async def _execute_step_for_company(self, empresa: str, step: str):
-        """Ejecutar un paso específico para una empresa"""
-        logger.info(f"[missing_steps][interleaved] Ejecutando {step} para {empresa}")
-        
-        if self.simulated_mode:
-            # Simular ejecución
-            await asyncio.sleep(5)
-            logger.info(f"[missing_steps][interleaved] ✓ {step} simulado para {empresa}")
-        else:
-            # Implementar ejecución real según el paso
-            if step == 'web_extraction':
-                # Ejecutar extracción web usando los managers correctos
-                try:
-                    if empresa == 'afinia':
-                        # Usar el runner automatizado en lugar de importar directamente
-                        from run_complete_flow_automated import AutomatedFlowRunner
-                        runner = AutomatedFlowRunner(simulated_mode=False)
-                        await runner.run_web_download_for_company('afinia')
-                    elif empresa == 'aire':
-                        from run_complete_flow_automated import AutomatedFlowRunner
-                        runner = AutomatedFlowRunner(simulated_mode=False)
-                        await runner.run_web_download_for_company('aire')
-                except Exception as e:
-                    logger.error(f"Error en extracción web para {empresa}: {e}")
-                    
-            elif step == 'csv_consolidation':
-                # Ejecutar consolidación CSV
-                logger.info(f"Consolidación CSV para {empresa} - implementar según necesidad")
-                
-            elif step == 'rds_loading':
-                # Ejecutar carga RDS
-                try:
-                    from run_complete_flow_automated import AutomatedFlowRunner
-                    runner = AutomatedFlowRunner(simulated_mode=False)
-                    await runner.run_csv_to_rds_for_company(empresa)
-                except Exception as e:
-                    logger.error(f"Error en carga RDS para {empresa}: {e}")
-                    
-            elif step == 's3_verification':
-                # Ejecutar verificación S3
-                self.implement_step_20_verification(empresa)
-            elif step == 's3_upload':
-                # Ejecutar subida S3
-                self.implement_step_21_s3_upload(empresa, limite_registros=10)
+    @staticmethod
+    def _run_web_download(empresa: str):
+        """Descarga web bloqueante (se ejecuta en el hilo de la etapa discover)"""
+        from run_complete_flow_automated import AutomatedFlowRunner
+        runner = AutomatedFlowRunner(simulated_mode=False)
+        asyncio.run(runner.run_web_download_for_company(empresa))
 
 async def main():
     """Función principal"""
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de archivos por Número de Reclamo SGC
+========================================================
+
+Escáner compartido por `cleanup_duplicates_sgc.py` y
+`analyze_file_duplicates_sgc.py`.
+
+- Recorre el árbol con `os.scandir` (una sola llamada stat por entrada).
+- Extrae el SGC del nombre; solo abre el archivo cuando el nombre no lo
+  contiene, y lo hace en un pool de procesos.
+- Persiste el resultado en `data/index/sgc_file_index.json`. En la
+  siguiente ejecución los archivos con mismo tamaño y mtime no se vuelven
+  a leer.
+- Para comparar contenido agrupa por SGC, luego por tamaño, luego por hash
+  parcial (primeros y últimos 64 KB) y solo calcula SHA-256 completo
+  cuando el hash parcial coincide.
+
+Uso:
+  from sgc_file_index import SGCFileIndex
+  index = SGCFileIndex.load()
+  entries = index.scan(Path('data/downloads'), {'.json', '.pdf'})
+  index.save()
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+INDEX_VERSION = 2
+DEFAULT_INDEX_PATH = Path('data/index/sgc_file_index.json')
+PARTIAL_HASH_BYTES = 64 * 1024
+
+SGC_REGEXES = [
+    re.compile(r"RE(\d{7,16})", re.IGNORECASE),
+    re.compile(r"SGC[=:_\-\s]*(\d{7,16})", re.IGNORECASE)
+]
+
+# Secuencia numérica sin prefijo: también coincide con fechas (report_20251015_1200.pdf),
+# por eso solo la usa la limpieza (numeric_fallback=True), no el análisis
+NUMERIC_SGC_REGEX = re.compile(r"(\d{7,16})")
+
+# Regex flexible para textos libres (radicado alfanumérico precedido de palabra clave)
+SGC_TEXT_REGEX = re.compile(r"(?i)(sgc|reclamo|radicado|num|nro|numero)[-_\s]*([a-z0-9]{6,})")
+
+CLAIM_KEYS = [
+    "sgc_number", "numero_reclamo_sgc", "numero_radicado", "radicado", "numeroradicado",
+    "nro_reclamo_sgc", "nro_radicado", "numero_reclamo", "reclamo", "sgc"
+]
+
+
+@dataclass
+class IndexEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    sgc: Optional[str] = None
+    numeric_sgc: Optional[str] = None
+    partial_hash: Optional[str] = None
+    full_hash: Optional[str] = None
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+
+# ---------------------------------------------------------------------------
+# Extracción de SGC
+# ---------------------------------------------------------------------------
+
+def extract_sgc_from_filename(name: str, numeric_fallback: bool = False) -> Optional[str]:
+    regexes = SGC_REGEXES + [NUMERIC_SGC_REGEX] if numeric_fallback else SGC_REGEXES
+    for rx in regexes:
+        m = rx.search(name)
+        if m:
+            return m.group(1)
+    return None
+
+
+def entry_sgc(entry: 'IndexEntry', numeric_fallback: bool = False) -> Optional[str]:
+    """
+    SGC de una entrada del índice.
+
+    Sin fallback: prefijo RE/SGC en el nombre o, si no, el contenido. Con
+    fallback (limpieza): la secuencia numérica del nombre va antes que el
+    contenido, como en la limpieza original.
+    """
+    if numeric_fallback and entry.numeric_sgc:
+        return entry.numeric_sgc
+    return entry.sgc
+
+
+def _normalize_claim(value) -> Optional[str]:
+    if value is None or not isinstance(value, (str, int)):
+        return None
+    cstr = str(value).strip()
+    if not cstr:
+        return None
+    return extract_sgc_from_filename(cstr, numeric_fallback=True) or cstr
+
+
+def _sgc_from_json(path: str) -> Optional[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    def scan_obj(obj):
+        if not isinstance(obj, dict):
+            return None
+        for k, v in obj.items():
+            if k.strip().lower().replace(" ", "_") in CLAIM_KEYS:
+                val = _normalize_claim(v)
+                if val:
+                    return val
+        return None
+
+    if isinstance(data, list):
+        for item in data[:50]:
+            val = scan_obj(item)
+            if val:
+                return val
+        return None
+    return scan_obj(data)
+
+
+def _sgc_from_csv(path: str) -> Optional[str]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames or []
+        norm = [h.strip().lower().replace(" ", "_") for h in header]
+        for key in CLAIM_KEYS:
+            if key in norm:
+                col = header[norm.index(key)]
+                for i, row in enumerate(reader):
+                    val = _normalize_claim(row.get(col))
+                    if val:
+                        return val
+                    if i > 20:
+                        break
+                return None
+    return None
+
+
+def _sgc_from_txt(path: str) -> Optional[str]:
+    # Solo el inicio del archivo: el radicado aparece en el encabezado
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        text = f.read(256 * 1024)
+    m = SGC_TEXT_REGEX.search(text)
+    return m.group(2) if m else None
+
+
+def extract_sgc_from_content(path: str) -> Optional[str]:
+    """Leer el contenido solo cuando el nombre no trae el SGC (se ejecuta en el pool)"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == '.json':
+            return _sgc_from_json(path)
+        if ext == '.csv':
+            return _sgc_from_csv(path)
+        if ext == '.txt':
+            return _sgc_from_txt(path)
+    except Exception:
+        return None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Hashes
+# ---------------------------------------------------------------------------
+
+def compute_partial_hash(path: str, size: int) -> Optional[str]:
+    """SHA-256 de los primeros y últimos 64 KB (más el tamaño)"""
+    try:
+        h = hashlib.sha256(str(size).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read(PARTIAL_HASH_BYTES))
+            if size > PARTIAL_HASH_BYTES * 2:
+                f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+                h.update(f.read(PARTIAL_HASH_BYTES))
+            elif size > PARTIAL_HASH_BYTES:
+                h.update(f.read())
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def compute_sha256(path: str) -> Optional[str]:
+    try:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def _partial_hash_job(args):
+    return compute_partial_hash(*args)
+
+
+# ---------------------------------------------------------------------------
+# Recorrido
+# ---------------------------------------------------------------------------
+
+def iter_files(root: Path, include_exts: Set[str]) -> Iterator[os.DirEntry]:
+    """Recorrido iterativo con os.scandir"""
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if os.path.splitext(entry.name)[1].lower() in include_exts:
+                                yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class SGCFileIndex:
+    """Índice de archivos (path -> tamaño, mtime, SGC, hashes) persistido en JSON"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH, workers: Optional[int] = None):
+        self.path = Path(path)
+        self.workers = workers or os.cpu_count() or 1
+        self.entries: Dict[str, IndexEntry] = {}
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_INDEX_PATH, workers: Optional[int] = None) -> 'SGCFileIndex':
+        index = cls(path, workers)
+        if index.path.exists():
+            try:
+                data = json.loads(index.path.read_text(encoding='utf-8'))
+                if data.get('version') == INDEX_VERSION:
+                    index.entries = {p: IndexEntry(**e) for p, e in data.get('files', {}).items()}
+            except Exception:
+                # Índice corrupto: se reconstruye
+                index.entries = {}
+        return index
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'files': {p: asdict(e) for p, e in self.entries.items()}
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def _map(self, fn, items: List, chunksize: int = 64) -> List:
+        """Ejecutar en el pool de procesos solo si el volumen lo justifica"""
+        if self.workers <= 1 or len(items) < chunksize:
+            return [fn(item) for item in items]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(fn, items, chunksize=chunksize))
+
+    def scan(self, root: Path, include_exts: Iterable[str]) -> List[IndexEntry]:
+        """
+        Actualizar el índice para `root` y devolver las entradas vigentes.
+
+        Los archivos sin cambios (tamaño y mtime) reutilizan SGC y hashes
+        guardados. Las entradas de archivos eliminados bajo `root` se descartan.
+        """
+        include_exts = {e.lower() for e in include_exts}
+        root_prefix = str(root).rstrip(os.sep) + os.sep
+        seen: List[IndexEntry] = []
+        pending_content: List[IndexEntry] = []
+        seen_paths = set()
+
+        own_path = os.path.abspath(self.path)
+        for dir_entry in iter_files(root, include_exts):
+            if os.path.abspath(dir_entry.path) == own_path:
+                continue
+            try:
+                st = dir_entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            path = dir_entry.path
+            seen_paths.add(path)
+            cached = self.entries.get(path)
+            if cached and cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+                seen.append(cached)
+                continue
+
+            entry = IndexEntry(path=path, size=st.st_size, mtime_ns=st.st_mtime_ns,
+                               sgc=extract_sgc_from_filename(dir_entry.name))
+            if not entry.sgc:
+                m = NUMERIC_SGC_REGEX.search(dir_entry.name)
+                entry.numeric_sgc = m.group(1) if m else None
+                pending_content.append(entry)
+            self.entries[path] = entry
+            seen.append(entry)
+
+        if pending_content:
+            sgcs = self._map(extract_sgc_from_content, [e.path for e in pending_content])
+            for entry, sgc in zip(pending_content, sgcs):
+                entry.sgc = sgc
+
+        stale = [p for p in self.entries
+                 if p.startswith(root_prefix) and p not in seen_paths
+                 and os.path.splitext(p)[1].lower() in include_exts]
+        for path in stale:
+            del self.entries[path]
+
+        return seen
+
+    def resolve_content_keys(self, groups: Dict[str, List[IndexEntry]]) -> Dict[str, str]:
+        """
+        Calcular una clave de contenido por archivo, igual solo si el contenido es igual.
+
+        Dentro de cada grupo: tamaño único -> 'size:N'; hash parcial único ->
+        'partial:H'; en otro caso se calcula el SHA-256 completo -> 'sha256:H'.
+        """
+        keys: Dict[str, str] = {}
+        need_partial: List[IndexEntry] = []
+        size_buckets: List[List[IndexEntry]] = []
+
+        for entries in groups.values():
+            by_size: Dict[int, List[IndexEntry]] = {}
+            for e in entries:
+                by_size.setdefault(e.size, []).append(e)
+            for size, same_size in by_size.items():
+                if len(same_size) == 1:
+                    keys[same_size[0].path] = f"size:{size}"
+                else:
+                    size_buckets.append(same_size)
+                    need_partial.extend(e for e in same_size if not e.partial_hash)
+
+        if need_partial:
+            hashes = self._map(_partial_hash_job, [(e.path, e.size) for e in need_partial], chunksize=16)
+            for e, h in zip(need_partial, hashes):
+                e.partial_hash = h
+
+        need_full: List[IndexEntry] = []
+        full_buckets: List[List[IndexEntry]] = []
+        for same_size in size_buckets:
+            by_partial: Dict[Optional[str], List[IndexEntry]] = {}
+            for e in same_size:
+                by_partial.setdefault(e.partial_hash, []).append(e)
+            # Hasta 128 KB el hash parcial cubre el archivo completo: es exacto
+            exact = same_size[0].size <= PARTIAL_HASH_BYTES * 2
+            for partial, same_partial in by_partial.items():
+                if partial and (len(same_partial) == 1 or exact):
+                    for e in same_partial:
+                        keys[e.path] = f"partial:{partial}"
+                else:
+                    full_buckets.append(same_partial)
+                    need_full.extend(e for e in same_partial if not e.full_hash)
+
+        if need_full:
+            hashes = self._map(compute_sha256, [e.path for e in need_full], chunksize=4)
+            for e, h in zip(need_full, hashes):
+                e.full_hash = h
+
+        for bucket in full_buckets:
+            for e in bucket:
+                keys[e.path] = f"sha256:{e.full_hash}" if e.full_hash else f"path:{e.path}"
+
+        return keys
+
+
+def group_entries_by_sgc(entries: Iterable[IndexEntry],
+                         numeric_fallback: bool = False) -> Dict[str, List[IndexEntry]]:
+    groups: Dict[str, List[IndexEntry]] = {}
+    for e in entries:
+        sgc = entry_sgc(e, numeric_fallback)
+        if sgc:
+            groups.setdefault(sgc, []).append(e)
+    return groups
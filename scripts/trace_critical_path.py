@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Camino Crítico de los Registros más Lentos
+==========================================
+
+Lee los spans exportados (data/traces/spans_*.jsonl, formato OTLP/JSON) y
+muestra, para los N registros más lentos, en qué etapa se fue el tiempo:
+abrir pestaña, carga, PDF, adjuntos, JSON, validación, BD, S3 y las
+esperas en cola entre etapas.
+
+Uso:
+  python scripts/trace_critical_path.py --top 10
+  python scripts/trace_critical_path.py --company afinia --files data/traces/spans_20251015.jsonl
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import sys
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.tracing import critical_path, load_otlp_spans, slowest_records
+
+
+def _merge_segments(segments):
+    """Unir segmentos consecutivos de la misma etapa"""
+    merged = []
+    for segment in segments:
+        if merged and merged[-1]['name'] == segment['name']:
+            merged[-1]['duration_s'] += segment['duration_s']
+        else:
+            merged.append({'name': segment['name'], 'duration_s': segment['duration_s']})
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Camino crítico de los registros más lentos')
+    parser.add_argument('--files', '-f', nargs='*',
+                        help='Archivos de spans (por defecto data/traces/spans_*.jsonl)')
+    parser.add_argument('--top', '-n', type=int, default=10, help='Registros a mostrar')
+    parser.add_argument('--company', '-c', choices=['afinia', 'aire'], help='Filtrar por empresa')
+    parser.add_argument('--min-share', type=float, default=1.0,
+                        help='Ocultar etapas con menos de este %% del tiempo del registro')
+    parser.add_argument('--output', '-o', type=str, help='Archivo JSON para el reporte')
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.files] if args.files else sorted(Path('data/traces').glob('spans_*.jsonl'))
+    if not files:
+        print("[ERROR] No se encontraron archivos de spans")
+        return 1
+
+    spans = load_otlp_spans(files)
+    records = slowest_records(spans, top=args.top, company=args.company)
+    print(f"[DATOS] {len(spans)} spans leídos de {len(files)} archivos")
+
+    report = []
+    stage_totals = defaultdict(float)
+    for position, record in enumerate(records, 1):
+        segments = _merge_segments(critical_path(record['spans']))
+        total = record['duration_s'] or 1e-9
+        print(f"\n#{position} {record['company'] or '?'} {record['record_id'] or record['trace_id']}: "
+              f"{record['duration_s']:.1f}s")
+        for segment in segments:
+            share = segment['duration_s'] / total * 100
+            stage_totals[segment['name']] += segment['duration_s']
+            if share >= args.min_share:
+                print(f"    {segment['duration_s']:8.2f}s  {share:5.1f}%  {segment['name']}")
+        report.append({'record_id': record['record_id'], 'company': record['company'],
+                       'trace_id': record['trace_id'], 'duration_s': record['duration_s'],
+                       'critical_path': segments})
+
+    if stage_totals:
+        print(f"\n[DATOS] Tiempo en camino crítico por etapa (top {len(records)}):")
+        grand_total = sum(stage_totals.values())
+        for name, seconds in sorted(stage_totals.items(), key=lambda item: item[1], reverse=True):
+            print(f"    {seconds:8.2f}s  {seconds / grand_total * 100:5.1f}%  {name}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    print("\n[EXITOSO] Análisis de trazas completado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,25 @@
 Monitor de Progreso Visual Multiplataforma
 Proporciona visualización en tiempo real del progreso de carga de archivos
 Compatible con Windows 11 y Ubuntu 24.04.3 LTS
+
+También puede seguir un proceso extractor a través de su endpoint local de
+métricas/control (CONTROL_ENDPOINT) en lugar de llamadas en proceso:
+
+  python scripts/visual_progress_monitor.py --endpoint http://127.0.0.1:8765 --source afinia
+  python scripts/visual_progress_monitor.py --endpoint http://127.0.0.1:8765 --pause
+  python scripts/visual_progress_monitor.py --endpoint http://127.0.0.1:8765 --resume
 """
 
 import os
 import sys
+import json
 import time
+import argparse
 import threading
 import platform
+import urllib.request
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 
 class ProgressMonitor:
     """Monitor de progreso visual multiplataforma optimizado"""
@@ -25,6 +35,10 @@ class ProgressMonitor:
         self.db_failures = 0
         self.current_record = ""
         self.start_time = None
+        # Tasa/ETA calculadas por el endpoint (el monitor puede conectarse a mitad de corrida)
+        self.remote_rate_per_min: Optional[float] = None
+        self.remote_eta_seconds: Optional[float] = None
+        self.status_label = ""
         self.is_running = False
         self.display_thread = None
         self.lock = threading.Lock()
@@ -249,7 +263,11 @@ class ProgressMonitor:
             lines.append(f"{c['bold']}[TIEMPO]  TIEMPO:{c['reset']}")
             lines.append(f"   Transcurrido: {elapsed_str}")
             
-            if processed > 0:
+            if self.remote_rate_per_min is not None:
+                lines.append(f"   Velocidad: {self.remote_rate_per_min:.1f} registros/min")
+                if self.remote_eta_seconds is not None:
+                    lines.append(f"   ETA: {timedelta(seconds=int(self.remote_eta_seconds))}")
+            elif processed > 0:
                 rate = processed / elapsed.total_seconds() * 60  # registros por minuto
                 lines.append(f"   Velocidad: {rate:.1f} registros/min")
                 
@@ -272,6 +290,10 @@ class ProgressMonitor:
             lines.append(f"   {display_current}")
             lines.append("")
         
+        if self.status_label:
+            lines.append(f"{c['bold']}[ESTADO] {self.status_label}{c['reset']}")
+            lines.append("")
+        
         # Línea de estado
         timestamp = datetime.now().strftime("%H:%M:%S")
         status_line = f"{c['gray']}Actualizado: {timestamp} | Refresco: {self.refresh_rate}s{c['reset']}"
@@ -455,7 +477,62 @@ def create_progress_monitor(total_records: int = 0) -> ProgressMonitor:
     return ProgressMonitor(total_records)
 
 
-if __name__ == "__main__":
+class EndpointProgressFeed:
+    """Alimenta un ProgressMonitor desde el endpoint local de métricas (/events)"""
+    
+    def __init__(self, url: str, source: Optional[str] = None):
+        self.url = url.rstrip('/')
+        self.source = source
+    
+    def snapshots(self) -> Iterator[Dict[str, Any]]:
+        """Snapshots del stream Server-Sent Events"""
+        with urllib.request.urlopen(f"{self.url}/events") as response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if line.startswith('data: '):
+                    yield json.loads(line[len('data: '):])
+    
+    def apply(self, monitor: ProgressMonitor, snapshot: Dict[str, Any]):
+        sources = snapshot.get('sources', {})
+        name = self.source or next(iter(sources), None)
+        status = sources.get(name)
+        if not status:
+            monitor.status_label = f"Esperando fuente '{name or '-'}'..."
+            return
+        
+        processed = status.get('processed_records', 0)
+        failed = status.get('failed_records', 0)
+        with monitor.lock:
+            monitor.total_records = status.get('total_records', 0)
+            monitor.remote_rate_per_min = status.get('records_per_minute')
+            monitor.remote_eta_seconds = status.get('eta_seconds')
+        monitor.update_progress(processed, max(0, processed - failed), failed,
+                                current_record=f"{name}: página {status.get('current_page', 0)}/{status.get('total_pages', 0)}")
+        
+        state = "DETENIDO" if status.get('is_stopped') else "PAUSADO" if status.get('is_paused') else "EN CURSO"
+        queues = ", ".join(
+            f"{bus}/{sub}={info.get('depth', 0)}"
+            for bus, stats in snapshot.get('queues', {}).items()
+            for sub, info in stats.get('subscribers', {}).items()
+        )
+        monitor.status_label = f"{state}" + (f" | colas: {queues}" if queues else "")
+    
+    def run(self, monitor: ProgressMonitor):
+        for snapshot in self.snapshots():
+            if not monitor.is_running:
+                break
+            self.apply(monitor, snapshot)
+
+
+def send_control_command(url: str, command: str, source: Optional[str] = None) -> Dict[str, Any]:
+    """Enviar pause/resume/stop al endpoint local"""
+    target = f"?target={source}" if source else ""
+    request = urllib.request.Request(f"{url.rstrip('/')}/control/{command}{target}", method='POST')
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def _run_demo():
     # Prueba del monitor
     monitor = create_progress_monitor(100)
     monitor.start_monitoring()
@@ -486,4 +563,44 @@ if __name__ == "__main__":
             's3_failures': 2,
             'total_size_mb': 50.0
         }
-        monitor.show_final_report(final_stats)
\ No newline at end of file
+        monitor.show_final_report(final_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitor de progreso visual')
+    parser.add_argument('--endpoint', help='URL del endpoint de métricas/control (ej. http://127.0.0.1:8765)')
+    parser.add_argument('--source', help='Fuente a mostrar/controlar (afinia, aire); por defecto la primera')
+    command_group = parser.add_mutually_exclusive_group()
+    command_group.add_argument('--pause', action='store_const', const='pause', dest='command')
+    command_group.add_argument('--resume', action='store_const', const='resume', dest='command')
+    command_group.add_argument('--stop', action='store_const', const='stop', dest='command')
+    args = parser.parse_args()
+    
+    if not args.endpoint:
+        if args.command:
+            parser.error("--pause/--resume/--stop requieren --endpoint")
+        _run_demo()
+        return 0
+    
+    try:
+        if args.command:
+            result = send_control_command(args.endpoint, args.command, args.source)
+            print(f"[EXITOSO] {args.command.upper()} enviado: {result.get('applied')}")
+            return 0
+        
+        monitor = create_progress_monitor()
+        monitor.start_monitoring()
+        try:
+            EndpointProgressFeed(args.endpoint, args.source).run(monitor)
+        except KeyboardInterrupt:
+            print("\n\nMonitor detenido por el usuario")
+        finally:
+            monitor.stop_monitoring()
+        return 0
+    except OSError as e:
+        print(f"[ERROR] No se pudo conectar al endpoint {args.endpoint}: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
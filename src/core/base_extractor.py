@@ -10,8 +10,11 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from enum import Enum
+from pathlib import Path
 import logging
 
+from utils.run_profiler import RunProfiler
+
 logger = logging.getLogger(__name__)
 
 class ExtractorStatus(Enum):
@@ -32,9 +35,12 @@ class BaseExtractor(ABC):
     los extractores de Afinia y Aire.
     """
     
-    def __init__(self, company: str, headless: bool = True):
+    def __init__(self, company: str, headless: bool = True, profile: Optional[bool] = None):
         self.company = company
         self.headless = headless
+        # Perfilado opcional de run_extraction (None = variable EXTRACTOR_PROFILE)
+        self.profile_enabled = profile
+        self.last_profile_dir: Optional[Path] = None
         self.status = ExtractorStatus.IDLE
         self.start_time: Optional[datetime] = None
         self.end_time: Optional[datetime] = None
@@ -93,26 +99,35 @@ class BaseExtractor(ABC):
         2. Authenticate
         3. Extract data
         4. Cleanup
+        
+        Con perfilado activo (profile=True o EXTRACTOR_PROFILE=1) cada paso
+        se mide como una etapa de RunProfiler.
         """
         self.start_time = datetime.now()
         self.status = ExtractorStatus.INITIALIZING
+        profiler = RunProfiler(f"{self.company}_extraction", enabled=self.profile_enabled).start()
         
         try:
             # 1. Setup browser
             self.log_info("Inicializando navegador...")
-            if not self.setup_browser():
+            with profiler.stage("setup_browser"):
+                browser_ready = self.setup_browser()
+            if not browser_ready:
                 raise Exception("Error al configurar navegador")
             
             # 2. Authenticate
             self.status = ExtractorStatus.AUTHENTICATING
             self.log_info("Autenticando...")
-            if not self.authenticate():
+            with profiler.stage("authenticate"):
+                authenticated = self.authenticate()
+            if not authenticated:
                 raise Exception("Error en autenticación")
             
             # 3. Extract data
             self.status = ExtractorStatus.EXTRACTING
             self.log_info("Extrayendo datos...")
-            result = self.extract_data(**kwargs)
+            with profiler.stage("extract_data"):
+                result = self.extract_data(**kwargs)
             
             self.status = ExtractorStatus.COMPLETED
             self.end_time = datetime.now()
@@ -142,6 +157,12 @@ class BaseExtractor(ABC):
         finally:
             # Siempre limpiar recursos
             try:
-                self.cleanup()
+                with profiler.stage("cleanup"):
+                    self.cleanup()
             except Exception as e:
-                self.log_error(f"Error en cleanup: {str(e)}")
\ No newline at end of file
+                self.log_error(f"Error en cleanup: {str(e)}")
+            
+            profile_dir = profiler.stop()
+            if profile_dir:
+                self.last_profile_dir = profile_dir
+                self.log_info(f"Perfil de ejecución guardado en {profile_dir}")
\ No newline at end of file
@@ -24,6 +24,7 @@ from playwright.async_api import TimeoutError, async_playwright, Page, BrowserCo
 
 from config.centralized_config import config
 from src.core.logging import get_logger
+from src.utils.rate_limiter import get_rate_limiter, parse_retry_after
 from .clean_and_transform import (
     rra_pendientes,
     rra_recibidas,
@@ -36,7 +37,7 @@ logger = get_logger()
 # 🔄 MIGRADO DESDE IPO: Configuraciones originales
 PATH_PLAYWRIGHT = os.getenv("PLAYWRIGHT_BROWSERS_PATH")
 TIMEOUT_MERCURIO = 5 * 60 * 1000  # 5 minutos en milisegundos
-MERCURIO_SLEEP = 3  # segundos
+MERCURIO_SLEEP = 3  # segundos entre reportes al arrancar (el limitador por host la adapta)
 REPORTS_DAYS_FROM = 30  # días hacia atrás
 
 
@@ -46,6 +47,8 @@ class MercurioReportDownloader:
     def __init__(self, empresa: str):
         self.empresa = empresa.lower()
         self.config = self._get_empresa_config()
+        self.rate_limiter = get_rate_limiter(self.config.get("url") or self.empresa,
+                                             initial_interval=MERCURIO_SLEEP)
         
     def _get_empresa_config(self) -> Dict[str, Any]:
         """🔄 MIGRADO DESDE IPO: Configuración por empresa"""
@@ -124,7 +127,12 @@ class MercurioReportDownloader:
             )
             
             try:
-                await page.goto(parameters["url"], timeout=TIMEOUT_MERCURIO)
+                # Cada reporte abre sesión: turno del limitador compartido por host
+                async with self.rate_limiter.request() as outcome:
+                    response = await page.goto(parameters["url"], timeout=TIMEOUT_MERCURIO)
+                    if response:
+                        outcome["status"] = response.status
+                        outcome["retry_after"] = parse_retry_after(response.headers.get("retry-after"))
                 logger.info("Entrando a la página de Mercurio")
                 
                 await self.handle_login(page, parameters)
@@ -0,0 +1,274 @@
+"""
+Extraction Runner - Backends de Ejecución Concurrente de Extractores
+===================================================================
+
+Los extractores usan Playwright síncrono y ``BaseExtractor.run_extraction``
+es bloqueante, por lo que ejecutarlos directamente en el event loop los
+serializa. Este módulo aísla cada extracción en su propio proceso (o hilo)
+y expone una interfaz async con timeout y cancelación por empresa.
+
+- ProcessExtractionBackend: un proceso por empresa (contexto ``spawn``).
+  El timeout o la cancelación terminan el grupo de procesos completo,
+  incluyendo el driver de Playwright y Chromium.
+- ThreadExtractionBackend: un hilo por empresa. Playwright síncrono queda
+  aislado por hilo; el timeout no puede detener el hilo, solo dispara
+  ``cleanup()`` del extractor para liberar el navegador.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .base_extractor import BaseExtractor
+
+logger = logging.getLogger(__name__)
+
+STATUS_COMPLETED = "completed"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_CANCELLED = "cancelled"
+
+
+@dataclass
+class ExtractionJob:
+    """Trabajo de extracción de una empresa"""
+    company: str
+    extractor: Optional[BaseExtractor] = None
+    factory: Optional[Callable[..., BaseExtractor]] = None
+    factory_kwargs: Dict[str, Any] = field(default_factory=dict)
+    extract_kwargs: Dict[str, Any] = field(default_factory=dict)
+    timeout: Optional[float] = None
+
+    def build_extractor(self) -> BaseExtractor:
+        """Instanciar el extractor (en el proceso/hilo que lo ejecuta)"""
+        if self.factory is not None:
+            return self.factory(**self.factory_kwargs)
+        if self.extractor is not None:
+            return self.extractor
+        raise ValueError(f"Trabajo sin extractor ni factory para {self.company}")
+
+
+def _normalize_result(company: str, raw: Dict[str, Any], start_time: datetime,
+                      end_time: datetime) -> Dict[str, Any]:
+    """Convertir el resultado de BaseExtractor.run_extraction al formato del orquestador"""
+    raw = raw if isinstance(raw, dict) else {"success": bool(raw), "result": raw}
+    success = raw.get("success", raw.get("status") == STATUS_COMPLETED)
+    errors = list(raw.get("errors", []))
+    if raw.get("error"):
+        errors.append(raw["error"])
+
+    result = raw.get("result")
+    return {
+        'status': STATUS_COMPLETED if success else STATUS_ERROR,
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'duration_seconds': (end_time - start_time).total_seconds(),
+        'extracted_files': raw.get("extracted_files", []),
+        'errors': errors,
+        'statistics': raw.get("statistics") or (result if isinstance(result, dict) else {})
+    }
+
+
+def _failure_result(status: str, message: str, start_time: datetime) -> Dict[str, Any]:
+    end_time = datetime.now()
+    return {
+        'status': status,
+        'error': message,
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'duration_seconds': (end_time - start_time).total_seconds(),
+        'extracted_files': [],
+        'errors': [message],
+        'statistics': {}
+    }
+
+
+def _process_entrypoint(job: ExtractionJob, conn) -> None:
+    """Punto de entrada del proceso hijo: ejecuta la extracción y envía el resultado"""
+    if hasattr(os, "setpgrp"):
+        # Grupo propio para poder terminar también Playwright/Chromium
+        os.setpgrp()
+    try:
+        extractor = job.build_extractor()
+        raw = extractor.run_extraction(**job.extract_kwargs)
+        conn.send(("ok", raw))
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+    finally:
+        conn.close()
+
+
+class ProcessExtractionBackend:
+    """Ejecuta cada extracción en un proceso independiente"""
+
+    def __init__(self, poll_interval: float = 0.5, terminate_grace: float = 5.0):
+        self.poll_interval = poll_interval
+        self.terminate_grace = terminate_grace
+        self._ctx = multiprocessing.get_context("spawn")
+
+    async def run(self, job: ExtractionJob) -> Dict[str, Any]:
+        start_time = datetime.now()
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_process_entrypoint,
+            args=(job, child_conn),
+            name=f"extraction_{job.company}",
+            daemon=False
+        )
+        process.start()
+        child_conn.close()
+        logger.info(f"[extraction_runner][process] {job.company}: PID {process.pid}")
+
+        try:
+            kind, payload = await asyncio.wait_for(
+                self._wait_message(process, parent_conn), timeout=job.timeout
+            )
+        except asyncio.TimeoutError:
+            self._terminate(process)
+            message = f"Timeout de {job.timeout}s excedido"
+            logger.error(f"[extraction_runner][process] {job.company}: {message}")
+            return _failure_result(STATUS_TIMEOUT, message, start_time)
+        except asyncio.CancelledError:
+            self._terminate(process)
+            logger.warning(f"[extraction_runner][process] {job.company}: cancelada")
+            raise
+        finally:
+            parent_conn.close()
+
+        process.join(self.terminate_grace)
+        if kind == "ok":
+            return _normalize_result(job.company, payload, start_time, datetime.now())
+        return _failure_result(STATUS_ERROR, payload, start_time)
+
+    async def _wait_message(self, process, conn) -> Tuple[str, Any]:
+        while True:
+            if conn.poll():
+                try:
+                    return conn.recv()
+                except EOFError:
+                    break
+            if not process.is_alive():
+                # El hijo pudo enviar justo antes de salir
+                if conn.poll():
+                    continue
+                break
+            await asyncio.sleep(self.poll_interval)
+        return "error", f"Proceso terminó sin resultado (exitcode={process.exitcode})"
+
+    def _terminate(self, process) -> None:
+        if not process.is_alive():
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+        except (ProcessLookupError, PermissionError):
+            process.terminate()
+
+        deadline = time.monotonic() + self.terminate_grace
+        while process.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if process.is_alive():
+            if hasattr(os, "killpg"):
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            process.kill()
+        process.join(1)
+
+
+class ThreadExtractionBackend:
+    """Ejecuta cada extracción en un hilo dedicado (Playwright síncrono por hilo)"""
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="extraction")
+
+    async def run(self, job: ExtractionJob) -> Dict[str, Any]:
+        start_time = datetime.now()
+        loop = asyncio.get_running_loop()
+        holder: Dict[str, BaseExtractor] = {}
+
+        def _target():
+            extractor = job.build_extractor()
+            holder['extractor'] = extractor
+            return extractor.run_extraction(**job.extract_kwargs)
+
+        future = loop.run_in_executor(self._executor, _target)
+        try:
+            raw = await asyncio.wait_for(future, timeout=job.timeout)
+        except asyncio.TimeoutError:
+            self._release(job.company, holder.get('extractor'))
+            message = f"Timeout de {job.timeout}s excedido"
+            logger.error(f"[extraction_runner][thread] {job.company}: {message}")
+            return _failure_result(STATUS_TIMEOUT, message, start_time)
+        except asyncio.CancelledError:
+            self._release(job.company, holder.get('extractor'))
+            raise
+        except Exception as e:
+            return _failure_result(STATUS_ERROR, str(e), start_time)
+
+        return _normalize_result(job.company, raw, start_time, datetime.now())
+
+    @staticmethod
+    def _release(company: str, extractor: Optional[BaseExtractor]) -> None:
+        # El hilo no se puede interrumpir: cerrar el navegador hace fallar
+        # la siguiente operación de Playwright y el hilo termina solo.
+        if extractor is None:
+            return
+        try:
+            extractor.cleanup()
+        except Exception as e:
+            logger.warning(f"[extraction_runner][thread] {company}: error en cleanup: {e}")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def create_backend(kind: str = "process", **kwargs):
+    """Crear backend de ejecución ('process' o 'thread')"""
+    if kind == "process":
+        return ProcessExtractionBackend(**kwargs)
+    if kind == "thread":
+        return ThreadExtractionBackend(**kwargs)
+    raise ValueError(f"Backend de ejecución desconocido: {kind}")
+
+
+async def stream_jobs(backend, jobs: List[ExtractionJob]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Ejecutar trabajos en paralelo y entregar (empresa, resultado) a medida que terminan.
+
+    Si el consumidor cancela la iteración, las extracciones pendientes se cancelan.
+    """
+    tasks = {
+        asyncio.create_task(backend.run(job), name=f"extraction_{job.company}"): job.company
+        for job in jobs
+    }
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                company = tasks[task]
+                if task.cancelled():
+                    yield company, _failure_result(STATUS_CANCELLED, "Extracción cancelada", datetime.now())
+                elif task.exception() is not None:
+                    yield company, _failure_result(STATUS_ERROR, str(task.exception()), datetime.now())
+                else:
+                    yield company, task.result()
+    finally:
+        outstanding = [t for t in tasks if not t.done()]
+        for task in outstanding:
+            task.cancel()
+        if outstanding:
+            await asyncio.gather(*outstanding, return_exceptions=True)
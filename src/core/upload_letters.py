@@ -28,6 +28,7 @@ from sqlalchemy import create_engine, text
 
 from config.centralized_config import config
 from src.core.logging import get_logger
+from src.utils.rate_limiter import get_rate_limiter, parse_retry_after
 
 logger = get_logger()
 config = AppConfig()
@@ -41,7 +42,8 @@ MERCURIO_CONFIG = {
     "login_url": "https://mercurio.creg.gov.co/Account/Login",
     "timeout": 30000,
     "retry_attempts": 3,
-    "retry_delay": 5000
+    "retry_delay": 5000,
+    "letter_interval": 2.0  # segundos entre cartas al arrancar (el limitador la adapta)
 }
 
 # 🔄 MIGRADO DESDE IPO: Selectores CSS
@@ -80,6 +82,10 @@ class MercurioLetterUploader:
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
         self.credentials = self._get_credentials()
+        self.rate_limiter = get_rate_limiter(MERCURIO_CONFIG["base_url"],
+                                             initial_interval=MERCURIO_CONFIG["letter_interval"])
+        # Última respuesta 429/5xx vista durante la carga en curso (para el limitador)
+        self._last_throttle: Optional[Dict[str, Optional[float]]] = None
         
     def _get_credentials(self) -> Dict[str, str]:
         """Obtiene credenciales según la empresa"""
@@ -105,6 +111,15 @@ class MercurioLetterUploader:
         )
         self.page = await self.browser.new_page()
         await self.page.set_viewport_size({"width": 1920, "height": 1080})
+        self.page.on("response", self._track_response)
+    
+    def _track_response(self, response) -> None:
+        """Registrar respuestas 429/5xx de Mercurio con su Retry-After"""
+        if response.status == 429 or response.status >= 500:
+            self._last_throttle = {
+                "status": response.status,
+                "retry_after": parse_retry_after(response.headers.get("retry-after")),
+            }
         
     async def close_browser(self) -> None:
         """Cierra el navegador"""
@@ -263,7 +278,12 @@ class MercurioLetterUploader:
                 success = False
                 for attempt in range(MERCURIO_CONFIG["retry_attempts"]):
                     try:
-                        success = await self.upload_letter(radicado, file_path, is_notification)
+                        # Turno del limitador por host (reemplaza la pausa fija entre cartas)
+                        self._last_throttle = None
+                        async with self.rate_limiter.request() as outcome:
+                            success = await self.upload_letter(radicado, file_path, is_notification)
+                            if self._last_throttle:
+                                outcome.update(self._last_throttle)
                         if success:
                             break
                         else:
@@ -280,9 +300,6 @@ class MercurioLetterUploader:
                     results["success"].append(radicado)
                 else:
                     results["failed"].append(radicado)
-                
-                # Pausa entre cargas
-                await self.page.wait_for_timeout(2000)
             
         except Exception as e:
             logger.error(f"Error en carga por lotes: {e}")
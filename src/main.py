@@ -20,10 +20,11 @@ Fecha: 2025-01-27
 
 import asyncio
 import logging
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 # Configuración de logging
 logging.basicConfig(
@@ -39,6 +40,9 @@ logger = logging.getLogger(__name__)
 
 # Importaciones locales
 from core.base_extractor import BaseExtractor, ExtractorStatus
+from core.extraction_runner import (
+    ExtractionJob, create_backend, stream_jobs, STATUS_COMPLETED, STATUS_CANCELLED
+)
 from services.afinia_extractor import AfiniaExtractor
 from services.aire_extractor import AireExtractor
 from utils.aire_logger import setup_logging
@@ -50,93 +54,124 @@ class ExtractorMercOrchestrator:
     Orquestador principal del sistema ExtractorMERC
     
     Coordina la ejecución de extractores para diferentes empresas
-    y maneja el flujo de trabajo completo.
+    y maneja el flujo de trabajo completo. Cada extracción corre en su
+    propio proceso (o hilo) mediante un backend de ejecución, de modo que
+    las empresas avanzan realmente en paralelo.
     """
     
-    def __init__(self):
+    def __init__(self, backend: str = "process", default_timeout: Optional[float] = None,
+                 timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            backend: 'process' (un proceso por empresa) o 'thread'
+            default_timeout: Timeout en segundos por empresa (None = sin límite)
+            timeouts: Timeouts específicos por empresa
+        """
         self.extractors: Dict[str, BaseExtractor] = {}
+        self.factories: Dict[str, Tuple[Callable[..., BaseExtractor], Dict[str, Any]]] = {}
         self.results: Dict[str, Dict[str, Any]] = {}
+        self.default_timeout = default_timeout
+        self.timeouts: Dict[str, float] = dict(timeouts or {})
+        self.backend = create_backend(backend)
         
     def register_extractor(self, company: str, extractor: BaseExtractor):
         """Registra un extractor para una empresa específica"""
         self.extractors[company] = extractor
         logger.info(f"Extractor registrado para {company}")
         
-    async def run_extraction(self, company: str, **kwargs) -> Dict[str, Any]:
+    def register_extractor_factory(self, company: str, factory: Callable[..., BaseExtractor],
+                                   **factory_kwargs):
+        """
+        Registra una factory de extractor (clase o función de módulo).
+        
+        El extractor se construye dentro del proceso/hilo que lo ejecuta,
+        evitando serializar objetos de Playwright.
+        """
+        self.factories[company] = (factory, factory_kwargs)
+        logger.info(f"Factory de extractor registrada para {company}")
+        
+    @property
+    def companies(self) -> List[str]:
+        """Empresas registradas (instancias y factories)"""
+        return list(dict.fromkeys(list(self.extractors) + list(self.factories)))
+        
+    def _build_job(self, company: str, timeout: Optional[float] = None, **kwargs) -> ExtractionJob:
+        if company not in self.extractors and company not in self.factories:
+            raise ValueError(f"No hay extractor registrado para {company}")
+        
+        factory, factory_kwargs = self.factories.get(company, (None, {}))
+        return ExtractionJob(
+            company=company,
+            extractor=self.extractors.get(company),
+            factory=factory,
+            factory_kwargs=factory_kwargs,
+            extract_kwargs=kwargs,
+            timeout=timeout if timeout is not None else self.timeouts.get(company, self.default_timeout)
+        )
+        
+    def _store_result(self, company: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.results[company] = result
+        if result['status'] == STATUS_COMPLETED:
+            logger.info(f"Extracción completada para {company} en {result['duration_seconds']:.2f}s")
+        else:
+            logger.error(f"Extracción {result['status']} para {company}: {result.get('error', '')}")
+        return result
+        
+    async def run_extraction(self, company: str, timeout: Optional[float] = None,
+                             **kwargs) -> Dict[str, Any]:
         """
         Ejecuta la extracción para una empresa específica
         
         Args:
             company: Nombre de la empresa (afinia, aire)
+            timeout: Timeout en segundos (por defecto el configurado para la empresa)
             **kwargs: Parámetros adicionales para la extracción
             
         Returns:
             Diccionario con los resultados de la extracción
         """
-        if company not in self.extractors:
-            raise ValueError(f"No hay extractor registrado para {company}")
-            
-        extractor = self.extractors[company]
+        job = self._build_job(company, timeout, **kwargs)
+        logger.info(f"Iniciando extracción para {company}")
         
         try:
-            logger.info(f"Iniciando extracción para {company}")
-            start_time = datetime.now()
-            
-            # Ejecutar extracción
-            result = await extractor.run_extraction(**kwargs)
-            
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            
-            # Almacenar resultados
+            result = await self.backend.run(job)
+        except asyncio.CancelledError:
             self.results[company] = {
-                'status': result.get('status', 'unknown'),
-                'start_time': start_time.isoformat(),
-                'end_time': end_time.isoformat(),
-                'duration_seconds': duration,
-                'extracted_files': result.get('extracted_files', []),
-                'errors': result.get('errors', []),
-                'statistics': result.get('statistics', {})
-            }
-            
-            logger.info(f"Extracción completada para {company} en {duration:.2f}s")
-            return self.results[company]
-            
-        except Exception as e:
-            logger.error(f"Error en extracción para {company}: {str(e)}")
-            self.results[company] = {
-                'status': 'error',
-                'error': str(e),
+                'status': STATUS_CANCELLED,
+                'error': 'Extracción cancelada',
                 'timestamp': datetime.now().isoformat()
             }
             raise
             
+        return self._store_result(company, result)
+        
+    async def stream_extractions(self, companies: Optional[List[str]] = None,
+                                 **kwargs) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Ejecuta las extracciones en paralelo y entrega cada resultado apenas termina
+        
+        Yields:
+            Tuplas (empresa, resultado) en orden de finalización
+        """
+        jobs = [self._build_job(company, **kwargs) for company in (companies or self.companies)]
+        for job in jobs:
+            logger.info(f"Iniciando extracción para {job.company}")
+            
+        async for company, result in stream_jobs(self.backend, jobs):
+            yield company, self._store_result(company, result)
+            
     async def run_all_extractions(self, **kwargs) -> Dict[str, Dict[str, Any]]:
         """
         Ejecuta extracciones para todas las empresas registradas
         
+        El tiempo total es el de la empresa más lenta, no la suma.
+        
         Returns:
             Diccionario con resultados de todas las extracciones
         """
-        tasks = []
-        for company in self.extractors.keys():
-            task = asyncio.create_task(
-                self.run_extraction(company, **kwargs),
-                name=f"extraction_{company}"
-            )
-            tasks.append((company, task))
-            
-        # Ejecutar todas las extracciones en paralelo
         results = {}
-        for company, task in tasks:
-            try:
-                results[company] = await task
-            except Exception as e:
-                logger.error(f"Fallo en extracción para {company}: {str(e)}")
-                results[company] = {
-                    'status': 'error',
-                    'error': str(e)
-                }
+        async for company, result in self.stream_extractions(**kwargs):
+            results[company] = result
                 
         return results
         
@@ -170,20 +205,15 @@ async def main():
     
     try:
         # Inicializar orquestador
-        orchestrator = ExtractorMercOrchestrator()
-        
-        # Registrar extractores
-        afinia_extractor = AfiniaExtractor(
-            company="afinia",
-            headless=True
+        timeout = os.getenv('EXTRACTION_TIMEOUT_SECONDS')
+        orchestrator = ExtractorMercOrchestrator(
+            backend=os.getenv('EXTRACTION_BACKEND', 'process'),
+            default_timeout=float(timeout) if timeout else None
         )
-        orchestrator.register_extractor("afinia", afinia_extractor)
         
-        aire_extractor = AireExtractor(
-            company="aire", 
-            headless=True
-        )
-        orchestrator.register_extractor("aire", aire_extractor)
+        # Registrar extractores (se construyen dentro de su propio proceso)
+        orchestrator.register_extractor_factory("afinia", AfiniaExtractor)
+        orchestrator.register_extractor_factory("aire", AireExtractor, headless=True)
         
         # Ejecutar extracciones
         logger.info("Ejecutando extracciones para todas las empresas...")
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rate Limiter - Limitador Adaptativo por Host
+============================================
+
+La implementación vive en ``legacy/Legacy_OV/utils/rate_limiter.py``;
+este módulo la expone en el layout ``src/`` sin duplicarla.
+"""
+
+import sys
+
+from .shared_loader import load_shared_util
+
+sys.modules[__name__] = load_shared_util("rate_limiter")
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Run Profiler - Perfilado Opcional por Corrida
+=============================================
+
+La implementación vive en ``legacy/Legacy_OV/utils/run_profiler.py``;
+este módulo la expone en el layout ``src/`` sin duplicarla.
+"""
+
+import sys
+
+from .shared_loader import load_shared_util
+
+sys.modules[__name__] = load_shared_util("run_profiler")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Shared Loader - Utilidades compartidas con Legacy_OV
+====================================================
+
+Algunas utilidades (limitador de tasa, perfilador) tienen una única
+implementación en ``legacy/Legacy_OV/utils``, que en el layout legacy se
+despliega como ``src.utils``. Este módulo la carga por ruta para que el
+layout ``src/`` la importe sin mantener una copia.
+
+Cada módulo se carga una sola vez por proceso, así ``utils.X`` y
+``src.utils.X`` comparten el mismo estado (singletons, locks).
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+LEGACY_UTILS_DIR = Path(__file__).resolve().parents[2] / "legacy" / "Legacy_OV" / "utils"
+
+
+def load_shared_util(name: str) -> ModuleType:
+    """
+    Cargar ``legacy/Legacy_OV/utils/<name>.py`` como módulo único del proceso
+
+    Args:
+        name: Nombre del módulo sin extensión (ej. ``rate_limiter``)
+    """
+    module_name = f"legacy_ov_utils_{name}"
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    path = LEGACY_UTILS_DIR / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"[shared_loader][load_shared_util] No se encontró {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(module_name, None)
+        raise
+    return module
+
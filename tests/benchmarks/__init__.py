@@ -0,0 +1,3 @@
+"""
+Benchmarks offline contra un portal Mercurio / Oficina Virtual simulado
+"""
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de Cargadores a Base de Datos
+=============================================
+
+Compara las rutas de inserción de PQR con datos sintéticos reproducibles:
+
+  bulk      BulkDatabaseLoader.load_json_files_to_database  (PostgreSQL, data_general)
+  direct    DirectJSONToRDSLoader.process_json_file         (PostgreSQL, data_general)
+  service   DatabaseService.load_data_from_json             (MySQL/pymysql, data.ov_*)
+  manager   AfiniaDatabaseManager.insert_pqr_record         (MySQL/pymysql, afinia_pqr)
+
+Las dos primeras usan el esquema de RDSConnectionConfig.create_schema_and_tables
+sobre un PostgreSQL local. DatabaseService y AfiniaDatabaseManager están
+escritos para MySQL (pymysql, backticks, ON DUPLICATE KEY UPDATE), así que
+solo se ejecutan si se indica un MySQL local con --mysql-host.
+
+Por cada cargador, escala (1k/10k/100k) y proporción de duplicados se
+reporta: registros/s, sentencias SQL (round-trips) por registro, commits y
+conexiones abiertas. Los duplicados se precargan con el mismo cargador
+antes de la medición, de modo que cada uno los detecta con su propia regla.
+
+Uso:
+  python tests/benchmarks/bench_loaders.py --pg-database extractor_bench
+  python tests/benchmarks/bench_loaders.py --scales 1000,10000,100000 --duplicate-ratios 0,0.1,0.5
+  python tests/benchmarks/bench_loaders.py --loaders service manager --mysql-host 127.0.0.1 --mysql-password bench
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import importlib.util
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import Pool
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+
+try:
+    import pymysql
+    PYMYSQL_AVAILABLE = True
+except ImportError:
+    PYMYSQL_AVAILABLE = False
+
+BENCH_DIR = Path(__file__).resolve().parent
+project_root = BENCH_DIR.parent.parent
+
+sys.path.insert(0, str(BENCH_DIR))
+
+from run_benchmarks import LEGACY_OV_ROOT, import_legacy_ov_as_src
+
+LOADERS = ["bulk", "direct", "service", "manager"]
+PG_LOADERS = ("bulk", "direct")
+
+# Columnas que BulkDatabaseLoader escribe y que el DDL base no declara
+# (en RDS se agregaron después de create_schema_and_tables)
+PG_EXTRA_COLUMNS = {
+    'lectura': 'VARCHAR(50)',
+    'documento_prueba': 'VARCHAR(255)',
+    'cuerpo_reclamacion': 'TEXT',
+    'finalizar': 'VARCHAR(50)',
+    'adjuntar_archivo': 'VARCHAR(255)',
+    'numero_reclamo_sgc': 'VARCHAR(50)',
+    'comentarios': 'TEXT',
+    'fecha_actualizacion': 'TIMESTAMP'
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoaderRun:
+    """Resultado de un cargador en una escala y proporción de duplicados"""
+    loader: str
+    scale: int
+    duplicate_ratio: float
+    status: str = "ok"                   # ok | error | omitido
+    inserted: int = 0
+    skipped: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    rows_per_s: float = 0.0
+    statements: int = 0
+    statements_per_record: float = 0.0
+    commits: int = 0
+    connections: int = 0
+    note: str = ""
+
+
+class RoundTripCounter:
+    """
+    Cuenta sentencias, commits y conexiones de SQLAlchemy y pymysql
+
+    Cada sentencia enviada cuenta como un round-trip (executemany de
+    SQLAlchemy cuenta como uno).
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.connections = 0
+        self._restore: List[Callable[[], None]] = []
+
+    def _on_execute(self, *args, **kwargs):
+        self.statements += 1
+
+    def _on_commit(self, *args, **kwargs):
+        self.commits += 1
+
+    def _on_connect(self, *args, **kwargs):
+        self.connections += 1
+
+    def __enter__(self) -> 'RoundTripCounter':
+        if SQLALCHEMY_AVAILABLE:
+            listeners = [(Engine, "before_cursor_execute", self._on_execute),
+                         (Engine, "commit", self._on_commit),
+                         (Pool, "connect", self._on_connect)]
+            for target, name, fn in listeners:
+                event.listen(target, name, fn)
+                self._restore.append(lambda t=target, n=name, f=fn: event.remove(t, n, f))
+
+        if PYMYSQL_AVAILABLE:
+            counter = self
+            cursor_execute = pymysql.cursors.Cursor.execute
+            connection_commit = pymysql.connections.Connection.commit
+            connect = pymysql.connect
+
+            def execute(cursor, *args, **kwargs):
+                counter.statements += 1
+                return cursor_execute(cursor, *args, **kwargs)
+
+            def commit(connection):
+                counter.commits += 1
+                return connection_commit(connection)
+
+            def counted_connect(*args, **kwargs):
+                counter.connections += 1
+                return connect(*args, **kwargs)
+
+            pymysql.cursors.Cursor.execute = execute
+            pymysql.connections.Connection.commit = commit
+            pymysql.connect = counted_connect
+
+            def restore():
+                pymysql.cursors.Cursor.execute = cursor_execute
+                pymysql.connections.Connection.commit = connection_commit
+                pymysql.connect = connect
+            self._restore.append(restore)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for restore in reversed(self._restore):
+            restore()
+        self._restore.clear()
+
+
+# ----------------------------------------------------------------------
+# Datos sintéticos
+# ----------------------------------------------------------------------
+
+TIPOS_PQR = ["Reclamo por facturación", "Pérdidas Técnicas", "Calidad del servicio", "Solicitud de revisión"]
+ESTADOS = ["Pendiente", "En trámite", "Terminado"]
+CANALES = ["Correo electrónico", "Dirección física", "Oficina Virtual"]
+
+
+def synthetic_record(company: str, index: int, rng: random.Random) -> Dict[str, Any]:
+    """Registro con la misma forma que el JSON que escriben los procesadores de PQR"""
+    prefix = "1" if company == "afinia" else "2"
+    sgc = f"{prefix}{index:08d}"
+    fecha = datetime(2025, 1, 1, 8, 0) + timedelta(minutes=index * 7)
+    return {
+        'numero_radicado': f"RE{prefix}{index:09d}",
+        'fecha': fecha.strftime("%Y/%m/%d %H:%M"),
+        'estado_solicitud': ESTADOS[index % len(ESTADOS)],
+        'tipo_pqr': TIPOS_PQR[index % len(TIPOS_PQR)],
+        'nic': str(7000000 + index),
+        'nombres_apellidos': f"USUARIO SINTETICO {index}",
+        'telefono': f"60{rng.randint(10000000, 99999999)}",
+        'celular': f"3{rng.randint(100000000, 999999999)}",
+        'correo_electronico': f"usuario{index}@correo.com",
+        'documento_identidad': str(1040000000 + index),
+        'canal_respuesta': CANALES[index % len(CANALES)],
+        'lectura': str(rng.randint(1000, 99999)),
+        'documento_prueba': f"{index:08x}-0000-4000-8000-{index:012x}.pdf",
+        'cuerpo_reclamacion': "Reclamación sintética de benchmark. " * rng.randint(3, 12),
+        'finalizar': "Sí",
+        'adjuntar_archivo': "",
+        'numero_reclamo_sgc': sgc,
+        'comentarios': "",
+        'sgc_number': sgc,
+        'extraction_timestamp': datetime.now().isoformat(),
+        'page_url': f"https://oficinavirtual.{company}.com.co/#Detail/{index}"
+    }
+
+
+class Dataset:
+    """Registros de una escala escritos en disco en los formatos que cada cargador lee"""
+
+    def __init__(self, company: str, scale: int, root: Path, seed: int = 42):
+        rng = random.Random(seed)
+        self.company = company
+        self.scale = scale
+        self.records = [synthetic_record(company, index, rng) for index in range(1, scale + 1)]
+        self.root = root / f"{company}_{scale}"
+        self.files_dir = self.root / "processed"
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.files: List[Path] = []
+        for index, record in enumerate(self.records, 1):
+            path = self.files_dir / f"{record['sgc_number']}_data_{index:06d}.json"
+            if not path.exists():
+                path.write_text(json.dumps(record, ensure_ascii=False), encoding='utf-8')
+            self.files.append(path)
+
+    def array_file(self, count: int) -> Path:
+        """Archivo JSON con los primeros `count` registros (formato de DirectJSONToRDSLoader/DatabaseService)"""
+        path = self.root / f"records_{count}.json"
+        if not path.exists():
+            path.write_text(json.dumps(self.records[:count], ensure_ascii=False), encoding='utf-8')
+        return path
+
+
+# ----------------------------------------------------------------------
+# Cargadores
+# ----------------------------------------------------------------------
+
+def _load_script_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class LoaderAdapter:
+    """Interfaz común: reset() deja la tabla vacía, load(n) carga los primeros n registros"""
+
+    name = ""
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+        self.company = dataset.company
+
+    def reset(self):
+        raise NotImplementedError
+
+    def load(self, count: int) -> Tuple[int, int, int]:
+        """Returns: (insertados/actualizados, omitidos, errores)"""
+        raise NotImplementedError
+
+
+class BulkLoaderAdapter(LoaderAdapter):
+    name = "bulk"
+
+    def __init__(self, dataset: Dataset, pg_engine):
+        super().__init__(dataset)
+        from src.services.bulk_database_loader import BulkDatabaseLoader
+        self.loader = BulkDatabaseLoader()
+        self.pg_engine = pg_engine
+
+    def reset(self):
+        _truncate_pg(self.pg_engine, self.company)
+
+    def load(self, count: int) -> Tuple[int, int, int]:
+        stats = self.loader.load_json_files_to_database(self.dataset.files[:count], self.company)
+        return stats.inserted_records + stats.updated_records, stats.skipped_duplicates, stats.error_records
+
+
+class DirectLoaderAdapter(LoaderAdapter):
+    name = "direct"
+
+    def __init__(self, dataset: Dataset, pg_engine):
+        super().__init__(dataset)
+        Path("logs").mkdir(exist_ok=True)  # el script abre su log al importarse
+        module = _load_script_module("direct_json_to_rds_loader",
+                                     project_root / "scripts" / "direct_json_to_rds_loader.py")
+        self.loader = module.DirectJSONToRDSLoader()
+        self.pg_engine = pg_engine
+
+    def reset(self):
+        _truncate_pg(self.pg_engine, self.company)
+
+    def load(self, count: int) -> Tuple[int, int, int]:
+        # Igual que process_directory: primero la caché de SGC existentes
+        self.loader.load_existing_sgcs(self.company)
+        stats = self.loader.process_json_file(self.dataset.array_file(count), self.company)
+        return stats.processed_records, stats.duplicated_records, stats.failed_records
+
+
+class ServiceLoaderAdapter(LoaderAdapter):
+    name = "service"
+
+    def __init__(self, dataset: Dataset, mysql_config: Dict[str, Any]):
+        super().__init__(dataset)
+        from src.services.database_service import DatabaseService
+        self.service = DatabaseService(config=dict(mysql_config, database="data"))
+        self.mysql_config = mysql_config
+        schema = DatabaseService.TABLE_SCHEMAS[f"ov_{self.company}"]
+        _mysql_execute(mysql_config, ["CREATE DATABASE IF NOT EXISTS data",
+                                      _mysql_table_ddl(f"data.{schema['table_name']}", schema['fields'])])
+
+    def reset(self):
+        _mysql_execute(self.mysql_config, [f"TRUNCATE TABLE data.ov_{self.company}"])
+
+    def load(self, count: int) -> Tuple[int, int, int]:
+        result = self.service.load_data_from_json(self.company, str(self.dataset.array_file(count)))
+        return result.records_inserted, result.records_skipped, len(result.errors)
+
+
+class ManagerLoaderAdapter(LoaderAdapter):
+    name = "manager"
+
+    def __init__(self, dataset: Dataset, mysql_config: Dict[str, Any]):
+        super().__init__(dataset)
+        if self.company != "afinia":
+            raise ImportError("AfiniaDatabaseManager solo existe para afinia")
+        from src.processors.afinia.database_manager import AfiniaDatabaseManager
+        config = dict(mysql_config, charset='utf8mb4', connect_timeout=10,
+                      read_timeout=60, write_timeout=60)
+        self.manager = AfiniaDatabaseManager(config)
+        self.mysql_config = mysql_config
+        if not self.manager.create_pqr_table():
+            raise RuntimeError("No se pudo crear la tabla de AfiniaDatabaseManager")
+
+    def reset(self):
+        _mysql_execute(self.mysql_config, [f"TRUNCATE TABLE `{self.manager.schema['table_name']}`"])
+
+    def load(self, count: int) -> Tuple[int, int, int]:
+        loaded = errors = 0
+        for record in self.dataset.records[:count]:
+            if self.manager.insert_pqr_record(dict(record)) is not None:
+                loaded += 1
+            else:
+                errors += 1
+        # Los duplicados se resuelven con ON DUPLICATE KEY UPDATE: no hay omitidos
+        return loaded, 0, errors
+
+
+def _truncate_pg(engine, company: str):
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE TABLE data_general.ov_{company} RESTART IDENTITY"))
+
+
+def _mysql_execute(config: Dict[str, Any], statements: List[str]):
+    connection = pymysql.connect(host=config['host'], port=config['port'], user=config['username'],
+                                 password=config['password'], database=config['database'])
+    try:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _mysql_table_ddl(table: str, fields: Dict[str, Dict[str, Any]]) -> str:
+    """DDL MySQL a partir de DatabaseService.TABLE_SCHEMAS"""
+    definitions = []
+    for name, spec in fields.items():
+        definition = f"{name} {spec['type']}"
+        if spec.get('auto_increment'):
+            definition += " AUTO_INCREMENT"
+        if spec.get('default'):
+            definition += f" DEFAULT {spec['default']}"
+        definitions.append(definition)
+    primary = [name for name, spec in fields.items() if spec.get('primary_key')]
+    if primary:
+        definitions.append(f"PRIMARY KEY ({', '.join(primary)})")
+    definitions += [f"INDEX idx_{name} ({name})" for name, spec in fields.items() if spec.get('index')]
+    return f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(definitions)}) DEFAULT CHARSET=utf8mb4"
+
+
+# ----------------------------------------------------------------------
+# Preparación del entorno
+# ----------------------------------------------------------------------
+
+def configure_environment(args) -> Optional[str]:
+    """Apuntar RDS_* al PostgreSQL local e importar Legacy_OV como `src`"""
+    os.environ.update({
+        'RDS_HOST': args.pg_host,
+        'RDS_PORT': str(args.pg_port),
+        'RDS_DATABASE': args.pg_database,
+        'RDS_USERNAME': args.pg_user,
+        'RDS_PASSWORD': args.pg_password,
+        'RDS_SSLMODE': 'disable',
+        'TRACE_EXPORT': 'off'
+    })
+    legacy_root = Path(args.legacy_root)
+    import_legacy_ov_as_src(legacy_root)
+    # Módulos que importan `config.*` / `services.*` sin el prefijo src
+    sys.path.insert(0, str(legacy_root))
+    return f"postgresql://{args.pg_user}:{args.pg_password}@{args.pg_host}:{args.pg_port}/{args.pg_database}"
+
+
+def prepare_postgres(dsn: str):
+    """Crear esquema y tablas con RDSConnectionConfig y completar columnas que escriben los cargadores"""
+    from src.config.rds_config import RDSConnectionManager
+
+    if not RDSConnectionManager().get_config().create_schema_and_tables():
+        raise RuntimeError("create_schema_and_tables falló (ver log)")
+
+    engine = create_engine(dsn)
+    with engine.begin() as connection:
+        for table in ("ov_afinia", "ov_aire"):
+            for column, column_type in PG_EXTRA_COLUMNS.items():
+                connection.execute(text(
+                    f"ALTER TABLE data_general.{table} ADD COLUMN IF NOT EXISTS {column} {column_type}"))
+    return engine
+
+
+def build_adapter(name: str, dataset: Dataset, pg_engine, mysql_config: Optional[Dict[str, Any]]) -> LoaderAdapter:
+    if name in PG_LOADERS:
+        if pg_engine is None:
+            raise ImportError("PostgreSQL no disponible")
+        adapter_class = BulkLoaderAdapter if name == "bulk" else DirectLoaderAdapter
+        return adapter_class(dataset, pg_engine)
+    if mysql_config is None:
+        raise ImportError("usa pymysql/MySQL; indicar --mysql-host para medirlo")
+    adapter_class = ServiceLoaderAdapter if name == "service" else ManagerLoaderAdapter
+    return adapter_class(dataset, mysql_config)
+
+
+def run_loader(adapter: LoaderAdapter, scale: int, duplicate_ratio: float) -> LoaderRun:
+    """Precargar los duplicados (sin medir) y medir la carga completa"""
+    run = LoaderRun(loader=adapter.name, scale=scale, duplicate_ratio=duplicate_ratio)
+    adapter.reset()
+    duplicates = int(scale * duplicate_ratio)
+    if duplicates:
+        adapter.load(duplicates)
+
+    with RoundTripCounter() as counter:
+        started = time.perf_counter()
+        loaded, skipped, errors = adapter.load(scale)
+        elapsed = time.perf_counter() - started
+
+    run.inserted, run.skipped, run.errors = loaded, skipped, errors
+    run.elapsed_s = round(elapsed, 3)
+    run.rows_per_s = round(scale / elapsed, 1) if elapsed else 0.0
+    run.statements = counter.statements
+    run.statements_per_record = round(counter.statements / scale, 2)
+    run.commits = counter.commits
+    run.connections = counter.connections
+    if errors:
+        run.status = "error"
+    return run
+
+
+def _print_table(runs: List[LoaderRun]):
+    print(f"\n{'cargador':<9}{'escala':>8}{'dup':>6}{'reg/s':>10}{'sent/reg':>10}"
+          f"{'commits':>9}{'conex':>7}{'ins':>8}{'omit':>8}{'err':>6}")
+    for run in runs:
+        if run.status == "omitido":
+            print(f"{run.loader:<9}{run.scale:>8}{run.duplicate_ratio:>6.0%}  omitido: {run.note}")
+            continue
+        print(f"{run.loader:<9}{run.scale:>8}{run.duplicate_ratio:>6.0%}{run.rows_per_s:>10.1f}"
+              f"{run.statements_per_record:>10.2f}{run.commits:>9}{run.connections:>7}"
+              f"{run.inserted:>8}{run.skipped:>8}{run.errors:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark de cargadores a base de datos')
+    parser.add_argument('--loaders', nargs='*', choices=LOADERS, default=LOADERS)
+    parser.add_argument('--company', choices=['afinia', 'aire'], default='afinia')
+    parser.add_argument('--scales', default='1000,10000', help='Escalas separadas por coma (ej. 1000,10000,100000)')
+    parser.add_argument('--duplicate-ratios', default='0,0.5', help='Proporciones de duplicados separadas por coma')
+    parser.add_argument('--pg-host', default='localhost')
+    parser.add_argument('--pg-port', type=int, default=5432)
+    parser.add_argument('--pg-user', default='postgres')
+    parser.add_argument('--pg-password', default='postgres')
+    parser.add_argument('--pg-database', default='extractor_bench')
+    parser.add_argument('--mysql-host', help='MySQL local para DatabaseService/AfiniaDatabaseManager')
+    parser.add_argument('--mysql-port', type=int, default=3306)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='')
+    parser.add_argument('--mysql-database', default='extractor_bench')
+    parser.add_argument('--legacy-root', default=str(LEGACY_OV_ROOT), help='Directorio de Legacy_OV (se importa como src)')
+    parser.add_argument('--data-dir', default=None, help='Directorio para los JSON sintéticos (se reutiliza)')
+    parser.add_argument('--output', '-o', type=str, help='Archivo JSON para el reporte')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not SQLALCHEMY_AVAILABLE:
+        print("[ERROR] sqlalchemy es necesario para el benchmark de cargadores")
+        return 1
+
+    scales = [int(value) for value in args.scales.split(',') if value]
+    ratios = [float(value) for value in args.duplicate_ratios.split(',') if value]
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="bench_cargadores_"))
+    dsn = configure_environment(args)
+
+    pg_engine = None
+    if any(name in PG_LOADERS for name in args.loaders):
+        try:
+            pg_engine = prepare_postgres(dsn)
+        except Exception as e:
+            print(f"[ERROR] PostgreSQL local no disponible ({e}); se omiten {', '.join(PG_LOADERS)}")
+
+    mysql_config = None
+    if args.mysql_host:
+        if not PYMYSQL_AVAILABLE:
+            print("[ERROR] pymysql no está instalado; se omiten service y manager")
+        else:
+            mysql_config = {'host': args.mysql_host, 'port': args.mysql_port, 'username': args.mysql_user,
+                            'password': args.mysql_password, 'database': args.mysql_database}
+
+    runs: List[LoaderRun] = []
+    for scale in scales:
+        print(f"[DATOS] Generando {scale} registros sintéticos de {args.company}...")
+        dataset = Dataset(args.company, scale, data_dir)
+        for name in args.loaders:
+            try:
+                adapter = build_adapter(name, dataset, pg_engine, mysql_config)
+            except Exception as e:
+                runs += [LoaderRun(loader=name, scale=scale, duplicate_ratio=ratio, status="omitido", note=str(e))
+                         for ratio in ratios]
+                continue
+            for ratio in ratios:
+                print(f"[DATOS] {name}: {scale} registros, {ratio:.0%} duplicados")
+                try:
+                    runs.append(run_loader(adapter, scale, ratio))
+                except Exception as e:
+                    runs.append(LoaderRun(loader=name, scale=scale, duplicate_ratio=ratio,
+                                          status="error", note=f"{type(e).__name__}: {e}"))
+
+    _print_table(runs)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        report = {'company': args.company, 'scales': scales, 'duplicate_ratios': ratios,
+                  'data_dir': str(data_dir), 'runs': [asdict(run) for run in runs]}
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    measured = [run for run in runs if run.status != "omitido"]
+    if not measured or any(run.status == "error" for run in measured):
+        print("[ERROR] Algunos cargadores fallaron o no hubo ninguno disponible")
+        return 1
+    print("\n[EXITOSO] Benchmark de cargadores completado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del Logging Unificado
+=====================================
+
+Mide el costo por record en el hilo que registra con los handlers de
+config/unified_logging_config.py (archivo rotativo + consola):
+
+  sync        Handlers síncronos (LOG_ASYNC=0): limpieza, formato y escritura en el hilo
+  async       QueueHandler/QueueListener: el hilo solo encola
+  async_json  Igual que async con LOG_FORMAT=json
+  baseline    El módulo en otra revisión de git (--baseline-ref), para comparar antes/después
+
+Por modo se reporta: µs por record en el hilo (promedio/p50/p95/p99),
+tiempo total hasta que el listener termina de escribir y records DEBUG
+descartados por cola llena (LOG_QUEUE_SIZE). La consola se redirige a /dev/null.
+
+Uso:
+  python tests/benchmarks/bench_logging.py
+  python tests/benchmarks/bench_logging.py --records 50000 --baseline-ref HEAD~1
+  python tests/benchmarks/bench_logging.py --modes async async_json --output data/benchmarks/logging.json
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+project_root = BENCH_DIR.parent.parent
+MODULE_PATH = Path("legacy") / "Legacy_OV" / "config" / "unified_logging_config.py"
+
+MODES = ["sync", "async", "async_json", "baseline"]
+
+
+@dataclass
+class LoggingRun:
+    """Resultado de un modo de logging"""
+    mode: str
+    records: int
+    caller_avg_us: float = 0.0
+    caller_p50_us: float = 0.0
+    caller_p95_us: float = 0.0
+    caller_p99_us: float = 0.0
+    total_s: float = 0.0
+    records_per_s: float = 0.0
+    dropped: int = 0
+    status: str = "ok"
+    note: str = ""
+
+
+def load_module(name: str, path: Path):
+    """Carga unified_logging_config desde un archivo sin importar el paquete src"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_baseline(ref: str, work_dir: Path):
+    """Extrae el módulo de otra revisión con git show"""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:{MODULE_PATH.as_posix()}"],
+        cwd=project_root, capture_output=True, text=True, check=True
+    ).stdout
+    path = work_dir / "unified_logging_config_baseline.py"
+    path.write_text(source, encoding='utf-8')
+    return load_module("unified_logging_config_baseline", path)
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    index = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(index)]
+
+
+def run_mode(mode: str, module, records: int, work_dir: Path, console) -> LoggingRun:
+    """Registra `records` mensajes con la mezcla habitual del extractor"""
+    run = LoggingRun(mode=mode, records=records)
+    logs_dir = work_dir / mode
+    logs_dir.mkdir(parents=True, exist_ok=True)
+
+    kwargs: Dict[str, Any] = {}
+    if mode != "baseline":
+        kwargs = {'async_logging': mode != "sync", 'json_output': mode == "async_json"}
+
+    # StreamHandler() toma sys.stderr al crearse: la consola queda en `console`
+    stderr = sys.stderr
+    sys.stderr = console
+    try:
+        unified = module.UnifiedLogger(str(logs_dir), **kwargs)
+        logger = unified.get_logger('afinia', f"bench_{mode}")
+        samples: List[float] = []
+
+        started = time.perf_counter()
+        for i in range(records):
+            t0 = time.perf_counter_ns()
+            if i % 4 == 0:
+                logger.info("[afinia_pqr_processor][process_pqr] Procesando PQR %s de %s", i, records)
+            elif i % 4 == 1:
+                logger.info(f"[EXITOSO] PQR {i} guardado en data/downloads/afinia/{i}.json")
+            elif i % 4 == 2:
+                logger.debug("Selector encontrado: %s", "a.md-primary")
+            else:
+                logger.warning("Elemento no encontrado, reintentando (%d/%d)", i % 3, 3)
+            samples.append((time.perf_counter_ns() - t0) / 1000)
+
+        # Esperar a que el listener escriba todo (no-op en modo síncrono)
+        if hasattr(module, 'flush_logging'):
+            module.flush_logging()
+        run.total_s = round(time.perf_counter() - started, 3)
+
+        if hasattr(module, '_pipeline'):
+            run.dropped = module._pipeline.dropped_records()
+    finally:
+        sys.stderr = stderr
+
+    ordered = sorted(samples)
+    run.caller_avg_us = round(sum(ordered) / len(ordered), 2)
+    run.caller_p50_us = round(percentile(ordered, 50), 2)
+    run.caller_p95_us = round(percentile(ordered, 95), 2)
+    run.caller_p99_us = round(percentile(ordered, 99), 2)
+    run.records_per_s = round(records / run.total_s, 1) if run.total_s else 0.0
+    return run
+
+
+def _print_table(runs: List[LoggingRun]):
+    print("\n" + "=" * 96)
+    print(f"{'MODO':<12}{'RECORDS':>9}{'AVG µs':>10}{'P50 µs':>10}{'P95 µs':>10}{'P99 µs':>10}"
+          f"{'TOTAL s':>10}{'REC/S':>12}{'DESCART.':>10}")
+    print("-" * 96)
+    for run in runs:
+        if run.status != "ok":
+            print(f"{run.mode:<12}{run.records:>9}  {run.status}: {run.note}")
+            continue
+        print(f"{run.mode:<12}{run.records:>9}{run.caller_avg_us:>10}{run.caller_p50_us:>10}"
+              f"{run.caller_p95_us:>10}{run.caller_p99_us:>10}{run.total_s:>10}"
+              f"{run.records_per_s:>12}{run.dropped:>10}")
+    print("=" * 96)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark del logging unificado')
+    parser.add_argument('--modes', nargs='*', choices=MODES, default=["sync", "async", "async_json"])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--baseline-ref', help='Revisión de git para el modo baseline (ej. HEAD~1)')
+    parser.add_argument('--output', '-o', type=str, help='Archivo JSON para el reporte')
+    args = parser.parse_args()
+
+    modes = list(args.modes)
+    if args.baseline_ref and "baseline" not in modes:
+        modes.insert(0, "baseline")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_logging_"))
+    current = load_module("unified_logging_config_bench", project_root / MODULE_PATH)
+
+    console = open(os.devnull, 'w', encoding='utf-8')
+    runs: List[LoggingRun] = []
+    for mode in modes:
+        module = current
+        if mode == "baseline":
+            if not args.baseline_ref:
+                runs.append(LoggingRun(mode=mode, records=args.records, status="omitido",
+                                       note="indique --baseline-ref"))
+                continue
+            try:
+                module = load_baseline(args.baseline_ref, work_dir)
+            except (subprocess.CalledProcessError, OSError) as e:
+                runs.append(LoggingRun(mode=mode, records=args.records, status="error", note=str(e)))
+                continue
+
+        print(f"[DATOS] {mode}: {args.records} records")
+        runs.append(run_mode(mode, module, args.records, work_dir, console))
+
+    if hasattr(current, 'shutdown_logging'):
+        current.shutdown_logging()
+    console.close()
+
+    _print_table(runs)
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps({
+            'records': args.records,
+            'baseline_ref': args.baseline_ref,
+            'runs': [asdict(run) for run in runs]
+        }, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"[EXITOSO] Reporte guardado en {output_path}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
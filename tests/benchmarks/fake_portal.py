@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Portal Simulado de Mercurio y Oficina Virtual
+=============================================
+
+Servidor local (FastAPI + uvicorn) que reproduce lo que los extractores
+tocan de los portales reales, para medir rendimiento sin VPN ni
+credenciales:
+
+- Mercurio: formulario de login (txtUsuario/usuario, txtClave/contrasena,
+  btnIniciarSesion/ingresar), menú #Bar4 / #menuItem4_7 con popup de
+  consultas especiales, parámetros param0/param1 y descarga Excel
+  (#btnGenerarExcel y #cmd_ejecuta_excel)
+- Oficina Virtual: grilla md-data-table paginada con botones del ojo
+  (a.md-primary[tooltip="Ver PQR"] -> #Detail/<id>), página de detalle con
+  NumeroReclamoSGC, campos td.text-td-label + td.ng-binding y adjunto
+  "Documento/prueba" descargable
+
+Latencia y errores son configurables (PortalConfig) para reproducir un
+portal lento o inestable. Los datos se generan de forma determinística a
+partir del índice del registro.
+
+Uso:
+  python tests/benchmarks/fake_portal.py --port 8765 --records 200 --latency-ms 150 --error-rate 0.02
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import io
+import csv
+import time
+import socket
+import random
+import asyncio
+import argparse
+import threading
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from html import escape
+from typing import Dict, Optional, Tuple
+
+try:
+    import uvicorn
+    from fastapi import FastAPI, Request
+    from fastapi.responses import HTMLResponse, RedirectResponse, Response
+    FASTAPI_AVAILABLE = True
+except ImportError:
+    FASTAPI_AVAILABLE = False
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+CONSULTAS = {
+    "00000015": "PQR Escritas Pendientes",
+    "00000066": "PQR Verbales Pendientes",
+    "00000014": "RRA Pendientes",
+    "00000013": "RRA Recibidas"
+}
+
+TIPOS_PQR = ["Reclamo por facturación", "Pérdidas Técnicas", "Calidad del servicio", "Solicitud de revisión"]
+ESTADOS = ["Pendiente", "En trámite", "Terminado"]
+
+
+@dataclass
+class PortalConfig:
+    """Comportamiento del portal simulado"""
+    records: int = 100                       # Registros PQR en la grilla
+    page_size: int = 10                      # Filas por página de la grilla
+    excel_rows: int = 500                    # Filas de cada reporte Excel de Mercurio
+    latency_ms: float = 100.0                # Latencia base por petición
+    jitter_ms: float = 50.0                  # Variación uniforme adicional
+    excel_ms_per_row: float = 0.5            # Tiempo de generación del Excel por fila
+    error_rate: float = 0.0                  # Probabilidad de HTTP 500
+    error_paths: Tuple[str, ...] = ("/ov/", "/mercurio/excel")  # Prefijos afectados por errores
+    seed: int = 42
+    username: str = "bench"
+    password: str = "bench"
+
+
+@dataclass
+class PortalStats:
+    """Contadores del servidor para validar el benchmark"""
+    requests: int = 0
+    injected_errors: int = 0
+    logins: int = 0
+    excel_downloads: int = 0
+    detail_views: int = 0
+    attachments: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+
+class FakePortal:
+    """
+    Datos y páginas del portal simulado
+
+    Las páginas se construyen como HTML plano, independiente del servidor,
+    para poder inspeccionarlas sin levantar FastAPI.
+    """
+
+    def __init__(self, config: Optional[PortalConfig] = None):
+        self.config = config or PortalConfig()
+        self.stats = PortalStats()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Datos
+    # ------------------------------------------------------------------
+
+    def record(self, company: str, index: int) -> Dict[str, str]:
+        """Registro PQR determinístico para un índice (1..records)"""
+        radicado = date(2025, 1, 1) + timedelta(days=index % 270)
+        prefix = "1" if company == "afinia" else "2"
+        return {
+            "id": str(index),
+            "numero_reclamo_sgc": f"{prefix}{index:08d}",
+            "nic": f"{7000000 + index * 7}",
+            "fecha": radicado.strftime("%d/%m/%Y"),
+            "documento_identidad": f"{1040000000 + index * 13}",
+            "nombres_apellidos": f"USUARIO BENCHMARK {index}",
+            "tipo_pqr": TIPOS_PQR[index % len(TIPOS_PQR)],
+            "numero_radicado": f"RAD-{company.upper()}-{index:06d}",
+            "estado_solicitud": ESTADOS[index % len(ESTADOS)],
+            "documento_prueba": f"{index:08x}-0000-4000-8000-{index:012x}.pdf"
+        }
+
+    def next_delay(self, path: str) -> float:
+        """Segundos de latencia simulada para una petición"""
+        with self._lock:
+            jitter = self._random.uniform(0, self.config.jitter_ms)
+        return (self.config.latency_ms + jitter) / 1000.0
+
+    def should_fail(self, path: str) -> bool:
+        """Decidir si se inyecta un error en esta petición"""
+        if self.config.error_rate <= 0 or not path.startswith(self.config.error_paths):
+            return False
+        with self._lock:
+            return self._random.random() < self.config.error_rate
+
+    def count(self, path: str, **counters):
+        with self._lock:
+            self.stats.requests += 1
+            key = "/".join(path.split("/")[:3])
+            self.stats.by_path[key] = self.stats.by_path.get(key, 0) + 1
+            for name, value in counters.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    # ------------------------------------------------------------------
+    # Mercurio
+    # ------------------------------------------------------------------
+
+    def login_page(self) -> str:
+        # Cada input satisface a la vez los selectores de MercurioAdapter
+        # (txtUsuario/txtClave/btnIniciarSesion) y de MercurioReportDownloader
+        # (#usuario/#contrasena/#ingresar)
+        return _page("Mercurio - Ingreso", """
+<form id="frmLogin" method="get" action="principal.jsp">
+  <input type="text" id="usuario" name="txtUsuario" class="form-control" placeholder="usuario">
+  <input type="password" id="contrasena" name="txtClave" class="form-control">
+  <input type="submit" id="ingresar" name="btnIniciarSesion" value="Ingresar">
+</form>""")
+
+    def main_page(self) -> str:
+        return _page("Mercurio", """
+<div class="navbar menu-principal">
+  <a id="Bar4" href="#">Reportes</a>
+  <div class="menu">
+    <a id="menuItem4_7" href="consultas.jsp" target="_blank">Consultas especiales</a>
+    <a href="PQRs/PQREscritas.aspx">PQRs</a>
+    <a href="RRAs/RRAPendientes.aspx">RRAs</a>
+  </div>
+</div>
+<div class="panel-heading">Bienvenido</div>""")
+
+    def consultas_page(self) -> str:
+        links = "\n".join(
+            f'  <li><a href="servlet/ControllerMercurio?command=consultaEspecial&amp;'
+            f'tipoOperacion=parametros&amp;idCnslta={id_consulta}">{id_consulta}</a> {escape(name)}</li>'
+            for id_consulta, name in CONSULTAS.items())
+        return _page("Consultas especiales", f"<ul>\n{links}\n</ul>")
+
+    def parameters_page(self, id_consulta: str) -> str:
+        name = CONSULTAS.get(id_consulta, "Consulta")
+        return _page(name, f"""
+<form method="get" action="/mercurio/excel">
+  <input type="hidden" name="idCnslta" value="{escape(id_consulta)}">
+  <label>Fecha inicial</label> <input type="text" name="param0">
+  <label>Fecha final</label> <input type="text" name="param1">
+  <input type="submit" id="cmd_ejecuta_excel" name="cmd_ejecuta_excel" value="Excel">
+  <input type="submit" id="btnGenerarExcel" value="Generar Excel">
+</form>""")
+
+    def excel_report(self, id_consulta: str, desde: str, hasta: str) -> Tuple[bytes, str, str]:
+        """
+        Reporte de la consulta
+
+        Returns:
+            (contenido, media type, nombre de archivo)
+        """
+        header = ["NUMERO_RECLAMO_SGC", "NIC", "FECHA_RADICACION", "TIPO_PQR", "ESTADO", "CONSULTA"]
+        rows = []
+        for index in range(1, self.config.excel_rows + 1):
+            record = self.record("afinia", index)
+            rows.append([record["numero_reclamo_sgc"], record["nic"], record["fecha"],
+                         record["tipo_pqr"], record["estado_solicitud"], id_consulta])
+
+        stamp = f"{id_consulta}_{(desde or 'inicio').replace('/', '')}_{(hasta or 'fin').replace('/', '')}"
+        if OPENPYXL_AVAILABLE:
+            workbook = Workbook()
+            sheet = workbook.active
+            sheet.append(header)
+            for row in rows:
+                sheet.append(row)
+            buffer = io.BytesIO()
+            workbook.save(buffer)
+            return (buffer.getvalue(),
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    f"consulta_{stamp}.xlsx")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow(header)
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8'), "text/csv", f"consulta_{stamp}.csv"
+
+    # ------------------------------------------------------------------
+    # Oficina Virtual
+    # ------------------------------------------------------------------
+
+    def grid_page(self, company: str, page: int) -> str:
+        total = self.config.records
+        size = self.config.page_size
+        last_page = max(1, -(-total // size))
+        page = min(max(page, 1), last_page)
+        first = (page - 1) * size + 1
+        last = min(page * size, total)
+
+        rows = []
+        for index in range(first, last + 1):
+            record = self.record(company, index)
+            rows.append(f"""
+    <tr class="md-row">
+      <td class="md-cell">{record['numero_radicado']}</td>
+      <td class="md-cell">{record['nic']}</td>
+      <td class="md-cell">{escape(record['tipo_pqr'])}</td>
+      <td class="md-cell md-actions"><a class="md-primary" tooltip="Ver PQR" href="#Detail/{record['id']}">&#128065;</a></td>
+    </tr>""")
+
+        prev_disabled = " disabled" if page <= 1 else ""
+        next_disabled = " disabled" if page >= last_page else ""
+        # Los procesadores abren href="#Detail/<id>" en una pestaña nueva: el
+        # script redirige ese hash a la página de detalle
+        return _page(f"PQR {company}", f"""
+<script>
+  if (location.hash.indexOf('#Detail/') === 0) {{
+    location.replace('detail/' + location.hash.substring(8));
+  }}
+</script>
+<md-table-container>
+  <table md-table class="md-table">
+    <thead><tr><th>Radicado</th><th>NIC</th><th>Tipo</th><th></th></tr></thead>
+    <tbody>{''.join(rows)}
+    </tbody>
+  </table>
+</md-table-container>
+<md-table-pagination class="md-table-pagination">
+  <div class="label ng-binding">{first} - {last} de {total}</div>
+  <button class="md-icon-button" aria-label="Previous" ng-click="$pagination.previous()"
+          onclick="location.href='pqr?page={page - 1}'"{prev_disabled}>&lsaquo;</button>
+  <button class="md-icon-button" aria-label="Next" ng-click="$pagination.next()"
+          onclick="location.href='pqr?page={page + 1}'"{next_disabled}>&rsaquo;</button>
+</md-table-pagination>""")
+
+    def detail_page(self, company: str, record_id: int) -> str:
+        record = self.record(company, record_id)
+        fields = [
+            ("NIC", record["nic"]),
+            ("Fecha", record["fecha"]),
+            ("Documento de identidad", record["documento_identidad"]),
+            ("Nombres y Apellidos", record["nombres_apellidos"]),
+            ("Tipo de PQR", record["tipo_pqr"]),
+            ("N° Radicado PQR", record["numero_radicado"]),
+            ("Estado Solicitud", record["estado_solicitud"])
+        ]
+        rows = "".join(
+            f'\n  <tr><td class="text-td-label">{escape(label)}</td>'
+            f'<td class="ng-binding">{escape(value)}</td></tr>'
+            for label, value in fields)
+        filename = record["documento_prueba"]
+        return _page(f"Detalle PQR {record['numero_reclamo_sgc']}", f"""
+<table class="table">
+  <tr><td class="text-td-label">Número Reclamo SGC</td>
+      <td><input name="NumeroReclamoSGC" value="{record['numero_reclamo_sgc']}" readonly></td></tr>{rows}
+  <tr><td class="text-td-label">Documento/prueba</td>
+      <td class="ng-binding"><div class="link-archivo ng-binding" role="button"
+           ng-click="descargarAdjunto('{filename}')"
+           onclick="location.href='../adjunto/{filename}'">{filename}</div></td></tr>
+  <tr><td class="text-td-label">Observación</td>
+      <td class="ng-binding">Registro generado por el portal de benchmark</td></tr>
+</table>""")
+
+    def attachment(self, filename: str) -> bytes:
+        """PDF mínimo válido para el adjunto"""
+        return (b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+                b"2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\n"
+                b"trailer<</Root 1 0 R>>\n%%EOF\n" + filename.encode('utf-8'))
+
+
+def _page(title: str, body: str) -> str:
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{escape(title)}</title></head>"
+            f"\n<body>{body}\n</body></html>")
+
+
+def create_app(portal: FakePortal) -> "FastAPI":
+    """Aplicación FastAPI que sirve el portal"""
+    if not FASTAPI_AVAILABLE:
+        raise RuntimeError("fastapi y uvicorn son necesarios para el portal simulado")
+
+    app = FastAPI(title="Portal simulado Mercurio / Oficina Virtual")
+
+    @app.middleware("http")
+    async def latency_and_errors(request: Request, call_next):
+        path = request.url.path
+        await asyncio.sleep(portal.next_delay(path))
+        if portal.should_fail(path):
+            portal.count(path, injected_errors=1)
+            return HTMLResponse(_page("Error", "<h1>500 - Error interno</h1>"), status_code=500)
+        return await call_next(request)
+
+    @app.get("/mercurio/index.jsp", response_class=HTMLResponse)
+    async def login_page(request: Request):
+        portal.count(request.url.path)
+        return portal.login_page()
+
+    @app.get("/mercurio/principal.jsp")
+    async def main_page(request: Request, txtUsuario: Optional[str] = None, txtClave: Optional[str] = None):
+        portal.count(request.url.path)
+        if txtUsuario is not None:
+            if (txtUsuario, txtClave) != (portal.config.username, portal.config.password):
+                return RedirectResponse("index.jsp?err=1", status_code=303)
+            portal.count(request.url.path, logins=1)
+            response = RedirectResponse("principal.jsp", status_code=303)
+            response.set_cookie("JSESSIONID", f"bench-{time.time_ns()}")
+            return response
+        if "JSESSIONID" not in request.cookies:
+            return RedirectResponse("index.jsp?err=", status_code=303)
+        return HTMLResponse(portal.main_page())
+
+    @app.get("/mercurio/consultas.jsp", response_class=HTMLResponse)
+    async def consultas(request: Request):
+        portal.count(request.url.path)
+        return portal.consultas_page()
+
+    @app.get("/mercurio/servlet/ControllerMercurio", response_class=HTMLResponse)
+    async def parameters(request: Request, idCnslta: str = "00000015"):
+        portal.count(request.url.path)
+        return portal.parameters_page(idCnslta)
+
+    @app.get("/mercurio/{section}/{report}.aspx", response_class=HTMLResponse)
+    async def report_section(request: Request, section: str, report: str):
+        portal.count(request.url.path)
+        id_consulta = "00000066" if "Verbal" in report else "00000015"
+        return portal.parameters_page(id_consulta)
+
+    @app.get("/mercurio/excel")
+    async def excel(request: Request, idCnslta: str = "00000015",
+                    param0: Optional[str] = None, param1: Optional[str] = None):
+        portal.count(request.url.path, excel_downloads=1)
+        await asyncio.sleep(portal.config.excel_rows * portal.config.excel_ms_per_row / 1000.0)
+        content, media_type, filename = portal.excel_report(idCnslta, param0, param1)
+        return Response(content, media_type=media_type,
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+    @app.get("/ov/{company}/pqr", response_class=HTMLResponse)
+    async def grid(request: Request, company: str, page: int = 1):
+        portal.count(request.url.path)
+        return portal.grid_page(company, page)
+
+    @app.get("/ov/{company}/detail/{record_id}", response_class=HTMLResponse)
+    async def detail(request: Request, company: str, record_id: int):
+        portal.count(request.url.path, detail_views=1)
+        return portal.detail_page(company, record_id)
+
+    @app.get("/ov/{company}/adjunto/{filename}")
+    async def attachment(request: Request, company: str, filename: str):
+        portal.count(request.url.path, attachments=1)
+        return Response(portal.attachment(filename), media_type="application/pdf",
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakePortalServer:
+    """
+    Portal simulado corriendo en un hilo de fondo
+
+    Uso:
+        with FakePortalServer(PortalConfig(records=50)) as server:
+            server.mercurio_url   # http://127.0.0.1:<puerto>/mercurio/
+            server.grid_url("afinia")
+    """
+
+    def __init__(self, config: Optional[PortalConfig] = None, host: str = "127.0.0.1",
+                 port: Optional[int] = None):
+        self.portal = FakePortal(config)
+        self.host = host
+        self.port = port or _free_port()
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def mercurio_url(self) -> str:
+        return f"{self.base_url}/mercurio/"
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.base_url}/mercurio/index.jsp?err="
+
+    def grid_url(self, company: str, page: int = 1) -> str:
+        return f"{self.base_url}/ov/{company}/pqr?page={page}"
+
+    def start(self, timeout: float = 15.0) -> 'FakePortalServer':
+        app = create_app(self.portal)
+        config = uvicorn.Config(app, host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="fake_portal", daemon=True)
+        self._thread.start()
+
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"El portal simulado no inició en {self.base_url}")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> 'FakePortalServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Portal simulado de Mercurio / Oficina Virtual')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--records', type=int, default=100, help='Registros PQR en la grilla')
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--excel-rows', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probabilidad de HTTP 500')
+    args = parser.parse_args()
+
+    config = PortalConfig(records=args.records, page_size=args.page_size, excel_rows=args.excel_rows,
+                          latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    server = FakePortalServer(config, port=args.port).start()
+    print(f"[EXITOSO] Portal simulado en {server.base_url}")
+    print(f"  Mercurio:        {server.login_url}")
+    print(f"  Oficina Virtual: {server.grid_url('afinia')}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"[DATOS] Peticiones atendidas: {server.portal.stats.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite de Benchmarks Offline
+===========================
+
+Levanta el portal simulado (fake_portal.py) y ejecuta contra él los
+extractores reales, midiendo:
+
+- Registros por minuto
+- Latencia por registro (p50/p95/máx); para los extractores de Mercurio la
+  unidad es el reporte Excel descargado
+- RSS del navegador (procesos Chromium hijos): pico y promedio
+
+Objetivos:
+  afinia_extractor      AfiniaExtractor (Mercurio, src/services)
+  aire_extractor        AireExtractor (Mercurio, src/services)
+  afinia_pqr_processor  AfiniaPQRProcessor (Oficina Virtual, Legacy_OV/components)
+  aire_pqr_processor    AirePQRProcessor (Oficina Virtual, Legacy_OV/components)
+
+Cada objetivo corre en un subproceso propio: los extractores de Mercurio y
+los procesadores de Oficina Virtual viven en paquetes distintos que se
+importan como `src`, y así el RSS medido es solo el del navegador de ese
+objetivo.
+
+Uso:
+  python tests/benchmarks/run_benchmarks.py
+  python tests/benchmarks/run_benchmarks.py --targets afinia_pqr_processor --records 60 --pages 3
+  python tests/benchmarks/run_benchmarks.py --latency-ms 400 --error-rate 0.05 --output data/benchmarks/lento.json
+
+Autor: ISES | Analyst Data Jeam Paul Arcon Solano
+Fecha: Octubre 2025
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import importlib
+import importlib.util
+import subprocess
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+BENCH_DIR = Path(__file__).resolve().parent
+project_root = BENCH_DIR.parent.parent
+LEGACY_OV_ROOT = project_root / "legacy" / "Legacy_OV"
+
+sys.path.insert(0, str(BENCH_DIR))
+
+from fake_portal import FASTAPI_AVAILABLE, FakePortalServer, PortalConfig
+
+RESULT_MARKER = "BENCHMARK_RESULT "
+BROWSER_PROCESS_NAMES = ("chrom", "headless_shell")
+
+TARGETS = ["afinia_extractor", "aire_extractor", "afinia_pqr_processor", "aire_pqr_processor"]
+
+
+@dataclass
+class BenchmarkResult:
+    """Resultado de un objetivo"""
+    target: str
+    status: str = "ok"                       # ok | error | omitido
+    records: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    records_per_min: float = 0.0
+    latency_unit: str = "registro"
+    latency: Dict[str, float] = field(default_factory=dict)
+    browser_rss_mb: Dict[str, float] = field(default_factory=dict)
+    note: str = ""
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    """Percentiles por rango más cercano (las muestras de un benchmark son pocas)"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def rank(percent: float) -> float:
+        index = max(0, -(-len(ordered) * percent // 100) - 1)
+        return ordered[int(index)]
+
+    return {
+        'count': len(ordered),
+        'avg_s': round(sum(ordered) / len(ordered), 3),
+        'p50_s': round(rank(50), 3),
+        'p95_s': round(rank(95), 3),
+        'max_s': round(ordered[-1], 3)
+    }
+
+
+class BrowserRSSSampler:
+    """Muestrea en segundo plano el RSS de los procesos de navegador hijos"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _browser_rss(self) -> float:
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                if any(name in child.name().lower() for name in BROWSER_PROCESS_NAMES):
+                    total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = self._browser_rss()
+            if rss:
+                self.samples.append(rss)
+
+    def start(self) -> 'BrowserRSSSampler':
+        if PSUTIL_AVAILABLE:
+            self._thread = threading.Thread(target=self._run, name="rss_sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, float]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if not self.samples:
+            return {} if PSUTIL_AVAILABLE else {'note': 'psutil no disponible'}
+        return {
+            'peak_mb': round(max(self.samples), 1),
+            'avg_mb': round(sum(self.samples) / len(self.samples), 1),
+            'samples': len(self.samples)
+        }
+
+
+# ----------------------------------------------------------------------
+# Objetivos (se ejecutan en el subproceso)
+# ----------------------------------------------------------------------
+
+def _rewrite_url(url: str, portal_url: str) -> str:
+    """Conservar ruta y query de una URL real pero apuntarla al portal simulado"""
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{portal_url.rstrip('/')}{parts.path}{query}"
+
+
+def _count_report_rows(file_path: str) -> int:
+    """Filas de datos de un reporte descargado (xlsx o csv)"""
+    path = Path(file_path)
+    if not path.exists():
+        return 0
+    if path.suffix.lower() == ".xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        return max(0, workbook.active.max_row - 1)
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def bench_mercurio_extractor(company: str, portal_url: str, work_dir: Path) -> BenchmarkResult:
+    """AfiniaExtractor / AireExtractor contra el Mercurio simulado"""
+    sys.path.insert(0, str(project_root))
+    for prefix in (f"MERCURIO_{company.upper()}", company.upper()):
+        os.environ[f"{prefix}_USERNAME"] = "bench"
+        os.environ[f"{prefix}_PASSWORD"] = "bench"
+
+    module = importlib.import_module(f"src.services.{company}_extractor")
+    extractor_class = getattr(module, f"{company.capitalize()}Extractor")
+    extractor = extractor_class(download_dir=str(work_dir / "mercurio"))
+
+    extractor.urls = {key: _rewrite_url(url, portal_url) for key, url in extractor.urls.items()}
+    extractor.urls["base"] = f"{portal_url.rstrip('/')}/mercurio"
+
+    report_times: List[float] = []
+    report_rows: List[int] = []
+    original_setup = extractor.setup_browser
+
+    def setup_browser() -> bool:
+        ok = original_setup()
+        if ok and extractor.mercurio_adapter is not None:
+            adapter = extractor.mercurio_adapter
+            adapter.config["url"] = extractor.urls["base"]
+            auth_config = getattr(adapter.auth_manager, "config", None)
+            if isinstance(auth_config, dict):
+                auth_config["login_url"] = extractor.urls["login"]
+            original_download = adapter.download_report
+
+            def timed_download(*args, **kwargs):
+                started = time.perf_counter()
+                file_path = original_download(*args, **kwargs)
+                report_times.append(time.perf_counter() - started)
+                report_rows.append(_count_report_rows(file_path) if file_path else 0)
+                return file_path
+
+            adapter.download_report = timed_download
+        return ok
+
+    extractor.setup_browser = setup_browser
+
+    sampler = BrowserRSSSampler().start()
+    started = time.perf_counter()
+    try:
+        outcome = extractor.run_extraction()
+    finally:
+        elapsed = time.perf_counter() - started
+        rss = sampler.stop()
+        extractor.cleanup()
+
+    records = sum(report_rows)
+    return BenchmarkResult(
+        target=f"{company}_extractor",
+        status="ok" if outcome.get("success") else "error",
+        records=records,
+        failed=sum(1 for rows in report_rows if not rows),
+        elapsed_s=round(elapsed, 2),
+        records_per_min=round(records / elapsed * 60, 1) if elapsed else 0.0,
+        latency_unit="reporte",
+        latency=latency_stats(report_times),
+        browser_rss_mb=rss,
+        note=outcome.get("error", "")
+    )
+
+
+def import_legacy_ov_as_src(legacy_root: Path):
+    """Registrar Legacy_OV como el paquete `src`, igual que en el despliegue"""
+    spec = importlib.util.spec_from_file_location(
+        "src", legacy_root / "__init__.py", submodule_search_locations=[str(legacy_root)])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["src"] = package
+    spec.loader.exec_module(package)
+
+
+async def _run_pqr_processor(company: str, portal: Dict[str, Any], work_dir: Path,
+                             pages: int, max_records: Optional[int]) -> Dict[str, Any]:
+    from playwright.async_api import async_playwright
+
+    module = importlib.import_module(f"src.components.{company}_pqr_processor")
+    processor_class = getattr(module, f"{company.capitalize()}PQRProcessor")
+    successful = 0
+    attempted = 0
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        context = await browser.new_context(accept_downloads=True)
+        page = await context.new_page()
+        try:
+            for page_number in range(1, pages + 1):
+                await page.goto(f"{portal['base_url']}/ov/{company}/pqr?page={page_number}",
+                                wait_until="networkidle")
+                processor = processor_class(page, str(work_dir / "oficina_virtual"),
+                                            str(work_dir / "screenshots"))
+                rows = await page.locator('a.md-primary[tooltip="Ver PQR"]').count()
+                attempted += min(rows, max_records) if max_records else rows
+                successful += await processor.process_all_pqr_records(max_records=max_records)
+        finally:
+            await browser.close()
+
+    return {'successful': successful, 'attempted': attempted}
+
+
+def bench_pqr_processor(company: str, portal_url: str, work_dir: Path, pages: int,
+                        max_records: Optional[int], legacy_root: Path) -> BenchmarkResult:
+    """AfiniaPQRProcessor / AirePQRProcessor contra la Oficina Virtual simulada"""
+    os.environ["TRACE_EXPORT"] = "memory"
+    import_legacy_ov_as_src(legacy_root)
+    from src.utils.tracing import get_tracer
+
+    sampler = BrowserRSSSampler().start()
+    started = time.perf_counter()
+    try:
+        counts = asyncio.run(_run_pqr_processor(company, {'base_url': portal_url.rstrip('/')},
+                                                work_dir, pages, max_records))
+    finally:
+        elapsed = time.perf_counter() - started
+        rss = sampler.stop()
+
+    # Cada registro queda medido por el span raíz "pqr_record" del procesador
+    spans = [span for exporter in get_tracer().exporters if hasattr(exporter, "get_spans")
+             for span in exporter.get_spans() if span['name'] == 'pqr_record']
+    durations = [(span['end_ns'] - span['start_ns']) / 1e9 for span in spans]
+
+    return BenchmarkResult(
+        target=f"{company}_pqr_processor",
+        records=counts['successful'],
+        failed=counts['attempted'] - counts['successful'],
+        elapsed_s=round(elapsed, 2),
+        records_per_min=round(counts['successful'] / elapsed * 60, 1) if elapsed else 0.0,
+        latency=latency_stats(durations),
+        browser_rss_mb=rss
+    )
+
+
+def run_target(target: str, args) -> BenchmarkResult:
+    company = target.split("_")[0]
+    work_dir = Path(args.work_dir) / target
+    work_dir.mkdir(parents=True, exist_ok=True)
+    if target.endswith("_extractor"):
+        return bench_mercurio_extractor(company, args.portal_url, work_dir)
+    return bench_pqr_processor(company, args.portal_url, work_dir, args.pages,
+                               args.max_records, Path(args.legacy_root))
+
+
+# ----------------------------------------------------------------------
+# Orquestación (proceso principal)
+# ----------------------------------------------------------------------
+
+def _spawn_target(target: str, portal_url: str, work_dir: str, args) -> BenchmarkResult:
+    command = [sys.executable, str(Path(__file__).resolve()), "--run-target", target,
+               "--portal-url", portal_url, "--work-dir", work_dir,
+               "--pages", str(args.pages), "--legacy-root", args.legacy_root]
+    if args.max_records:
+        command += ["--max-records", str(args.max_records)]
+
+    completed = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return BenchmarkResult(**json.loads(line[len(RESULT_MARKER):]))
+
+    tail = (completed.stderr or completed.stdout).strip().splitlines()[-3:]
+    return BenchmarkResult(target=target, status="error",
+                           note=" | ".join(tail) or f"código de salida {completed.returncode}")
+
+
+def _print_result(result: BenchmarkResult):
+    if result.status == "omitido" or (result.status == "error" and not result.records):
+        print(f"[ERROR] {result.target}: {result.status} - {result.note}")
+        return
+    latency = result.latency
+    rss = result.browser_rss_mb
+    print(f"[DATOS] {result.target}: {result.records} registros en {result.elapsed_s:.1f}s "
+          f"({result.records_per_min:.1f}/min, fallidos {result.failed})")
+    if latency.get('count'):
+        print(f"    latencia por {result.latency_unit}: p50 {latency['p50_s']:.2f}s, "
+              f"p95 {latency['p95_s']:.2f}s, máx {latency['max_s']:.2f}s")
+    if rss.get('peak_mb'):
+        print(f"    RSS navegador: pico {rss['peak_mb']:.0f} MB, promedio {rss['avg_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks offline contra el portal simulado')
+    parser.add_argument('--targets', nargs='*', choices=TARGETS, default=TARGETS)
+    parser.add_argument('--records', type=int, default=30, help='Registros PQR en la grilla simulada')
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=1, help='Páginas de la grilla a procesar')
+    parser.add_argument('--max-records', type=int, default=None, help='Registros por página')
+    parser.add_argument('--excel-rows', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probabilidad de HTTP 500')
+    parser.add_argument('--timeout', type=int, default=1800, help='Segundos máximos por objetivo')
+    parser.add_argument('--legacy-root', default=str(LEGACY_OV_ROOT),
+                        help='Directorio de Legacy_OV (se importa como src)')
+    parser.add_argument('--work-dir', default=None, help='Directorio para descargas del benchmark')
+    parser.add_argument('--output', '-o', type=str, help='Archivo JSON para el reporte')
+    # Modo interno: ejecutar un objetivo dentro del subproceso
+    parser.add_argument('--run-target', choices=TARGETS, help=argparse.SUPPRESS)
+    parser.add_argument('--portal-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_target:
+        try:
+            result = run_target(args.run_target, args)
+        except ImportError as e:
+            result = BenchmarkResult(target=args.run_target, status="omitido", note=f"dependencia faltante: {e}")
+        except Exception as e:
+            result = BenchmarkResult(target=args.run_target, status="error", note=f"{type(e).__name__}: {e}")
+        print(RESULT_MARKER + json.dumps(asdict(result), ensure_ascii=False))
+        return 0
+
+    if not FASTAPI_AVAILABLE:
+        print("[ERROR] fastapi y uvicorn son necesarios para el portal simulado (ver requirements.txt)")
+        return 1
+
+    config = PortalConfig(records=args.records, page_size=args.page_size, excel_rows=args.excel_rows,
+                          latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bench_extractores_")
+
+    results: List[BenchmarkResult] = []
+    with FakePortalServer(config) as server:
+        print(f"[DATOS] Portal simulado en {server.base_url} (latencia {config.latency_ms:.0f}ms "
+              f"+{config.jitter_ms:.0f}ms, errores {config.error_rate:.0%})")
+        for target in args.targets:
+            print(f"[DATOS] Ejecutando {target}...")
+            result = _spawn_target(target, server.base_url, work_dir, args)
+            _print_result(result)
+            results.append(result)
+        portal_stats = asdict(server.portal.stats)
+
+    report = {
+        'portal': asdict(config),
+        'portal_stats': portal_stats,
+        'work_dir': work_dir,
+        'results': [asdict(result) for result in results]
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if any(result.status != "ok" for result in results):
+        print("[ERROR] Algunos objetivos no completaron el benchmark")
+        return 1
+    print("[EXITOSO] Benchmarks completados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para date_window_sharding.py
+Valida el tamaño de las ventanas de fechas y la deduplicación por SGC
+"""
+
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+MODULE_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..',
+    'legacy', 'Legacy_OV', 'orchestrators', 'date_window_sharding.py'))
+
+# Carga directa del módulo: el paquete orchestrators importa servicios con dependencias externas
+_spec = importlib.util.spec_from_file_location('date_window_sharding', MODULE_PATH)
+date_window_sharding = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(date_window_sharding)
+
+DateWindow = date_window_sharding.DateWindow
+RecordDensityModel = date_window_sharding.RecordDensityModel
+merge_and_dedupe = date_window_sharding.merge_and_dedupe
+plan_date_windows = date_window_sharding.plan_date_windows
+
+
+class TestPlanDateWindows(unittest.TestCase):
+    """Pruebas del particionado por densidad de registros"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.density = RecordDensityModel(path=os.path.join(self.tmp.name, 'density.json'))
+        self.density.data = {'afinia': {'2025-01': 1000.0, '2025-02': 10.0}}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_contiguous(self, windows, start, end):
+        self.assertEqual(windows[0].start, start)
+        self.assertEqual(windows[-1].end, end)
+        for previous, current in zip(windows, windows[1:]):
+            self.assertEqual(current.start, previous.end + timedelta(days=1))
+
+    def test_ventanas_contiguas_y_completas(self):
+        start, end = date(2025, 1, 1), date(2025, 2, 28)
+        windows = plan_date_windows('afinia', start, end, self.density, target_records=2000)
+
+        self.assert_contiguous(windows, start, end)
+        self.assertEqual(sum(w.days for w in windows), (end - start).days + 1)
+
+    def test_meses_densos_generan_ventanas_cortas(self):
+        windows = plan_date_windows('afinia', date(2025, 1, 1), date(2025, 2, 28), self.density,
+                                    target_records=2000, max_days=31)
+
+        # 1000 registros/día en enero: ventanas de 2 días (1-30 de enero)
+        dense = windows[:-1]
+        self.assertEqual(len(dense), 15)
+        self.assertTrue(all(w.days == 2 for w in dense))
+        self.assertTrue(all(w.expected_records >= 2000 for w in dense))
+        # 10 registros/día en febrero: la última ventana crece hasta el final del rango
+        self.assertEqual((windows[-1].start, windows[-1].end), (date(2025, 1, 31), date(2025, 2, 28)))
+        self.assertLessEqual(windows[-1].days, 31)
+
+    def test_respeta_maximo_de_dias(self):
+        windows = plan_date_windows('afinia', date(2025, 2, 1), date(2025, 2, 28), self.density,
+                                    target_records=10 ** 6, max_days=7)
+
+        self.assertEqual([w.days for w in windows], [7, 7, 7, 7])
+
+    def test_respeta_minimo_de_dias(self):
+        start, end = date(2025, 1, 1), date(2025, 1, 20)
+        windows = plan_date_windows('afinia', start, end, self.density,
+                                    target_records=1, min_days=3, max_days=31)
+
+        self.assert_contiguous(windows, start, end)
+        # Solo la última ventana puede quedar recortada por el fin del rango
+        self.assertTrue(all(w.days == 3 for w in windows[:-1]))
+        self.assertLessEqual(windows[-1].days, 3)
+
+    def test_empresa_sin_observaciones_usa_densidad_por_defecto(self):
+        windows = plan_date_windows('aire', date(2025, 3, 1), date(2025, 3, 10), self.density,
+                                    target_records=self.density.default_per_day * 5)
+
+        self.assertEqual([w.days for w in windows], [5, 5])
+
+    def test_rango_de_un_dia(self):
+        windows = plan_date_windows('afinia', date(2025, 1, 15), date(2025, 1, 15), self.density)
+
+        self.assertEqual(len(windows), 1)
+        self.assertEqual(windows[0].days, 1)
+
+
+class TestMergeAndDedupe(unittest.TestCase):
+    """Pruebas de la fusión de ventanas deduplicando por SGC"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_json(self, window, name, data):
+        path = self.root / window / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data), encoding='utf-8')
+        return str(path)
+
+    def test_conserva_el_registro_mas_reciente_por_sgc(self):
+        files = [
+            self.write_json('w1', '111_data_a.json', {'sgc_number': '111', 'extraction_timestamp': '2025-10-01T10:00:00'}),
+            self.write_json('w2', '111_data_b.json', {'sgc_number': '111', 'extraction_timestamp': '2025-10-03T10:00:00'}),
+            self.write_json('w3', '111_data_c.json', {'sgc_number': '111', 'extraction_timestamp': '2025-10-02T10:00:00'}),
+            self.write_json('w1', '222_data_a.json', {'numero_reclamo_sgc': '222', 'extraction_timestamp': '2025-10-01T10:00:00'}),
+        ]
+        merged_dir = self.root / 'merged'
+
+        summary = merge_and_dedupe(files, merged_dir)
+
+        self.assertEqual(summary['unique_records'], 2)
+        self.assertEqual(summary['duplicates_removed'], 2)
+        self.assertEqual(sorted(p.name for p in merged_dir.glob('*_data_*.json')),
+                         ['111_data_b.json', '222_data_a.json'])
+        manifest = json.loads((merged_dir / 'manifest.json').read_text(encoding='utf-8'))
+        self.assertEqual(manifest['input_files'], 4)
+
+    def test_registros_sin_sgc_no_se_fusionan_entre_si(self):
+        files = [
+            self.write_json('w1', 'x_data_1.json', {'sgc_number': 'sin_sgc'}),
+            self.write_json('w2', 'y_data_2.json', {'sgc_number': None}),
+        ]
+
+        summary = merge_and_dedupe(files, self.root / 'merged')
+
+        self.assertEqual(summary['unique_records'], 2)
+        self.assertEqual(summary['duplicates_removed'], 0)
+
+    def test_archivos_ilegibles_se_cuentan_aparte(self):
+        broken = self.root / 'w1' / 'roto_data_1.json'
+        broken.parent.mkdir(parents=True)
+        broken.write_text('{no es json', encoding='utf-8')
+        files = [
+            str(broken),
+            self.write_json('w1', '333_data_1.json', {'sgc_number': '333'}),
+        ]
+
+        summary = merge_and_dedupe(files, self.root / 'merged')
+
+        self.assertEqual(summary['unreadable'], 1)
+        self.assertEqual(summary['unique_records'], 1)
+        self.assertEqual(summary['duplicates_removed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
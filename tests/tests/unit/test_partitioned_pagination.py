@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para WorkStealingPageScheduler (partitioned_pagination.py)
+Valida que los rangos de páginas sigan disjuntos y completos tras robos y retiros
+"""
+
+import importlib.util
+import os
+import random
+import unittest
+
+MODULE_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..',
+    'legacy', 'Legacy_OV', 'components', 'partitioned_pagination.py'))
+
+# Carga directa del módulo: el paquete components importa Playwright
+_spec = importlib.util.spec_from_file_location('partitioned_pagination', MODULE_PATH)
+partitioned_pagination = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(partitioned_pagination)
+
+WorkStealingPageScheduler = partitioned_pagination.WorkStealingPageScheduler
+
+
+def pending_in_ranges(scheduler):
+    """Páginas pendientes aún asignadas, por rango (vivos y huérfanos)"""
+    ranges = list(scheduler.ranges.values()) + list(scheduler.orphans)
+    return [
+        {p for p in range(r.next_page, r.end_page) if p in scheduler._pending_set}
+        for r in ranges
+    ]
+
+
+class TestWorkStealingPageScheduler(unittest.TestCase):
+    """Pruebas del repartidor de páginas con robo de trabajo"""
+
+    def assert_disjoint_and_complete(self, scheduler, pending, dispatched):
+        assigned = pending_in_ranges(scheduler)
+        union = set()
+        for pages in assigned:
+            self.assertFalse(union & pages, "Rangos con páginas solapadas")
+            union |= pages
+        self.assertFalse(union & dispatched, "Página asignada y ya entregada")
+        self.assertEqual(union | dispatched, set(pending), "Páginas pendientes sin asignar")
+
+    def test_reparto_inicial_cubre_todas_las_paginas(self):
+        pending = [p for p in range(1, 101) if p % 7]
+        scheduler = WorkStealingPageScheduler(pending, workers=4)
+
+        self.assertEqual(len(scheduler.ranges), 4)
+        self.assertEqual(scheduler.remaining(), 100)
+        self.assert_disjoint_and_complete(scheduler, pending, set())
+
+    def test_paginas_completadas_no_se_entregan(self):
+        pending = [2, 3, 5, 8, 13]
+        scheduler = WorkStealingPageScheduler(pending, workers=2)
+
+        served = []
+        for worker_id in (0, 1) * 10:
+            page = scheduler.next_page(worker_id)
+            if page is not None:
+                served.append(page)
+
+        self.assertEqual(sorted(served), pending)
+
+    def test_robo_toma_la_mitad_final_del_rango_mas_grande(self):
+        scheduler = WorkStealingPageScheduler(list(range(1, 21)), workers=2, min_steal=2)
+        # El worker 1 agota su rango (11-20)
+        for _ in range(10):
+            self.assertIsNotNone(scheduler.next_page(1))
+
+        stolen = scheduler.next_page(1)
+
+        self.assertEqual(stolen, 6)
+        self.assertEqual(scheduler.ranges[0].end_page, 6)
+        self.assert_disjoint_and_complete(scheduler, range(1, 21), set(range(11, 21)) | {6})
+
+    def test_sin_robo_por_debajo_del_minimo(self):
+        scheduler = WorkStealingPageScheduler([1, 2, 3], workers=2, min_steal=2)
+        for _ in range(2):
+            scheduler.next_page(0)
+
+        self.assertEqual(scheduler.next_page(0), None)
+        self.assertEqual(scheduler.next_page(1), 3)
+
+    def test_retiro_devuelve_pagina_sin_terminar(self):
+        scheduler = WorkStealingPageScheduler(list(range(1, 11)), workers=2)
+        failed_page = scheduler.next_page(0)
+
+        scheduler.retire(0, unfinished_page=failed_page)
+
+        self.assertNotIn(0, scheduler.ranges)
+        self.assertEqual(len(scheduler.orphans), 1)
+        # Un worker sin trabajo adopta primero el rango huérfano
+        for _ in range(5):
+            scheduler.next_page(1)
+        self.assertEqual(scheduler.next_page(1), failed_page)
+
+    def test_simulacion_con_robos_y_retiros(self):
+        """Intercalado aleatorio: cada página pendiente se completa exactamente una vez"""
+        for seed in range(25):
+            rng = random.Random(seed)
+            pending = sorted(rng.sample(range(1, 400), 250))
+            workers = rng.randint(1, 6)
+            scheduler = WorkStealingPageScheduler(pending, workers=workers, min_steal=rng.randint(1, 4))
+            active = list(range(workers))
+            completed = []
+            dispatched = set()
+
+            while active:
+                worker_id = rng.choice(active)
+                page = scheduler.next_page(worker_id)
+                if page is None:
+                    active.remove(worker_id)
+                    continue
+                dispatched.add(page)
+
+                # Algunos workers fallan: la página vuelve al reparto
+                if len(active) > 1 and rng.random() < 0.03:
+                    scheduler.retire(worker_id, unfinished_page=page)
+                    dispatched.discard(page)
+                    active.remove(worker_id)
+                else:
+                    completed.append(page)
+                self.assert_disjoint_and_complete(scheduler, pending, dispatched)
+
+            with self.subTest(seed=seed):
+                self.assertEqual(sorted(completed), pending)
+                self.assertEqual(scheduler.remaining(), 0)
+
+    def test_sin_paginas_pendientes(self):
+        scheduler = WorkStealingPageScheduler([], workers=3)
+
+        self.assertIsNone(scheduler.next_page(0))
+        self.assertEqual(scheduler.remaining(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)